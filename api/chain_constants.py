@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+# Rent-exempt minimums only change with a feature activation, which lands on
+# an epoch boundary (~2 days on mainnet).
+DEFAULT_CONSTANT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_EPOCH_INFO_TTL_SECONDS = 10 * 60
+
+
+class ChainConstantsCache:
+    """
+    Per-RPC cache for slow-moving chain values (rent-exempt minimums per
+    account size). An entry is reused until its TTL runs out or the cached
+    epoch info shows a new epoch. When a refresh fails, the previous value is
+    served as stale; callers only see None on a cold start.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = DEFAULT_CONSTANT_TTL_SECONDS,
+        epoch_info_ttl_seconds: float = DEFAULT_EPOCH_INFO_TTL_SECONDS,
+    ):
+        self.ttl_seconds = float(ttl_seconds)
+        self.epoch_info_ttl_seconds = float(epoch_info_ttl_seconds)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, dict] = {}
+        self._epoch_info: dict[str, dict] = {}
+
+    def epoch_info(self, rpc_url: str, fetch: Callable[[], dict | None] | None = None) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._epoch_info.get(rpc_url)
+            if entry and now - entry["fetched_at"] < self.epoch_info_ttl_seconds:
+                return dict(entry["value"])
+        if fetch is None:
+            return dict(entry["value"]) if entry else None
+        value = fetch()
+        if isinstance(value, dict) and value.get("epoch") is not None:
+            with self._lock:
+                self._epoch_info[rpc_url] = {"fetched_at": time.monotonic(), "value": dict(value)}
+            return dict(value)
+        return dict(entry["value"]) if entry else None
+
+    def _current_epoch(self, rpc_url: str, epoch_fetch: Callable[[], dict | None] | None) -> int | None:
+        info = self.epoch_info(rpc_url, epoch_fetch)
+        return info.get("epoch") if info else None
+
+    def get(
+        self,
+        rpc_url: str,
+        name: Any,
+        fetch: Callable[[], Any],
+        *,
+        epoch_fetch: Callable[[], dict | None] | None = None,
+    ) -> tuple[Any, str | None]:
+        """
+        Returns (value, status) where status is "cached", "fetched", "stale",
+        or None when nothing is known yet and the fetch failed.
+        """
+        key = (rpc_url, name)
+        with self._lock:
+            entry = dict(self._values[key]) if key in self._values else None
+
+        current_epoch = self._current_epoch(rpc_url, epoch_fetch) if entry else None
+        if entry:
+            fresh = time.monotonic() - entry["fetched_at"] < self.ttl_seconds
+            same_epoch = current_epoch is None or entry["epoch"] is None or entry["epoch"] == current_epoch
+            if fresh and same_epoch:
+                if entry["epoch"] is None and current_epoch is not None:
+                    with self._lock:
+                        if key in self._values:
+                            self._values[key]["epoch"] = current_epoch
+                return entry["value"], "cached"
+
+        value = fetch()
+        if value is not None:
+            if current_epoch is None:
+                current_epoch = self._current_epoch(rpc_url, epoch_fetch)
+            with self._lock:
+                self._values[key] = {"fetched_at": time.monotonic(), "epoch": current_epoch, "value": value}
+            return value, "fetched"
+        if entry:
+            return entry["value"], "stale"
+        return None, None
+
+    def invalidate(self, rpc_url: str | None = None) -> None:
+        with self._lock:
+            if rpc_url is None:
+                self._values.clear()
+                self._epoch_info.clear()
+                return
+            self._values = {key: item for key, item in self._values.items() if key[0] != rpc_url}
+            self._epoch_info.pop(rpc_url, None)
+
+
+_CACHE = ChainConstantsCache()
+
+
+def get_chain_constants_cache() -> ChainConstantsCache:
+    return _CACHE
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable
+
+from providers.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+CHAIN_HEAD_TRACKER_ENV = "CHAIN_HEAD_TRACKER"
+CHAIN_HEAD_REFRESH_SECONDS_ENV = "CHAIN_HEAD_REFRESH_SECONDS"
+DEFAULT_REFRESH_SECONDS = 2.0
+# A blockhash is accepted for ~150 slots (~60s). Fee estimates only need a
+# recognized hash; transactions handed to a wallet need most of the window left.
+DEFAULT_MAX_AGE_SECONDS = 30.0
+PREPARE_MAX_AGE_SECONDS = 10.0
+# Stop refreshing an RPC URL nobody has read from for this long.
+DEFAULT_IDLE_SECONDS = 120.0
+
+HeadFetcher = Callable[[str], "dict | None"]
+
+
+def chain_head_tracker_enabled() -> bool:
+    return (os.getenv(CHAIN_HEAD_TRACKER_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def configured_refresh_seconds() -> float:
+    raw = (os.getenv(CHAIN_HEAD_REFRESH_SECONDS_ENV) or "").strip()
+    try:
+        return max(0.2, float(raw)) if raw else DEFAULT_REFRESH_SECONDS
+    except ValueError:
+        return DEFAULT_REFRESH_SECONDS
+
+
+class ChainHeadTracker:
+    """
+    Latest blockhash, lastValidBlockHeight and slot per RPC URL.
+
+    head() is a read-through cache: it returns the cached head while it is
+    younger than max_age_seconds and fetches otherwise. With background
+    refresh on (CHAIN_HEAD_TRACKER=1), a daemon thread re-fetches every URL
+    read in the last idle_seconds on a fixed cadence, so readers normally
+    never wait on getLatestBlockhash. peek() never fetches.
+    """
+
+    def __init__(
+        self,
+        fetch_head: HeadFetcher,
+        *,
+        refresh_seconds: float | None = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        background: bool | None = None,
+    ):
+        self.fetch_head = fetch_head
+        self.refresh_seconds = configured_refresh_seconds() if refresh_seconds is None else float(refresh_seconds)
+        self.idle_seconds = float(idle_seconds)
+        self.background = chain_head_tracker_enabled() if background is None else bool(background)
+        self._lock = threading.Lock()
+        self._heads: dict[str, dict] = {}
+        self._last_read: dict[str, float] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    @staticmethod
+    def _snapshot(entry: dict, now: float) -> dict:
+        return {
+            "blockhash": entry["blockhash"],
+            "last_valid_block_height": entry["last_valid_block_height"],
+            "slot": entry["slot"],
+            "blockhash_age_ms": round((now - entry["fetched_at"]) * 1000, 1),
+        }
+
+    def _store(self, rpc_url: str, head: dict | None) -> dict | None:
+        if not isinstance(head, dict) or not head.get("blockhash"):
+            with self._lock:
+                self.failures += 1
+            return None
+        entry = {
+            "blockhash": head["blockhash"],
+            "last_valid_block_height": head.get("last_valid_block_height"),
+            "slot": head.get("slot"),
+            "fetched_at": time.monotonic(),
+        }
+        with self._lock:
+            self._heads[rpc_url] = entry
+        return entry
+
+    def refresh(self, rpc_url: str) -> dict | None:
+        try:
+            head = self.fetch_head(rpc_url)
+        except Exception:
+            head = None
+        with self._lock:
+            self.refreshes += 1
+        entry = self._store(rpc_url, head)
+        return self._snapshot(entry, time.monotonic()) if entry else None
+
+    def peek(self, rpc_url: str, *, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_read[rpc_url] = now
+            if self.background:
+                self._ensure_thread_locked()
+            entry = self._heads.get(rpc_url)
+            if entry and now - entry["fetched_at"] <= max_age_seconds:
+                self.hits += 1
+                return self._snapshot(entry, now)
+        return None
+
+    def head(self, rpc_url: str, *, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> dict | None:
+        cached = self.peek(rpc_url, max_age_seconds=max_age_seconds)
+        if cached:
+            return cached
+        with self._lock:
+            self.misses += 1
+        return self.refresh(rpc_url)
+
+    def invalidate(self, rpc_url: str) -> None:
+        with self._lock:
+            self._heads.pop(rpc_url, None)
+
+    def _ensure_thread_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="chain-head-tracker", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                for rpc_url, read_at in list(self._last_read.items()):
+                    if now - read_at > self.idle_seconds:
+                        self._last_read.pop(rpc_url, None)
+                        self._heads.pop(rpc_url, None)
+                active = list(self._last_read)
+                if not active:
+                    self._thread = None
+                    return
+            with upstream_priority(PRIORITY_BACKGROUND):
+                for rpc_url in active:
+                    self.refresh(rpc_url)
+            self._stop.wait(self.refresh_seconds)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "background": self.background,
+                "tracked": len(self._heads),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+            }
+
+
+_TRACKER: ChainHeadTracker | None = None
+_TRACKER_LOCK = threading.Lock()
+
+
+def get_chain_head_tracker(fetch_head: HeadFetcher) -> ChainHeadTracker:
+    global _TRACKER
+    with _TRACKER_LOCK:
+        if _TRACKER is None:
+            _TRACKER = ChainHeadTracker(fetch_head)
+        return _TRACKER
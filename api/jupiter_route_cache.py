@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+JUPITER_SPECULATIVE_EXCLUDE_ENV = "JUPITER_SPECULATIVE_EXCLUDE"
+DEFAULT_ROUTE_LABEL_TTL_SECONDS = 300
+DEFAULT_ROUTE_LABEL_MAX_ENTRIES = 4096
+DEFAULT_SPECULATION_WORKERS = 8
+
+
+def speculative_exclude_enabled() -> bool:
+    raw = (os.getenv(JUPITER_SPECULATIVE_EXCLUDE_ENV) or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def amount_bucket(amount_raw: int) -> int:
+    """Power-of-two bucket of the raw input amount (route mix shifts with size, not with the last digits)."""
+    try:
+        return max(0, int(amount_raw)).bit_length()
+    except (TypeError, ValueError):
+        return 0
+
+
+def same_route_labels(left: list[str] | None, right: list[str] | None) -> bool:
+    return bool(left) and bool(right) and sorted(set(left)) == sorted(set(right))
+
+
+class RouteLabelCache:
+    """
+    Last-seen Jupiter route labels per (input mint, output mint, amount bucket).
+    Bounded LRU with a TTL; entries are only a guess for the next quote, so a
+    stale or evicted entry just costs one serial exclude-dexes call.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = DEFAULT_ROUTE_LABEL_TTL_SECONDS,
+        max_entries: int = DEFAULT_ROUTE_LABEL_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, list[str]]] = OrderedDict()
+
+    @staticmethod
+    def _key(input_mint: str, output_mint: str, amount_raw: int) -> tuple:
+        return (input_mint, output_mint, amount_bucket(amount_raw))
+
+    def get(self, input_mint: str, output_mint: str, amount_raw: int) -> list[str] | None:
+        key = self._key(input_mint, output_mint, amount_raw)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, labels = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return list(labels)
+
+    def put(self, input_mint: str, output_mint: str, amount_raw: int, labels: list[str] | None) -> None:
+        if not labels:
+            return
+        key = self._key(input_mint, output_mint, amount_raw)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), list(labels))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_ROUTE_LABEL_CACHE = RouteLabelCache()
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_route_label_cache() -> RouteLabelCache:
+    return _ROUTE_LABEL_CACHE
+
+
+def submit_speculative_probe(fn, *args, **kwargs) -> Future:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=DEFAULT_SPECULATION_WORKERS,
+                thread_name_prefix="jupiter-speculative",
+            )
+        executor = _EXECUTOR
+    # copy_context keeps the caller's upstream priority in the worker thread.
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -1,7 +1,44 @@
 from __future__ import annotations
 from fastapi.responses import HTMLResponse
-
-from .ui_page import build_ui_html
+
+from .quote_observations import (
+    build_quote_observation_rows,
+    ensure_quote_observation_schema,
+    get_quote_observation_writer,
+    record_quote_observations,
+)
+from .chain_constants import get_chain_constants_cache
+from .chain_head import PREPARE_MAX_AGE_SECONDS, get_chain_head_tracker
+from .jupiter_route_cache import (
+    get_route_label_cache,
+    same_route_labels,
+    speculative_exclude_enabled,
+    submit_speculative_probe,
+)
+from .network_fee import get_network_fee_service
+from .profiler import get_sampling_profiler, profiler_control_enabled
+from .provider_urls import (
+    coingecko_api_base_url,
+    jupiter_price_api_url,
+    jupiter_swap_api_base_url,
+    node_helper_url,
+    raydium_trade_api_base_url,
+    solana_mainnet_rpc_url,
+)
+from .quote_providers import QuoteProvider, QuoteProviderRegistry, QuoteRequest
+from .quote_scheduler import plan_quote_schedule
+from .signature_watcher import AsyncSubscriber, get_signature_watcher, signature_watcher_enabled
+from .solana_pda import derive_associated_token_account, derive_associated_token_accounts
+from .solana_tx import (
+    SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID,
+    SOLANA_SYSTEM_PROGRAM_ID,
+    SOLANA_TOKEN_PROGRAM_ID,
+    SOLANA_WRAPPED_SOL_MINT,
+    SolanaTransactionView,
+    b58decode,
+    b58encode,
+    decode_transaction_diagnostics as _decode_solana_transaction_diagnostics,
+)
 from fastapi import FastAPI, HTTPException, Query
 from pathlib import Path
 import base64
@@ -16,31 +53,93 @@ import sys
 import subprocess
 import time
 import os
+import asyncio
 import re
-import hashlib
 import urllib.parse
 import urllib.request
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi import Body
-
+
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from providers.helius_activity import fetch_wallet_activity
+from providers.rate_limiter import (
+    PRIORITY_EXECUTION,
+    acquire_upstream,
+    get_upstream_rate_limiter,
+    jupiter_upstream,
+    rpc_upstream,
+    upstream_rate_limiter_enabled,
+)
+from providers.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    count_cache_lookup,
+    count_speculative_probe,
+    count_rpc_call,
+    count_subprocess_spawn,
+    get_metrics,
+    StageTimer,
+)
 from providers.token_holder_concentration import (
     fetch_token_holder_concentration,
+    fetch_token_holder_concentration_batch,
+    get_holder_concentration_cache_stats,
     get_holder_concentration_rpc_config_status,
 )
+from providers.solana_rpc_pool import (
+    ERROR as RPC_POOL_ERROR,
+    OK as RPC_POOL_OK,
+    RATE_LIMITED as RPC_POOL_RATE_LIMITED,
+    get_solana_rpc_pool,
+    submit_fan_out_enabled,
+)
 from providers.token_resolver import maybe_enrich_token_logo_uri_from_dexscreener, resolve_token
-from token_registry import default_swap_token_meta_by_symbol, get_token_meta_by_symbol, mint_to_asset_key, TOKENS
-
+from token_registry import (
+    default_swap_token_meta_by_symbol,
+    get_token_index,
+    get_token_meta_by_symbol,
+    mint_to_asset_key,
+    TOKENS,
+)
+
 app = FastAPI(title="Web3 Digest API", version="0.1.0")
 
 
 
 
-TOKEN_META = default_swap_token_meta_by_symbol()
+_TOKEN_META: dict | None = None
+_TOKEN_META_BY_MINT: dict | None = None
+
+
+def _token_meta() -> dict:
+    # Built on first use so importing api.main (tools, workers, tests) skips it.
+    global _TOKEN_META
+    if _TOKEN_META is None:
+        _TOKEN_META = default_swap_token_meta_by_symbol()
+    return _TOKEN_META
+
+
+def _token_meta_by_mint() -> dict:
+    global _TOKEN_META_BY_MINT
+    if _TOKEN_META_BY_MINT is None:
+        _TOKEN_META_BY_MINT = {
+            (meta.get("mint") or "").strip(): {"symbol": symbol, **meta}
+            for symbol, meta in _token_meta().items()
+            if isinstance(meta, dict) and meta.get("mint")
+        }
+    return _TOKEN_META_BY_MINT
+
+
+def __getattr__(name: str):
+    # TOKEN_META / TOKEN_META_BY_MINT stay importable for existing callers.
+    if name == "TOKEN_META":
+        return _token_meta()
+    if name == "TOKEN_META_BY_MINT":
+        return _token_meta_by_mint()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 EXTERNAL_REFERENCE_IMPLIED_USD_MAX_MULTIPLE = 5.0
 
@@ -250,7 +349,7 @@ def _fetch_jupiter_price_v3_reference_prices_usd(tokens: list[str]) -> dict:
     if not token_to_mint:
         return {}
 
-    url = "https://lite-api.jup.ag/price/v3?" + urllib.parse.urlencode(
+    url = jupiter_price_api_url() + "?" + urllib.parse.urlencode(
         {"ids": ",".join(sorted(set(token_to_mint.values())))}
     )
     headers = {
@@ -268,6 +367,9 @@ def _fetch_jupiter_price_v3_reference_prices_usd(tokens: list[str]) -> dict:
         method="GET",
     )
 
+    upstream = jupiter_upstream()
+    if not acquire_upstream(upstream):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail(upstream))
     with urllib.request.urlopen(req, timeout=10) as resp:
         data = json.loads(resp.read().decode("utf-8"))
 
@@ -325,8 +427,10 @@ def _fetch_coingecko_reference_prices_usd(tokens: list[str]) -> dict:
 
     ids = ",".join(sorted(set(token_to_cg.values())))
 
+    if not acquire_upstream("coingecko"):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail("coingecko"))
     resp = requests.get(
-        "https://api.coingecko.com/api/v3/simple/price",
+        coingecko_api_base_url() + "/simple/price",
         params={
             "ids": ids,
             "vs_currencies": "usd",
@@ -657,39 +761,17 @@ def display_asset(asset: str) -> str:
     if asset in {"sol", "usdc", "btc", "eth"}:
         return asset.upper()
 
-    try:
-        import token_registry
-        for _mint, info in getattr(token_registry, "TOKENS", {}).items():
-            if not isinstance(info, dict):
-                continue
-            if (info.get("asset") or "").strip().lower() == asset.lower():
-                return info.get("symbol") or info.get("name") or asset.upper()
-    except Exception:
-        pass
+    index = get_token_index()
+    info = index.by_asset(asset)
+    if info is not None:
+        return info.get("symbol") or info.get("name") or asset.upper()
 
     # SPL mint format: spl:<mint>
     if asset.startswith("spl:"):
         mint = asset.split(":", 1)[1]
-
-        # Try token_registry lookup (best effort, no hard dependency)
-        try:
-            import token_registry  # your project file
-            # common patterns: token_registry.get(mint) or token_registry.REGISTRY[mint], etc.
-            for attr in ("get_by_mint", "token_for_mint", "lookup_mint", "get"):
-                fn = getattr(token_registry, attr, None)
-                if callable(fn):
-                    info = fn(mint)
-                    if isinstance(info, dict):
-                        return info.get("symbol") or info.get("name") or asset
-            # common dicts:
-            for attr in ("TOKEN_REGISTRY", "REGISTRY", "TOKENS"):
-                d = getattr(token_registry, attr, None)
-                if isinstance(d, dict):
-                    info = d.get(mint)
-                    if isinstance(info, dict):
-                        return info.get("symbol") or info.get("name") or asset
-        except Exception:
-            pass
+        info = index.by_mint(mint)
+        if info is not None:
+            return info.get("symbol") or info.get("name") or asset
 
         # Fallback: readable short mint
         return f"SPL {mint[:4]}…{mint[-4:]}"
@@ -724,7 +806,56 @@ def _mark_refreshed(key: str) -> None:
     _last_refresh[key] = time.time()
 
 
+def _upstream_rate_limited_detail(upstream: str) -> str:
+    """Worded so the existing "rate limit" / "too many requests" checks classify it."""
+    return f"Too many requests: local rate limit for {upstream} reached for this request class."
+
+
+def _run_node_helper(helper_path: Path, payload: dict, *, timeout: float) -> subprocess.CompletedProcess:
+    """Runs a tools/*.mjs helper with the JSON payload on stdin."""
+    remote = node_helper_url()
+    if remote:
+        return _post_node_helper(remote, helper_path, payload, timeout=timeout)
+    count_subprocess_spawn(helper_path.name)
+    return subprocess.run(
+        [os.getenv("NODE_BINARY") or "node", str(helper_path)],
+        input=json.dumps(payload),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        cwd=project_root(),
+    )
+
+
+def _post_node_helper(base_url: str, helper_path: Path, payload: dict, *, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Same protocol as the Node helpers (JSON in, JSON out) over HTTP, for load
+    tests against tools/provider_simulator.py. Errors map onto what callers
+    already handle for the subprocess: timeouts raise TimeoutExpired, HTTP
+    errors come back as a non-zero returncode with the body on stderr.
+    """
+    args = ["POST", f"{base_url}/{helper_path.name}"]
+    req = urllib.request.Request(
+        args[1],
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return subprocess.CompletedProcess(args, 0, resp.read().decode("utf-8"), "")
+    except urllib.error.HTTPError as e:
+        return subprocess.CompletedProcess(args, 1, "", e.read().decode("utf-8", errors="replace"))
+    except TimeoutError:
+        raise subprocess.TimeoutExpired(args, timeout)
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, TimeoutError):
+            raise subprocess.TimeoutExpired(args, timeout)
+        raise
+
+
 def _run_cmd(cmd: list[str], timeout: int = 90) -> dict:
+    count_subprocess_spawn(Path(cmd[-1]).name if cmd else "unknown")
     p = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
     return {
         "cmd": " ".join(cmd),
@@ -772,6 +903,46 @@ def get_account_or_404(account_name: str) -> dict:
 @app.get("/health")
 def health():
     return {"status": "ok", "ts": datetime.now(timezone.utc).isoformat()}
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(content=get_metrics().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/debug/profiler")
+def debug_profiler(top: int = Query(20, ge=0, le=500), format: str = Query("json")):
+    profiler = get_sampling_profiler()
+    if format == "folded":
+        return Response(content=profiler.folded(), media_type="text/plain; charset=utf-8")
+    return {"ok": True, "control_enabled": profiler_control_enabled(), **profiler.snapshot(top=top)}
+
+
+@app.post("/debug/profiler")
+def debug_profiler_control(payload: dict = Body(...)):
+    """{"enabled": bool, "interval_ms"?: float, "reset"?: bool}; needs SAMPLING_PROFILER_CONTROL=1."""
+    if not profiler_control_enabled():
+        return JSONResponse(
+            status_code=403,
+            content={"ok": False, "error": {"code": "PROFILER_CONTROL_DISABLED", "message": "Set SAMPLING_PROFILER_CONTROL=1 to switch the profiler at runtime."}},
+        )
+    profiler = get_sampling_profiler()
+    if payload.get("reset"):
+        profiler.reset()
+    if payload.get("enabled") is True:
+        try:
+            interval_ms = float(payload["interval_ms"]) if payload.get("interval_ms") is not None else None
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="interval_ms must be a number")
+        profiler.start(interval_ms)
+    elif payload.get("enabled") is False:
+        profiler.stop()
+    return {"ok": True, **profiler.snapshot(top=0)}
+
+
+@app.get("/debug/rate-limits")
+def debug_rate_limits():
+    return {"ok": True, "enabled": upstream_rate_limiter_enabled(), **get_upstream_rate_limiter().snapshot()}
 
 
 @app.get("/accounts")
@@ -825,16 +996,16 @@ def _normalize_refresh_asset_for_diagnostics(asset: str) -> str:
     low = raw.lower()
     if low.startswith("spl:"):
         return mint_to_asset_key(raw.split(":", 1)[1])
-    for mint in TOKENS.keys():
-        if raw == mint or low == mint.lower():
-            return mint_to_asset_key(mint)
+    meta = get_token_index().by_mint(raw, case_sensitive=False)
+    if meta is not None and meta["mint"] in TOKENS:
+        return mint_to_asset_key(meta["mint"])
     return low
 
 
 @app.get("/swap/tokens")
 def swap_tokens():
     tokens = []
-    for symbol, meta in TOKEN_META.items():
+    for symbol, meta in _token_meta().items():
         if not meta.get("default_enabled"):
             continue
         public_meta = _public_swap_token_meta(symbol, meta)
@@ -868,6 +1039,9 @@ def token_resolve(query: str = Query(""), allow_external: bool = Query(True)):
     return result
 
 
+MAX_HOLDER_CONCENTRATION_BATCH_MINTS = 50
+
+
 @app.get("/tokens/holder-concentration")
 def token_holder_concentration(mint: str = Query("")):
     mint = (mint or "").strip()
@@ -877,11 +1051,28 @@ def token_holder_concentration(mint: str = Query("")):
     return fetch_token_holder_concentration(mint)
 
 
+@app.get("/tokens/holder-concentration/batch")
+def token_holder_concentration_batch(
+    mints: str = Query("", description="Comma-separated Solana token mints."),
+):
+    requested = list(dict.fromkeys(m.strip() for m in (mints or "").split(",") if m.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="mints is required")
+    if len(requested) > MAX_HOLDER_CONCENTRATION_BATCH_MINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"at most {MAX_HOLDER_CONCENTRATION_BATCH_MINTS} mints per request",
+        )
+
+    return fetch_token_holder_concentration_batch(requested)
+
+
 @app.get("/tokens/holder-concentration/config")
 def token_holder_concentration_config():
     return {
         "ok": True,
         "rpc": get_holder_concentration_rpc_config_status(),
+        "cache": get_holder_concentration_cache_stats(),
         "note": "Set TOKEN_HOLDER_CONCENTRATION_RPC_URL to use a dedicated RPC for holder concentration.",
     }
 
@@ -1054,7 +1245,7 @@ def _fetch_jupiter_swap_instructions(
     user_public_key: str,
     as_legacy_transaction: bool = True,
 ) -> dict:
-    url = "https://api.jup.ag/swap/v1/swap-instructions"
+    url = jupiter_swap_api_base_url() + "/swap-instructions"
 
     payload = {
         "userPublicKey": user_public_key,
@@ -1081,6 +1272,9 @@ def _fetch_jupiter_swap_instructions(
         method="POST",
     )
 
+    upstream = jupiter_upstream()
+    if not acquire_upstream(upstream, PRIORITY_EXECUTION):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail(upstream))
     try:
         with urllib.request.urlopen(req, timeout=25) as resp:
             return json.loads(resp.read().decode("utf-8"))
@@ -1109,7 +1303,7 @@ def _fetch_jupiter_swap_transaction(
     user_public_key: str,
     as_legacy_transaction: bool = False,
 ) -> dict:
-    url = "https://api.jup.ag/swap/v1/swap"
+    url = jupiter_swap_api_base_url() + "/swap"
 
     payload = {
         "quoteResponse": quote_response,
@@ -1135,6 +1329,13 @@ def _fetch_jupiter_swap_transaction(
         method="POST",
     )
 
+    upstream = jupiter_upstream()
+    if not acquire_upstream(upstream, PRIORITY_EXECUTION):
+        return _swap_execution_error(
+            "SWAP_EXECUTION_RATE_LIMITED",
+            "Jupiter swap execution is rate-limited right now.",
+            detail=_upstream_rate_limited_detail(upstream),
+        )
     try:
         with urllib.request.urlopen(req, timeout=25) as resp:
             data = json.loads(resp.read().decode("utf-8"))
@@ -1355,36 +1556,13 @@ def _normalize_execution_provider(provider: str) -> str | None:
 
 def get_swap_execution_provider(provider_id: str) -> dict | None:
     provider = _normalize_execution_provider(provider_id) or (provider_id or "").strip().lower()
-    if provider == "jupiter-metis":
-        return {
-            "provider": "jupiter-metis",
-            "execution_surface_label": "Jupiter",
-            "prepare": _prepare_jupiter_swap_transaction,
-        }
-    if provider == "raydium-trade-api":
-        return {
-            "provider": "raydium-trade-api",
-            "execution_surface_label": "Raydium",
-            "prepare": _prepare_raydium_swap_transaction,
-        }
-    if provider == "orca-whirlpool":
-        return {
-            "provider": "orca-whirlpool",
-            "execution_surface_label": "Orca",
-            "prepare": _prepare_orca_whirlpool_swap_transaction,
-        }
-    if provider == "meteora-dlmm":
-        return {
-            "provider": "meteora-dlmm",
-            "execution_surface_label": "Meteora",
-            "prepare": _prepare_meteora_dlmm_swap_transaction,
-        }
-    if provider == "pumpswap":
-        return {
-            "provider": "pumpswap",
-            "execution_surface_label": "PumpSwap",
-            "prepare": _prepare_pumpswap_swap_transaction,
-        }
+    for quote_provider in QUOTE_PROVIDERS.providers():
+        if quote_provider.provider_id == provider and quote_provider.prepare is not None:
+            return {
+                "provider": provider,
+                "execution_surface_label": quote_provider.capabilities.get("label") or quote_provider.label,
+                "prepare": quote_provider.prepare,
+            }
     return None
 
 
@@ -1518,17 +1696,7 @@ RAYDIUM_TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
 
 
 def _base58_decode_bytes(value: str) -> bytes:
-    if not isinstance(value, str) or not value:
-        raise ValueError("base58 value is required")
-
-    decoded = 0
-    for char in value:
-        if char not in _BASE58_ALPHABET:
-            raise ValueError("invalid base58 character")
-        decoded = decoded * 58 + _BASE58_ALPHABET.index(char)
-    raw = decoded.to_bytes((decoded.bit_length() + 7) // 8, "big") if decoded else b""
-    leading_zeroes = len(value) - len(value.lstrip("1"))
-    return (b"\x00" * leading_zeroes) + raw
+    return b58decode(value)
 
 
 def _solana_pubkey_bytes(value: str) -> bytes:
@@ -1538,65 +1706,13 @@ def _solana_pubkey_bytes(value: str) -> bytes:
     return raw
 
 
-def _ed25519_is_on_curve(compressed: bytes) -> bool:
-    if len(compressed) != 32:
-        return False
-
-    p = 2**255 - 19
-    y = int.from_bytes(compressed, "little") & ((1 << 255) - 1)
-    if y >= p:
-        return False
-
-    y2 = (y * y) % p
-    u = (y2 - 1) % p
-    d = (-121665 * pow(121666, p - 2, p)) % p
-    v = (d * y2 + 1) % p
-    if v == 0:
-        return False
-    x2 = (u * pow(v, p - 2, p)) % p
-    return pow(x2, (p - 1) // 2, p) == 1 or x2 == 0
-
-
-def _solana_create_program_address(seeds: list[bytes], program_id: bytes) -> bytes:
-    if len(seeds) > 16:
-        raise ValueError("too many PDA seeds")
-    for seed in seeds:
-        if len(seed) > 32:
-            raise ValueError("PDA seed is too long")
-
-    digest = hashlib.sha256(
-        b"".join(seeds) + program_id + b"ProgramDerivedAddress"
-    ).digest()
-    if _ed25519_is_on_curve(digest):
-        raise ValueError("PDA landed on curve")
-    return digest
-
-
-def _solana_find_program_address(seeds: list[bytes], program_id: bytes) -> tuple[bytes, int]:
-    for bump in range(255, -1, -1):
-        try:
-            address = _solana_create_program_address(seeds + [bytes([bump])], program_id)
-            return address, bump
-        except ValueError:
-            continue
-    raise ValueError("could not find a valid PDA")
-
-
 def _derive_solana_associated_token_account(
     *,
     owner: str,
     mint: str,
     token_program_id: str = RAYDIUM_TOKEN_PROGRAM_ID,
 ) -> str:
-    owner_bytes = _solana_pubkey_bytes(owner)
-    mint_bytes = _solana_pubkey_bytes(mint)
-    token_program_bytes = _solana_pubkey_bytes(token_program_id)
-    associated_program_bytes = _solana_pubkey_bytes(SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID)
-    ata_bytes, _bump = _solana_find_program_address(
-        [owner_bytes, token_program_bytes, mint_bytes],
-        associated_program_bytes,
-    )
-    return _base58_encode_bytes(ata_bytes)
+    return derive_associated_token_account(owner, mint, token_program_id)
 
 
 def _raydium_prepare_token_accounts(
@@ -1608,18 +1724,14 @@ def _raydium_prepare_token_accounts(
     wrap_sol = input_mint == RAYDIUM_EXECUTION_SOL_MINT
     unwrap_sol = output_mint == RAYDIUM_EXECUTION_SOL_MINT
 
-    input_account = None
-    output_account = None
+    pairs = []
     if not wrap_sol:
-        input_account = _derive_solana_associated_token_account(
-            owner=user_public_key,
-            mint=input_mint,
-        )
+        pairs.append((user_public_key, input_mint))
     if not unwrap_sol:
-        output_account = _derive_solana_associated_token_account(
-            owner=user_public_key,
-            mint=output_mint,
-        )
+        pairs.append((user_public_key, output_mint))
+    accounts = derive_associated_token_accounts(pairs, token_program_id=RAYDIUM_TOKEN_PROGRAM_ID)
+    input_account = None if wrap_sol else accounts[(user_public_key, input_mint)]
+    output_account = None if unwrap_sol else accounts[(user_public_key, output_mint)]
 
     return {
         "wrap_sol": wrap_sol,
@@ -1797,7 +1909,7 @@ def _fetch_raydium_swap_transaction(
         payload["outputAccount"] = output_account
 
     req = urllib.request.Request(
-        "https://transaction-v1.raydium.io/transaction/swap-base-in",
+        raydium_trade_api_base_url() + "/transaction/swap-base-in",
         data=json.dumps(payload).encode("utf-8"),
         headers={
             "Accept": "application/json",
@@ -1807,6 +1919,11 @@ def _fetch_raydium_swap_transaction(
         method="POST",
     )
 
+    if not acquire_upstream("raydium", PRIORITY_EXECUTION):
+        return _raydium_execution_error(
+            "SWAP_EXECUTION_RAYDIUM_RATE_LIMITED",
+            "Raydium transaction preparation is rate-limited right now.",
+        )
     try:
         with urllib.request.urlopen(req, timeout=20) as resp:
             data = json.loads(resp.read().decode("utf-8"))
@@ -2079,16 +2196,10 @@ def _fetch_orca_whirlpool_swap_transaction(
     rpc_url, _rpc_source = _configured_swap_prepare_rpc_url()
     if rpc_url:
         payload["rpc_url"] = rpc_url
+    chain_head = _attach_swap_prepare_chain_head(payload, rpc_url)
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=25,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=25)
     except FileNotFoundError:
         return _orca_execution_error(
             "SWAP_EXECUTION_ORCA_HELPER_FAILED",
@@ -2154,11 +2265,14 @@ def _fetch_orca_whirlpool_swap_transaction(
     if extracted.get("ok") is not True:
         return extracted
 
-    return {
+    result = {
         "ok": True,
         "transaction_base64": extracted["transaction_base64"],
         "raw": data,
     }
+    if chain_head:
+        result["chain_head"] = chain_head
+    return result
 
 
 def _orca_execution_quote_summary(
@@ -2254,7 +2368,7 @@ def _fetch_fresh_meteora_dlmm_execution_quote(
         output_mint=output_meta["mint"],
         amount_raw=amount_raw,
         slippage_bps=slippage_bps,
-        rpc_url=rpc_url or SOLANA_MAINNET_RPC_URL,
+        rpc_url=rpc_url or solana_mainnet_rpc_url(),
     )
 
     result = _try_fetch_meteora_dlmm_quote(payload)
@@ -2327,16 +2441,10 @@ def _fetch_meteora_dlmm_swap_transaction(
     rpc_url, _rpc_source = _configured_swap_prepare_rpc_url()
     if rpc_url:
         payload["rpc_url"] = rpc_url
+    chain_head = _attach_swap_prepare_chain_head(payload, rpc_url)
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=25,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=25)
     except FileNotFoundError:
         return _meteora_execution_error(
             "SWAP_EXECUTION_METEORA_HELPER_FAILED",
@@ -2402,11 +2510,14 @@ def _fetch_meteora_dlmm_swap_transaction(
     if extracted.get("ok") is not True:
         return extracted
 
-    return {
+    result = {
         "ok": True,
         "transaction_base64": extracted["transaction_base64"],
         "raw": data,
     }
+    if chain_head:
+        result["chain_head"] = chain_head
+    return result
 
 
 def _meteora_dlmm_execution_quote_summary(
@@ -2536,7 +2647,7 @@ def _fetch_fresh_pumpswap_execution_quote(
         output_mint=output_meta["mint"],
         amount_raw=amount_raw,
         slippage_bps=slippage_bps,
-        rpc_url=rpc_url or SOLANA_MAINNET_RPC_URL,
+        rpc_url=rpc_url or solana_mainnet_rpc_url(),
         user_public_key=user_public_key,
     )
 
@@ -2643,16 +2754,10 @@ def _fetch_pumpswap_swap_transaction(
     rpc_url, _rpc_source = _configured_swap_prepare_rpc_url()
     if rpc_url:
         payload["rpc_url"] = rpc_url
+    chain_head = _attach_swap_prepare_chain_head(payload, rpc_url)
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=25,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=25)
     except FileNotFoundError:
         return _pumpswap_execution_error(
             "SWAP_EXECUTION_PUMPSWAP_HELPER_FAILED",
@@ -2717,11 +2822,14 @@ def _fetch_pumpswap_swap_transaction(
     if extracted.get("ok") is not True:
         return extracted
 
-    return {
+    result = {
         "ok": True,
         "transaction_base64": extracted["transaction_base64"],
         "raw": data,
     }
+    if chain_head:
+        result["chain_head"] = chain_head
+    return result
 
 
 def _pumpswap_execution_quote_summary(
@@ -2939,7 +3047,7 @@ def _prepare_orca_whirlpool_swap_transaction(
     from_token = input_meta.get("quote_label") or input_meta.get("symbol") or from_token_query
     to_token = output_meta.get("quote_label") or output_meta.get("symbol") or to_token_query
 
-    return {
+    prepared = {
         "ok": True,
         "provider": "orca-whirlpool",
         "execution_surface_label": "Orca",
@@ -2958,6 +3066,10 @@ def _prepare_orca_whirlpool_swap_transaction(
         "warnings": ["quote_refreshed_before_execution"],
         "submit_preflight": _swap_submit_preflight_metadata(),
     }
+    if swap_tx.get("chain_head"):
+        # Diagnostics: how old the tracked blockhash was when the helper used it.
+        prepared["chain_head"] = swap_tx["chain_head"]
+    return prepared
 
 
 def _prepare_meteora_dlmm_swap_transaction(
@@ -2998,7 +3110,7 @@ def _prepare_meteora_dlmm_swap_transaction(
     from_token = input_meta.get("quote_label") or input_meta.get("symbol") or from_token_query
     to_token = output_meta.get("quote_label") or output_meta.get("symbol") or to_token_query
 
-    return {
+    prepared = {
         "ok": True,
         "provider": "meteora-dlmm",
         "execution_surface_label": "Meteora",
@@ -3017,6 +3129,9 @@ def _prepare_meteora_dlmm_swap_transaction(
         "warnings": ["quote_refreshed_before_execution", "meteora_dlmm_prepare_research_only"],
         "submit_preflight": _swap_submit_preflight_metadata(),
     }
+    if swap_tx.get("chain_head"):
+        prepared["chain_head"] = swap_tx["chain_head"]
+    return prepared
 
 
 def _prepare_pumpswap_swap_transaction(
@@ -3058,7 +3173,7 @@ def _prepare_pumpswap_swap_transaction(
     from_token = input_meta.get("quote_label") or input_meta.get("symbol") or from_token_query
     to_token = output_meta.get("quote_label") or output_meta.get("symbol") or to_token_query
 
-    return {
+    prepared = {
         "ok": True,
         "provider": "pumpswap",
         "execution_surface_label": "PumpSwap",
@@ -3077,6 +3192,9 @@ def _prepare_pumpswap_swap_transaction(
         "warnings": ["quote_refreshed_before_execution"],
         "submit_preflight": _swap_submit_preflight_metadata(),
     }
+    if swap_tx.get("chain_head"):
+        prepared["chain_head"] = swap_tx["chain_head"]
+    return prepared
 
 
 def prepare_swap_transaction_with_provider(
@@ -3111,12 +3229,6 @@ def prepare_swap_transaction_with_provider(
 
 
 
-SOLANA_MAINNET_RPC_URL = os.environ.get(
-    "SOLANA_MAINNET_RPC_URL",
-    "https://api.mainnet-beta.solana.com",
-).strip()
-
-
 MAX_SIGNED_SWAP_TRANSACTION_BASE64_CHARS = 200_000
 
 
@@ -3192,6 +3304,13 @@ def _fetch_solana_send_transaction(
         ],
     }
 
+    if not acquire_upstream(rpc_upstream(rpc_url), PRIORITY_EXECUTION):
+        return _swap_submit_error(
+            "SWAP_SUBMIT_RATE_LIMITED",
+            "RPC is rate-limited. Try again later.",
+            detail=_upstream_rate_limited_detail("RPC"),
+        )
+    count_rpc_call("sendTransaction")
     try:
         response = requests.post(
             rpc_url,
@@ -3278,17 +3397,47 @@ def _fetch_solana_send_transaction(
     }
 
 
-def _fetch_solana_signature_status(*, signature: str, rpc_url: str) -> dict:
+def _map_solana_signature_status(signature: str, status) -> dict:
+    if status is not None and not isinstance(status, dict):
+        status = None
+
+    confirmation_status = status.get("confirmationStatus") if status else None
+    confirmations = status.get("confirmations") if status else None
+    err = status.get("err") if status else None
+    finalized = confirmation_status == "finalized"
+    confirmed = finalized or confirmation_status == "confirmed"
+
+    return {
+        "ok": True,
+        "signature": signature,
+        "confirmation_status": confirmation_status,
+        "confirmations": confirmations,
+        "confirmed": confirmed,
+        "finalized": finalized,
+        "err": err,
+        "status": status,
+    }
+
+
+def _fetch_solana_signature_statuses(*, signatures: list[str], rpc_url: str) -> dict:
+    """One getSignatureStatuses call for up to 256 signatures."""
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
         "method": "getSignatureStatuses",
         "params": [
-            [signature],
+            list(signatures),
             {"searchTransactionHistory": True},
         ],
     }
 
+    if not acquire_upstream(rpc_upstream(rpc_url)):
+        return _swap_submit_error(
+            "SWAP_STATUS_RATE_LIMITED",
+            "RPC is rate-limited. Try again later.",
+            detail=_upstream_rate_limited_detail("RPC"),
+        )
+    count_rpc_call("getSignatureStatuses")
     try:
         response = requests.post(
             rpc_url,
@@ -3362,79 +3511,42 @@ def _fetch_solana_signature_status(*, signature: str, rpc_url: str) -> dict:
         )
 
     values = data.get("result", {}).get("value") if isinstance(data.get("result"), dict) else None
-    status = values[0] if isinstance(values, list) and values else None
-    if status is not None and not isinstance(status, dict):
-        status = None
-
-    confirmation_status = status.get("confirmationStatus") if status else None
-    confirmations = status.get("confirmations") if status else None
-    err = status.get("err") if status else None
-    finalized = confirmation_status == "finalized"
-    confirmed = finalized or confirmation_status == "confirmed"
-
+    if not isinstance(values, list):
+        values = []
     return {
         "ok": True,
-        "signature": signature,
-        "confirmation_status": confirmation_status,
-        "confirmations": confirmations,
-        "confirmed": confirmed,
-        "finalized": finalized,
-        "err": err,
-        "status": status,
+        "statuses": {
+            signature: _map_solana_signature_status(signature, values[index] if index < len(values) else None)
+            for index, signature in enumerate(signatures)
+        },
     }
 
 
+def _fetch_solana_signature_status(*, signature: str, rpc_url: str) -> dict:
+    result = _fetch_solana_signature_statuses(signatures=[signature], rpc_url=rpc_url)
+    if result.get("ok") is not True:
+        return result
+    return result["statuses"][signature]
+
+
+def _signature_watcher_fetch(signatures: list[str], rpc_url: str) -> dict | None:
+    result = get_solana_rpc_pool().call(
+        rpc_url,
+        lambda url: _fetch_solana_signature_statuses(signatures=signatures, rpc_url=url),
+        hedge=True,
+    )
+    if result.get("ok") is not True:
+        return None
+    return result["statuses"]
+
+
 MAX_SWAP_PREFLIGHT_TRANSACTION_BASE64_CHARS = 200_000
 SPL_TOKEN_ACCOUNT_RENT_EXEMPT_LAMPORTS_FALLBACK = 2_039_280
 SPL_TOKEN_ACCOUNT_RENT_EXEMPT_SIZE = 165
-SOLANA_SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
-SOLANA_TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
-SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
-SOLANA_WRAPPED_SOL_MINT = "So11111111111111111111111111111111111111112"
-_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 
 
 def _base58_encode_bytes(raw: bytes) -> str:
-    if not raw:
-        return ""
-    value = int.from_bytes(raw, "big")
-    encoded = ""
-    while value:
-        value, remainder = divmod(value, 58)
-        encoded = _BASE58_ALPHABET[remainder] + encoded
-    leading_zeroes = len(raw) - len(raw.lstrip(b"\x00"))
-    return ("1" * leading_zeroes) + encoded
-
-
-def _read_solana_shortvec(raw: bytes, offset: int) -> tuple[int, int]:
-    value = 0
-    shift = 0
-    for _ in range(3):
-        if offset >= len(raw):
-            raise ValueError("shortvec out of range")
-        byte = raw[offset]
-        offset += 1
-        value |= (byte & 0x7F) << shift
-        if not byte & 0x80:
-            return value, offset
-        shift += 7
-    raise ValueError("shortvec too long")
-
-
-def _skip_solana_shortvec_bytes(raw: bytes, offset: int) -> int:
-    length, offset = _read_solana_shortvec(raw, offset)
-    end = offset + length
-    if end > len(raw):
-        raise ValueError("shortvec bytes out of range")
-    return end
-
-
-def _read_solana_instruction_indexes(raw: bytes, offset: int) -> tuple[list[int], int]:
-    length, offset = _read_solana_shortvec(raw, offset)
-    end = offset + length
-    if end > len(raw):
-        raise ValueError("instruction accounts out of range")
-    return list(raw[offset:end]), end
+    return b58encode(raw)
 
 
 def _extract_pubkeys_from_solana_logs(*values) -> list[str]:
@@ -3450,13 +3562,16 @@ def _extract_pubkeys_from_solana_logs(*values) -> list[str]:
     return safe
 
 
-def _fetch_solana_rent_exempt_lamports(rpc_url: str, account_size: int = SPL_TOKEN_ACCOUNT_RENT_EXEMPT_SIZE) -> dict:
+def _request_solana_rent_exempt_lamports(rpc_url: str, account_size: int) -> int | None:
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
         "method": "getMinimumBalanceForRentExemption",
         "params": [account_size],
     }
+    if not acquire_upstream(rpc_upstream(rpc_url)):
+        return None
+    count_rpc_call("getMinimumBalanceForRentExemption")
     try:
         response = requests.post(
             rpc_url,
@@ -3468,14 +3583,31 @@ def _fetch_solana_rent_exempt_lamports(rpc_url: str, account_size: int = SPL_TOK
             raise ValueError("rent RPC returned non-OK status")
         data = response.json()
     except Exception:
-        return {
-            "ok": False,
-            "lamports": SPL_TOKEN_ACCOUNT_RENT_EXEMPT_LAMPORTS_FALLBACK,
-            "source": "fallback_spl_token_account_rent_exempt_lamports",
-        }
+        return None
 
     lamports = data.get("result") if isinstance(data, dict) else None
     if not isinstance(lamports, int) or lamports <= 0:
+        return None
+    return lamports
+
+
+def _fetch_solana_epoch_info(rpc_url: str) -> dict | None:
+    try:
+        data = _solana_rpc_call(rpc_url, "getEpochInfo", [{"commitment": "confirmed"}])
+    except HTTPException:
+        return None
+    result = data.get("result") if isinstance(data, dict) else None
+    return result if isinstance(result, dict) else None
+
+
+def _fetch_solana_rent_exempt_lamports(rpc_url: str, account_size: int = SPL_TOKEN_ACCOUNT_RENT_EXEMPT_SIZE) -> dict:
+    lamports, cache_status = get_chain_constants_cache().get(
+        rpc_url,
+        ("rent_exempt_lamports", int(account_size)),
+        lambda: _request_solana_rent_exempt_lamports(rpc_url, account_size),
+        epoch_fetch=lambda: _fetch_solana_epoch_info(rpc_url),
+    )
+    if lamports is None:
         return {
             "ok": False,
             "lamports": SPL_TOKEN_ACCOUNT_RENT_EXEMPT_LAMPORTS_FALLBACK,
@@ -3485,10 +3617,47 @@ def _fetch_solana_rent_exempt_lamports(rpc_url: str, account_size: int = SPL_TOK
     return {
         "ok": True,
         "lamports": lamports,
-        "source": "rpc_getMinimumBalanceForRentExemption_165",
+        "source": f"rpc_getMinimumBalanceForRentExemption_{account_size}",
+        "cache_status": cache_status,
     }
 
 
+MAX_SWAP_PREFLIGHT_BALANCE_ACCOUNTS = 16
+
+
+def _solana_transaction_writable_accounts(transaction_base64: str) -> list[str]:
+    """Static writable account keys of a serialized transaction (lookup-table accounts are skipped)."""
+    try:
+        return SolanaTransactionView.from_base64(transaction_base64).writable_static_account_keys()
+    except (binascii.Error, IndexError, ValueError):
+        return []
+
+
+def _fetch_swap_preflight_account_balances(transaction_base64: str, rpc_url: str) -> dict:
+    accounts = _solana_transaction_writable_accounts(transaction_base64)[:MAX_SWAP_PREFLIGHT_BALANCE_ACCOUNTS]
+    if not accounts:
+        return {"ok": False, "accounts": [], "reason": "no_static_writable_accounts"}
+    try:
+        data = _solana_rpc_call(
+            rpc_url,
+            "getMultipleAccounts",
+            [accounts, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}, "commitment": "processed"}],
+        )
+    except HTTPException:
+        return {"ok": False, "accounts": [], "reason": "rpc_unavailable"}
+
+    values = ((data.get("result") or {}).get("value") or []) if isinstance(data, dict) else []
+    items = []
+    for pubkey, value in zip(accounts, values):
+        items.append({
+            "pubkey": pubkey,
+            "exists": value is not None,
+            "lamports": (value or {}).get("lamports"),
+            "owner": (value or {}).get("owner"),
+        })
+    return {"ok": True, "accounts": items, "reason": None}
+
+
 def _build_swap_setup_cost_estimate(transaction_diagnostics: dict | None, rpc_url: str) -> dict | None:
     if not isinstance(transaction_diagnostics, dict):
         return None
@@ -3523,178 +3692,6 @@ def _build_swap_setup_cost_estimate(transaction_diagnostics: dict | None, rpc_ur
     }
 
 
-def _decode_solana_transaction_diagnostics(transaction_base64: str, *, expected_user_public_key: str = "") -> dict:
-    try:
-        raw = base64.b64decode((transaction_base64 or "").strip(), validate=True)
-    except (binascii.Error, ValueError):
-        return {"decode_ok": False}
-
-    try:
-        signature_count, offset = _read_solana_shortvec(raw, 0)
-        offset += signature_count * 64
-        if offset >= len(raw):
-            raise ValueError("missing message")
-
-        first_message_byte = raw[offset]
-        version = "legacy"
-        if first_message_byte & 0x80:
-            version = f"v{first_message_byte & 0x7F}"
-            offset += 1
-
-        if offset + 3 > len(raw):
-            raise ValueError("missing header")
-        offset += 3
-
-        account_count, offset = _read_solana_shortvec(raw, offset)
-        account_keys = []
-        for _ in range(account_count):
-            end = offset + 32
-            if end > len(raw):
-                raise ValueError("account key out of range")
-            account_keys.append(_base58_encode_bytes(raw[offset:end]))
-            offset = end
-
-        if offset + 32 > len(raw):
-            raise ValueError("missing recent blockhash")
-        offset += 32
-
-        instruction_count, offset = _read_solana_shortvec(raw, offset)
-        program_ids = []
-        ata_create_details = []
-        system_transfer_details = []
-        token_sync_native_details = []
-        token_close_account_details = []
-        for instruction_index in range(instruction_count):
-            if offset >= len(raw):
-                raise ValueError("instruction program out of range")
-            program_index = raw[offset]
-            offset += 1
-            account_indexes, offset = _read_solana_instruction_indexes(raw, offset)
-            instruction_data_length, offset = _read_solana_shortvec(raw, offset)
-            instruction_data_end = offset + instruction_data_length
-            if instruction_data_end > len(raw):
-                raise ValueError("instruction data out of range")
-            instruction_data = raw[offset:instruction_data_end]
-            offset = instruction_data_end
-            program_id = account_keys[program_index] if program_index < len(account_keys) else f"loaded_address_index:{program_index}"
-            program_ids.append(program_id)
-            account_pubkeys = [
-                account_keys[index] if index < len(account_keys) else f"loaded_address_index:{index}"
-                for index in account_indexes
-            ]
-            if program_id == SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID:
-                ata_create_details.append({
-                    "instruction_index": instruction_index,
-                    "program_id": program_id,
-                    "account_indexes": account_indexes,
-                    "account_pubkeys": account_pubkeys,
-                    "payer": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
-                    "ata_account": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
-                    "owner": account_pubkeys[2] if len(account_pubkeys) > 2 else None,
-                    "mint": account_pubkeys[3] if len(account_pubkeys) > 3 else None,
-                })
-            if program_id == SOLANA_SYSTEM_PROGRAM_ID and len(instruction_data) >= 12:
-                instruction_type = int.from_bytes(instruction_data[:4], "little")
-                if instruction_type == 2:
-                    system_transfer_details.append({
-                        "instruction_index": instruction_index,
-                        "program_id": program_id,
-                        "source": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
-                        "destination": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
-                        "lamports": int.from_bytes(instruction_data[4:12], "little"),
-                    })
-            if program_id == SOLANA_TOKEN_PROGRAM_ID and instruction_data:
-                instruction_type = instruction_data[0]
-                if instruction_type == 17:
-                    token_sync_native_details.append({
-                        "instruction_index": instruction_index,
-                        "program_id": program_id,
-                        "account": account_pubkeys[0] if account_pubkeys else None,
-                    })
-                elif instruction_type == 9:
-                    token_close_account_details.append({
-                        "instruction_index": instruction_index,
-                        "program_id": program_id,
-                        "account": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
-                        "destination": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
-                        "owner": account_pubkeys[2] if len(account_pubkeys) > 2 else None,
-                    })
-
-        unique_program_ids = []
-        for program_id in program_ids:
-            if program_id not in unique_program_ids:
-                unique_program_ids.append(program_id)
-
-        expected_user = (expected_user_public_key or "").strip()
-        fee_payer = account_keys[0] if account_keys else None
-        wsol_ata_account = None
-        for detail in ata_create_details:
-            if detail.get("mint") == SOLANA_WRAPPED_SOL_MINT:
-                wsol_ata_account = detail.get("ata_account")
-                break
-        system_transfers_to_wsol = [
-            detail for detail in system_transfer_details
-            if wsol_ata_account and detail.get("destination") == wsol_ata_account
-        ]
-        sync_native_for_wsol = [
-            detail for detail in token_sync_native_details
-            if wsol_ata_account and detail.get("account") == wsol_ata_account
-        ]
-        uses_wrapped_sol_mint = SOLANA_WRAPPED_SOL_MINT in account_keys
-        native_sol_wrap_complete = None
-        if uses_wrapped_sol_mint:
-            native_sol_wrap_complete = bool(system_transfers_to_wsol and sync_native_for_wsol)
-        unresolved_loaded_addresses = [
-            detail for detail in ata_create_details
-            if any(str(value).startswith("loaded_address_index:") for value in detail.get("account_pubkeys", []))
-        ]
-        instruction_details = [
-            *({"kind": "system_transfer", **detail} for detail in system_transfer_details),
-            *({"kind": "token_sync_native", **detail} for detail in token_sync_native_details),
-            *({"kind": "token_close_account", **detail} for detail in token_close_account_details),
-        ]
-        return {
-            "decode_ok": True,
-            "transaction_version": version,
-            "fee_payer": fee_payer,
-            "expected_user_public_key": expected_user or None,
-            "fee_payer_matches_expected_user": bool(expected_user and fee_payer == expected_user),
-            "expected_user_account_present": bool(expected_user and expected_user in account_keys),
-            "static_account_count": len(account_keys),
-            "instruction_count": len(program_ids),
-            "program_ids": unique_program_ids[:16],
-            "instruction_program_ids": program_ids[:64],
-            "ata_create_count": program_ids.count(SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID),
-            "ata_create_details": ata_create_details,
-            "token_program_instruction_count": program_ids.count(SOLANA_TOKEN_PROGRAM_ID),
-            "system_program_instruction_count": program_ids.count(SOLANA_SYSTEM_PROGRAM_ID),
-            "uses_associated_token_program": SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID in program_ids,
-            "uses_token_program": SOLANA_TOKEN_PROGRAM_ID in program_ids,
-            "uses_system_program": SOLANA_SYSTEM_PROGRAM_ID in program_ids,
-            "uses_wrapped_sol_mint": uses_wrapped_sol_mint,
-            "wsol_ata_account": wsol_ata_account,
-            "has_system_transfer_to_wsol_account": bool(system_transfers_to_wsol),
-            "has_token_sync_native": bool(token_sync_native_details),
-            "has_token_close_account": bool(token_close_account_details),
-            "wsol_wrap_lamports_detected": sum(
-                int(detail.get("lamports") or 0) for detail in system_transfers_to_wsol
-            ) or None,
-            "native_sol_wrap_complete": native_sol_wrap_complete,
-            "system_transfer_details": system_transfer_details,
-            "token_sync_native_details": token_sync_native_details,
-            "token_close_account_details": token_close_account_details,
-            "instruction_details": instruction_details[:24],
-            "loaded_address_resolution_available": False,
-            "loaded_address_resolution_note": (
-                "v0 loaded addresses are not decoded by this lightweight parser yet"
-                if version != "legacy" and unresolved_loaded_addresses
-                else None
-            ),
-        }
-    except (IndexError, ValueError):
-        return {"decode_ok": False}
-
-
 def _safe_swap_preflight_log_line(value) -> str:
     text = str(value or "").strip()
     if not text:
@@ -3808,6 +3805,13 @@ def _classify_swap_preflight_error(err, logs, *, provider: str = "", transaction
     return "simulation_failed"
 
 
+def _simulation_rpc_outcome(result) -> str:
+    """A failed simulation is still an answer; only RPC-level failures count against the endpoint."""
+    if not isinstance(result, dict) or result.get("error_category") != "rpc_unavailable":
+        return RPC_POOL_OK
+    return RPC_POOL_RATE_LIMITED if result.get("status_code") == 429 else RPC_POOL_ERROR
+
+
 def _fetch_solana_simulate_transaction(
     *,
     transaction_base64: str,
@@ -3832,6 +3836,20 @@ def _fetch_solana_simulate_transaction(
         ],
     }
 
+    if not acquire_upstream(rpc_upstream(rpc_url), PRIORITY_EXECUTION):
+        return {
+            "ok": False,
+            "provider": provider or None,
+            "variant_id": variant_id or None,
+            "simulation_supported": False,
+            "error_category": "rpc_unavailable",
+            "rate_limited": True,
+            "message": "Could not preflight this route right now.",
+            "logs_preview": [],
+            "transaction_diagnostics": transaction_diagnostics or None,
+            **(setup_cost_estimate or {}),
+        }
+    count_rpc_call("simulateTransaction")
     try:
         response = requests.post(
             rpc_url,
@@ -3980,6 +3998,9 @@ def _solana_rpc_call(
         "params": params or [],
     }
 
+    if not acquire_upstream(rpc_upstream(rpc_url)):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail("RPC"))
+    count_rpc_call(method)
     try:
         resp = requests.post(
             rpc_url,
@@ -3998,43 +4019,209 @@ def _solana_rpc_call(
     return data
 
 
-def _estimate_swap_network_fee_lamports(
-    *,
-    quote_response: dict,
-    user_public_key: str,
-    rpc_url: str,
-    as_legacy_transaction: bool = True,
-) -> dict:
-    """
-    Backend-owned fee estimation for a Jupiter quote.
+SOLANA_COMPUTE_BUDGET_PROGRAM_ID = "ComputeBudget111111111111111111111111111111"
+JUPITER_SWAP_INSTRUCTION_KEYS = (
+    "tokenLedgerInstruction",
+    "computeBudgetInstructions",
+    "otherInstructions",
+    "setupInstructions",
+    "swapInstruction",
+    "cleanupInstruction",
+)
 
-    For now this estimates the signature/network fee conservatively via
-    getFeeForMessage using a legacy-style minimal message placeholder.
-    It does not attempt to fully serialize every Jupiter instruction yet.
-    That is acceptable for this sprint because the main goal is to move
-    ownership and error handling into the backend.
-    """
-    if not quote_response or not isinstance(quote_response, dict):
-        return {
-            "ok": False,
-            "lamports": None,
-            "sol": None,
-            "scope": "invalid_quote_response",
-            "reason": "invalid_quote_response",
-            "detail": "quote_response missing or invalid",
-        }
 
-    if not user_public_key:
-        return {
-            "ok": False,
-            "lamports": None,
-            "sol": None,
-            "scope": "wallet_not_connected",
-            "reason": "wallet_not_connected",
-            "detail": "user_public_key is required for fee estimation",
-        }
+def _encode_solana_shortvec(value: int) -> bytes:
+    out = bytearray()
+    value = int(value)
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
 
-    try:
+
+def _jupiter_swap_instruction_list(instructions: dict) -> list[dict]:
+    items = []
+    for key in JUPITER_SWAP_INSTRUCTION_KEYS:
+        value = instructions.get(key)
+        if isinstance(value, dict):
+            items.append(value)
+        elif isinstance(value, list):
+            items.extend(item for item in value if isinstance(item, dict))
+    return items
+
+
+def _swap_fee_message_shape(instructions: list[dict], *, payer: str) -> tuple:
+    """
+    The parts of a message that getFeeForMessage prices: signer count plus
+    the compute-unit limit/price set through the compute budget program.
+    """
+    signers = {payer}
+    compute_unit_limit = None
+    compute_unit_price = None
+    for ix in instructions:
+        for meta in ix.get("accounts") or []:
+            if meta.get("isSigner") and meta.get("pubkey"):
+                signers.add(meta["pubkey"])
+        if ix.get("programId") != SOLANA_COMPUTE_BUDGET_PROGRAM_ID:
+            continue
+        try:
+            data = base64.b64decode(ix.get("data") or "")
+        except (binascii.Error, ValueError):
+            continue
+        if len(data) >= 5 and data[0] == 2:
+            compute_unit_limit = int.from_bytes(data[1:5], "little")
+        elif len(data) >= 9 and data[0] == 3:
+            compute_unit_price = int.from_bytes(data[1:9], "little")
+    return (len(signers), compute_unit_limit, compute_unit_price)
+
+
+def _compile_legacy_fee_message(instructions: list[dict], *, payer: str, recent_blockhash: str) -> str:
+    """Serializes a legacy message (base64) good enough for getFeeForMessage."""
+    metas: dict[str, list[bool]] = {payer: [True, True]}
+    for ix in instructions:
+        for meta in ix.get("accounts") or []:
+            flags = metas.setdefault(meta["pubkey"], [False, False])
+            flags[0] = flags[0] or bool(meta.get("isSigner"))
+            flags[1] = flags[1] or bool(meta.get("isWritable"))
+        metas.setdefault(ix["programId"], [False, False])
+
+    others = [key for key in metas if key != payer]
+    ordered = [payer] + sorted(others, key=lambda key: (not metas[key][0], not metas[key][1]))
+    index = {key: i for i, key in enumerate(ordered)}
+    if len(ordered) > 256:
+        raise ValueError("too many account keys for a legacy message")
+
+    num_signers = sum(1 for key in ordered if metas[key][0])
+    num_readonly_signed = sum(1 for key in ordered if metas[key][0] and not metas[key][1])
+    num_readonly_unsigned = sum(1 for key in ordered if not metas[key][0] and not metas[key][1])
+
+    out = bytearray([num_signers, num_readonly_signed, num_readonly_unsigned])
+    out += _encode_solana_shortvec(len(ordered))
+    for key in ordered:
+        out += _solana_pubkey_bytes(key)
+    out += _solana_pubkey_bytes(recent_blockhash)
+    out += _encode_solana_shortvec(len(instructions))
+    for ix in instructions:
+        data = base64.b64decode(ix.get("data") or "")
+        accounts = ix.get("accounts") or []
+        out.append(index[ix["programId"]])
+        out += _encode_solana_shortvec(len(accounts))
+        out += bytes(index[meta["pubkey"]] for meta in accounts)
+        out += _encode_solana_shortvec(len(data))
+        out += data
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def _fetch_chain_head(rpc_url: str) -> dict | None:
+    resp = _solana_rpc_call(rpc_url, "getLatestBlockhash", [{"commitment": "confirmed"}])
+    result = resp.get("result") or {}
+    value = result.get("value") or {}
+    if not value.get("blockhash"):
+        return None
+    return {
+        "blockhash": value["blockhash"],
+        "last_valid_block_height": value.get("lastValidBlockHeight"),
+        "slot": (result.get("context") or {}).get("slot"),
+    }
+
+
+def _swap_prepare_chain_head(rpc_url: str | None) -> dict | None:
+    """
+    Tracked head for a prepare helper payload. Reads through the tracker, so
+    a stale or missing head is fetched here instead of inside the helper and
+    later prepares on the same RPC reuse it; None leaves the helper to fetch
+    its own blockhash.
+    """
+    if not rpc_url:
+        return None
+    return get_chain_head_tracker(_fetch_chain_head).head(rpc_url, max_age_seconds=PREPARE_MAX_AGE_SECONDS)
+
+
+def _attach_swap_prepare_chain_head(payload: dict, rpc_url: str | None) -> dict | None:
+    chain_head = _swap_prepare_chain_head(rpc_url)
+    if chain_head:
+        payload["recent_blockhash"] = chain_head["blockhash"]
+        payload["last_valid_block_height"] = chain_head["last_valid_block_height"]
+    return chain_head
+
+
+def _fee_for_jupiter_swap_instructions(
+    instructions: dict,
+    *,
+    user_public_key: str,
+    rpc_url: str,
+) -> int | None:
+    ixs = _jupiter_swap_instruction_list(instructions)
+    if not ixs:
+        return None
+    service = get_network_fee_service()
+    tracker = get_chain_head_tracker(_fetch_chain_head)
+
+    def _fetch_fee() -> int | None:
+        head = tracker.head(rpc_url)
+        if not head:
+            return None
+        message = _compile_legacy_fee_message(ixs, payer=user_public_key, recent_blockhash=head["blockhash"])
+        resp = get_solana_rpc_pool().call(
+            rpc_url,
+            lambda url: _solana_rpc_call(url, "getFeeForMessage", [message, {"commitment": "processed"}]),
+            hedge=True,
+        )
+        value = (resp.get("result") or {}).get("value")
+        if not isinstance(value, int):
+            # A null value means the blockhash is no longer recognized.
+            tracker.invalidate(rpc_url)
+            return None
+        return value
+
+    return service.fee_for_shape(
+        rpc_url,
+        _swap_fee_message_shape(ixs, payer=user_public_key),
+        _fetch_fee,
+    )
+
+
+def _estimate_swap_network_fee_lamports(
+    *,
+    quote_response: dict,
+    user_public_key: str,
+    rpc_url: str,
+    as_legacy_transaction: bool = True,
+) -> dict:
+    """
+    Backend-owned fee estimation for a Jupiter quote.
+
+    Compiles the Jupiter swap instructions into a legacy message and prices
+    it with getFeeForMessage. The blockhash comes from the shared chain-head
+    tracker and the fee per message shape is cached by NetworkFeeService, so
+    only the swap-instructions call is per-quote. Falls back to a flat
+    signature fee.
+    """
+    if not quote_response or not isinstance(quote_response, dict):
+        return {
+            "ok": False,
+            "lamports": None,
+            "sol": None,
+            "scope": "invalid_quote_response",
+            "reason": "invalid_quote_response",
+            "detail": "quote_response missing or invalid",
+        }
+
+    if not user_public_key:
+        return {
+            "ok": False,
+            "lamports": None,
+            "sol": None,
+            "scope": "wallet_not_connected",
+            "reason": "wallet_not_connected",
+            "detail": "user_public_key is required for fee estimation",
+        }
+
+    try:
         instructions = _fetch_jupiter_swap_instructions(
             quote_response=quote_response,
             user_public_key=user_public_key,
@@ -4051,43 +4238,28 @@ def _estimate_swap_network_fee_lamports(
                 "detail": "swap instructions response was not a dict",
             }
 
-        # We only need a recent blockhash + fee-for-message call on backend.
-        # For this sprint, use a minimal legacy-message placeholder and keep
-        # failures explicit instead of hiding them in the browser.
-        latest_blockhash_resp = _solana_rpc_call(
-            rpc_url,
-            "getLatestBlockhash",
-            [{"commitment": "confirmed"}],
-        )
-
-        _ = latest_blockhash_resp.get("result", {}).get("value", {}).get("blockhash")
-
-        fallback_lamports = 5000
-
         try:
-            fee_resp = _solana_rpc_call(
-                rpc_url,
-                "getFees",
-                [{"commitment": "confirmed"}],
+            lamports = _fee_for_jupiter_swap_instructions(
+                instructions,
+                user_public_key=user_public_key,
+                rpc_url=rpc_url,
             )
+        except (HTTPException, KeyError, TypeError, ValueError, binascii.Error):
+            lamports = None
 
-            fee_value = fee_resp.get("result", {}).get("value", {})
-            lamports_per_signature = fee_value.get("feeCalculator", {}).get("lamportsPerSignature")
-
-            if isinstance(lamports_per_signature, int):
-                lamports = lamports_per_signature
-                return {
-                    "ok": True,
-                    "lamports": lamports,
-                    "sol": lamports / 1_000_000_000,
-                    "scope": "solana_signature_fee_mainnet_estimate",
-                    "reason": None,
-                    "detail": None,
-                }
-        except HTTPException:
-            pass
-        except Exception:
-            pass
+        if isinstance(lamports, int):
+            return {
+                "ok": True,
+                "lamports": lamports,
+                "sol": lamports / 1_000_000_000,
+                "scope": "solana_fee_for_message_estimate",
+                "reason": None,
+                "detail": None,
+            }
+
+        # getFees was removed from current RPC nodes and getFeeForMessage
+        # already failed above, so fall back to the flat per-signature fee.
+        fallback_lamports = 5000
 
         return {
             "ok": True,
@@ -4123,6 +4295,7 @@ def _attach_backend_network_fee_estimate(
     *,
     user_public_key: str | None,
     rpc_url: str,
+    pending_estimates: dict | None = None,
 ) -> dict | None:
     if not option:
         return option
@@ -4133,12 +4306,21 @@ def _attach_backend_network_fee_estimate(
         option["network_fee_detail"] = None
         return option
 
-    fee_result = _estimate_swap_network_fee_lamports(
-        quote_response=option.get("raw_quote"),
-        user_public_key=user_public_key,
-        rpc_url=rpc_url,
-        as_legacy_transaction=True,
-    )
+    pending = (pending_estimates or {}).get(_quote_option_output_key(option))
+    if pending is not None:
+        fee_result = get_network_fee_service().result(pending)
+        if fee_result is None:
+            option["estimated_network_fee"] = None
+            option["network_fee_scope"] = "not_estimated_in_preview"
+            option["network_fee_detail"] = "The network fee estimate did not finish in time for this preview."
+            return option
+    else:
+        fee_result = _estimate_swap_network_fee_lamports(
+            quote_response=option.get("raw_quote"),
+            user_public_key=user_public_key,
+            rpc_url=rpc_url,
+            as_legacy_transaction=True,
+        )
 
     if fee_result.get("ok"):
         option["estimated_network_fee"] = {
@@ -4154,10 +4336,50 @@ def _attach_backend_network_fee_estimate(
     return option
 
 
+def _start_network_fee_estimates(
+    ranked_options: list[dict],
+    *,
+    user_public_key: str | None,
+    rpc_url: str,
+) -> dict:
+    """
+    Starts fee estimates in ranked order so they run while reference prices,
+    cost fields, and option roles are assembled. The top executable route is
+    always started, on the service's primary lane; further Jupiter routes only
+    while the shared rate budget allows. Returns {option output key: Future}.
+    """
+    if not user_public_key:
+        return {}
+
+    service = get_network_fee_service()
+    pending: dict = {}
+    for option in ranked_options:
+        if len(pending) >= service.max_routes_per_quote:
+            break
+        if not _is_executable_quote_option(option):
+            continue
+        key = _quote_option_output_key(option)
+        if key in pending:
+            continue
+        if pending and option.get("provider") != "jupiter-metis":
+            continue
+        if pending and not service.try_acquire_budget():
+            break
+        pending[key] = service.submit(
+            _estimate_swap_network_fee_lamports,
+            primary=not pending,
+            quote_response=option.get("raw_quote"),
+            user_public_key=user_public_key,
+            rpc_url=rpc_url,
+            as_legacy_transaction=True,
+        )
+    return pending
+
 
+
 
-def _fetch_jupiter_quote(params: dict) -> dict:
-    url = "https://api.jup.ag/swap/v1/quote?" + urllib.parse.urlencode(params)
+def _fetch_jupiter_quote(params: dict, *, timeout: float = 20) -> dict:
+    url = jupiter_swap_api_base_url() + "/quote?" + urllib.parse.urlencode(params)
 
     headers = {
         "Accept": "application/json",
@@ -4173,8 +4395,11 @@ def _fetch_jupiter_quote(params: dict) -> dict:
         method="GET",
     )
 
+    upstream = jupiter_upstream()
+    if not acquire_upstream(upstream):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail(upstream))
     try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
             return json.loads(resp.read().decode("utf-8"))
     except urllib.error.HTTPError as e:
         body = e.read().decode("utf-8", errors="replace")
@@ -4183,9 +4408,9 @@ def _fetch_jupiter_quote(params: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"Jupiter request failed: {e}")
 
 
-def _try_fetch_jupiter_quote(params: dict) -> dict:
+def _try_fetch_jupiter_quote(params: dict, *, timeout: float = 20) -> dict:
     try:
-        return {"ok": True, "data": _fetch_jupiter_quote(params)}
+        return {"ok": True, "data": _fetch_jupiter_quote(params, timeout=timeout)}
     except HTTPException as e:
         return {
             "ok": False,
@@ -4249,8 +4474,8 @@ def _build_raydium_quote_params(
     }
 
 
-def _fetch_raydium_quote(params: dict) -> dict:
-    url = "https://transaction-v1.raydium.io/compute/swap-base-in?" + urllib.parse.urlencode(
+def _fetch_raydium_quote(params: dict, *, timeout: float = 20) -> dict:
+    url = raydium_trade_api_base_url() + "/compute/swap-base-in?" + urllib.parse.urlencode(
         params
     )
 
@@ -4263,8 +4488,10 @@ def _fetch_raydium_quote(params: dict) -> dict:
         method="GET",
     )
 
+    if not acquire_upstream("raydium"):
+        raise HTTPException(status_code=429, detail=_upstream_rate_limited_detail("raydium"))
     try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
 
             if payload.get("success") is False:
@@ -4279,9 +4506,9 @@ def _fetch_raydium_quote(params: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"Raydium request failed: {e}")
 
 
-def _try_fetch_raydium_quote(params: dict) -> dict:
+def _try_fetch_raydium_quote(params: dict, *, timeout: float = 20) -> dict:
     try:
-        return {"ok": True, "data": _fetch_raydium_quote(params)}
+        return {"ok": True, "data": _fetch_raydium_quote(params, timeout=timeout)}
     except HTTPException as e:
         return {
             "ok": False,
@@ -4376,20 +4603,13 @@ def _build_meteora_dlmm_quote_payload(
     }
 
 
-def _fetch_meteora_dlmm_quote(payload: dict) -> dict:
+def _fetch_meteora_dlmm_quote(payload: dict, *, timeout: float = 20) -> dict:
     helper_path = project_root() / "tools" / "meteora_dlmm_quote.mjs"
     if not helper_path.exists():
         raise HTTPException(status_code=502, detail=f"Meteora DLMM helper missing: {helper_path}")
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=20,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=timeout)
     except FileNotFoundError as e:
         raise HTTPException(status_code=502, detail=f"Meteora DLMM helper runtime missing: {e}")
     except subprocess.TimeoutExpired:
@@ -4415,9 +4635,9 @@ def _fetch_meteora_dlmm_quote(payload: dict) -> dict:
     return parsed
 
 
-def _try_fetch_meteora_dlmm_quote(payload: dict) -> dict:
+def _try_fetch_meteora_dlmm_quote(payload: dict, *, timeout: float = 20) -> dict:
     try:
-        data = _fetch_meteora_dlmm_quote(payload)
+        data = _fetch_meteora_dlmm_quote(payload, timeout=timeout)
         if data.get("ok") is True:
             return {"ok": True, "data": data}
 
@@ -4476,7 +4696,7 @@ def _build_orca_whirlpool_quote_payload(
     return payload
 
 
-def _fetch_orca_whirlpool_quote(payload: dict) -> dict:
+def _fetch_orca_whirlpool_quote(payload: dict, *, timeout: float = 20) -> dict:
     if payload.get("unsupported_pair"):
         raise HTTPException(
             status_code=400,
@@ -4488,14 +4708,7 @@ def _fetch_orca_whirlpool_quote(payload: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"Orca Whirlpool helper missing: {helper_path}")
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=20,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=timeout)
     except FileNotFoundError as e:
         raise HTTPException(status_code=502, detail=f"Orca Whirlpool helper runtime missing: {e}")
     except subprocess.TimeoutExpired:
@@ -4521,9 +4734,9 @@ def _fetch_orca_whirlpool_quote(payload: dict) -> dict:
     return parsed
 
 
-def _try_fetch_orca_whirlpool_quote(payload: dict) -> dict:
+def _try_fetch_orca_whirlpool_quote(payload: dict, *, timeout: float = 20) -> dict:
     try:
-        data = _fetch_orca_whirlpool_quote(payload)
+        data = _fetch_orca_whirlpool_quote(payload, timeout=timeout)
         if data.get("ok") is True:
             return {"ok": True, "data": data}
 
@@ -4577,7 +4790,7 @@ def _build_phoenix_quote_payload(
     return payload
 
 
-def _fetch_phoenix_quote(payload: dict) -> dict:
+def _fetch_phoenix_quote(payload: dict, *, timeout: float = 20) -> dict:
     if payload.get("unsupported_pair"):
         raise HTTPException(
             status_code=400,
@@ -4589,14 +4802,7 @@ def _fetch_phoenix_quote(payload: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"Phoenix helper missing: {helper_path}")
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=20,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=timeout)
     except FileNotFoundError as e:
         raise HTTPException(status_code=502, detail=f"Phoenix helper runtime missing: {e}")
     except subprocess.TimeoutExpired:
@@ -4622,9 +4828,9 @@ def _fetch_phoenix_quote(payload: dict) -> dict:
     return parsed
 
 
-def _try_fetch_phoenix_quote(payload: dict) -> dict:
+def _try_fetch_phoenix_quote(payload: dict, *, timeout: float = 20) -> dict:
     try:
-        data = _fetch_phoenix_quote(payload)
+        data = _fetch_phoenix_quote(payload, timeout=timeout)
         if data.get("ok") is True:
             return {"ok": True, "data": data}
 
@@ -4723,7 +4929,7 @@ def _build_pumpswap_quote_payload(
     return payload
 
 
-def _fetch_pumpswap_quote(payload: dict) -> dict:
+def _fetch_pumpswap_quote(payload: dict, *, timeout: float = 20) -> dict:
     if payload.get("unsupported_pair"):
         raise HTTPException(
             status_code=400,
@@ -4738,14 +4944,7 @@ def _fetch_pumpswap_quote(payload: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"PumpSwap helper missing: {helper_path}")
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=20,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=timeout)
     except FileNotFoundError as e:
         raise HTTPException(status_code=502, detail=f"PumpSwap helper runtime missing: {e}")
     except subprocess.TimeoutExpired:
@@ -4771,9 +4970,9 @@ def _fetch_pumpswap_quote(payload: dict) -> dict:
     return parsed
 
 
-def _try_fetch_pumpswap_quote(payload: dict) -> dict:
+def _try_fetch_pumpswap_quote(payload: dict, *, timeout: float = 20) -> dict:
     try:
-        data = _fetch_pumpswap_quote(payload)
+        data = _fetch_pumpswap_quote(payload, timeout=timeout)
         if data.get("ok") is True:
             return {"ok": True, "data": data}
 
@@ -4833,7 +5032,7 @@ def _build_phantom_quote_payload(
     return payload
 
 
-def _fetch_phantom_quote(payload: dict) -> dict:
+def _fetch_phantom_quote(payload: dict, *, timeout: float = 20) -> dict:
     if payload.get("unsupported_pair"):
         raise HTTPException(
             status_code=400,
@@ -4851,14 +5050,7 @@ def _fetch_phantom_quote(payload: dict) -> dict:
         raise HTTPException(status_code=502, detail=f"Phantom quote helper missing: {helper_path}")
 
     try:
-        proc = subprocess.run(
-            [os.getenv("NODE_BINARY") or "node", str(helper_path)],
-            input=json.dumps(payload),
-            capture_output=True,
-            text=True,
-            timeout=20,
-            cwd=project_root(),
-        )
+        proc = _run_node_helper(helper_path, payload, timeout=timeout)
     except FileNotFoundError as e:
         raise HTTPException(status_code=502, detail=f"Phantom quote helper runtime missing: {e}")
     except subprocess.TimeoutExpired:
@@ -4884,9 +5076,9 @@ def _fetch_phantom_quote(payload: dict) -> dict:
     return parsed
 
 
-def _try_fetch_phantom_quote(payload: dict) -> dict:
+def _try_fetch_phantom_quote(payload: dict, *, timeout: float = 20) -> dict:
     try:
-        data = _fetch_phantom_quote(payload)
+        data = _fetch_phantom_quote(payload, timeout=timeout)
         if data.get("ok") is True:
             return {"ok": True, "data": data}
 
@@ -4911,17 +5103,10 @@ def _try_fetch_phantom_quote(payload: dict) -> dict:
         }
 
 
-TOKEN_META_BY_MINT = {
-    (meta.get("mint") or "").strip(): {"symbol": symbol, **meta}
-    for symbol, meta in TOKEN_META.items()
-    if isinstance(meta, dict) and meta.get("mint")
-}
-
-
 def _mint_meta(fee_mint: str | None) -> dict | None:
     if not fee_mint:
         return None
-    return TOKEN_META_BY_MINT.get((fee_mint or "").strip())
+    return _token_meta_by_mint().get((fee_mint or "").strip())
 
 
 def _extract_explicit_route_fees(quote: dict) -> dict:
@@ -6540,7 +6725,12 @@ def swap_execute_preflight(payload: dict = Body(...)):
             "logs_preview": [],
         }
 
-    transaction_diagnostics = _decode_solana_transaction_diagnostics(
+    started = time.perf_counter()
+    timings_ms: dict[str, float] = {}
+    transaction_diagnostics = _timed_provider_call(
+        timings_ms,
+        "decode",
+        _decode_solana_transaction_diagnostics,
         transaction_base64,
         expected_user_public_key=user_public_key,
     )
@@ -6558,16 +6748,59 @@ def swap_execute_preflight(payload: dict = Body(...)):
             "transaction_diagnostics": transaction_diagnostics,
         }
 
-    setup_cost_estimate = _build_swap_setup_cost_estimate(transaction_diagnostics, rpc_url)
+    # Simulation, setup-cost (rent) lookup and the optional account check only
+    # share the decoded diagnostics, so they run side by side and are merged
+    # into the simulation response once all of them finish.
+    include_account_balances = bool(payload.get("include_account_balances", False))
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="swap-preflight") as pool:
+        simulation_future = pool.submit(
+            _timed_provider_call,
+            timings_ms,
+            "simulate",
+            lambda: get_solana_rpc_pool().call(
+                rpc_url,
+                lambda url: _fetch_solana_simulate_transaction(
+                    transaction_base64=transaction_base64,
+                    rpc_url=url,
+                    provider=provider,
+                    variant_id=variant_id,
+                    transaction_diagnostics=transaction_diagnostics,
+                ),
+                classify=_simulation_rpc_outcome,
+                hedge=True,
+                slow=True,
+            ),
+        )
+        setup_cost_future = pool.submit(
+            _timed_provider_call,
+            timings_ms,
+            "setup_cost",
+            _build_swap_setup_cost_estimate,
+            transaction_diagnostics,
+            rpc_url,
+        )
+        account_balances_future = (
+            pool.submit(
+                _timed_provider_call,
+                timings_ms,
+                "account_balances",
+                _fetch_swap_preflight_account_balances,
+                transaction_base64,
+                rpc_url,
+            )
+            if include_account_balances
+            else None
+        )
+        result = simulation_future.result()
+        setup_cost_estimate = setup_cost_future.result()
+        account_balances = account_balances_future.result() if account_balances_future else None
 
-    return _fetch_solana_simulate_transaction(
-        transaction_base64=transaction_base64,
-        rpc_url=rpc_url,
-        provider=provider,
-        variant_id=variant_id,
-        transaction_diagnostics=transaction_diagnostics,
-        setup_cost_estimate=setup_cost_estimate,
-    )
+    result = {**result, **(setup_cost_estimate or {})}
+    if account_balances_future is not None:
+        result["account_balances"] = account_balances
+    timings_ms["total"] = round((time.perf_counter() - started) * 1000.0, 2)
+    result["preflight_timings_ms"] = timings_ms
+    return result
 
 
 @app.post("/swap/execute/submit")
@@ -6610,26 +6843,41 @@ def swap_execute_submit(payload: dict = Body(...)):
             "Set SWAP_SUBMIT_RPC_URL, SOLANA_RPC_URL, SOLANA_MAINNET_RPC_URL, or HELIUS_RPC_URL to submit swaps.",
         )
 
-    result = _fetch_solana_send_transaction(
-        signed_transaction_base64=signed_transaction_base64,
-        rpc_url=rpc_url,
-        skip_preflight=skip_preflight,
-        preflight_commitment=preflight_commitment,
-    )
+    def send(url: str) -> dict:
+        return _fetch_solana_send_transaction(
+            signed_transaction_base64=signed_transaction_base64,
+            rpc_url=url,
+            skip_preflight=skip_preflight,
+            preflight_commitment=preflight_commitment,
+        )
+
+    pool = get_solana_rpc_pool()
+    if submit_fan_out_enabled():
+        # The same signed bytes land at most once, so every endpoint can race.
+        result, endpoint_count = pool.fan_out(rpc_url, send)
+    else:
+        result, endpoint_count = pool.call(rpc_url, send), 1
     if result.get("ok") is not True:
         return result
 
+    rpc_meta = {
+        "source": rpc_source,
+        "url_configured": True,
+    }
+    if endpoint_count > 1:
+        rpc_meta["fan_out_endpoints"] = endpoint_count
     return {
         "ok": True,
         "signature": result.get("signature"),
         "status": "submitted",
-        "rpc": {
-            "source": rpc_source,
-            "url_configured": True,
-        },
+        "rpc": rpc_meta,
     }
 
 
+SWAP_STATUS_WATCHER_MAX_AGE_SECONDS = 8
+SWAP_STATUS_STREAM_KEEPALIVE_SECONDS = 15
+
+
 @app.get("/swap/transaction/status")
 def swap_transaction_status(signature: str):
     signature = (signature or "").strip()
@@ -6646,9 +6894,20 @@ def swap_transaction_status(signature: str):
             "Set SWAP_SUBMIT_RPC_URL, SOLANA_RPC_URL, SOLANA_MAINNET_RPC_URL, or HELIUS_RPC_URL to check transaction status.",
         )
 
-    result = _fetch_solana_signature_status(signature=signature, rpc_url=rpc_url)
-    if result.get("ok") is not True:
-        return result
+    watcher = get_signature_watcher(_signature_watcher_fetch) if signature_watcher_enabled() else None
+    result = watcher.snapshot(signature, max_age_seconds=SWAP_STATUS_WATCHER_MAX_AGE_SECONDS) if watcher else None
+    if result is None:
+        result = get_solana_rpc_pool().call(
+            rpc_url,
+            lambda url: _fetch_solana_signature_status(signature=signature, rpc_url=url),
+            hedge=True,
+        )
+        if result.get("ok") is not True:
+            return result
+        if watcher:
+            # Later polls for this signature are answered from the watcher's
+            # batched ticks instead of one RPC call each.
+            watcher.register(signature, rpc_url, status=result)
 
     return {
         "ok": True,
@@ -6665,6 +6924,367 @@ def swap_transaction_status(signature: str):
     }
 
 
+def _swap_status_stream_event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _swap_status_watch_expired_event(signature: str, watch_seconds: float) -> str:
+    return _swap_status_stream_event(
+        "watch_expired",
+        {
+            "signature": signature,
+            "state": "timeout",
+            "watch_seconds": watch_seconds,
+            "message": "Stopped watching before the transaction confirmed; check its status directly.",
+        },
+    )
+
+
+@app.get("/swap/transaction/status/stream")
+async def swap_transaction_status_stream(signature: str):
+    signature = (signature or "").strip()
+    if not signature:
+        return _swap_submit_error(
+            "SWAP_STATUS_SIGNATURE_REQUIRED",
+            "Transaction signature is required.",
+        )
+    if not signature_watcher_enabled():
+        return _swap_submit_error(
+            "SWAP_STATUS_STREAM_DISABLED",
+            "Transaction status streaming is disabled.",
+        )
+
+    rpc_url, _rpc_source = _configured_swap_submit_rpc_url()
+    if not rpc_url:
+        return _swap_submit_error(
+            "SWAP_STATUS_RPC_CONFIG_MISSING",
+            "Set SWAP_SUBMIT_RPC_URL, SOLANA_RPC_URL, SOLANA_MAINNET_RPC_URL, or HELIUS_RPC_URL to check transaction status.",
+        )
+
+    watcher = get_signature_watcher(_signature_watcher_fetch)
+    # An async generator waiting on the event loop: an open stream holds no
+    # worker thread, so pending-swap tabs cannot starve sync endpoints.
+    subscriber = watcher.subscribe(signature, AsyncSubscriber(asyncio.get_running_loop()))
+    watcher.register(signature, rpc_url)
+
+    async def events():
+        try:
+            current = watcher.snapshot(signature, include_expired=True)
+            if current:
+                if current["state"] == "timeout":
+                    yield _swap_status_watch_expired_event(signature, watcher.watch_seconds)
+                    return
+                yield _swap_status_stream_event("status", current)
+                if current["state"] != "pending":
+                    return
+            deadline = time.monotonic() + watcher.watch_seconds + SWAP_STATUS_STREAM_KEEPALIVE_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.get(), timeout=min(SWAP_STATUS_STREAM_KEEPALIVE_SECONDS, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["state"] == "timeout":
+                    break
+                yield _swap_status_stream_event("status", event)
+                if event["state"] != "pending":
+                    return
+            yield _swap_status_watch_expired_event(signature, watcher.watch_seconds)
+        finally:
+            watcher.unsubscribe(signature, subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
+
+
+SWAP_QUOTE_CHECKED_VARIANTS = (
+    "recommended_default",
+    "broader_search",
+    "exclude_recommended_dexes",
+    "direct_route_check",
+    "raydium_quote",
+    "meteora_dlmm_quote",
+    "orca_whirlpool_quote",
+    "phoenix_quote",
+    "phantom_quote",
+    "pumpswap_quote",
+)
+# Timing key of the speculative exclude-dexes probe, kept apart from the
+# serial call so the two never overwrite each other.
+SPECULATIVE_EXCLUDE_TIMING_KEY = "exclude_recommended_dexes_speculative"
+
+
+def _late_bound(name: str):
+    """Calls the module-level function by name at call time, so patching api.main.<name> still applies."""
+    def call(*args, **kwargs):
+        return globals()[name](*args, **kwargs)
+
+    call.__name__ = name
+    return call
+
+
+def _jupiter_quote_params(request: QuoteRequest) -> dict:
+    return {
+        "inputMint": request.input_mint,
+        "outputMint": request.output_mint,
+        "amount": str(request.amount_raw),
+        "slippageBps": str(request.slippage_bps),
+        "restrictIntermediateTokens": "true",
+        "instructionVersion": "V2",
+    }
+
+
+def _raydium_quote_request_params(request: QuoteRequest) -> dict:
+    return _build_raydium_quote_params(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        tx_version="V0",
+    )
+
+
+def _meteora_dlmm_quote_request_payload(request: QuoteRequest) -> dict:
+    return _build_meteora_dlmm_quote_payload(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        rpc_url=request.rpc_url,
+    )
+
+
+def _orca_whirlpool_quote_request_payload(request: QuoteRequest) -> dict:
+    return _build_orca_whirlpool_quote_payload(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        rpc_url=request.rpc_url,
+    )
+
+
+def _phoenix_quote_request_payload(request: QuoteRequest) -> dict:
+    return _build_phoenix_quote_payload(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        rpc_url=request.rpc_url,
+    )
+
+
+def _phantom_quote_request_payload(request: QuoteRequest) -> dict:
+    return _build_phantom_quote_payload(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        user_public_key=request.user_public_key,
+    )
+
+
+def _pumpswap_quote_request_payload(request: QuoteRequest) -> dict:
+    return _build_pumpswap_quote_payload(
+        input_mint=request.input_mint,
+        output_mint=request.output_mint,
+        amount_raw=request.amount_raw,
+        slippage_bps=request.slippage_bps,
+        rpc_url=request.rpc_url,
+        user_public_key=request.user_public_key,
+        known_amm_pool_addresses=_known_pumpswap_amm_pool_addresses_from_meta(request.input_meta, request.output_meta),
+    )
+
+
+def _build_quote_provider_registry() -> QuoteProviderRegistry:
+    """
+    Quote universes in call order. Jupiter is core: swap_quote drives its four
+    variants itself because the exclude-dexes probe depends on the default
+    route. Every other provider runs through the same build/fetch/normalize
+    loop and can be switched off with SWAP_QUOTE_PROVIDERS_DISABLED.
+    """
+    registry = QuoteProviderRegistry()
+    for provider_id, variant_id, label, build, name, prepare in (
+        ("jupiter-metis", "recommended_default", "Recommended", "_jupiter_quote_params",
+         "jupiter", "_prepare_jupiter_swap_transaction"),
+        ("raydium-trade-api", "raydium_quote", "Via Raydium", "_raydium_quote_request_params",
+         "raydium", "_prepare_raydium_swap_transaction"),
+        ("meteora-dlmm", "meteora_dlmm_quote", "Via Meteora", "_meteora_dlmm_quote_request_payload",
+         "meteora_dlmm", "_prepare_meteora_dlmm_swap_transaction"),
+        ("orca-whirlpool", "orca_whirlpool_quote", "Via Orca", "_orca_whirlpool_quote_request_payload",
+         "orca_whirlpool", "_prepare_orca_whirlpool_swap_transaction"),
+        ("phoenix-clob", "phoenix_quote", "Via Phoenix", "_phoenix_quote_request_payload",
+         "phoenix", None),
+        ("phantom-routing-api", "phantom_quote", "Via Phantom", "_phantom_quote_request_payload",
+         "phantom", None),
+        ("pumpswap", "pumpswap_quote", "Via PumpSwap", "_pumpswap_quote_request_payload",
+         "pumpswap", "_prepare_pumpswap_swap_transaction"),
+    ):
+        registry.register(QuoteProvider(
+            provider_id=provider_id,
+            variant_id=variant_id,
+            label=label,
+            build_payload=_late_bound(build),
+            try_fetch=_late_bound(f"_try_fetch_{name}_quote"),
+            normalize=_late_bound("_normalize_quote_option" if name == "jupiter" else f"_normalize_{name}_quote_option"),
+            capabilities=SWAP_EXECUTION_PROVIDER_CAPABILITIES.get(provider_id, {}),
+            prepare=_late_bound(prepare) if prepare else None,
+            core=provider_id == "jupiter-metis",
+        ))
+    return registry
+
+
+QUOTE_PROVIDERS = _build_quote_provider_registry()
+
+
+def _run_registered_quote_provider(
+    provider: QuoteProvider,
+    request: QuoteRequest,
+    schedule,
+    timings_ms: dict,
+    *,
+    from_token: str,
+    to_token: str,
+    input_amount: float,
+) -> tuple[dict | None, dict | None]:
+    """(option, diagnostic) for one non-core provider; both None when the schedule skipped it."""
+    if not schedule.should_run(provider.variant_id):
+        return None, None
+    payload = provider.build_payload(request)
+    result = _scheduled_provider_call(schedule, timings_ms, provider.variant_id, provider.try_fetch, payload)
+    if not result:
+        return None, None
+    if not result["ok"]:
+        return None, {"variant_id": provider.variant_id, **result["error"]}
+    option = provider.normalize(
+        variant_id=provider.variant_id,
+        label=provider.label,
+        kind="alternative",
+        quote=result["data"],
+        from_token=from_token,
+        to_token=to_token,
+        input_amount=input_amount,
+        input_amount_raw=request.amount_raw,
+        output_decimals=request.output_meta["decimals"],
+    )
+    return option, None
+
+
+@app.get("/swap/quote/providers")
+def swap_quote_providers():
+    return {"ok": True, "providers": QUOTE_PROVIDERS.describe()}
+
+
+def _timed_provider_call(timings_ms: dict, variant_id: str, fn, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings_ms[variant_id] = round((time.perf_counter() - started) * 1000.0, 2)
+
+
+def _provider_failure_kind(error) -> str:
+    """Coarse, low-cardinality failure label for the provider error metric."""
+    if not isinstance(error, dict):
+        return "provider_failure"
+    helper_error = error.get("helper_error") if isinstance(error.get("helper_error"), dict) else {}
+    status_code = error.get("status_code")
+    code = error.get("code") or error.get("error_code") or helper_error.get("code")
+    text = " ".join(str(part).lower() for part in (code, error.get("detail"), helper_error.get("message")) if part)
+    if status_code == 429 or "too many requests" in text or "rate limit" in text:
+        return "rate_limited"
+    if status_code == 504 or "timed out" in text or "timeout" in text:
+        return "timeout"
+    if "no_routes_found" in text or "no routes found" in text or "could_not_find_any_route" in text:
+        return "no_route"
+    if code in {"NO_DISCOVERED_POOL", "NO_USABLE_DISCOVERED_POOL", "NO_PUMPSWAP_POOL"}:
+        return "no_pool"
+    if "unsupported" in text:
+        return "unsupported"
+    return "provider_failure"
+
+
+def _quote_provider_call(timings_ms: dict, variant_id: str, fn, *args, **kwargs):
+    """_timed_provider_call plus the provider latency histogram and error counter."""
+    failure_kind = "provider_failure"
+    try:
+        result = _timed_provider_call(timings_ms, variant_id, fn, *args, **kwargs)
+        if isinstance(result, dict) and result.get("ok") is False:
+            failure_kind = _provider_failure_kind(result.get("error"))
+        else:
+            failure_kind = None
+        return result
+    except HTTPException as e:
+        failure_kind = _provider_failure_kind({"status_code": e.status_code, "detail": e.detail})
+        raise
+    finally:
+        metrics = get_metrics()
+        outcome = "ok" if failure_kind is None else "error"
+        metrics.provider_latency_ms.observe(timings_ms.get(variant_id, 0.0), variant_id, outcome)
+        if failure_kind is not None:
+            metrics.provider_errors.inc(variant_id, failure_kind)
+
+
+def _scheduled_provider_call(schedule, timings_ms: dict, variant_id: str, fn, *args):
+    if not schedule.should_run(variant_id):
+        return None
+    return _quote_provider_call(timings_ms, variant_id, fn, *args, **schedule.call_kwargs(variant_id))
+
+
+def _record_swap_quote_observations(**kwargs) -> None:
+    # Observation logging must never change or fail a quote response.
+    try:
+        record_quote_observations(build_quote_observation_rows(**kwargs))
+    except Exception:
+        pass
+
+
+@app.get("/swap/quote/observations")
+def swap_quote_observations(
+    input_mint: str | None = Query(None),
+    output_mint: str | None = Query(None),
+    provider: str | None = Query(None),
+    since: str | None = Query(None, description="Inclusive ISO timestamp lower bound"),
+    until: str | None = Query(None, description="Exclusive ISO timestamp upper bound"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    rows = db.get_quote_observations(
+        input_mint=(input_mint or "").strip() or None,
+        output_mint=(output_mint or "").strip() or None,
+        provider=(provider or "").strip() or None,
+        since=since,
+        until=until,
+        limit=limit,
+        db_path=ensure_quote_observation_schema(),
+    )
+    return {"ok": True, "count": len(rows), "observations": rows}
+
+
+@app.get("/swap/quote/provider-stats")
+def swap_quote_provider_stats(
+    input_mint: str | None = Query(None),
+    output_mint: str | None = Query(None),
+    since: str | None = Query(None, description="Inclusive ISO timestamp lower bound"),
+    until: str | None = Query(None, description="Exclusive ISO timestamp upper bound"),
+):
+    return {
+        "ok": True,
+        "variants": db.get_quote_provider_stats(
+            input_mint=(input_mint or "").strip() or None,
+            output_mint=(output_mint or "").strip() or None,
+            since=since,
+            until=until,
+            db_path=ensure_quote_observation_schema(),
+        ),
+        "writer": get_quote_observation_writer().stats(),
+    }
+
+
 @app.get("/swap/quote")
 def swap_quote(
     from_token: str,
@@ -6685,8 +7305,10 @@ def swap_quote(
     if from_token_query == to_token_query:
         raise HTTPException(status_code=400, detail="from_token and to_token must be different")
 
+    stages = StageTimer("swap_quote")
     input_meta = _resolve_swap_token_for_quote(from_token_query)
     output_meta = _resolve_swap_token_for_quote(to_token_query)
+    stages.mark("resolve_tokens")
     if not input_meta or input_meta.get("resolution_error"):
         raise HTTPException(
             status_code=400,
@@ -6723,18 +7345,60 @@ def swap_quote(
 
     raw_amount = to_raw_amount(amount, input_meta["decimals"])
 
-    base_params = {
-        "inputMint": input_meta["mint"],
-        "outputMint": output_meta["mint"],
-        "amount": str(raw_amount),
-        "slippageBps": "50",
-        "restrictIntermediateTokens": "true",
-        "instructionVersion": "V2",
-    }
+    quote_request = QuoteRequest(
+        input_meta=input_meta,
+        output_meta=output_meta,
+        amount_raw=raw_amount,
+        slippage_bps=50,
+        rpc_url=solana_mainnet_rpc_url(),
+        user_public_key=user_public_key,
+    )
+    base_params = _jupiter_quote_params(quote_request)
 
     diagnostics = []
     variant_candidates = []
     external_other_options = []
+    provider_timings_ms: dict[str, float] = {}
+    quote_schedule = plan_quote_schedule(
+        list(SWAP_QUOTE_CHECKED_VARIANTS),
+        input_meta=input_meta,
+        output_meta=output_meta,
+    )
+    for variant_id in QUOTE_PROVIDERS.disabled_variants():
+        quote_schedule.disable(variant_id, "provider_disabled")
+
+    # Speculative mode: send the exclude-dexes variant now with the route
+    # labels last seen for this pair/amount bucket, overlapping the default
+    # quote. It is only kept if the default route uses the same labels.
+    speculative_exclude = None
+    speculative_exclude_params = None
+    # The probe keeps its own timings: a discarded probe may still be in
+    # flight while the serial call runs and the response is built.
+    speculative_timings_ms: dict[str, float] = {}
+    exclude_speculation = {
+        "enabled": speculative_exclude_enabled(),
+        "cached_labels": None,
+        "outcome": "disabled",
+    }
+    if exclude_speculation["enabled"]:
+        cached_labels = get_route_label_cache().get(input_meta["mint"], output_meta["mint"], raw_amount)
+        count_cache_lookup("jupiter_route_labels", "hit" if cached_labels else "miss")
+        exclude_speculation["cached_labels"] = cached_labels
+        exclude_speculation["outcome"] = "no_cached_labels"
+        if cached_labels and quote_schedule.should_run("exclude_recommended_dexes"):
+            speculative_exclude_params = {
+                **base_params,
+                "excludeDexes": ",".join(cached_labels),
+            }
+            speculative_exclude = submit_speculative_probe(
+                _quote_provider_call,
+                speculative_timings_ms,
+                SPECULATIVE_EXCLUDE_TIMING_KEY,
+                _try_fetch_jupiter_quote,
+                speculative_exclude_params,
+                **quote_schedule.call_kwargs("exclude_recommended_dexes"),
+            )
+            exclude_speculation["outcome"] = "pending"
 
     # 1) Recommended/default Jupiter quote. A Jupiter no-route response is a
     # provider miss for this preview, not a reason to skip the rest of the
@@ -6742,7 +7406,9 @@ def swap_quote(
     recommended_raw = None
     recommended = None
     try:
-        recommended_raw = _fetch_jupiter_quote(base_params)
+        recommended_raw = _quote_provider_call(
+            provider_timings_ms, "recommended_default", _fetch_jupiter_quote, base_params
+        )
         recommended = _normalize_quote_option(
             variant_id="recommended_default",
             label="Recommended",
@@ -6763,8 +7429,10 @@ def swap_quote(
         **base_params,
         "restrictIntermediateTokens": "false",
     }
-    broader_result = _try_fetch_jupiter_quote(broader_params)
-    if broader_result["ok"]:
+    broader_result = _scheduled_provider_call(
+        quote_schedule, provider_timings_ms, "broader_search", _try_fetch_jupiter_quote, broader_params
+    )
+    if broader_result and broader_result["ok"]:
         variant_candidates.append(
             _normalize_quote_option(
                 variant_id="broader_search",
@@ -6779,18 +7447,44 @@ def swap_quote(
                 checked_params=broader_params,
             )
         )
-    else:
+    elif broader_result:
         diagnostics.append(_jupiter_quote_failure_diagnostic("broader_search", broader_result["error"]))
 
     # 3) Force an alternate venue mix by excluding DEX labels from the recommended route
     recommended_labels = recommended.get("route_labels") if recommended else []
     if recommended_labels:
-        exclude_params = {
-            **base_params,
-            "excludeDexes": ",".join(recommended_labels),
-        }
-        exclude_result = _try_fetch_jupiter_quote(exclude_params)
-        if exclude_result["ok"]:
+        get_route_label_cache().put(input_meta["mint"], output_meta["mint"], raw_amount, recommended_labels)
+    if speculative_exclude is not None and not same_route_labels(
+        exclude_speculation["cached_labels"], recommended_labels
+    ):
+        # cancel() only stops a probe still queued; one already sent is left
+        # to finish and its result (and Jupiter quota) is wasted.
+        probe_state = "discarded_not_started" if speculative_exclude.cancel() else "discarded_in_flight"
+        count_speculative_probe(probe_state)
+        exclude_speculation["probe"] = probe_state
+        if speculative_exclude.done() and not speculative_exclude.cancelled():
+            provider_timings_ms.update(speculative_timings_ms)
+        speculative_exclude = None
+        exclude_speculation["outcome"] = "miss" if recommended_labels else "discarded"
+    if recommended_labels:
+        if speculative_exclude is not None:
+            exclude_params = speculative_exclude_params
+            exclude_result = speculative_exclude.result()
+            count_speculative_probe("used")
+            exclude_speculation["outcome"] = "hit"
+            exclude_speculation["probe"] = "used"
+            provider_timings_ms.update(speculative_timings_ms)
+            if SPECULATIVE_EXCLUDE_TIMING_KEY in speculative_timings_ms:
+                provider_timings_ms["exclude_recommended_dexes"] = speculative_timings_ms[SPECULATIVE_EXCLUDE_TIMING_KEY]
+        else:
+            exclude_params = {
+                **base_params,
+                "excludeDexes": ",".join(recommended_labels),
+            }
+            exclude_result = _scheduled_provider_call(
+                quote_schedule, provider_timings_ms, "exclude_recommended_dexes", _try_fetch_jupiter_quote, exclude_params
+            )
+        if exclude_result and exclude_result["ok"]:
             variant_candidates.append(
                 _normalize_quote_option(
                     variant_id="exclude_recommended_dexes",
@@ -6805,7 +7499,7 @@ def swap_quote(
                     checked_params=exclude_params,
                 )
             )
-        else:
+        elif exclude_result:
             diagnostics.append(
                 _jupiter_quote_failure_diagnostic(
                     "exclude_recommended_dexes",
@@ -6818,9 +7512,11 @@ def swap_quote(
         **base_params,
         "onlyDirectRoutes": "true",
     }
-    direct_result = _try_fetch_jupiter_quote(direct_params)
     direct_route_check = None
-    if direct_result["ok"]:
+    direct_result = _scheduled_provider_call(
+        quote_schedule, provider_timings_ms, "direct_route_check", _try_fetch_jupiter_quote, direct_params
+    )
+    if direct_result and direct_result["ok"]:
         direct_route_check = _normalize_quote_option(
             variant_id="direct_route_check",
             label="Direct route check",
@@ -6833,160 +7529,27 @@ def swap_quote(
             output_decimals=output_meta["decimals"],
             checked_params=direct_params,
         )
-    else:
+    elif direct_result:
         diagnostics.append(_jupiter_quote_failure_diagnostic("direct_route_check", direct_result["error"]))
 
-    raydium_params = _build_raydium_quote_params(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        tx_version="V0",
-    )
-    raydium_result = _try_fetch_raydium_quote(raydium_params)
-    if raydium_result["ok"]:
-        external_other_options.append(
-            _normalize_raydium_quote_option(
-                variant_id="raydium_quote",
-                label="Via Raydium",
-                kind="alternative",
-                quote=raydium_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
-        )
-    else:
-        diagnostics.append({"variant_id": "raydium_quote", **raydium_result["error"]})
-
-    meteora_payload = _build_meteora_dlmm_quote_payload(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        rpc_url=SOLANA_MAINNET_RPC_URL,
-    )
-    meteora_result = _try_fetch_meteora_dlmm_quote(meteora_payload)
-    if meteora_result["ok"]:
-        external_other_options.append(
-            _normalize_meteora_dlmm_quote_option(
-                variant_id="meteora_dlmm_quote",
-                label="Via Meteora",
-                kind="alternative",
-                quote=meteora_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
-        )
-    else:
-        diagnostics.append({"variant_id": "meteora_dlmm_quote", **meteora_result["error"]})
-
-    orca_payload = _build_orca_whirlpool_quote_payload(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        rpc_url=SOLANA_MAINNET_RPC_URL,
-    )
-    orca_result = _try_fetch_orca_whirlpool_quote(orca_payload)
-    if orca_result["ok"]:
-        external_other_options.append(
-            _normalize_orca_whirlpool_quote_option(
-                variant_id="orca_whirlpool_quote",
-                label="Via Orca",
-                kind="alternative",
-                quote=orca_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
-        )
-    else:
-        diagnostics.append({"variant_id": "orca_whirlpool_quote", **orca_result["error"]})
-
-    phoenix_payload = _build_phoenix_quote_payload(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        rpc_url=SOLANA_MAINNET_RPC_URL,
-    )
-    phoenix_result = _try_fetch_phoenix_quote(phoenix_payload)
-    if phoenix_result["ok"]:
-        external_other_options.append(
-            _normalize_phoenix_quote_option(
-                variant_id="phoenix_quote",
-                label="Via Phoenix",
-                kind="alternative",
-                quote=phoenix_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
+    for provider in QUOTE_PROVIDERS.enabled():
+        if provider.core:
+            continue
+        option, diagnostic = _run_registered_quote_provider(
+            provider,
+            quote_request,
+            quote_schedule,
+            provider_timings_ms,
+            from_token=from_token,
+            to_token=to_token,
+            input_amount=amount,
         )
-    else:
-        diagnostics.append({"variant_id": "phoenix_quote", **phoenix_result["error"]})
+        if option:
+            external_other_options.append(option)
+        elif diagnostic:
+            diagnostics.append(diagnostic)
 
-    phantom_payload = _build_phantom_quote_payload(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        user_public_key=user_public_key,
-    )
-    phantom_result = _try_fetch_phantom_quote(phantom_payload)
-    if phantom_result["ok"]:
-        external_other_options.append(
-            _normalize_phantom_quote_option(
-                variant_id="phantom_quote",
-                label="Via Phantom",
-                kind="alternative",
-                quote=phantom_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
-        )
-    else:
-        diagnostics.append({"variant_id": "phantom_quote", **phantom_result["error"]})
-
-    pumpswap_payload = _build_pumpswap_quote_payload(
-        input_mint=input_meta["mint"],
-        output_mint=output_meta["mint"],
-        amount_raw=raw_amount,
-        slippage_bps=50,
-        rpc_url=SOLANA_MAINNET_RPC_URL,
-        user_public_key=user_public_key,
-        known_amm_pool_addresses=_known_pumpswap_amm_pool_addresses_from_meta(input_meta, output_meta),
-    )
-    pumpswap_result = _try_fetch_pumpswap_quote(pumpswap_payload)
-    if pumpswap_result["ok"]:
-        external_other_options.append(
-            _normalize_pumpswap_quote_option(
-                variant_id="pumpswap_quote",
-                label="Via PumpSwap",
-                kind="alternative",
-                quote=pumpswap_result["data"],
-                from_token=from_token,
-                to_token=to_token,
-                input_amount=amount,
-                input_amount_raw=raw_amount,
-                output_decimals=output_meta["decimals"],
-            )
-        )
-    else:
-        diagnostics.append({"variant_id": "pumpswap_quote", **pumpswap_result["error"]})
+    stages.mark("providers")
 
     # Build the ranked Jupiter candidate pool from all successful checked variants.
     # This remains the executable universe for now.
@@ -7002,6 +7565,12 @@ def swap_quote(
         [*ranked_jupiter_candidates, *external_other_options]
     )
     direct_route_base = _select_direct_route_option(ranked_universe_options)
+    pending_fee_estimates = _start_network_fee_estimates(
+        ranked_universe_options,
+        user_public_key=user_public_key,
+        rpc_url=quote_request.rpc_url,
+    )
+    stages.mark("rank")
 
     try:
         reference_prices = _resolve_quote_reference_prices_usd([from_token, to_token, "SOL"])
@@ -7014,6 +7583,7 @@ def swap_quote(
             to_token: output_meta,
         },
     )
+    stages.mark("reference_prices")
 
     if not ranked_universe_options:
         inline_baseline, inline_baseline_vs_recommended = _build_fresh_quote_reference_baseline(
@@ -7024,6 +7594,19 @@ def swap_quote(
             best_output_amount=None,
             reference_prices=reference_prices,
         )
+        _record_swap_quote_observations(
+            network=network,
+            input_meta=input_meta,
+            output_meta=output_meta,
+            from_token=from_token,
+            to_token=to_token,
+            input_amount=amount,
+            input_amount_raw=raw_amount,
+            options=[],
+            diagnostics=diagnostics,
+            timings_ms=provider_timings_ms,
+            pair_class=quote_schedule.pair_class,
+        )
         return {
             "ok": False,
             "no_route": True,
@@ -7048,18 +7631,8 @@ def swap_quote(
                 "selection_basis": "no_live_route_returned",
                 "headline_label": "No executable route found",
                 "recommended_reason": "Reference pricing is not an executable route.",
-                "checked_variants": [
-                    "recommended_default",
-                    "broader_search",
-                    "exclude_recommended_dexes",
-                    "direct_route_check",
-                    "raydium_quote",
-                    "meteora_dlmm_quote",
-                    "orca_whirlpool_quote",
-                    "phoenix_quote",
-                    "phantom_quote",
-                    "pumpswap_quote",
-                ],
+                "checked_variants": quote_schedule.checked_variants(),
+                "skipped_variants": quote_schedule.skipped_variants(),
                 "uses_external_tokens": bool(external_tokens),
             },
             "external_tokens": external_tokens,
@@ -7067,7 +7640,10 @@ def swap_quote(
                 "route_debug": None,
                 "ranked_jupiter_variants": [],
                 "variant_errors": diagnostics,
+                "quote_schedule": quote_schedule.debug(),
+                "jupiter_exclude_speculation": exclude_speculation,
                 "external_tokens": external_tokens,
+                "timings": {**stages.finish(), "providers": provider_timings_ms},
                 "notes": [
                     "Reference pricing is not an executable route.",
                     "No checked provider returned a usable live swap route for this request.",
@@ -7171,6 +7747,8 @@ def swap_quote(
         "The best quote had the strongest checked output among the currently available variants."
     )
 
+    stages.mark("select")
+
     best_output_amount = _safe_float(best_quote_option.get("estimated_output"))
     inline_baseline, inline_baseline_vs_recommended = _build_fresh_quote_reference_baseline(
         from_token=from_token,
@@ -7216,7 +7794,8 @@ def swap_quote(
         best_quote_option = _attach_backend_network_fee_estimate(
             best_quote_option,
             user_public_key=user_public_key,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=quote_request.rpc_url,
+            pending_estimates=pending_fee_estimates,
         )
     else:
         best_quote_option["estimated_network_fee"] = None
@@ -7231,7 +7810,8 @@ def swap_quote(
         recommended_executable_option = _attach_backend_network_fee_estimate(
             recommended_executable_option,
             user_public_key=user_public_key,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=quote_request.rpc_url,
+            pending_estimates=pending_fee_estimates,
         )
 
     for opt in ranked_other_options:
@@ -7245,11 +7825,18 @@ def swap_quote(
             opt["estimated_network_fee"] = None
             opt["network_fee_scope"] = "wallet_not_connected"
             opt["network_fee_detail"] = None
+        elif _quote_option_output_key(opt) in pending_fee_estimates:
+            _attach_backend_network_fee_estimate(
+                opt,
+                user_public_key=user_public_key,
+                rpc_url=quote_request.rpc_url,
+                pending_estimates=pending_fee_estimates,
+            )
         else:
             opt["estimated_network_fee"] = None
             opt["network_fee_scope"] = "not_estimated_in_preview"
             opt["network_fee_detail"] = (
-               "Fee estimation is currently limited to the recommended route to avoid provider rate limits."
+               "Fee estimation for additional routes is limited by the shared fee-estimate rate budget."
             )
 
     if direct_route_output:
@@ -7257,13 +7844,22 @@ def swap_quote(
             direct_route_output["estimated_network_fee"] = None
             direct_route_output["network_fee_scope"] = "wallet_not_connected"
             direct_route_output["network_fee_detail"] = None
+        elif _quote_option_output_key(direct_route_output) in pending_fee_estimates:
+            _attach_backend_network_fee_estimate(
+                direct_route_output,
+                user_public_key=user_public_key,
+                rpc_url=quote_request.rpc_url,
+                pending_estimates=pending_fee_estimates,
+            )
         else:
             direct_route_output["estimated_network_fee"] = None
             direct_route_output["network_fee_scope"] = "not_estimated_in_preview"
             direct_route_output["network_fee_detail"] = (
-                "Fee estimation is currently limited to the recommended route to avoid provider rate limits."
+                "Fee estimation for additional routes is limited by the shared fee-estimate rate budget."
             )
     
+
+    stages.mark("costs_and_fees")
 
     best_quote_option = _attach_recommended_swap_cost_summary(
         best_quote_option,
@@ -7334,6 +7930,36 @@ def swap_quote(
         network=network,
     )
 
+    _record_swap_quote_observations(
+        network=network,
+        input_meta=input_meta,
+        output_meta=output_meta,
+        from_token=from_token,
+        to_token=to_token,
+        input_amount=amount,
+        input_amount_raw=raw_amount,
+        options=[
+            opt
+            for opt in (
+                best_quote_option,
+                recommended_option,
+                direct_route_output,
+                *ranked_other_options,
+                recommended,
+                *variant_candidates,
+                direct_route_check,
+                *external_other_options,
+            )
+            if opt
+        ],
+        diagnostics=diagnostics,
+        timings_ms=provider_timings_ms,
+        best_variant_id=best_quote_variant_id,
+        recommended_variant_id=recommended_option.get("variant_id") if recommended_option else None,
+        reference_output_amount=reference_output_amount,
+        pair_class=quote_schedule.pair_class,
+    )
+
     return {
         "ok": True,
         "network": network,
@@ -7373,18 +7999,8 @@ def swap_quote(
             "direct_route_variant_id": direct_route_variant_id,
             "best_quote_is_executable": _is_executable_quote_option(best_quote_option),
             "recommended_is_executable": _is_executable_quote_option(recommended_option),
-            "checked_variants": [
-                "recommended_default",
-                "broader_search",
-                "exclude_recommended_dexes",
-                "direct_route_check",
-                "raydium_quote",
-                "meteora_dlmm_quote",
-                "orca_whirlpool_quote",
-                "phoenix_quote",
-                "phantom_quote",
-                "pumpswap_quote",
-            ],
+            "checked_variants": quote_schedule.checked_variants(),
+            "skipped_variants": quote_schedule.skipped_variants(),
             "available_other_options": len(ranked_other_options),
             "alternatives_show_all_remaining_universes": True,
             "direct_route_available": direct_route_output is not None,
@@ -7400,7 +8016,10 @@ def swap_quote(
             "route_debug": (recommended_raw or {}).get("mostReliableAmmsQuoteReport"),
             "ranked_jupiter_variants": ranked_jupiter_variant_debug,
             "variant_errors": diagnostics,
+            "quote_schedule": quote_schedule.debug(),
+            "jupiter_exclude_speculation": exclude_speculation,
             "external_tokens": external_tokens,
+            "timings": {**stages.finish(), "providers": provider_timings_ms},
             "notes": [
                 "Recommended is selected by highest receive amount across live quote universes, not by estimated total swap cost.",
                 "Execution availability is separate from recommendation. Quote-only routes are not clickable yet.",
@@ -7671,6 +8290,27 @@ def refresh_prices(
     return {"currency": currency, "source": source, "assets": assets_list, "result": r}
 
 
+def _ui_asset_bundle():
+    # The UI template is ~250 KB of source; workers, tools and tests that
+    # never serve /ui should not pay to load it.
+    from .ui_assets import get_ui_asset_bundle
+    from .ui_page import build_ui_html
+
+    return get_ui_asset_bundle(build_ui_html)
+
+
 @app.get("/ui", response_class=HTMLResponse)
-def ui():
-    return HTMLResponse(build_ui_html())
+def ui(request: Request):
+    from .ui_assets import asset_response
+
+    return asset_response(request, _ui_asset_bundle().shell)
+
+
+@app.get("/ui/assets/{name}")
+def ui_asset(name: str, request: Request):
+    from .ui_assets import asset_response
+
+    asset = _ui_asset_bundle().asset(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="unknown UI asset")
+    return asset_response(request, asset)
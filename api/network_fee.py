@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from providers.rate_limiter import PRIORITY_BACKGROUND, get_upstream_rate_limiter
+
+# Upstream limiter bucket that extra-route estimates spend from.
+NETWORK_FEE_UPSTREAM = "network_fee"
+DEFAULT_FEE_TTL_SECONDS = 60
+DEFAULT_MAX_ROUTES_PER_QUOTE = 4
+DEFAULT_FEE_WORKERS = 4
+DEFAULT_PRIMARY_FEE_WORKERS = 4
+DEFAULT_RESULT_TIMEOUT_SECONDS = 5.0
+
+
+class NetworkFeeService:
+    """
+    Shared state for backend fee estimation:
+
+    - getFeeForMessage results per (RPC URL, message shape), where the shape
+      is what the fee depends on: signer count and compute-budget price/limit
+    - a budget on swap-instructions calls for extra routes, taken from the
+      upstream rate limiter's network_fee bucket at background priority
+      (enforced whether or not UPSTREAM_RATE_LIMITER is on)
+    - two small worker pools so estimates overlap the rest of quote assembly:
+      each quote's top executable route has its own lane, so it never
+      queues behind other requests' estimates for extra routes
+    """
+
+    def __init__(
+        self,
+        *,
+        fee_ttl_seconds: float = DEFAULT_FEE_TTL_SECONDS,
+        max_routes_per_quote: int = DEFAULT_MAX_ROUTES_PER_QUOTE,
+        max_workers: int = DEFAULT_FEE_WORKERS,
+        primary_workers: int = DEFAULT_PRIMARY_FEE_WORKERS,
+        result_timeout_seconds: float = DEFAULT_RESULT_TIMEOUT_SECONDS,
+    ):
+        self.fee_ttl_seconds = float(fee_ttl_seconds)
+        self.max_routes_per_quote = max(1, int(max_routes_per_quote))
+        self.max_workers = max(1, int(max_workers))
+        self.primary_workers = max(1, int(primary_workers))
+        self.result_timeout_seconds = float(result_timeout_seconds)
+        self._lock = threading.Lock()
+        self._fees: dict[tuple, tuple[float, int]] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._primary_executor: ThreadPoolExecutor | None = None
+        self.fee_hits = 0
+        self.fee_misses = 0
+        self.budget_rejections = 0
+        self.result_timeouts = 0
+
+    def fee_for_shape(self, rpc_url: str, shape: tuple, fetch: Callable[[], int | None]) -> int | None:
+        key = (rpc_url, shape)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._fees.get(key)
+            if entry and now - entry[0] < self.fee_ttl_seconds:
+                self.fee_hits += 1
+                return entry[1]
+            self.fee_misses += 1
+        lamports = fetch()
+        if isinstance(lamports, int):
+            with self._lock:
+                self._fees[key] = (time.monotonic(), lamports)
+        return lamports
+
+    def try_acquire_budget(self) -> bool:
+        # Goes to the limiter directly rather than through acquire_upstream():
+        # the budget holds even when UPSTREAM_RATE_LIMITER is off, since
+        # nothing else caps the extra swap-instructions calls. Never waits: a
+        # route that cannot be estimated now is reported without a fee.
+        if get_upstream_rate_limiter().acquire(NETWORK_FEE_UPSTREAM, PRIORITY_BACKGROUND, wait=False):
+            return True
+        with self._lock:
+            self.budget_rejections += 1
+        return False
+
+    def submit(self, fn, *args, primary: bool = False, **kwargs) -> Future:
+        with self._lock:
+            if primary:
+                if self._primary_executor is None:
+                    self._primary_executor = ThreadPoolExecutor(
+                        max_workers=self.primary_workers,
+                        thread_name_prefix="network-fee-primary",
+                    )
+                executor = self._primary_executor
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="network-fee",
+                    )
+                executor = self._executor
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def result(self, future: Future):
+        """The estimate, or None if it is not done within result_timeout_seconds."""
+        try:
+            return future.result(timeout=self.result_timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.result_timeouts += 1
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "fee_hits": self.fee_hits,
+                "fee_misses": self.fee_misses,
+                "budget_rejections": self.budget_rejections,
+                "result_timeouts": self.result_timeouts,
+            }
+
+
+_SERVICE: NetworkFeeService | None = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_network_fee_service() -> NetworkFeeService:
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = NetworkFeeService()
+        return _SERVICE
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+SAMPLING_PROFILER_CONTROL_ENV = "SAMPLING_PROFILER_CONTROL"
+DEFAULT_INTERVAL_MS = 10.0
+MIN_INTERVAL_MS = 1.0
+MAX_STACK_DEPTH = 64
+# Distinct stacks kept; once full, new stacks are counted as "(other)".
+MAX_DISTINCT_STACKS = 5000
+
+
+def profiler_control_enabled() -> bool:
+    raw = (os.getenv(SAMPLING_PROFILER_CONTROL_ENV) or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _folded_stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler: a daemon thread reads every other thread's stack
+    every interval_ms and counts folded stacks ("outer;...;inner"), the
+    input format of flamegraph.pl and speedscope. Off until start() is
+    called; stopping keeps the samples until reset().
+    """
+
+    def __init__(self, interval_ms: float = DEFAULT_INTERVAL_MS):
+        self.interval_ms = max(MIN_INTERVAL_MS, float(interval_ms))
+        self._lock = threading.Lock()
+        self._stacks: Counter[str] = Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.samples = 0
+        self.started_at: float | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float | None = None) -> None:
+        with self._lock:
+            if interval_ms is not None:
+                self.interval_ms = max(MIN_INTERVAL_MS, float(interval_ms))
+            if self.running:
+                return
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=1.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def sample_once(self) -> None:
+        own = threading.get_ident()
+        stacks = [_folded_stack(frame) for ident, frame in sys._current_frames().items() if ident != own]
+        with self._lock:
+            for stack in stacks:
+                if stack in self._stacks or len(self._stacks) < MAX_DISTINCT_STACKS:
+                    self._stacks[stack] += 1
+                else:
+                    self._stacks["(other)"] += 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_ms / 1000.0):
+            self.sample_once()
+
+    def folded(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def snapshot(self, top: int = 20) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_ms": self.interval_ms,
+                "samples": self.samples,
+                "started_at": self.started_at,
+                "distinct_stacks": len(self._stacks),
+                "top_stacks": [
+                    {"stack": stack, "count": count}
+                    for stack, count in self._stacks.most_common(max(0, int(top)))
+                ],
+            }
+
+
+_PROFILER: SamplingProfiler | None = None
+_PROFILER_LOCK = threading.Lock()
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    global _PROFILER
+    with _PROFILER_LOCK:
+        if _PROFILER is None:
+            _PROFILER = SamplingProfiler()
+        return _PROFILER
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+
+# Each base URL can be pointed somewhere else on its own; PROVIDER_SIMULATOR_URL
+# points all of them (the quote path's mainnet RPC and the Node helpers
+# included) at one tools/provider_simulator.py.
+PROVIDER_SIMULATOR_URL_ENV = "PROVIDER_SIMULATOR_URL"
+JUPITER_SWAP_API_BASE_URL_ENV = "JUPITER_SWAP_API_BASE_URL"
+JUPITER_PRICE_API_URL_ENV = "JUPITER_PRICE_API_URL"
+RAYDIUM_TRADE_API_BASE_URL_ENV = "RAYDIUM_TRADE_API_BASE_URL"
+COINGECKO_API_BASE_URL_ENV = "COINGECKO_API_BASE_URL"
+NODE_HELPER_URL_ENV = "NODE_HELPER_URL"
+SOLANA_MAINNET_RPC_URL_ENV = "SOLANA_MAINNET_RPC_URL"
+
+DEFAULT_JUPITER_SWAP_API_BASE_URL = "https://api.jup.ag/swap/v1"
+DEFAULT_JUPITER_PRICE_API_URL = "https://lite-api.jup.ag/price/v3"
+DEFAULT_RAYDIUM_TRADE_API_BASE_URL = "https://transaction-v1.raydium.io"
+DEFAULT_COINGECKO_API_BASE_URL = "https://api.coingecko.com/api/v3"
+DEFAULT_SOLANA_MAINNET_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+
+def _env_url(name: str) -> str | None:
+    value = (os.getenv(name) or "").strip().rstrip("/")
+    return value or None
+
+
+def _simulator_url(path: str) -> str | None:
+    base = _env_url(PROVIDER_SIMULATOR_URL_ENV)
+    return base + path if base else None
+
+
+def jupiter_swap_api_base_url() -> str:
+    return (
+        _env_url(JUPITER_SWAP_API_BASE_URL_ENV)
+        or _simulator_url("/swap/v1")
+        or DEFAULT_JUPITER_SWAP_API_BASE_URL
+    )
+
+
+def jupiter_price_api_url() -> str:
+    return _env_url(JUPITER_PRICE_API_URL_ENV) or _simulator_url("/price/v3") or DEFAULT_JUPITER_PRICE_API_URL
+
+
+def raydium_trade_api_base_url() -> str:
+    return _env_url(RAYDIUM_TRADE_API_BASE_URL_ENV) or _simulator_url("") or DEFAULT_RAYDIUM_TRADE_API_BASE_URL
+
+
+def coingecko_api_base_url() -> str:
+    return _env_url(COINGECKO_API_BASE_URL_ENV) or _simulator_url("/coingecko") or DEFAULT_COINGECKO_API_BASE_URL
+
+
+def node_helper_url() -> str | None:
+    """Base URL serving POST <base>/<helper name> in place of spawning Node; None runs Node."""
+    return _env_url(NODE_HELPER_URL_ENV) or _simulator_url("/node-helper")
+
+
+def solana_mainnet_rpc_url() -> str:
+    """RPC the quote path reads (fee estimates, pool discovery for the Node helpers)."""
+    return _env_url(SOLANA_MAINNET_RPC_URL_ENV) or _simulator_url("/rpc") or DEFAULT_SOLANA_MAINNET_RPC_URL
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import db
+
+QUOTE_OBSERVATION_LOG_ENV = "QUOTE_OBSERVATION_LOG"
+QUOTE_OBSERVATION_DB_PATH_ENV = "QUOTE_OBSERVATION_DB_PATH"
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_QUEUE_ROWS = 20_000
+
+QUOTE_VARIANT_PROVIDERS = {
+    "recommended_default": "jupiter-metis",
+    "broader_search": "jupiter-metis",
+    "exclude_recommended_dexes": "jupiter-metis",
+    "direct_route_check": "jupiter-metis",
+    "raydium_quote": "raydium-trade-api",
+    "meteora_dlmm_quote": "meteora-dlmm",
+    "orca_whirlpool_quote": "orca-whirlpool",
+    "phoenix_quote": "phoenix-clob",
+    "phantom_quote": "phantom-routing-api",
+    "pumpswap_quote": "pumpswap",
+}
+
+
+def quote_observation_log_enabled() -> bool:
+    raw = (os.getenv(QUOTE_OBSERVATION_LOG_ENV) or "1").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def configured_quote_observation_db_path() -> Path:
+    raw = (os.getenv(QUOTE_OBSERVATION_DB_PATH_ENV) or "").strip()
+    return Path(raw) if raw else db.DB_PATH
+
+
+_SCHEMA_READY: set[str] = set()
+_SCHEMA_LOCK = threading.Lock()
+
+
+def ensure_quote_observation_schema(db_path: Path | None = None) -> Path:
+    """Creates the tables once per path, so readers work before the first write."""
+    db_path = Path(db_path) if db_path is not None else configured_quote_observation_db_path()
+    key = str(db_path.resolve())
+    with _SCHEMA_LOCK:
+        if key not in _SCHEMA_READY:
+            db.init_db(db_path)
+            _SCHEMA_READY.add(key)
+    return db_path
+
+
+_STOP = object()
+
+
+class QuoteObservationWriter:
+    """
+    Append-only background writer. submit() never blocks the request path:
+    rows are queued and a daemon thread writes them in batches. When the queue
+    is full, new rows are dropped and counted instead of applying backpressure.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_queue_rows: int = DEFAULT_MAX_QUEUE_ROWS,
+    ):
+        self.db_path = Path(db_path)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_seconds = float(flush_interval_seconds)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue_rows)))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.written_rows = 0
+        self.dropped_rows = 0
+        self.failed_batches = 0
+        self.last_error: str | None = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name="quote-observation-writer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def submit(self, rows: list[dict]) -> int:
+        accepted = 0
+        for row in rows or []:
+            try:
+                self._queue.put_nowait(row)
+                accepted += 1
+            except queue.Full:
+                self.dropped_rows += 1
+        if accepted:
+            self._ensure_started()
+        return accepted
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued row has been written (or timeout)."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+
+        def _wait() -> None:
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=_wait, daemon=True).start()
+        return done.wait(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "db_path": str(self.db_path),
+            "queued_rows": self._queue.qsize(),
+            "written_rows": self.written_rows,
+            "dropped_rows": self.dropped_rows,
+            "failed_batches": self.failed_batches,
+            "last_error": self.last_error,
+        }
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        try:
+            ensure_quote_observation_schema(self.db_path)
+            self.written_rows += db.insert_quote_observations(batch, db_path=self.db_path)
+        except Exception as exc:
+            self.failed_batches += 1
+            self.last_error = f"{exc.__class__.__name__}: {exc}"
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Writes the rows queued so far, then ends the writer thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch: list[dict] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                continue
+            stopping = item is _STOP
+            if not stopping:
+                batch.append(item)
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write_batch(batch)
+            if stopping:
+                self._queue.task_done()
+                return
+
+
+_WRITER: QuoteObservationWriter | None = None
+_WRITER_LOCK = threading.Lock()
+
+
+def get_quote_observation_writer() -> QuoteObservationWriter:
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = QuoteObservationWriter(configured_quote_observation_db_path())
+        return _WRITER
+
+
+def reset_quote_observation_writer() -> None:
+    """Stops the writer and forgets it; the next use reads the env again."""
+    global _WRITER
+    with _WRITER_LOCK:
+        writer, _WRITER = _WRITER, None
+    if writer is not None:
+        writer.stop(timeout=5)
+
+
+def record_quote_observations(rows: list[dict]) -> int:
+    if not rows or not quote_observation_log_enabled():
+        return 0
+    try:
+        return get_quote_observation_writer().submit(rows)
+    except Exception:
+        return 0
+
+
+def _int_or_none(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float_or_none(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_quote_observation_rows(
+    *,
+    network: str,
+    input_meta: dict,
+    output_meta: dict,
+    from_token: str,
+    to_token: str,
+    input_amount: float,
+    input_amount_raw: int,
+    options: list[dict],
+    diagnostics: list[dict],
+    timings_ms: dict[str, float],
+    best_variant_id: str | None = None,
+    recommended_variant_id: str | None = None,
+    reference_output_amount: float | None = None,
+    pair_class: str | None = None,
+    quote_id: str | None = None,
+    ts: str | None = None,
+) -> list[dict]:
+    """
+    One row per checked variant: successful options carry output and cost
+    fields, failed variants carry error_code/failure_kind from diagnostics.
+    """
+    quote_id = quote_id or uuid.uuid4().hex
+    ts = ts or datetime.now(timezone.utc).isoformat()
+    base = {
+        "ts": ts,
+        "quote_id": quote_id,
+        "network": network,
+        "input_mint": input_meta.get("mint"),
+        "output_mint": output_meta.get("mint"),
+        "from_token": from_token,
+        "to_token": to_token,
+        "input_amount": input_amount,
+        "input_amount_raw": str(input_amount_raw),
+        "reference_output_amount": reference_output_amount,
+        "pair_class": pair_class,
+    }
+
+    rows = []
+    seen = set()
+    for option in options:
+        variant_id = option.get("variant_id")
+        if not variant_id or variant_id in seen:
+            continue
+        seen.add(variant_id)
+        estimated_output = _float_or_none(option.get("estimated_output"))
+        gap_pct = None
+        if estimated_output is not None and reference_output_amount:
+            gap_pct = (estimated_output - reference_output_amount) / reference_output_amount * 100.0
+        rows.append({
+            **base,
+            "variant_id": variant_id,
+            "provider": option.get("provider") or QUOTE_VARIANT_PROVIDERS.get(variant_id),
+            "ok": 1,
+            "estimated_output_raw": (
+                str(option.get("estimated_output_raw"))
+                if option.get("estimated_output_raw") is not None
+                else None
+            ),
+            "latency_ms": timings_ms.get(variant_id),
+            "route_shape": option.get("route_shape"),
+            "route_step_count": _int_or_none(option.get("route_step_count")),
+            "benchmark_gap_pct": gap_pct,
+            "execution_cost": _float_or_none(option.get("execution_cost")),
+            "execution_cost_usd": _float_or_none(option.get("execution_cost_usd")),
+            "is_best": int(variant_id == best_variant_id),
+            "is_recommended": int(variant_id == recommended_variant_id),
+        })
+
+    for item in diagnostics:
+        variant_id = item.get("variant_id")
+        if not variant_id or variant_id in seen:
+            continue
+        seen.add(variant_id)
+        rows.append({
+            **base,
+            "variant_id": variant_id,
+            "provider": item.get("provider") or QUOTE_VARIANT_PROVIDERS.get(variant_id),
+            "ok": 0,
+            "latency_ms": timings_ms.get(variant_id),
+            "error_code": item.get("error_code") or item.get("code"),
+            "failure_kind": item.get("failure_kind"),
+            "is_best": 0,
+            "is_recommended": 0,
+        })
+
+    return rows
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+SWAP_QUOTE_PROVIDERS_DISABLED_ENV = "SWAP_QUOTE_PROVIDERS_DISABLED"
+
+
+def configured_disabled_quote_providers() -> set[str]:
+    """Provider ids or variant ids listed in SWAP_QUOTE_PROVIDERS_DISABLED (comma separated)."""
+    raw = os.getenv(SWAP_QUOTE_PROVIDERS_DISABLED_ENV) or ""
+    return {item.strip().lower() for item in raw.split(",") if item.strip()}
+
+
+@dataclass(frozen=True)
+class QuoteRequest:
+    """Everything a provider needs to build its quote payload."""
+
+    input_meta: dict
+    output_meta: dict
+    amount_raw: int
+    slippage_bps: int
+    rpc_url: str
+    user_public_key: str | None = None
+
+    @property
+    def input_mint(self) -> str:
+        return self.input_meta["mint"]
+
+    @property
+    def output_mint(self) -> str:
+        return self.output_meta["mint"]
+
+
+@dataclass(frozen=True)
+class QuoteProvider:
+    """
+    One quote universe. build_payload turns a QuoteRequest into the provider
+    request, try_fetch returns {"ok", "data"} or {"ok": False, "error"}, and
+    normalize turns the data into a quote option, route fees included.
+    prepare is the execution hook, None for comparison-only providers.
+    """
+
+    provider_id: str
+    variant_id: str
+    label: str
+    build_payload: Callable[[QuoteRequest], Any]
+    try_fetch: Callable[..., dict]
+    normalize: Callable[..., dict]
+    capabilities: dict = field(default_factory=dict)
+    prepare: Callable[..., dict] | None = None
+    # Core providers feed other variants (Jupiter's default route drives the
+    # exclude-dexes probe) and cannot be switched off.
+    core: bool = False
+
+    def describe(self) -> dict:
+        return {
+            "provider": self.provider_id,
+            "variant_id": self.variant_id,
+            "label": self.label,
+            "core": self.core,
+            "prepare": self.prepare is not None,
+            **{key: value for key, value in self.capabilities.items() if key not in {"label"}},
+        }
+
+
+class QuoteProviderRegistry:
+    """Quote providers in registration order, which is also the call order."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers: dict[str, QuoteProvider] = {}
+
+    def register(self, provider: QuoteProvider) -> QuoteProvider:
+        with self._lock:
+            if provider.variant_id in self._providers:
+                raise ValueError(f"quote provider already registered: {provider.variant_id}")
+            self._providers[provider.variant_id] = provider
+        return provider
+
+    def get(self, variant_id: str) -> QuoteProvider | None:
+        with self._lock:
+            return self._providers.get(variant_id)
+
+    def providers(self) -> list[QuoteProvider]:
+        with self._lock:
+            return list(self._providers.values())
+
+    def is_enabled(self, provider: QuoteProvider, disabled: set[str] | None = None) -> bool:
+        if provider.core:
+            return True
+        disabled = configured_disabled_quote_providers() if disabled is None else disabled
+        return provider.provider_id not in disabled and provider.variant_id not in disabled
+
+    def enabled(self, disabled: set[str] | None = None) -> list[QuoteProvider]:
+        disabled = configured_disabled_quote_providers() if disabled is None else disabled
+        return [provider for provider in self.providers() if self.is_enabled(provider, disabled)]
+
+    def disabled_variants(self, disabled: set[str] | None = None) -> list[str]:
+        disabled = configured_disabled_quote_providers() if disabled is None else disabled
+        return [provider.variant_id for provider in self.providers() if not self.is_enabled(provider, disabled)]
+
+    def describe(self) -> list[dict]:
+        disabled = configured_disabled_quote_providers()
+        return [
+            {**provider.describe(), "enabled": self.is_enabled(provider, disabled)}
+            for provider in self.providers()
+        ]
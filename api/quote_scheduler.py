@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import db
+from token_registry import get_token_index
+
+from .quote_observations import configured_quote_observation_db_path
+
+QUOTE_ADAPTIVE_SCHEDULING_ENV = "QUOTE_ADAPTIVE_SCHEDULING"
+
+PAIR_CLASS_MAJOR = "major"
+PAIR_CLASS_MEME = "meme"
+PAIR_CLASS_PUMP = "pump"
+MAJOR_TOKEN_TAGS = {"native", "blue_chip", "stablecoin"}
+
+# Variants that are only extra Jupiter probes; skipping them never removes a
+# quote universe, it only removes a chance to beat the default route.
+OPTIONAL_JUPITER_VARIANTS = {"broader_search", "exclude_recommended_dexes"}
+# The default quote is both a universe and the input for excludeDexes; the
+# direct-route check feeds the direct_route_output shown in the response.
+ALWAYS_RUN_VARIANTS = {"recommended_default", "direct_route_check"}
+
+DEFAULT_STATS_WINDOW_DAYS = 7
+DEFAULT_STATS_TTL_SECONDS = 300
+DEFAULT_MIN_OBSERVATIONS = 30
+DEFAULT_SKIP_WIN_RATE = 0.01
+DEFAULT_SHORT_DEADLINE_WIN_RATE = 0.05
+DEFAULT_SHORT_DEADLINE_SECONDS = 4.0
+DEFAULT_EXPLORE_RATE = 0.1
+
+
+def adaptive_scheduling_enabled() -> bool:
+    raw = (os.getenv(QUOTE_ADAPTIVE_SCHEDULING_ENV) or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _registry_tags_for_mint(mint: str) -> list[str]:
+    meta = get_token_index().by_mint(mint)
+    return list((meta or {}).get("tags") or [])
+
+
+def classify_token(mint: str | None, tags: list[str] | None = None) -> str:
+    mint = (mint or "").strip()
+    tags = set(tags if tags is not None else _registry_tags_for_mint(mint))
+    if mint.endswith("pump") or "pumpfun" in tags:
+        return PAIR_CLASS_PUMP
+    if tags & MAJOR_TOKEN_TAGS:
+        return PAIR_CLASS_MAJOR
+    return PAIR_CLASS_MEME
+
+
+def classify_pair(
+    input_mint: str | None,
+    output_mint: str | None,
+    *,
+    input_tags: list[str] | None = None,
+    output_tags: list[str] | None = None,
+) -> str:
+    """
+    major: both sides native/blue-chip/stablecoin.
+    pump: either side is a pump.fun mint.
+    meme: everything else (long tail).
+    """
+    classes = {
+        classify_token(input_mint, input_tags),
+        classify_token(output_mint, output_tags),
+    }
+    if PAIR_CLASS_PUMP in classes:
+        return PAIR_CLASS_PUMP
+    if classes == {PAIR_CLASS_MAJOR}:
+        return PAIR_CLASS_MAJOR
+    return PAIR_CLASS_MEME
+
+
+class QuoteSchedule:
+    def __init__(self, pair_class: str, decisions: dict[str, dict], *, adaptive: bool):
+        self.pair_class = pair_class
+        self.decisions = decisions
+        self.adaptive = adaptive
+
+    def should_run(self, variant_id: str) -> bool:
+        return (self.decisions.get(variant_id) or {}).get("run", True)
+
+    def disable(self, variant_id: str, reason: str) -> None:
+        if variant_id in self.decisions:
+            self.decisions[variant_id] = {**self.decisions[variant_id], "run": False, "reason": reason}
+
+    def call_kwargs(self, variant_id: str) -> dict:
+        timeout = (self.decisions.get(variant_id) or {}).get("timeout_seconds")
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def checked_variants(self) -> list[str]:
+        return [variant_id for variant_id, item in self.decisions.items() if item.get("run", True)]
+
+    def skipped_variants(self) -> list[str]:
+        return [variant_id for variant_id, item in self.decisions.items() if not item.get("run", True)]
+
+    def debug(self) -> dict:
+        ordered = sorted(
+            self.decisions.items(),
+            key=lambda item: -(item[1].get("win_rate") or 0.0),
+        )
+        return {
+            "adaptive": self.adaptive,
+            "pair_class": self.pair_class,
+            "priority_order": [variant_id for variant_id, _ in ordered],
+            "skipped_variants": self.skipped_variants(),
+            "decisions": self.decisions,
+        }
+
+
+class QuoteScheduler:
+    """
+    Plans which quote variants to call for a pair class, from win rate and
+    latency aggregated out of quote_observations. Stats are cached in memory
+    and refreshed at most every stats_ttl_seconds.
+
+    Until a variant has min_observations for the class it always runs with the
+    default deadline. Rarely-winning variants get a short deadline; variants
+    that almost never win are skipped except for an explore_rate sample that
+    keeps their stats fresh.
+    """
+
+    def __init__(
+        self,
+        *,
+        db_path: Path | None = None,
+        stats_window_days: int = DEFAULT_STATS_WINDOW_DAYS,
+        stats_ttl_seconds: float = DEFAULT_STATS_TTL_SECONDS,
+        min_observations: int = DEFAULT_MIN_OBSERVATIONS,
+        skip_win_rate: float = DEFAULT_SKIP_WIN_RATE,
+        short_deadline_win_rate: float = DEFAULT_SHORT_DEADLINE_WIN_RATE,
+        short_deadline_seconds: float = DEFAULT_SHORT_DEADLINE_SECONDS,
+        explore_rate: float = DEFAULT_EXPLORE_RATE,
+        rng: random.Random | None = None,
+    ):
+        self.db_path = db_path
+        self.stats_window_days = stats_window_days
+        self.stats_ttl_seconds = stats_ttl_seconds
+        self.min_observations = min_observations
+        self.skip_win_rate = skip_win_rate
+        self.short_deadline_win_rate = short_deadline_win_rate
+        self.short_deadline_seconds = short_deadline_seconds
+        self.explore_rate = explore_rate
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, dict]] = {}
+        self._stats_loaded_at: float | None = None
+
+    def _load_stats(self) -> dict[str, dict[str, dict]]:
+        since = (datetime.now(timezone.utc) - timedelta(days=self.stats_window_days)).isoformat()
+        db_path = self.db_path or configured_quote_observation_db_path()
+        try:
+            rows = db.get_quote_variant_pair_outcomes(since=since, db_path=db_path)
+        except Exception:
+            return {}
+
+        by_class: dict[str, dict[str, dict]] = {}
+        for row in rows:
+            # The class plan() used when the quote was logged; older rows are
+            # classified from registry tags.
+            pair_class = row.get("pair_class") or classify_pair(row.get("input_mint"), row.get("output_mint"))
+            item = by_class.setdefault(pair_class, {}).setdefault(
+                row["variant_id"],
+                {"observations": 0, "successes": 0, "wins": 0, "_latency_sum": 0.0, "_latency_n": 0},
+            )
+            observations = int(row.get("observations") or 0)
+            successes = int(row.get("successes") or 0)
+            item["observations"] += observations
+            item["successes"] += successes
+            item["wins"] += int(row.get("wins") or 0)
+            if row.get("avg_success_latency_ms") is not None and successes:
+                item["_latency_sum"] += float(row["avg_success_latency_ms"]) * successes
+                item["_latency_n"] += successes
+
+        for variants in by_class.values():
+            for item in variants.values():
+                latency_n = item.pop("_latency_n")
+                latency_sum = item.pop("_latency_sum")
+                item["win_rate"] = item["wins"] / item["observations"] if item["observations"] else None
+                item["avg_success_latency_ms"] = latency_sum / latency_n if latency_n else None
+        return by_class
+
+    def stats_for_class(self, pair_class: str) -> dict[str, dict]:
+        with self._lock:
+            now = time.monotonic()
+            if self._stats_loaded_at is None or now - self._stats_loaded_at >= self.stats_ttl_seconds:
+                self._stats = self._load_stats()
+                self._stats_loaded_at = now
+            return dict(self._stats.get(pair_class) or {})
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stats_loaded_at = None
+
+    def plan(self, variant_ids: list[str], *, pair_class: str) -> QuoteSchedule:
+        stats = self.stats_for_class(pair_class)
+        decisions: dict[str, dict] = {}
+        for variant_id in variant_ids:
+            item = stats.get(variant_id) or {}
+            observations = int(item.get("observations") or 0)
+            win_rate = item.get("win_rate")
+            decision = {
+                "run": True,
+                "timeout_seconds": None,
+                "reason": "default",
+                "observations": observations,
+                "win_rate": win_rate,
+                "avg_success_latency_ms": item.get("avg_success_latency_ms"),
+            }
+            if variant_id in ALWAYS_RUN_VARIANTS:
+                decision["reason"] = "always_run"
+            elif observations < self.min_observations or win_rate is None:
+                decision["reason"] = "insufficient_history"
+            elif win_rate < self.skip_win_rate:
+                explore = self._rng.random() < self.explore_rate
+                decision["run"] = explore
+                decision["reason"] = "explore_sample" if explore else "rarely_wins"
+                if explore and variant_id not in OPTIONAL_JUPITER_VARIANTS:
+                    decision["timeout_seconds"] = self.short_deadline_seconds
+            elif win_rate < self.short_deadline_win_rate and variant_id not in OPTIONAL_JUPITER_VARIANTS:
+                decision["timeout_seconds"] = self.short_deadline_seconds
+                decision["reason"] = "low_win_rate_short_deadline"
+            decisions[variant_id] = decision
+        return QuoteSchedule(pair_class, decisions, adaptive=True)
+
+
+_SCHEDULER: QuoteScheduler | None = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_quote_scheduler() -> QuoteScheduler:
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = QuoteScheduler()
+        return _SCHEDULER
+
+
+def plan_quote_schedule(variant_ids: list[str], *, input_meta: dict, output_meta: dict) -> QuoteSchedule:
+    pair_class = classify_pair(
+        (input_meta or {}).get("mint"),
+        (output_meta or {}).get("mint"),
+        input_tags=(input_meta or {}).get("tags"),
+        output_tags=(output_meta or {}).get("tags"),
+    )
+    if not adaptive_scheduling_enabled():
+        return QuoteSchedule(
+            pair_class,
+            {variant_id: {"run": True, "timeout_seconds": None, "reason": "adaptive_disabled"} for variant_id in variant_ids},
+            adaptive=False,
+        )
+    return get_quote_scheduler().plan(variant_ids, pair_class=pair_class)
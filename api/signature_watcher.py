@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from typing import Callable
+
+SWAP_STATUS_WATCHER_ENV = "SWAP_STATUS_WATCHER"
+# getSignatureStatuses accepts at most 256 signatures per call.
+MAX_SIGNATURES_PER_CALL = 256
+DEFAULT_MIN_INTERVAL_SECONDS = 0.4
+DEFAULT_MAX_INTERVAL_SECONDS = 4.0
+DEFAULT_BACKOFF_FACTOR = 1.5
+# A blockhash expires after ~150 slots, so an unconfirmed transaction older
+# than this is not going to land.
+DEFAULT_WATCH_SECONDS = 90
+DEFAULT_RETAIN_SECONDS = 60
+
+StatusFetcher = Callable[[list[str], str], "dict[str, dict | None] | None"]
+
+
+def signature_watcher_enabled() -> bool:
+    return (os.getenv(SWAP_STATUS_WATCHER_ENV) or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def status_state(status: dict | None) -> str:
+    if not status:
+        return "pending"
+    if status.get("err"):
+        return "failed"
+    if status.get("confirmed") or status.get("finalized"):
+        return "confirmed"
+    return "pending"
+
+
+class AsyncSubscriber:
+    """
+    Subscriber for async consumers: the watcher thread's put() hands the
+    event to the event loop, and the consumer awaits get() without holding
+    a worker thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, event: dict) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            # The loop is closed; the stream is gone.
+            pass
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+
+class SignatureWatcher:
+    """
+    One registry for every pending swap signature.
+
+    A single background thread polls all of them with batched
+    getSignatureStatuses calls (one per RPC URL per 256 signatures) and pushes
+    state changes to subscriber queues, so RPC load follows the tick rate
+    instead of clients x polls. The tick interval starts at min_interval,
+    grows by backoff_factor while nothing changes (or the RPC fails), and
+    snaps back when a new signature is registered or a status moves.
+
+    Only failed and finalized signatures are settled: a confirmed one keeps
+    being polled until it finalizes or its watch window ends. Settled and
+    expired entries are dropped retain_seconds after they stop being polled.
+    """
+
+    def __init__(
+        self,
+        fetch_statuses: StatusFetcher,
+        *,
+        min_interval_seconds: float = DEFAULT_MIN_INTERVAL_SECONDS,
+        max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        watch_seconds: float = DEFAULT_WATCH_SECONDS,
+        retain_seconds: float = DEFAULT_RETAIN_SECONDS,
+        batch_size: int = MAX_SIGNATURES_PER_CALL,
+    ):
+        self.fetch_statuses = fetch_statuses
+        self.min_interval_seconds = float(min_interval_seconds)
+        self.max_interval_seconds = max(self.min_interval_seconds, float(max_interval_seconds))
+        self.backoff_factor = max(1.0, float(backoff_factor))
+        self.watch_seconds = float(watch_seconds)
+        self.retain_seconds = float(retain_seconds)
+        self.batch_size = max(1, min(MAX_SIGNATURES_PER_CALL, int(batch_size)))
+        self.interval_seconds = self.min_interval_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._entries: dict[str, dict] = {}
+        self._subscribers: dict[str, list[queue.Queue]] = {}
+        self._thread: threading.Thread | None = None
+        self.ticks = 0
+        self.rpc_calls = 0
+        self.rpc_failures = 0
+
+    @staticmethod
+    def _settled(entry: dict) -> bool:
+        return entry["state"] == "failed" or bool((entry["status"] or {}).get("finalized"))
+
+    @staticmethod
+    def _watching(entry: dict) -> bool:
+        return entry["state"] in {"pending", "confirmed"} and entry["finished_at"] is None
+
+    def _watching_locked(self) -> bool:
+        return any(self._watching(entry) for entry in self._entries.values())
+
+    def _prune_locked(self, now: float) -> None:
+        for signature, entry in list(self._entries.items()):
+            if entry["finished_at"] is not None and now - entry["finished_at"] > self.retain_seconds:
+                self._entries.pop(signature, None)
+
+    def _ensure_thread_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="signature-watcher", daemon=True)
+            self._thread.start()
+
+    def register(self, signature: str, rpc_url: str, *, status: dict | None = None, start: bool = True) -> None:
+        """
+        Adds a signature to the registry. A known status (e.g. from a direct
+        lookup) seeds the entry; settled signatures are kept for snapshots
+        but never polled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune_locked(now)
+            entry = self._entries.get(signature)
+            if entry is None:
+                entry = {
+                    "rpc_url": rpc_url,
+                    "registered_at": now,
+                    "polled_at": None,
+                    "finished_at": None,
+                    "status": None,
+                    "state": "pending",
+                }
+                self._entries[signature] = entry
+            if status is not None and entry["state"] in {"pending", "confirmed"} and not self._settled(entry):
+                self._apply_locked(signature, entry, status, now)
+            if self._watching(entry):
+                self.interval_seconds = self.min_interval_seconds
+                if start:
+                    self._ensure_thread_locked()
+                self._wakeup.notify_all()
+
+    def snapshot(
+        self,
+        signature: str,
+        *,
+        max_age_seconds: float | None = None,
+        include_expired: bool = False,
+    ) -> dict | None:
+        """
+        Latest known status, or None when it was never polled or, unless
+        settled, is older than max_age_seconds. A signature whose watch
+        expired (state "timeout") is only returned with include_expired,
+        since its last polled status no longer says anything about the
+        transaction.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune_locked(now)
+            entry = self._entries.get(signature)
+            if entry and entry["state"] == "timeout" and include_expired:
+                return self._event_locked(signature, entry)
+            if not entry or entry["polled_at"] is None or entry["state"] == "timeout":
+                return None
+            if (
+                max_age_seconds is not None
+                and not self._settled(entry)
+                and now - entry["polled_at"] > max_age_seconds
+            ):
+                return None
+            return self._event_locked(signature, entry)
+
+    def subscribe(self, signature: str, subscriber=None):
+        """Registers a queue (or any object with put()) for this signature's state changes."""
+        subscriber = queue.Queue() if subscriber is None else subscriber
+        with self._lock:
+            self._subscribers.setdefault(signature, []).append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, signature: str, subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(signature) or []
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+            if not subscribers:
+                self._subscribers.pop(signature, None)
+
+    @staticmethod
+    def _event_locked(signature: str, entry: dict) -> dict:
+        status = entry["status"] or {}
+        return {
+            "signature": signature,
+            "state": entry["state"],
+            "confirmation_status": status.get("confirmation_status"),
+            "confirmations": status.get("confirmations"),
+            "confirmed": bool(status.get("confirmed")),
+            "finalized": bool(status.get("finalized")),
+            "err": status.get("err"),
+        }
+
+    def _publish_locked(self, signature: str, entry: dict) -> None:
+        event = self._event_locked(signature, entry)
+        for subscriber in self._subscribers.get(signature) or []:
+            subscriber.put(dict(event))
+
+    def _apply_locked(self, signature: str, entry: dict, status: dict | None, now: float) -> bool:
+        previous = entry["status"] or {}
+        current = status or {}
+        entry["status"] = status
+        entry["polled_at"] = now
+        entry["state"] = status_state(status)
+        if self._settled(entry):
+            entry["finished_at"] = now
+        changed = (
+            previous.get("confirmation_status") != current.get("confirmation_status")
+            or bool(previous.get("err")) != bool(current.get("err"))
+        )
+        if changed:
+            self._publish_locked(signature, entry)
+        return changed
+
+    def tick(self) -> int:
+        """Polls every watched signature once; returns the number of RPC calls made."""
+        now = time.monotonic()
+        batches: dict[str, list[str]] = {}
+        with self._lock:
+            self.ticks += 1
+            self._prune_locked(now)
+            for signature, entry in list(self._entries.items()):
+                if not self._watching(entry):
+                    continue
+                if now - entry["registered_at"] > self.watch_seconds:
+                    entry["finished_at"] = now
+                    # A confirmed signature just stops being polled; snapshots
+                    # of it then age out after max_age_seconds.
+                    if entry["state"] == "pending":
+                        entry["state"] = "timeout"
+                        self._publish_locked(signature, entry)
+                    continue
+                batches.setdefault(entry["rpc_url"], []).append(signature)
+
+        calls = 0
+        changed = False
+        failed = False
+        for rpc_url, signatures in batches.items():
+            for start in range(0, len(signatures), self.batch_size):
+                chunk = signatures[start:start + self.batch_size]
+                calls += 1
+                try:
+                    statuses = self.fetch_statuses(chunk, rpc_url)
+                except Exception:
+                    statuses = None
+                with self._lock:
+                    self.rpc_calls += 1
+                    if statuses is None:
+                        self.rpc_failures += 1
+                        failed = True
+                        continue
+                    polled_at = time.monotonic()
+                    for signature in chunk:
+                        entry = self._entries.get(signature)
+                        if entry is None or not self._watching(entry):
+                            continue
+                        if self._apply_locked(signature, entry, statuses.get(signature), polled_at):
+                            changed = True
+
+        with self._lock:
+            if changed and not failed:
+                self.interval_seconds = self.min_interval_seconds
+            else:
+                self.interval_seconds = min(self.max_interval_seconds, self.interval_seconds * self.backoff_factor)
+        return calls
+
+    def _run(self) -> None:
+        while True:
+            self.tick()
+            with self._lock:
+                if not self._watching_locked():
+                    self._thread = None
+                    return
+                self._wakeup.wait(self.interval_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": sum(1 for entry in self._entries.values() if entry["state"] == "pending"),
+                "awaiting_finalization": sum(
+                    1 for entry in self._entries.values() if entry["state"] == "confirmed" and self._watching(entry)
+                ),
+                "tracked": len(self._entries),
+                "subscribers": sum(len(items) for items in self._subscribers.values()),
+                "interval_seconds": round(self.interval_seconds, 3),
+                "ticks": self.ticks,
+                "rpc_calls": self.rpc_calls,
+                "rpc_failures": self.rpc_failures,
+            }
+
+
+_WATCHER: SignatureWatcher | None = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def get_signature_watcher(fetch_statuses: StatusFetcher) -> SignatureWatcher:
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            _WATCHER = SignatureWatcher(fetch_statuses)
+        return _WATCHER
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Iterable
+
+from .solana_tx import decode_pubkey, encode_pubkey
+
+SOLANA_TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
+PDA_MARKER = b"ProgramDerivedAddress"
+MAX_PDA_SEEDS = 16
+MAX_PDA_SEED_LENGTH = 32
+PDA_CACHE_SIZE = 4096
+
+_P = 2**255 - 19
+_Y_MASK = (1 << 255) - 1
+_LEGENDRE_EXPONENT = (_P - 1) // 2
+# Edwards d = -121665/121666, computed once instead of once per bump.
+_D = (-121665 * pow(121666, _P - 2, _P)) % _P
+
+
+def ed25519_is_on_curve(compressed: bytes) -> bool:
+    """
+    True when the 32 bytes decompress to an ed25519 point.
+
+    x^2 = u / v with u = y^2 - 1 and v = d*y^2 + 1, so a point exists iff u/v
+    is a square. Legendre(u/v) == Legendre(u*v), which needs one modular
+    exponentiation instead of an inversion plus a Legendre symbol.
+    """
+    if len(compressed) != 32:
+        return False
+    y = int.from_bytes(compressed, "little") & _Y_MASK
+    if y >= _P:
+        return False
+    y2 = y * y % _P
+    v = (_D * y2 + 1) % _P
+    if v == 0:
+        return False
+    uv = (y2 - 1) * v % _P
+    return uv == 0 or pow(uv, _LEGENDRE_EXPONENT, _P) == 1
+
+
+def create_program_address(seeds: list[bytes] | tuple[bytes, ...], program_id: bytes) -> bytes:
+    if len(seeds) > MAX_PDA_SEEDS:
+        raise ValueError("too many PDA seeds")
+    for seed in seeds:
+        if len(seed) > MAX_PDA_SEED_LENGTH:
+            raise ValueError("PDA seed is too long")
+
+    digest = hashlib.sha256(b"".join(seeds) + program_id + PDA_MARKER).digest()
+    if ed25519_is_on_curve(digest):
+        raise ValueError("PDA landed on curve")
+    return digest
+
+
+@lru_cache(maxsize=PDA_CACHE_SIZE)
+def _find_program_address_cached(seeds: tuple[bytes, ...], program_id: bytes) -> tuple[bytes, int]:
+    if len(seeds) + 1 > MAX_PDA_SEEDS:
+        raise ValueError("too many PDA seeds")
+    for seed in seeds:
+        if len(seed) > MAX_PDA_SEED_LENGTH:
+            raise ValueError("PDA seed is too long")
+    prefix = b"".join(seeds)
+    suffix = program_id + PDA_MARKER
+    for bump in range(255, -1, -1):
+        digest = hashlib.sha256(prefix + bytes([bump]) + suffix).digest()
+        if not ed25519_is_on_curve(digest):
+            return digest, bump
+    raise ValueError("could not find a valid PDA")
+
+
+def find_program_address(seeds: list[bytes] | tuple[bytes, ...], program_id: bytes) -> tuple[bytes, int]:
+    """Memoized by (seeds, program_id); derivations are pure, so entries never go stale."""
+    return _find_program_address_cached(tuple(bytes(seed) for seed in seeds), bytes(program_id))
+
+
+@lru_cache(maxsize=PDA_CACHE_SIZE)
+def derive_associated_token_account(
+    owner: str,
+    mint: str,
+    token_program_id: str = SOLANA_TOKEN_PROGRAM_ID,
+) -> str:
+    address, _bump = find_program_address(
+        (decode_pubkey(owner), decode_pubkey(token_program_id), decode_pubkey(mint)),
+        decode_pubkey(SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID),
+    )
+    return encode_pubkey(address)
+
+
+def derive_associated_token_accounts(
+    pairs: Iterable[tuple[str, str]],
+    *,
+    token_program_id: str = SOLANA_TOKEN_PROGRAM_ID,
+) -> dict[tuple[str, str], str]:
+    """Batch form: {(owner, mint): ata} for every distinct pair, in input order."""
+    accounts: dict[tuple[str, str], str] = {}
+    for owner, mint in pairs:
+        key = (owner, mint)
+        if key not in accounts:
+            accounts[key] = derive_associated_token_account(owner, mint, token_program_id)
+    return accounts
+
+
+def pda_cache_info() -> dict:
+    pda = _find_program_address_cached.cache_info()
+    ata = derive_associated_token_account.cache_info()
+    return {
+        "pda": {"hits": pda.hits, "misses": pda.misses, "size": pda.currsize, "max_size": pda.maxsize},
+        "ata": {"hits": ata.hits, "misses": ata.misses, "size": ata.currsize, "max_size": ata.maxsize},
+    }
+
+
+def clear_pda_cache() -> None:
+    _find_program_address_cached.cache_clear()
+    derive_associated_token_account.cache_clear()
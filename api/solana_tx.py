@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from functools import lru_cache
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+PUBKEY_LENGTH = 32
+SOLANA_SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+SOLANA_TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
+SOLANA_WRAPPED_SOL_MINT = "So11111111111111111111111111111111111111112"
+
+# Encode/decode work in 10-digit chunks (58**10 < 2**64) so the big-int
+# arithmetic runs once per chunk instead of once per character.
+_CHUNK_DIGITS = 10
+_CHUNK_BASE = 58 ** _CHUNK_DIGITS
+_PAIR_BASE = 58 * 58
+_PAIR_TABLE = tuple(BASE58_ALPHABET[i // 58] + BASE58_ALPHABET[i % 58] for i in range(_PAIR_BASE))
+_CHUNK_POWERS = tuple(58 ** n for n in range(_CHUNK_DIGITS + 1))
+_INVALID_DIGIT = 0xFF
+_DIGITS = {ord(char): index for index, char in enumerate(BASE58_ALPHABET)}
+_TRANSLATE_TABLE = bytes(_DIGITS.get(code, _INVALID_DIGIT) for code in range(256))
+
+
+def b58encode(raw: bytes | bytearray | memoryview) -> str:
+    raw = bytes(raw)
+    if not raw:
+        return ""
+    stripped = raw.lstrip(b"\x00")
+    leading_zeroes = len(raw) - len(stripped)
+    value = int.from_bytes(stripped, "big")
+    pairs = []
+    while value:
+        value, chunk = divmod(value, _CHUNK_BASE)
+        for _ in range(_CHUNK_DIGITS // 2):
+            chunk, pair = divmod(chunk, _PAIR_BASE)
+            pairs.append(_PAIR_TABLE[pair])
+    encoded = "".join(reversed(pairs)).lstrip("1")
+    return ("1" * leading_zeroes) + encoded
+
+
+def b58decode(value: str) -> bytes:
+    if not isinstance(value, str) or not value:
+        raise ValueError("base58 value is required")
+    try:
+        digits = value.encode("ascii").translate(_TRANSLATE_TABLE)
+    except UnicodeEncodeError:
+        raise ValueError("invalid base58 character") from None
+    if max(digits) == _INVALID_DIGIT:
+        raise ValueError("invalid base58 character")
+
+    decoded = 0
+    for start in range(0, len(digits), _CHUNK_DIGITS):
+        chunk = digits[start:start + _CHUNK_DIGITS]
+        chunk_value = 0
+        for digit in chunk:
+            chunk_value = chunk_value * 58 + digit
+        decoded = decoded * _CHUNK_POWERS[len(chunk)] + chunk_value
+    raw = decoded.to_bytes((decoded.bit_length() + 7) // 8, "big") if decoded else b""
+    leading_zeroes = len(value) - len(value.lstrip("1"))
+    return (b"\x00" * leading_zeroes) + raw
+
+
+@lru_cache(maxsize=8192)
+def encode_pubkey(raw: bytes) -> str:
+    """Fixed-width fast path: program ids and mints repeat across transactions."""
+    if len(raw) != PUBKEY_LENGTH:
+        raise ValueError("Solana public key must be 32 bytes")
+    return b58encode(raw)
+
+
+@lru_cache(maxsize=8192)
+def decode_pubkey(value: str) -> bytes:
+    raw = b58decode(value)
+    if len(raw) != PUBKEY_LENGTH:
+        raise ValueError("Solana public key must decode to 32 bytes")
+    return raw
+
+
+def _read_shortvec(buf: memoryview, offset: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    for _ in range(3):
+        if offset >= len(buf):
+            raise ValueError("shortvec out of range")
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+    raise ValueError("shortvec too long")
+
+
+def _read_shortvec_slice(buf: memoryview, offset: int, what: str) -> tuple[memoryview, int]:
+    length, offset = _read_shortvec(buf, offset)
+    end = offset + length
+    if end > len(buf):
+        raise ValueError(f"{what} out of range")
+    return buf[offset:end], end
+
+
+class SolanaInstructionView:
+    __slots__ = ("index", "program_index", "account_indexes", "data")
+
+    def __init__(self, index: int, program_index: int, account_indexes: memoryview, data: memoryview):
+        self.index = index
+        self.program_index = program_index
+        self.account_indexes = account_indexes
+        self.data = data
+
+
+class AddressTableLookupView:
+    __slots__ = ("key_offset", "writable_indexes", "readonly_indexes")
+
+    def __init__(self, key_offset: int, writable_indexes: memoryview, readonly_indexes: memoryview):
+        self.key_offset = key_offset
+        self.writable_indexes = writable_indexes
+        self.readonly_indexes = readonly_indexes
+
+
+class SolanaTransactionView:
+    """
+    Zero-copy view over a serialized legacy or v0 transaction.
+
+    Parsing only records offsets into a memoryview; account keys are base58
+    encoded on first access, so callers pay for the keys they actually read.
+    v0 address-table lookups are parsed, and loaded addresses resolve to real
+    keys when the lookup-table contents are supplied, or to
+    "loaded_address_index:N" placeholders otherwise.
+    """
+
+    def __init__(
+        self,
+        raw: bytes | bytearray | memoryview,
+        *,
+        lookup_table_addresses: dict[str, list[str]] | None = None,
+    ):
+        buf = memoryview(raw)
+        self._buf = buf
+        self._lookup_table_addresses = lookup_table_addresses or {}
+        self._key_cache: dict[int, str] = {}
+        self._loaded: list[tuple[str, int, bool]] | None = None
+
+        self.signature_count, offset = _read_shortvec(buf, 0)
+        offset += self.signature_count * 64
+        if offset >= len(buf):
+            raise ValueError("missing message")
+
+        self.version = "legacy"
+        if buf[offset] & 0x80:
+            self.version = f"v{buf[offset] & 0x7F}"
+            offset += 1
+
+        if offset + 3 > len(buf):
+            raise ValueError("missing header")
+        self.num_required_signatures = buf[offset]
+        self.num_readonly_signed = buf[offset + 1]
+        self.num_readonly_unsigned = buf[offset + 2]
+        offset += 3
+
+        self.static_account_count, offset = _read_shortvec(buf, offset)
+        self._keys_offset = offset
+        offset += self.static_account_count * PUBKEY_LENGTH
+        if offset > len(buf):
+            raise ValueError("account key out of range")
+
+        if offset + PUBKEY_LENGTH > len(buf):
+            raise ValueError("missing recent blockhash")
+        self._blockhash_offset = offset
+        offset += PUBKEY_LENGTH
+
+        instruction_count, offset = _read_shortvec(buf, offset)
+        self.instructions: list[SolanaInstructionView] = []
+        for index in range(instruction_count):
+            if offset >= len(buf):
+                raise ValueError("instruction program out of range")
+            program_index = buf[offset]
+            offset += 1
+            account_indexes, offset = _read_shortvec_slice(buf, offset, "instruction accounts")
+            data, offset = _read_shortvec_slice(buf, offset, "instruction data")
+            self.instructions.append(SolanaInstructionView(index, program_index, account_indexes, data))
+
+        self.address_table_lookups: list[AddressTableLookupView] = []
+        if self.version != "legacy" and offset < len(buf):
+            lookup_count, offset = _read_shortvec(buf, offset)
+            for _ in range(lookup_count):
+                if offset + PUBKEY_LENGTH > len(buf):
+                    raise ValueError("address table key out of range")
+                key_offset = offset
+                offset += PUBKEY_LENGTH
+                writable, offset = _read_shortvec_slice(buf, offset, "address table writable indexes")
+                readonly, offset = _read_shortvec_slice(buf, offset, "address table readonly indexes")
+                self.address_table_lookups.append(AddressTableLookupView(key_offset, writable, readonly))
+
+    @classmethod
+    def from_base64(cls, value: str, **kwargs) -> "SolanaTransactionView":
+        return cls(base64.b64decode((value or "").strip(), validate=True), **kwargs)
+
+    @property
+    def loaded_account_count(self) -> int:
+        return sum(len(item.writable_indexes) + len(item.readonly_indexes) for item in self.address_table_lookups)
+
+    @property
+    def recent_blockhash(self) -> str:
+        return encode_pubkey(bytes(self._buf[self._blockhash_offset:self._blockhash_offset + PUBKEY_LENGTH]))
+
+    def _static_key_bytes(self, index: int) -> bytes:
+        start = self._keys_offset + index * PUBKEY_LENGTH
+        return bytes(self._buf[start:start + PUBKEY_LENGTH])
+
+    def _loaded_entries(self) -> list[tuple[str, int, bool]]:
+        # Loaded addresses follow the static keys: every table's writable
+        # indexes first (in lookup order), then every table's readonly ones.
+        if self._loaded is None:
+            writable = []
+            readonly = []
+            for lookup in self.address_table_lookups:
+                table = encode_pubkey(bytes(self._buf[lookup.key_offset:lookup.key_offset + PUBKEY_LENGTH]))
+                writable.extend((table, index, True) for index in lookup.writable_indexes)
+                readonly.extend((table, index, False) for index in lookup.readonly_indexes)
+            self._loaded = writable + readonly
+        return self._loaded
+
+    def account_key(self, index: int) -> str:
+        cached = self._key_cache.get(index)
+        if cached is not None:
+            return cached
+        if index < self.static_account_count:
+            key = encode_pubkey(self._static_key_bytes(index))
+        else:
+            key = f"loaded_address_index:{index}"
+            loaded = self._loaded_entries()
+            position = index - self.static_account_count
+            if position < len(loaded):
+                table, table_index, _ = loaded[position]
+                addresses = self._lookup_table_addresses.get(table)
+                if addresses is not None and table_index < len(addresses):
+                    key = addresses[table_index]
+        self._key_cache[index] = key
+        return key
+
+    def account_keys(self) -> list[str]:
+        return [self.account_key(index) for index in range(self.static_account_count)]
+
+    def has_static_account_key(self, pubkey: str) -> bool:
+        try:
+            needle = decode_pubkey(pubkey)
+        except ValueError:
+            return False
+        buf = self._buf
+        start = self._keys_offset
+        for index in range(self.static_account_count):
+            offset = start + index * PUBKEY_LENGTH
+            if buf[offset:offset + PUBKEY_LENGTH] == needle:
+                return True
+        return False
+
+    def is_writable(self, index: int) -> bool:
+        if index < self.static_account_count:
+            if index < self.num_required_signatures:
+                return index < self.num_required_signatures - self.num_readonly_signed
+            unsigned_count = self.static_account_count - self.num_required_signatures
+            return index - self.num_required_signatures < unsigned_count - self.num_readonly_unsigned
+        loaded = self._loaded_entries()
+        position = index - self.static_account_count
+        return position < len(loaded) and loaded[position][2]
+
+    def writable_static_account_keys(self) -> list[str]:
+        return [self.account_key(index) for index in range(self.static_account_count) if self.is_writable(index)]
+
+    def address_table_lookup_summary(self) -> list[dict]:
+        return [
+            {
+                "account_key": encode_pubkey(bytes(self._buf[item.key_offset:item.key_offset + PUBKEY_LENGTH])),
+                "writable_count": len(item.writable_indexes),
+                "readonly_count": len(item.readonly_indexes),
+            }
+            for item in self.address_table_lookups
+        ]
+
+
+_DECODED_INSTRUCTION_PROGRAM_IDS = frozenset({
+    SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID,
+    SOLANA_SYSTEM_PROGRAM_ID,
+    SOLANA_TOKEN_PROGRAM_ID,
+})
+
+
+def decode_transaction_diagnostics(
+    transaction_base64: str,
+    *,
+    expected_user_public_key: str = "",
+    lookup_table_addresses: dict[str, list[str]] | None = None,
+) -> dict:
+    """Fee payer, program ids and ATA / wSOL wrap instructions of a base64 transaction, for swap preflight."""
+    try:
+        raw = base64.b64decode((transaction_base64 or "").strip(), validate=True)
+    except (binascii.Error, ValueError):
+        return {"decode_ok": False}
+
+    try:
+        view = SolanaTransactionView(raw, lookup_table_addresses=lookup_table_addresses)
+        version = view.version
+        program_ids = []
+        ata_create_details = []
+        system_transfer_details = []
+        token_sync_native_details = []
+        token_close_account_details = []
+        for instruction in view.instructions:
+            instruction_index = instruction.index
+            program_id = view.account_key(instruction.program_index)
+            program_ids.append(program_id)
+            if program_id not in _DECODED_INSTRUCTION_PROGRAM_IDS:
+                continue
+            # Only instructions we report on pay for base58-encoding their accounts.
+            account_indexes = list(instruction.account_indexes)
+            account_pubkeys = [view.account_key(index) for index in account_indexes]
+            instruction_data = instruction.data
+            if program_id == SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID:
+                ata_create_details.append({
+                    "instruction_index": instruction_index,
+                    "program_id": program_id,
+                    "account_indexes": account_indexes,
+                    "account_pubkeys": account_pubkeys,
+                    "payer": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
+                    "ata_account": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
+                    "owner": account_pubkeys[2] if len(account_pubkeys) > 2 else None,
+                    "mint": account_pubkeys[3] if len(account_pubkeys) > 3 else None,
+                })
+            if program_id == SOLANA_SYSTEM_PROGRAM_ID and len(instruction_data) >= 12:
+                instruction_type = int.from_bytes(instruction_data[:4], "little")
+                if instruction_type == 2:
+                    system_transfer_details.append({
+                        "instruction_index": instruction_index,
+                        "program_id": program_id,
+                        "source": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
+                        "destination": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
+                        "lamports": int.from_bytes(instruction_data[4:12], "little"),
+                    })
+            if program_id == SOLANA_TOKEN_PROGRAM_ID and instruction_data:
+                instruction_type = instruction_data[0]
+                if instruction_type == 17:
+                    token_sync_native_details.append({
+                        "instruction_index": instruction_index,
+                        "program_id": program_id,
+                        "account": account_pubkeys[0] if account_pubkeys else None,
+                    })
+                elif instruction_type == 9:
+                    token_close_account_details.append({
+                        "instruction_index": instruction_index,
+                        "program_id": program_id,
+                        "account": account_pubkeys[0] if len(account_pubkeys) > 0 else None,
+                        "destination": account_pubkeys[1] if len(account_pubkeys) > 1 else None,
+                        "owner": account_pubkeys[2] if len(account_pubkeys) > 2 else None,
+                    })
+
+        unique_program_ids = []
+        for program_id in program_ids:
+            if program_id not in unique_program_ids:
+                unique_program_ids.append(program_id)
+
+        expected_user = (expected_user_public_key or "").strip()
+        fee_payer = view.account_key(0) if view.static_account_count else None
+        wsol_ata_account = None
+        for detail in ata_create_details:
+            if detail.get("mint") == SOLANA_WRAPPED_SOL_MINT:
+                wsol_ata_account = detail.get("ata_account")
+                break
+        system_transfers_to_wsol = [
+            detail for detail in system_transfer_details
+            if wsol_ata_account and detail.get("destination") == wsol_ata_account
+        ]
+        sync_native_for_wsol = [
+            detail for detail in token_sync_native_details
+            if wsol_ata_account and detail.get("account") == wsol_ata_account
+        ]
+        uses_wrapped_sol_mint = view.has_static_account_key(SOLANA_WRAPPED_SOL_MINT)
+        native_sol_wrap_complete = None
+        if uses_wrapped_sol_mint:
+            native_sol_wrap_complete = bool(system_transfers_to_wsol and sync_native_for_wsol)
+        unresolved_loaded_addresses = [
+            detail for detail in ata_create_details
+            if any(str(value).startswith("loaded_address_index:") for value in detail.get("account_pubkeys", []))
+        ]
+        instruction_details = [
+            *({"kind": "system_transfer", **detail} for detail in system_transfer_details),
+            *({"kind": "token_sync_native", **detail} for detail in token_sync_native_details),
+            *({"kind": "token_close_account", **detail} for detail in token_close_account_details),
+        ]
+        return {
+            "decode_ok": True,
+            "transaction_version": version,
+            "fee_payer": fee_payer,
+            "expected_user_public_key": expected_user or None,
+            "fee_payer_matches_expected_user": bool(expected_user and fee_payer == expected_user),
+            "expected_user_account_present": bool(expected_user and view.has_static_account_key(expected_user)),
+            "static_account_count": view.static_account_count,
+            "loaded_account_count": view.loaded_account_count,
+            "address_table_lookups": view.address_table_lookup_summary(),
+            "instruction_count": len(program_ids),
+            "program_ids": unique_program_ids[:16],
+            "instruction_program_ids": program_ids[:64],
+            "ata_create_count": program_ids.count(SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID),
+            "ata_create_details": ata_create_details,
+            "token_program_instruction_count": program_ids.count(SOLANA_TOKEN_PROGRAM_ID),
+            "system_program_instruction_count": program_ids.count(SOLANA_SYSTEM_PROGRAM_ID),
+            "uses_associated_token_program": SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID in program_ids,
+            "uses_token_program": SOLANA_TOKEN_PROGRAM_ID in program_ids,
+            "uses_system_program": SOLANA_SYSTEM_PROGRAM_ID in program_ids,
+            "uses_wrapped_sol_mint": uses_wrapped_sol_mint,
+            "wsol_ata_account": wsol_ata_account,
+            "has_system_transfer_to_wsol_account": bool(system_transfers_to_wsol),
+            "has_token_sync_native": bool(token_sync_native_details),
+            "has_token_close_account": bool(token_close_account_details),
+            "wsol_wrap_lamports_detected": sum(
+                int(detail.get("lamports") or 0) for detail in system_transfers_to_wsol
+            ) or None,
+            "native_sol_wrap_complete": native_sol_wrap_complete,
+            "system_transfer_details": system_transfer_details,
+            "token_sync_native_details": token_sync_native_details,
+            "token_close_account_details": token_close_account_details,
+            "instruction_details": instruction_details[:24],
+            "loaded_address_resolution_available": bool(lookup_table_addresses),
+            "loaded_address_resolution_note": (
+                "v0 loaded addresses need lookup-table contents to resolve"
+                if version != "legacy" and unresolved_loaded_addresses
+                else None
+            ),
+        }
+    except (IndexError, ValueError):
+        return {"decode_ok": False}
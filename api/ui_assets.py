@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+UI_ASSET_PREFIX = "/ui/assets/"
+# Hashed asset URLs never change content, so browsers may keep them for a year.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# The shell names the current asset hashes, so it must be revalidated.
+SHELL_CACHE_CONTROL = "no-cache"
+MIN_COMPRESS_BYTES = 1024
+
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class UiAsset:
+    """One UI file with its encoded variants, built once."""
+
+    def __init__(self, body: bytes, media_type: str, *, cache_control: str):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.hash = _content_hash(body)
+        self.variants: dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            brotli = _load_brotli()
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding: str) -> str:
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.hash}{suffix}"'
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in {"0", "0.0", "0.00", "0.000"}:
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _if_none_match(header: str) -> set[str]:
+    return {tag.strip().removeprefix("W/") for tag in (header or "").split(",") if tag.strip()}
+
+
+def asset_response(request: Request, asset: UiAsset) -> Response:
+    """Picks br > gzip > identity from Accept-Encoding and answers If-None-Match with 304."""
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    encoding = next((name for name in ("br", "gzip") if name in accepted and name in asset.variants), "identity")
+    etag = asset.etag(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": asset.cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    tags = _if_none_match(request.headers.get("if-none-match", ""))
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+def split_ui_html(html: str) -> tuple[str, str, str]:
+    """
+    Splits the page into (shell, css, js): the first inline <style> block and
+    the inline <script> block without a src. The shell keeps "{css_href}" and
+    "{js_src}" markers where they were.
+    """
+    style_start = html.index("<style>")
+    style_end = html.index("</style>", style_start)
+    css = html[style_start + len("<style>"):style_end]
+    html = html[:style_start] + '<link rel="stylesheet" href="{css_href}" />' + html[style_end + len("</style>"):]
+
+    script_start = html.index("<script>")
+    script_end = html.index("</script>", script_start)
+    js = html[script_start + len("<script>"):script_end]
+    html = html[:script_start] + '<script src="{js_src}"></script>' + html[script_end + len("</script>"):]
+    return html, css, js
+
+
+class UiAssetBundle:
+    """The UI shell plus content-hashed CSS and JS, compressed once at build time."""
+
+    def __init__(self, html: str):
+        shell, css, js = split_ui_html(html)
+        css_asset = UiAsset(css.encode("utf-8"), "text/css; charset=utf-8", cache_control=IMMUTABLE_CACHE_CONTROL)
+        js_asset = UiAsset(js.encode("utf-8"), "text/javascript; charset=utf-8", cache_control=IMMUTABLE_CACHE_CONTROL)
+        self.assets = {
+            f"app.{css_asset.hash}.css": css_asset,
+            f"app.{js_asset.hash}.js": js_asset,
+        }
+        shell = (
+            shell
+            .replace("{css_href}", f"{UI_ASSET_PREFIX}app.{css_asset.hash}.css")
+            .replace("{js_src}", f"{UI_ASSET_PREFIX}app.{js_asset.hash}.js")
+        )
+        self.shell = UiAsset(shell.encode("utf-8"), "text/html; charset=utf-8", cache_control=SHELL_CACHE_CONTROL)
+
+    def asset(self, name: str) -> UiAsset | None:
+        return self.assets.get(name)
+
+    def stats(self) -> dict:
+        return {
+            name: {encoding: len(body) for encoding, body in asset.variants.items()}
+            for name, asset in {"shell": self.shell, **self.assets}.items()
+        }
+
+
+_BUNDLE: UiAssetBundle | None = None
+_BUNDLE_LOCK = threading.Lock()
+
+
+def get_ui_asset_bundle(build_html: Callable[[], str]) -> UiAssetBundle:
+    global _BUNDLE
+    with _BUNDLE_LOCK:
+        if _BUNDLE is None:
+            _BUNDLE = UiAssetBundle(build_html())
+        return _BUNDLE
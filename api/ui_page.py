@@ -1483,6 +1483,7 @@ def build_ui_html() -> str:
   const SWAP_CONFIRMATION_POLL_INTERVAL_MS = 1500;
   const SWAP_CONFIRMATION_POLL_TIMEOUT_MS = 20000;
   const SWAP_BALANCE_FRESH_MS = 10 * 60 * 1000;
+  const HOLDER_CONCENTRATION_REUSE_MS = 60 * 1000;
   const SWAP_SOL_FEE_ACCOUNT_SETUP_BUFFER_SOL = 0.001;
   const SWAP_DEFAULT_NETWORK_FEE_SOL = 0.0001;
   const SWAP_RECOGNIZED_TOKENS_STORAGE_KEY = "web3Digest.swapRecognizedTokens.v1";
@@ -1506,6 +1507,7 @@ def build_ui_html() -> str:
   let latestPortfolioAccount = "";
   let latestSwapQuoteResponse = null;
   let latestHolderConcentrationData = null;
+  let holderConcentrationByMint = {};
   let latestPreparedSwap = null;
   let latestSwapPreflightResponse = null;
   let latestSwapBalanceRefreshDiagnostics = null;
@@ -3242,6 +3244,15 @@ function selectedExternalTokenForHolderConcentration() {
   return holderConcentrationTokenForSide("to") || holderConcentrationTokenForSide("from");
 }
 
+function externalMintsForHolderConcentration() {
+  const mints = [];
+  for (const side of ["to", "from"]) {
+    const token = holderConcentrationTokenForSide(side);
+    if (token && token.mint && !mints.includes(token.mint)) mints.push(token.mint);
+  }
+  return mints;
+}
+
 function resetHolderConcentration(opts = {}) {
   const card = $("holderConcentrationCard");
   const box = $("holderConcentrationBox");
@@ -3434,14 +3445,20 @@ async function runHolderConcentration() {
 
   holderConcentrationMint = token.mint;
   latestHolderConcentrationData = null;
+  const remembered = holderConcentrationByMint[token.mint];
+  if (remembered && Date.now() - remembered.at < HOLDER_CONCENTRATION_REUSE_MS) {
+    renderHolderConcentration(remembered.data);
+    return;
+  }
   card.style.display = "block";
   box.className = "muted";
   box.textContent = "Checking holder concentration...";
 
+  // Both sides of the swap in one request; the backend batches the RPC calls.
   let res;
   try {
-    res = await fetchMaybeJson("/tokens/holder-concentration?" + qs({
-      mint: token.mint
+    res = await fetchMaybeJson("/tokens/holder-concentration/batch?" + qs({
+      mints: externalMintsForHolderConcentration().join(",")
     }));
   } catch (err) {
     renderHolderConcentration({
@@ -3462,7 +3479,16 @@ async function runHolderConcentration() {
     return;
   }
 
-  renderHolderConcentration(res.data || {});
+  const results = res.data?.results || {};
+  const fetchedAt = Date.now();
+  for (const [mint, data] of Object.entries(results)) {
+    holderConcentrationByMint[mint] = { data, at: fetchedAt };
+  }
+  if (holderConcentrationMint !== token.mint) return;
+  renderHolderConcentration(results[token.mint] || {
+    ok: false,
+    error: { code: "HOLDER_CONCENTRATION_MISSING_RESULT" }
+  });
 }
 
 function renderSwapOptionCard(opt, opts = {}) {
@@ -4559,11 +4585,60 @@ function updateSwapSuccessModalState(state) {
   statusText.textContent = "Confirming on Solana";
 }
 
+function watchSwapConfirmationStream(signature, pollToken) {
+  // Resolves "complete" | "failed" | "timeout" from server push, or null so
+  // the caller falls back to polling.
+  if (typeof EventSource !== "function") return Promise.resolve(null);
+  return new Promise((resolve) => {
+    let settled = false;
+    const source = new EventSource("/swap/transaction/status/stream?" + qs({ signature }));
+    const finish = (state) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      source.close();
+      resolve(state);
+    };
+    const timer = setTimeout(() => finish("timeout"), SWAP_CONFIRMATION_POLL_TIMEOUT_MS);
+    source.addEventListener("status", (evt) => {
+      if (pollToken !== swapConfirmationPollToken) return finish("stale");
+      let data = {};
+      try { data = JSON.parse(evt.data || "{}"); } catch (err) { return; }
+      if (data.state === "failed") finish("failed");
+      else if (data.state === "confirmed") finish("complete");
+      else if (data.state === "timeout") finish("timeout");
+    });
+    source.addEventListener("watch_expired", () => {
+      if (pollToken !== swapConfirmationPollToken) return finish("stale");
+      finish("timeout");
+    });
+    source.onerror = () => finish(null);
+  });
+}
+
 async function pollSwapConfirmationStatus(signature) {
   if (!signature) return;
   const pollToken = ++swapConfirmationPollToken;
   const startedAt = Date.now();
 
+  const streamed = await watchSwapConfirmationStream(signature, pollToken);
+  if (pollToken !== swapConfirmationPollToken || streamed === "stale") return;
+  if (streamed === "complete") {
+    updateSwapSuccessModalState("complete");
+    setCompactSubmittedStatus(signature, "Transaction confirmed · ");
+    return;
+  }
+  if (streamed === "failed") {
+    updateSwapSuccessModalState("failed");
+    setCompactSubmittedStatus(signature, "Transaction failed · ");
+    return;
+  }
+  if (streamed === "timeout") {
+    updateSwapSuccessModalState("timeout");
+    setCompactSubmittedStatus(signature, "Still confirming · ");
+    return;
+  }
+
   while (Date.now() - startedAt < SWAP_CONFIRMATION_POLL_TIMEOUT_MS) {
     await delay(SWAP_CONFIRMATION_POLL_INTERVAL_MS);
     if (pollToken !== swapConfirmationPollToken) return;
@@ -7,8 +7,8 @@ from typing import Iterable, Optional
 from contextlib import contextmanager
 
 @contextmanager
-def open_conn(db_path: Path):
-    con = get_conn(db_path)
+def open_conn(db_path: Path, *, timeout: float = 5.0):
+    con = get_conn(db_path, timeout=timeout)
     try:
         yield con
     finally:
@@ -17,8 +17,9 @@ def open_conn(db_path: Path):
 DB_PATH = Path("wallet.db")
 
 
-def get_conn(db_path: Path = DB_PATH) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+def get_conn(db_path: Path = DB_PATH, *, timeout: float = 5.0) -> sqlite3.Connection:
+    # timeout: how long to wait for another connection's write lock.
+    conn = sqlite3.connect(db_path, timeout=timeout)
     conn.row_factory = sqlite3.Row
     # Good defaults for a local app
     conn.execute("PRAGMA foreign_keys = ON;")
@@ -87,6 +88,107 @@ def init_db(db_path: Path = DB_PATH) -> None:
             """
         )
 
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quote_observations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                quote_id TEXT NOT NULL,        -- groups all variants of one /swap/quote
+                network TEXT NOT NULL,
+                input_mint TEXT NOT NULL,
+                output_mint TEXT NOT NULL,
+                from_token TEXT,
+                to_token TEXT,
+                input_amount REAL,
+                input_amount_raw TEXT,
+                variant_id TEXT NOT NULL,      -- e.g. "recommended_default", "raydium_quote"
+                provider TEXT,                 -- e.g. "jupiter-metis", "raydium"
+                ok INTEGER NOT NULL,
+                estimated_output_raw TEXT,
+                latency_ms REAL,
+                error_code TEXT,
+                failure_kind TEXT,
+                route_shape TEXT,
+                route_step_count INTEGER,
+                reference_output_amount REAL,
+                benchmark_gap_pct REAL,
+                execution_cost REAL,
+                execution_cost_usd REAL,
+                is_best INTEGER NOT NULL DEFAULT 0,
+                is_recommended INTEGER NOT NULL DEFAULT 0,
+                pair_class TEXT                -- scheduler class from the quote's resolved token tags
+            );
+            """
+        )
+        observation_columns = {row[1] for row in conn.execute("PRAGMA table_info(quote_observations);")}
+        if "pair_class" not in observation_columns:
+            conn.execute("ALTER TABLE quote_observations ADD COLUMN pair_class TEXT;")
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quote_observations_pair
+            ON quote_observations (input_mint, output_mint, ts);
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quote_observations_provider
+            ON quote_observations (provider, ts);
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quote_observations_ts
+            ON quote_observations (ts);
+            """
+        )
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS external_token_metadata (
+                mint TEXT PRIMARY KEY,
+                decimals INTEGER,              -- immutable once known
+                decimals_source TEXT,
+                mint_account_owner TEXT,
+                token_json TEXT,               -- last external token payload (price, liquidity, pair)
+                token_fetched_at REAL,         -- unix seconds
+                logo_uri TEXT,
+                logo_fetched_at REAL,
+                not_found_at REAL,             -- negative cache: no external metadata
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_hit_at REAL
+            );
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_external_token_metadata_hits
+            ON external_token_metadata (last_hit_at, hits);
+            """
+        )
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                namespace TEXT NOT NULL,       -- e.g. "holder_concentration"
+                cache_key TEXT NOT NULL,
+                stored_at REAL NOT NULL,       -- unix seconds
+                expires_at REAL NOT NULL,
+                value_json TEXT NOT NULL,
+                PRIMARY KEY (namespace, cache_key)
+            );
+            """
+        )
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                upstream TEXT PRIMARY KEY,     -- e.g. "jupiter", "rpc:api.mainnet-beta.solana.com"
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL       -- unix seconds
+            );
+            """
+        )
+
 
 def insert_price_snapshot(
     ts: str,
@@ -459,3 +561,368 @@ def get_latest_balance(account: str, asset: str, db_path: Path = DB_PATH) -> tup
         return None
     return (row["ts"], float(row["amount"]))
 
+
+
+QUOTE_OBSERVATION_COLUMNS = [
+    "ts",
+    "quote_id",
+    "network",
+    "input_mint",
+    "output_mint",
+    "from_token",
+    "to_token",
+    "input_amount",
+    "input_amount_raw",
+    "variant_id",
+    "provider",
+    "ok",
+    "estimated_output_raw",
+    "latency_ms",
+    "error_code",
+    "failure_kind",
+    "route_shape",
+    "route_step_count",
+    "reference_output_amount",
+    "benchmark_gap_pct",
+    "execution_cost",
+    "execution_cost_usd",
+    "is_best",
+    "is_recommended",
+    "pair_class",
+]
+
+
+def insert_quote_observations(rows: Iterable[dict], db_path: Path = DB_PATH) -> int:
+    """
+    Append quote observation rows (dicts keyed by QUOTE_OBSERVATION_COLUMNS).
+    Returns number of rows inserted.
+    """
+    values = [tuple(row.get(column) for column in QUOTE_OBSERVATION_COLUMNS) for row in rows]
+    if not values:
+        return 0
+
+    columns = ", ".join(QUOTE_OBSERVATION_COLUMNS)
+    placeholders = ", ".join(["?"] * len(QUOTE_OBSERVATION_COLUMNS))
+    with open_conn(db_path) as conn:
+        conn.executemany(
+            f"INSERT INTO quote_observations ({columns}) VALUES ({placeholders});",
+            values,
+        )
+        conn.commit()
+    return len(values)
+
+
+def _quote_observation_filters(
+    input_mint: str | None,
+    output_mint: str | None,
+    provider: str | None,
+    since: str | None,
+    until: str | None,
+) -> tuple[str, list]:
+    clauses = []
+    params: list = []
+    if input_mint:
+        clauses.append("input_mint = ?")
+        params.append(input_mint)
+    if output_mint:
+        clauses.append("output_mint = ?")
+        params.append(output_mint)
+    if provider:
+        clauses.append("provider = ?")
+        params.append(provider)
+    if since:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if until:
+        clauses.append("ts < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def get_quote_observations(
+    input_mint: str | None = None,
+    output_mint: str | None = None,
+    provider: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = 100,
+    db_path: Path = DB_PATH,
+) -> list[dict]:
+    """
+    Returns observation rows newest-first, filtered by pair, provider and [since, until).
+    """
+    where, params = _quote_observation_filters(input_mint, output_mint, provider, since, until)
+    sql = f"""
+        SELECT {", ".join(QUOTE_OBSERVATION_COLUMNS)}
+        FROM quote_observations
+        {where}
+        ORDER BY ts DESC, id DESC
+        LIMIT ?;
+    """
+    with open_conn(db_path) as conn:
+        rows = conn.execute(sql, [*params, int(limit)]).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_quote_provider_stats(
+    input_mint: str | None = None,
+    output_mint: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    db_path: Path = DB_PATH,
+) -> dict[str, dict]:
+    """
+    Per-variant win rate and latency distribution over the filtered window.
+    Returns {variant_id: {provider, observations, successes, wins, win_rate,
+    success_rate, latency_ms_p50, latency_ms_p95}}.
+    """
+    where, params = _quote_observation_filters(input_mint, output_mint, None, since, until)
+    sql = f"""
+        SELECT variant_id, provider, ok, is_best, latency_ms
+        FROM quote_observations
+        {where}
+        ORDER BY variant_id, latency_ms;
+    """
+    grouped: dict[str, dict] = {}
+    with open_conn(db_path) as conn:
+        for row in conn.execute(sql, params):
+            item = grouped.setdefault(
+                row["variant_id"],
+                {"provider": row["provider"], "observations": 0, "successes": 0, "wins": 0, "latencies": []},
+            )
+            item["observations"] += 1
+            item["successes"] += 1 if row["ok"] else 0
+            item["wins"] += 1 if row["is_best"] else 0
+            if row["latency_ms"] is not None:
+                item["latencies"].append(float(row["latency_ms"]))
+
+    out: dict[str, dict] = {}
+    for variant_id, item in grouped.items():
+        latencies = item.pop("latencies")
+        observations = item["observations"]
+        out[variant_id] = {
+            **item,
+            "win_rate": item["wins"] / observations if observations else None,
+            "success_rate": item["successes"] / observations if observations else None,
+            "latency_ms_p50": _percentile(latencies, 0.50),
+            "latency_ms_p95": _percentile(latencies, 0.95),
+        }
+    return out
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def get_quote_variant_pair_outcomes(
+    since: str | None = None,
+    db_path: Path = DB_PATH,
+) -> list[dict]:
+    """
+    Aggregates observations per (input_mint, output_mint, pair_class, variant_id)
+    since ts. Returns dicts with observations, successes, wins and
+    avg_success_latency_ms; pair_class is None for rows logged before it existed.
+    """
+    where, params = _quote_observation_filters(None, None, None, since, None)
+    sql = f"""
+        SELECT
+            input_mint,
+            output_mint,
+            pair_class,
+            variant_id,
+            COUNT(*) AS observations,
+            SUM(ok) AS successes,
+            SUM(is_best) AS wins,
+            AVG(CASE WHEN ok = 1 THEN latency_ms END) AS avg_success_latency_ms
+        FROM quote_observations
+        {where}
+        GROUP BY input_mint, output_mint, pair_class, variant_id;
+    """
+    with open_conn(db_path) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+EXTERNAL_TOKEN_METADATA_COLUMNS = [
+    "mint",
+    "decimals",
+    "decimals_source",
+    "mint_account_owner",
+    "token_json",
+    "token_fetched_at",
+    "logo_uri",
+    "logo_fetched_at",
+    "not_found_at",
+    "hits",
+    "last_hit_at",
+]
+
+
+def get_external_token_metadata(mint: str, db_path: Path = DB_PATH) -> dict | None:
+    with open_conn(db_path) as conn:
+        row = conn.execute(
+            "SELECT * FROM external_token_metadata WHERE mint = ?;",
+            (mint,),
+        ).fetchone()
+    return dict(row) if row is not None else None
+
+
+def upsert_external_token_metadata(mint: str, fields: dict, db_path: Path = DB_PATH) -> None:
+    """
+    Insert or update one mint. Only the given columns change, and a stored
+    decimals value is never overwritten (it cannot change for a mint).
+    """
+    columns = [column for column in EXTERNAL_TOKEN_METADATA_COLUMNS if column != "mint" and column in fields]
+    if not columns:
+        return
+    assignments = ", ".join(
+        "decimals = COALESCE(decimals, excluded.decimals)" if column == "decimals" else f"{column} = excluded.{column}"
+        for column in columns
+    )
+    names = ", ".join(["mint", *columns])
+    placeholders = ", ".join(["?"] * (len(columns) + 1))
+    with open_conn(db_path) as conn:
+        conn.execute(
+            f"""
+            INSERT INTO external_token_metadata ({names}) VALUES ({placeholders})
+            ON CONFLICT(mint) DO UPDATE SET {assignments};
+            """,
+            [mint, *(fields[column] for column in columns)],
+        )
+        conn.commit()
+
+
+def record_external_token_hit(mint: str, ts: float, db_path: Path = DB_PATH) -> None:
+    with open_conn(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO external_token_metadata (mint, hits, last_hit_at) VALUES (?, 1, ?)
+            ON CONFLICT(mint) DO UPDATE SET hits = hits + 1, last_hit_at = excluded.last_hit_at;
+            """,
+            (mint, ts),
+        )
+        conn.commit()
+
+
+def get_popular_external_token_mints(
+    since: float,
+    min_hits: int = 3,
+    limit: int = 20,
+    db_path: Path = DB_PATH,
+) -> list[dict]:
+    """Mints looked up at least min_hits times and hit since the given unix time, most-hit first."""
+    with open_conn(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT mint, hits, token_fetched_at, not_found_at
+            FROM external_token_metadata
+            WHERE last_hit_at >= ? AND hits >= ?
+            ORDER BY hits DESC
+            LIMIT ?;
+            """,
+            (since, int(min_hits), int(limit)),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_result_cache_entry(namespace: str, cache_key: str, now: float, db_path: Path = DB_PATH) -> dict | None:
+    with open_conn(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT stored_at, expires_at, value_json
+            FROM result_cache
+            WHERE namespace = ? AND cache_key = ? AND expires_at > ?;
+            """,
+            (namespace, cache_key, now),
+        ).fetchone()
+    return dict(row) if row is not None else None
+
+
+def set_result_cache_entry(
+    namespace: str,
+    cache_key: str,
+    *,
+    stored_at: float,
+    expires_at: float,
+    value_json: str,
+    db_path: Path = DB_PATH,
+) -> None:
+    """Upserts one entry and drops the namespace's expired rows in the same transaction."""
+    with open_conn(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO result_cache (namespace, cache_key, stored_at, expires_at, value_json)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(namespace, cache_key) DO UPDATE SET
+                stored_at = excluded.stored_at,
+                expires_at = excluded.expires_at,
+                value_json = excluded.value_json;
+            """,
+            (namespace, cache_key, stored_at, expires_at, value_json),
+        )
+        conn.execute(
+            "DELETE FROM result_cache WHERE namespace = ? AND expires_at <= ?;",
+            (namespace, stored_at),
+        )
+        conn.commit()
+
+
+def clear_result_cache(namespace: str, db_path: Path = DB_PATH) -> int:
+    with open_conn(db_path) as conn:
+        cur = conn.execute("DELETE FROM result_cache WHERE namespace = ?;", (namespace,))
+        conn.commit()
+        return cur.rowcount
+
+
+def take_rate_limit_tokens(
+    upstream: str,
+    *,
+    rate: float,
+    burst: float,
+    floor: float,
+    cost: float,
+    now: float,
+    db_path: Path = DB_PATH,
+    timeout: float = 5.0,
+) -> float:
+    """
+    Refills the upstream's shared bucket and takes cost tokens if the level
+    stays >= floor. Returns 0.0 when taken, else the seconds until it would
+    be. BEGIN IMMEDIATE serializes concurrent processes on the write lock;
+    waiting for it longer than timeout raises sqlite3.OperationalError.
+    """
+    with open_conn(db_path, timeout=timeout) as conn:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE upstream = ?;",
+                (upstream,),
+            ).fetchone()
+            if row is None:
+                tokens = burst
+            else:
+                tokens = min(burst, row["tokens"] + max(0.0, now - row["updated_at"]) * rate)
+            wait = 0.0
+            if tokens - cost >= floor:
+                tokens -= cost
+            else:
+                wait = (floor + cost - tokens) / rate
+            conn.execute(
+                """
+                INSERT INTO rate_limit_buckets (upstream, tokens, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(upstream) DO UPDATE SET
+                    tokens = excluded.tokens,
+                    updated_at = excluded.updated_at;
+                """,
+                (upstream, tokens, now),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return wait
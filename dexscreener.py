@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from typing import Any, Optional
 import requests
 
+from providers.rate_limiter import acquire_upstream
+
 
 @dataclass(frozen=True)
 class DexPair:
@@ -39,6 +41,8 @@ def fetch_best_pair_price_usd_solana(
     pairs: list[dict[str, Any]] = []
 
     for url in urls:
+        if not acquire_upstream("dexscreener"):
+            continue
         try:
             r = requests.get(url, timeout=timeout)
             if not r.ok:
@@ -6,6 +6,8 @@ from urllib.parse import parse_qs, quote, urlparse
 
 import requests
 
+from providers.rate_limiter import acquire_upstream
+
 
 DEFAULT_HELIUS_API_BASE_URL = "https://api-mainnet.helius-rpc.com"
 DEFAULT_TIMEOUT_SECONDS = 10
@@ -133,6 +135,12 @@ def fetch_wallet_activity(
     if configured_api_key:
         params["api-key"] = configured_api_key
 
+    if not acquire_upstream("helius"):
+        return _error(
+            "HELIUS_ACTIVITY_RATE_LIMITED",
+            "Helius wallet activity lookup is rate-limited right now.",
+            address=address,
+        )
     try:
         response = requests.get(url, params=params, timeout=timeout)
     except requests.RequestException as exc:
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+
+# Milliseconds; provider calls range from a cached hit (<1 ms) to a Node
+# helper cold start (several seconds).
+DEFAULT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(value) for value in label_values), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = tuple(str(item) for item in label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            row = self._values.get(tuple(str(value) for value in label_values))
+            return int(sum(row[:-1])) if row else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(row)) for key, row in self._values.items())
+        for key, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {_format_number(cumulative)}")
+            cumulative += row[len(self.buckets)]
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, inf)} {_format_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_number(round(row[-1], 3))}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {_format_number(cumulative)}")
+        return lines
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms, rendered in the Prometheus
+    text format. Everything is in memory and per process; with several
+    uvicorn workers each worker reports its own series.
+    """
+
+    def __init__(self):
+        self.provider_latency_ms = Histogram(
+            "swap_quote_provider_latency_ms",
+            "Quote provider call latency in milliseconds.",
+            ("variant", "outcome"),
+        )
+        self.provider_errors = Counter(
+            "swap_quote_provider_errors_total",
+            "Failed quote provider calls by failure kind.",
+            ("variant", "failure_kind"),
+        )
+        self.stage_latency_ms = Histogram(
+            "request_stage_latency_ms",
+            "Latency of request stages in milliseconds.",
+            ("endpoint", "stage"),
+        )
+        self.cache_lookups = Counter(
+            "cache_lookups_total",
+            "Cache lookups by cache and outcome.",
+            ("cache", "outcome"),
+        )
+        self.subprocess_spawns = Counter(
+            "subprocess_spawns_total",
+            "Helper subprocesses started.",
+            ("helper",),
+        )
+        self.rpc_calls = Counter(
+            "solana_rpc_calls_total",
+            "Solana JSON-RPC requests by method.",
+            ("method",),
+        )
+        self.rate_limit_decisions = Counter(
+            "upstream_rate_limit_decisions_total",
+            "Upstream rate limiter decisions by priority (granted, waited, shed).",
+            ("upstream", "priority", "outcome"),
+        )
+        self.speculative_probes = Counter(
+            "jupiter_speculative_probes_total",
+            "Speculative exclude-dexes probes by outcome (used, discarded before or after it was sent).",
+            ("outcome",),
+        )
+        self._started_at = time.time()
+
+    def families(self) -> list:
+        return [
+            self.provider_latency_ms,
+            self.provider_errors,
+            self.stage_latency_ms,
+            self.cache_lookups,
+            self.subprocess_spawns,
+            self.rpc_calls,
+            self.rate_limit_decisions,
+            self.speculative_probes,
+        ]
+
+    def render(self) -> str:
+        lines = [
+            "# HELP process_start_time_seconds Start time of the process since unix epoch in seconds.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {_format_number(round(self._started_at, 3))}",
+        ]
+        for family in self.families():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+_METRICS = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _METRICS
+
+
+def count_rpc_call(method: str, amount: int = 1) -> None:
+    _METRICS.rpc_calls.inc(method, amount=amount)
+
+
+def count_subprocess_spawn(helper: str) -> None:
+    _METRICS.subprocess_spawns.inc(helper)
+
+
+def count_cache_lookup(cache: str, outcome: str) -> None:
+    _METRICS.cache_lookups.inc(cache, outcome)
+
+
+def count_rate_limit_decision(upstream: str, priority: str, outcome: str) -> None:
+    _METRICS.rate_limit_decisions.inc(upstream, priority, outcome)
+
+
+def count_speculative_probe(outcome: str) -> None:
+    _METRICS.speculative_probes.inc(outcome)
+
+
+class StageTimer:
+    """
+    Sequential stage clock for one request: mark(stage) records the time
+    since the previous mark (or since creation) under that stage name and
+    in the stage histogram.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.timings_ms: dict[str, float] = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed_ms = round((now - self._last) * 1000.0, 2)
+        self._last = now
+        self.timings_ms[stage] = round(self.timings_ms.get(stage, 0.0) + elapsed_ms, 2)
+        _METRICS.stage_latency_ms.observe(elapsed_ms, self.endpoint, stage)
+        return elapsed_ms
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self._started) * 1000.0, 2)
+
+    def finish(self) -> dict:
+        total_ms = self.total_ms()
+        _METRICS.stage_latency_ms.observe(total_ms, self.endpoint, "total")
+        return {"total_ms": total_ms, "stages": dict(self.timings_ms)}
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import db
+from providers.metrics import count_rate_limit_decision
+
+
+class TokenBucket:
+    """
+    rate tokens per second refill up to burst. acquire() blocks until a
+    token is available (or timeout passes); try_acquire() and take() never
+    block. take() can keep a floor of tokens in reserve.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, *, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, tokens: float = 1.0, *, floor: float = 0.0) -> float:
+        """Takes tokens if the level stays >= floor; returns 0.0 or the seconds until it would."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens - tokens >= floor:
+                self._tokens -= tokens
+                return 0.0
+            return (floor + tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        return self.take(tokens) == 0.0
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens would be available, without taking them."""
+        with self._lock:
+            self._refill(self._clock())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.take(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+
+UPSTREAM_RATE_LIMITER_ENV = "UPSTREAM_RATE_LIMITER"
+UPSTREAM_RATE_LIMITS_ENV = "UPSTREAM_RATE_LIMITS"
+RATE_LIMITER_SHARED_ENV = "RATE_LIMITER_SHARED"
+RATE_LIMITER_DB_PATH_ENV = "RATE_LIMITER_DB_PATH"
+
+PRIORITY_EXECUTION = 0
+PRIORITY_QUOTE = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_AUDIT = 3
+PRIORITY_NAMES = {
+    PRIORITY_EXECUTION: "execution",
+    PRIORITY_QUOTE: "quote",
+    PRIORITY_BACKGROUND: "background",
+    PRIORITY_AUDIT: "audit",
+}
+# Share of an upstream's burst each class has to leave in the bucket, so
+# refresh jobs and audits can never spend the quota quotes and swaps need.
+PRIORITY_RESERVE_FRACTION = {
+    PRIORITY_EXECUTION: 0.0,
+    PRIORITY_QUOTE: 0.2,
+    PRIORITY_BACKGROUND: 0.5,
+    PRIORITY_AUDIT: 0.7,
+}
+# Longest a call waits for a token before it is shed (reported like a 429);
+# None waits as long as it takes.
+PRIORITY_MAX_WAIT_SECONDS = {
+    PRIORITY_EXECUTION: 10.0,
+    PRIORITY_QUOTE: 3.0,
+    PRIORITY_BACKGROUND: 30.0,
+    PRIORITY_AUDIT: None,
+}
+# Longest a take waits for the shared store's write lock before this process
+# falls back to its own bucket; quotes must not queue behind a stuck writer.
+SHARED_STORE_TIMEOUT_SECONDS = 0.2
+# upstream -> (requests per second, burst). "rpc" applies to every RPC
+# endpoint separately ("rpc:<host>").
+DEFAULT_UPSTREAM_LIMITS = {
+    "jupiter": (1.0, 5.0),
+    "jupiter_keyed": (10.0, 20.0),
+    "raydium": (5.0, 10.0),
+    "coingecko": (0.5, 3.0),
+    "dexscreener": (4.0, 10.0),
+    "helius": (10.0, 20.0),
+    "rpc": (8.0, 20.0),
+    # Backend fee estimates for extra quote routes (always background
+    # priority, so half the burst stays in reserve): about 30 per minute.
+    "network_fee": (0.5, 60.0),
+}
+
+_CURRENT_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("upstream_priority", default=PRIORITY_QUOTE)
+
+
+def upstream_rate_limiter_enabled() -> bool:
+    return (os.getenv(UPSTREAM_RATE_LIMITER_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _shared_rate_limiter_enabled() -> bool:
+    return (os.getenv(RATE_LIMITER_SHARED_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def parse_upstream_limits(value: str) -> dict[str, tuple[float, float]]:
+    """"jupiter=2:10,coingecko=0.2" -> rate[:burst] per upstream; invalid parts are skipped."""
+    limits: dict[str, tuple[float, float]] = {}
+    for part in (value or "").split(","):
+        name, sep, spec = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        rate_text, _, burst_text = spec.partition(":")
+        try:
+            rate = float(rate_text)
+            burst = float(burst_text) if burst_text.strip() else max(1.0, rate)
+        except ValueError:
+            continue
+        if rate > 0:
+            limits[name.strip()] = (rate, max(1.0, burst))
+    return limits
+
+
+def jupiter_upstream() -> str:
+    """Keyed and keyless Jupiter traffic have separate quotas."""
+    return "jupiter_keyed" if (os.getenv("JUP_API_KEY") or "").strip() else "jupiter"
+
+
+def rpc_upstream(rpc_url: str) -> str:
+    return "rpc:" + (urlsplit(str(rpc_url or "")).netloc or "default")
+
+
+def current_priority() -> int:
+    return _CURRENT_PRIORITY.get()
+
+
+@contextmanager
+def upstream_priority(priority: int):
+    """Upstream calls made inside (in this thread/context) use priority."""
+    token = _CURRENT_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _CURRENT_PRIORITY.reset(token)
+
+
+class UpstreamRateLimiter:
+    """
+    One token bucket per upstream with priority classes. A class may only
+    take a token while the bucket stays above its reserve, and never while
+    a higher class is waiting on the same upstream in this process. Calls
+    that would wait longer than their class allows are shed instead.
+
+    In-process levels are TokenBuckets. With db_path the bucket levels live
+    in SQLite instead, so every process using that file (uvicorn workers,
+    refresh scripts) spends the same budget; the reserves then hold across
+    processes.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float]] | None = None,
+        *,
+        db_path: Path | None = None,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.limits = dict(DEFAULT_UPSTREAM_LIMITS if limits is None else limits)
+        self.db_path = Path(db_path) if db_path is not None else None
+        self._clock = clock
+        self._sleep = sleep
+        # _lock guards the waiting counts, stats and bucket map only; takes
+        # run outside it so a slow shared store never blocks other upstreams.
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._waiting: dict[str, Counter[int]] = {}
+        self._schema_ready = False
+        self.shared_errors = 0
+        self.stats: Counter[tuple[str, str, str]] = Counter()
+
+    def limit_for(self, upstream: str) -> tuple[float, float] | None:
+        return self.limits.get(upstream) or self.limits.get(upstream.split(":", 1)[0])
+
+    def _take(self, upstream: str, rate: float, burst: float, floor: float, cost: float) -> float:
+        """Takes cost tokens if the level stays >= floor; returns 0 or the seconds to wait."""
+        if self.db_path is not None:
+            try:
+                if not self._schema_ready:
+                    db.init_db(self.db_path)
+                    self._schema_ready = True
+                return db.take_rate_limit_tokens(
+                    upstream,
+                    rate=rate,
+                    burst=burst,
+                    floor=floor,
+                    cost=cost,
+                    now=self._clock(),
+                    db_path=self.db_path,
+                    timeout=SHARED_STORE_TIMEOUT_SECONDS,
+                )
+            except Exception:
+                # A broken or locked shared store must not block quotes; fall back to this process's bucket.
+                with self._lock:
+                    self.shared_errors += 1
+        with self._lock:
+            bucket = self._buckets.get(upstream)
+            if bucket is None:
+                bucket = self._buckets[upstream] = TokenBucket(rate, burst, clock=self._clock)
+        return bucket.take(cost, floor=floor)
+
+    def acquire(self, upstream: str, priority: int | None = None, *, cost: float = 1.0, wait: bool = True) -> bool:
+        """True once a token is taken; False if the call was shed. wait=False sheds instead of waiting."""
+        limit = self.limit_for(upstream)
+        if limit is None:
+            return True
+        rate, burst = limit
+        # A batch larger than the bucket could never be granted; it drains the whole burst instead.
+        cost = min(float(cost), burst)
+        priority = current_priority() if priority is None else priority
+        # Clamped so a class can still be served by a bucket too small for its reserve.
+        floor = min(burst * PRIORITY_RESERVE_FRACTION.get(priority, 0.0), max(0.0, burst - cost))
+        max_wait = PRIORITY_MAX_WAIT_SECONDS.get(priority)
+        deadline = None if max_wait is None else self._clock() + max_wait
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        waited = False
+        with self._lock:
+            self._waiting.setdefault(upstream, Counter())[priority] += 1
+        try:
+            while True:
+                with self._lock:
+                    waiting = self._waiting[upstream]
+                    outranked = any(count for other, count in waiting.items() if other < priority)
+                delay = 1.0 / rate if outranked else self._take(upstream, rate, burst, floor, cost)
+                if delay <= 0:
+                    self._record(upstream, label, "waited" if waited else "granted")
+                    return True
+                if not wait:
+                    self._record(upstream, label, "shed")
+                    return False
+                if deadline is not None:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0 or (not outranked and delay > remaining):
+                        self._record(upstream, label, "shed")
+                        return False
+                    delay = min(delay, remaining)
+                waited = True
+                self._sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting[upstream][priority] -= 1
+
+    def _record(self, upstream: str, priority: str, outcome: str) -> None:
+        with self._lock:
+            self.stats[(upstream, priority, outcome)] += 1
+        count_rate_limit_decision(upstream, priority, outcome)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "shared": self.db_path is not None,
+                "shared_errors": self.shared_errors,
+                "limits": {name: {"rate": rate, "burst": burst} for name, (rate, burst) in sorted(self.limits.items())},
+                "decisions": [
+                    {"upstream": upstream, "priority": priority, "outcome": outcome, "count": count}
+                    for (upstream, priority, outcome), count in sorted(self.stats.items())
+                ],
+            }
+
+
+_UPSTREAM_LIMITER: UpstreamRateLimiter | None = None
+_UPSTREAM_LIMITER_LOCK = threading.Lock()
+
+
+def get_upstream_rate_limiter() -> UpstreamRateLimiter:
+    global _UPSTREAM_LIMITER
+    with _UPSTREAM_LIMITER_LOCK:
+        if _UPSTREAM_LIMITER is None:
+            limits = dict(DEFAULT_UPSTREAM_LIMITS)
+            limits.update(parse_upstream_limits(os.getenv(UPSTREAM_RATE_LIMITS_ENV) or ""))
+            db_path = None
+            if _shared_rate_limiter_enabled():
+                db_path = Path((os.getenv(RATE_LIMITER_DB_PATH_ENV) or "").strip() or db.DB_PATH)
+            _UPSTREAM_LIMITER = UpstreamRateLimiter(limits, db_path=db_path)
+        return _UPSTREAM_LIMITER
+
+
+def acquire_upstream(upstream: str, priority: int | None = None, *, cost: float = 1.0, wait: bool = True) -> bool:
+    """Gate for one upstream request (cost tokens for a batch); always True unless UPSTREAM_RATE_LIMITER is on."""
+    if not upstream_rate_limiter_enabled():
+        return True
+    return get_upstream_rate_limiter().acquire(upstream, priority, cost=cost, wait=wait)
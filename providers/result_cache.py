@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable
+
+import db
+from providers.metrics import count_cache_lookup
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class MemoryLruCache:
+    """
+    Size-bounded, per-process cache of {"stored_at", "expires_at", "result"}
+    entries. Expired entries are dropped when read; the least recently used
+    entry is evicted once max_entries is reached. Stored results are shared
+    with readers, so callers must copy before mutating.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, dict[str, Any]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: Hashable, now: float) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if float(entry.get("expires_at") or 0) <= now:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteResultCache:
+    """
+    On-disk tier shared by every process using the same database file (e.g.
+    all uvicorn workers). Results round-trip through JSON; errors are
+    swallowed and counted so the cache can never fail a request.
+    """
+
+    def __init__(self, db_path: Path, namespace: str):
+        self.db_path = Path(db_path)
+        self.namespace = namespace
+        self._schema_ready = False
+        self._lock = threading.Lock()
+        self.errors = 0
+        self.last_error: str | None = None
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(list(key) if isinstance(key, tuple) else key)
+
+    def _ensure_schema(self) -> None:
+        if not self._schema_ready:
+            db.init_db(self.db_path)
+            self._schema_ready = True
+
+    def _failed(self, exc: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+            self.last_error = f"{exc.__class__.__name__}: {exc}"
+
+    def get(self, key: Hashable, now: float) -> dict[str, Any] | None:
+        try:
+            self._ensure_schema()
+            row = db.get_result_cache_entry(self.namespace, self._key(key), now, db_path=self.db_path)
+            if row is None:
+                return None
+            return {
+                "stored_at": row["stored_at"],
+                "expires_at": row["expires_at"],
+                "result": json.loads(row["value_json"]),
+            }
+        except Exception as exc:
+            self._failed(exc)
+            return None
+
+    def set(self, key: Hashable, entry: dict[str, Any]) -> None:
+        try:
+            self._ensure_schema()
+            db.set_result_cache_entry(
+                self.namespace,
+                self._key(key),
+                stored_at=float(entry["stored_at"]),
+                expires_at=float(entry["expires_at"]),
+                value_json=json.dumps(entry["result"]),
+                db_path=self.db_path,
+            )
+        except Exception as exc:
+            self._failed(exc)
+
+    def clear(self) -> None:
+        try:
+            self._ensure_schema()
+            db.clear_result_cache(self.namespace, db_path=self.db_path)
+        except Exception as exc:
+            self._failed(exc)
+
+
+class TieredResultCache:
+    """
+    Memory LRU in front of an optional shared tier. A shared hit is promoted
+    into memory with its original expiry, so a result fetched by one worker
+    serves every worker until the same deadline.
+    """
+
+    def __init__(self, memory: MemoryLruCache, shared: SqliteResultCache | None = None, *, name: str = "result"):
+        self.memory = memory
+        self.shared = shared
+        self.name = name
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, now: float) -> dict[str, Any] | None:
+        entry = self.memory.get(key, now)
+        if entry is not None:
+            self.memory_hits += 1
+            count_cache_lookup(self.name, "memory_hit")
+            return entry
+        if self.shared is not None:
+            entry = self.shared.get(key, now)
+            if entry is not None:
+                self.shared_hits += 1
+                count_cache_lookup(self.name, "shared_hit")
+                self.memory.set(key, entry)
+                return entry
+        self.misses += 1
+        count_cache_lookup(self.name, "miss")
+        return None
+
+    def set(self, key: Hashable, entry: dict[str, Any]) -> None:
+        self.memory.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, entry)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+            "memory_evictions": self.memory.evictions,
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "shared": None if self.shared is None else {
+                "db_path": str(self.shared.db_path),
+                "errors": self.shared.errors,
+                "last_error": self.shared.last_error,
+            },
+        }
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import contextvars
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+
+SOLANA_RPC_POOL_URLS_ENV = "SOLANA_RPC_POOL_URLS"
+SWAP_SUBMIT_FAN_OUT_ENV = "SWAP_SUBMIT_FAN_OUT"
+LATENCY_SAMPLE_SIZE = 64
+MIN_HEDGE_SAMPLES = 8
+DEFAULT_HEDGE_DELAY_SECONDS = 0.3
+MIN_HEDGE_DELAY_SECONDS = 0.05
+MAX_HEDGE_DELAY_SECONDS = 2.0
+DEFAULT_LATENCY_SECONDS = 0.5
+EWMA_ALPHA = 0.2
+RATE_LIMIT_COOLDOWN_SECONDS = 5.0
+MAX_RATE_LIMIT_COOLDOWN_SECONDS = 60.0
+DEFAULT_POOL_WORKERS = 8
+DEFAULT_SLOW_POOL_WORKERS = 4
+
+OK = "ok"
+ERROR = "error"
+RATE_LIMITED = "rate_limited"
+
+
+def configured_pool_urls() -> list[str]:
+    raw = os.getenv(SOLANA_RPC_POOL_URLS_ENV) or ""
+    return [value for value in re.split(r"[\s,]+", raw.strip()) if value]
+
+
+def submit_fan_out_enabled() -> bool:
+    return (os.getenv(SWAP_SUBMIT_FAN_OUT_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def default_outcome(result: Any) -> str:
+    """Maps the repo's {"ok": False, "error": {...}} results onto pool outcomes."""
+    if not isinstance(result, dict) or result.get("ok") is not False:
+        return OK
+    error = result.get("error") if isinstance(result.get("error"), dict) else {}
+    code = str(error.get("code") or "")
+    if "RATE_LIMITED" in code or error.get("status_code") == 429 or result.get("status_code") == 429:
+        return RATE_LIMITED
+    return ERROR
+
+
+class _EndpointHealth:
+    __slots__ = ("latencies", "ewma_latency", "error_rate", "requests", "errors", "rate_limited", "cooldown_until", "cooldown")
+
+    def __init__(self):
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self.ewma_latency: float | None = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.cooldown_until = 0.0
+        self.cooldown = RATE_LIMIT_COOLDOWN_SECONDS
+
+
+class SolanaRpcPool:
+    """
+    Health-ranked set of interchangeable Solana RPC endpoints.
+
+    The pool for a call is the caller's configured URL plus SOLANA_RPC_POOL_URLS.
+    Each endpoint keeps recent latencies, an EWMA error rate and a 429
+    cooldown; call() tries endpoints healthiest-first, and with hedge=True
+    fires a second request when the first has not answered by that
+    endpoint's p90 latency. fan_out() sends to every endpoint at once. With a
+    single endpoint every method is a plain synchronous call.
+
+    Calls made with slow=True (simulateTransaction can take tens of seconds)
+    run on their own executor so they never queue short status and fee
+    reads behind them.
+    """
+
+    def __init__(self, *, max_workers: int = DEFAULT_POOL_WORKERS, slow_workers: int = DEFAULT_SLOW_POOL_WORKERS):
+        self.max_workers = max(2, int(max_workers))
+        self.slow_workers = max(2, int(slow_workers))
+        self._lock = threading.Lock()
+        self._health: dict[str, _EndpointHealth] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._slow_executor: ThreadPoolExecutor | None = None
+        self.hedges = 0
+        self.failovers = 0
+
+    def _health_locked(self, url: str) -> _EndpointHealth:
+        health = self._health.get(url)
+        if health is None:
+            health = _EndpointHealth()
+            self._health[url] = health
+        return health
+
+    def record(self, url: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            health = self._health_locked(url)
+            health.requests += 1
+            failed = outcome != OK
+            health.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - health.error_rate)
+            if outcome == RATE_LIMITED:
+                health.rate_limited += 1
+                health.cooldown_until = time.monotonic() + health.cooldown
+                health.cooldown = min(MAX_RATE_LIMIT_COOLDOWN_SECONDS, health.cooldown * 2)
+                return
+            if failed:
+                health.errors += 1
+                return
+            health.cooldown = RATE_LIMIT_COOLDOWN_SECONDS
+            health.latencies.append(seconds)
+            if health.ewma_latency is None:
+                health.ewma_latency = seconds
+            else:
+                health.ewma_latency += EWMA_ALPHA * (seconds - health.ewma_latency)
+
+    def urls(self, primary: str) -> list[str]:
+        candidates = [primary] if primary else []
+        for url in configured_pool_urls():
+            if url not in candidates:
+                candidates.append(url)
+        if len(candidates) < 2:
+            return candidates
+        now = time.monotonic()
+        with self._lock:
+            def score(item: tuple[int, str]) -> tuple:
+                index, url = item
+                health = self._health.get(url)
+                if health is None:
+                    return (False, DEFAULT_LATENCY_SECONDS, index)
+                latency = health.ewma_latency if health.ewma_latency is not None else DEFAULT_LATENCY_SECONDS
+                return (health.cooldown_until > now, latency * (1 + 4 * health.error_rate), index)
+
+            return [url for _index, url in sorted(enumerate(candidates), key=score)]
+
+    def hedge_delay_seconds(self, url: str) -> float:
+        with self._lock:
+            health = self._health.get(url)
+            samples = sorted(health.latencies) if health else []
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return DEFAULT_HEDGE_DELAY_SECONDS
+        p90 = samples[min(len(samples) - 1, math.ceil(len(samples) * 0.9) - 1)]
+        return min(MAX_HEDGE_DELAY_SECONDS, max(MIN_HEDGE_DELAY_SECONDS, p90))
+
+    def _submit(self, fn: Callable[[str], Any], url: str, classify: Callable[[Any], str], *, slow: bool = False) -> Future:
+        with self._lock:
+            if slow:
+                if self._slow_executor is None:
+                    self._slow_executor = ThreadPoolExecutor(max_workers=self.slow_workers, thread_name_prefix="solana-rpc-pool-slow")
+                executor = self._slow_executor
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="solana-rpc-pool")
+                executor = self._executor
+        return executor.submit(contextvars.copy_context().run, self._timed, fn, url, classify)
+
+    def _timed(self, fn: Callable[[str], Any], url: str, classify: Callable[[Any], str]) -> tuple[str, Any, BaseException | None]:
+        started = time.monotonic()
+        try:
+            result = fn(url)
+        except Exception as exc:
+            self.record(url, time.monotonic() - started, ERROR)
+            return ERROR, None, exc
+        outcome = classify(result)
+        self.record(url, time.monotonic() - started, outcome)
+        return outcome, result, None
+
+    @staticmethod
+    def _unwrap(outcome: tuple[str, Any, BaseException | None]) -> Any:
+        _status, result, exc = outcome
+        if exc is not None:
+            raise exc
+        return result
+
+    def call(
+        self,
+        primary: str,
+        fn: Callable[[str], Any],
+        *,
+        classify: Callable[[Any], str] = default_outcome,
+        hedge: bool = False,
+        slow: bool = False,
+    ) -> Any:
+        urls = self.urls(primary)
+        if len(urls) < 2:
+            return self._unwrap(self._timed(fn, urls[0] if urls else primary, classify))
+        if not hedge:
+            first = None
+            for index, url in enumerate(urls):
+                if index:
+                    with self._lock:
+                        self.failovers += 1
+                outcome = self._timed(fn, url, classify)
+                first = first or outcome
+                if outcome[0] == OK:
+                    return self._unwrap(outcome)
+            return self._unwrap(first)
+
+        pending: dict[Future, int] = {}
+        outcomes: dict[int, tuple] = {}
+        remaining = list(urls)
+
+        def launch() -> None:
+            url = remaining.pop(0)
+            pending[self._submit(fn, url, classify, slow=slow)] = len(urls) - len(remaining) - 1
+
+        launch()
+        while pending:
+            # Wait up to the current endpoint's p90 before hedging to the next one.
+            delay = self.hedge_delay_seconds(urls[max(pending.values())]) if remaining else None
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                outcomes[index] = future.result()
+                if outcomes[index][0] == OK:
+                    return self._unwrap(outcomes[index])
+            if remaining and not done:
+                with self._lock:
+                    self.hedges += 1
+                launch()
+            elif remaining and not pending:
+                with self._lock:
+                    self.failovers += 1
+                launch()
+        return self._unwrap(outcomes[min(outcomes)])
+
+    def fan_out(
+        self,
+        primary: str,
+        fn: Callable[[str], Any],
+        *,
+        classify: Callable[[Any], str] = default_outcome,
+        slow: bool = False,
+    ) -> tuple[Any, int]:
+        """Calls every endpoint at once; returns (first OK result or the primary's result, endpoint count)."""
+        urls = self.urls(primary)
+        if len(urls) < 2:
+            return self.call(primary, fn, classify=classify, slow=slow), len(urls)
+        pending = {self._submit(fn, url, classify, slow=slow): index for index, url in enumerate(urls)}
+        outcomes: dict[int, tuple] = {}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                outcomes[index] = future.result()
+                if outcomes[index][0] == OK:
+                    return self._unwrap(outcomes[index]), len(urls)
+        return self._unwrap(outcomes[min(outcomes)]), len(urls)
+
+    def stats(self, primary: str | None = None) -> list[dict]:
+        """Per-endpoint health, labelled by rank so configured URLs (and their API keys) never leak."""
+        urls = self.urls(primary or "") or list(self._health)
+        out = []
+        with self._lock:
+            for rank, url in enumerate(urls):
+                health = self._health.get(url) or _EndpointHealth()
+                out.append({
+                    "endpoint": f"rpc_{rank}",
+                    "requests": health.requests,
+                    "errors": health.errors,
+                    "rate_limited": health.rate_limited,
+                    "error_rate": round(health.error_rate, 3),
+                    "ewma_latency_ms": round(health.ewma_latency * 1000, 1) if health.ewma_latency is not None else None,
+                    "cooling_down": health.cooldown_until > time.monotonic(),
+                })
+        return out
+
+
+_POOL: SolanaRpcPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_solana_rpc_pool() -> SolanaRpcPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SolanaRpcPool()
+        return _POOL
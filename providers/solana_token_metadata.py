@@ -7,9 +7,21 @@ from typing import Any
 
 import requests
 
+from providers.metrics import count_rpc_call
+from providers.rate_limiter import acquire_upstream, rpc_upstream
+
 
 DEFAULT_SOLANA_RPC_URL = "https://api.mainnet-beta.solana.com"
 DEFAULT_TIMEOUT_SECONDS = 10
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM_ID = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+TOKEN_PROGRAMS = {TOKEN_PROGRAM_ID: "spl-token", TOKEN_2022_PROGRAM_ID: "spl-token-2022"}
+# getMultipleAccounts accepts at most 100 pubkeys per call.
+MAX_MINTS_PER_BATCH = 100
+# Base SPL mint layout; Token-2022 extensions follow it and are not needed here.
+MINT_ACCOUNT_SIZE = 82
+MINT_DECIMALS_OFFSET = 44
+MINT_IS_INITIALIZED_OFFSET = 45
 _BASE58_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
 
 
@@ -99,6 +111,18 @@ def fetch_solana_mint_decimals(
         ],
     }
 
+    if not acquire_upstream(rpc_upstream(url)):
+        return {
+            "ok": False,
+            "error": {
+                "code": "TOKEN_DECIMALS_LOOKUP_FAILED",
+                "message": "Solana RPC mint decimals lookup is rate-limited right now.",
+                "provider": "solana_rpc",
+                "mint": mint,
+                "detail": "rate limit",
+            },
+        }
+    count_rpc_call("getAccountInfo")
     try:
         response = requests.post(url, json=payload, timeout=timeout)
     except requests.RequestException as exc:
@@ -189,3 +213,155 @@ def fetch_solana_mint_decimals(
         "mint": mint,
         "owner": owner,
     }
+
+
+def _parse_mint_account(mint: str, value: Any) -> dict[str, Any]:
+    if value is None:
+        return {
+            "ok": False,
+            "error": {
+                "code": "TOKEN_DECIMALS_NOT_FOUND",
+                "message": "Solana RPC did not return a mint account for this token.",
+                "provider": "solana_rpc",
+                "mint": mint,
+            },
+        }
+
+    owner = value.get("owner") if isinstance(value, dict) else None
+    raw = None
+    data = value.get("data") if isinstance(value, dict) else None
+    encoded = data[0] if isinstance(data, list) and data else data
+    if isinstance(encoded, str):
+        try:
+            raw = base64.b64decode(encoded, validate=True)
+        except Exception:
+            raw = None
+
+    if (
+        owner not in TOKEN_PROGRAMS
+        or raw is None
+        or len(raw) < MINT_ACCOUNT_SIZE
+        or raw[MINT_IS_INITIALIZED_OFFSET] != 1
+    ):
+        return {
+            "ok": False,
+            "error": {
+                "code": "TOKEN_DECIMALS_NOT_FOUND",
+                "message": "Account is not an initialized SPL Token or Token-2022 mint.",
+                "provider": "solana_rpc",
+                "mint": mint,
+                "owner": owner,
+            },
+        }
+
+    return {
+        "ok": True,
+        "decimals": raw[MINT_DECIMALS_OFFSET],
+        "source": "solana_rpc_mint_account",
+        "mint": mint,
+        "owner": owner,
+        "token_program": TOKEN_PROGRAMS[owner],
+    }
+
+
+def _batch_failure(mint: str, message: str, **detail: Any) -> dict[str, Any]:
+    return {
+        "ok": False,
+        "error": {
+            "code": "TOKEN_DECIMALS_LOOKUP_FAILED",
+            "message": message,
+            "provider": "solana_rpc",
+            "mint": mint,
+            **detail,
+        },
+    }
+
+
+def fetch_solana_mint_decimals_batch(
+    mints: list[str],
+    rpc_url: str | None = None,
+    *,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    batch_size: int = MAX_MINTS_PER_BATCH,
+) -> dict[str, Any]:
+    """
+    Decimals and token program for many mints, one getMultipleAccounts call
+    per batch_size mints. Only the 82-byte base mint layout is requested
+    (dataSlice) and parsed directly. results maps every requested mint to a
+    fetch_solana_mint_decimals()-shaped result.
+    """
+    unique: list[str] = []
+    results: dict[str, dict[str, Any]] = {}
+    for raw_mint in mints:
+        mint = (raw_mint or "").strip()
+        if mint in results or mint in unique:
+            continue
+        if not _BASE58_RE.fullmatch(mint):
+            results[mint] = {
+                "ok": False,
+                "error": {
+                    "code": "INVALID_SOLANA_MINT",
+                    "message": "mint must look like a Solana public key.",
+                    "provider": "solana_rpc",
+                    "mint": mint,
+                },
+            }
+            continue
+        unique.append(mint)
+
+    url = rpc_url or _default_rpc_url()
+    size = max(1, min(MAX_MINTS_PER_BATCH, int(batch_size)))
+    rpc_calls = 0
+    for start in range(0, len(unique), size):
+        chunk = unique[start:start + size]
+        rpc_calls += 1
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": [
+                chunk,
+                {
+                    "encoding": "base64",
+                    "commitment": "confirmed",
+                    "dataSlice": {"offset": 0, "length": MINT_ACCOUNT_SIZE},
+                },
+            ],
+        }
+        if not acquire_upstream(rpc_upstream(url), cost=len(chunk)):
+            for mint in chunk:
+                results[mint] = _batch_failure(mint, "Solana RPC mint batch lookup is rate-limited right now.", detail="rate limit")
+            continue
+        count_rpc_call("getMultipleAccounts")
+        try:
+            response = requests.post(url, json=payload, timeout=timeout)
+            data = response.json() if response.ok else None
+        except (requests.RequestException, ValueError) as exc:
+            for mint in chunk:
+                results[mint] = _batch_failure(mint, "Solana RPC mint batch lookup failed.", detail=exc.__class__.__name__)
+            continue
+
+        if data is None:
+            for mint in chunk:
+                results[mint] = _batch_failure(
+                    mint,
+                    "Solana RPC mint batch lookup returned an HTTP error.",
+                    status_code=response.status_code,
+                )
+            continue
+
+        values = ((data.get("result") or {}).get("value")) if isinstance(data, dict) else None
+        if not isinstance(values, list) or len(values) != len(chunk):
+            rpc_error = data.get("error") if isinstance(data, dict) else None
+            for mint in chunk:
+                results[mint] = _batch_failure(
+                    mint,
+                    "Solana RPC mint batch lookup returned an RPC error.",
+                    rpc_error=rpc_error,
+                )
+            continue
+
+        for mint, value in zip(chunk, values):
+            results[mint] = _parse_mint_account(mint, value)
+
+    return {"ok": True, "results": results, "rpc_calls": rpc_calls}
@@ -5,21 +5,55 @@ from decimal import Decimal, InvalidOperation
 import os
 import time
 from typing import Any
+from pathlib import Path
 from urllib.parse import quote
 
 import requests
 
+import db
+from providers.metrics import count_rpc_call
+from providers.rate_limiter import acquire_upstream, rpc_upstream
+from providers.result_cache import MemoryLruCache, SqliteResultCache, TieredResultCache
+from providers.solana_rpc_pool import ERROR, OK, RATE_LIMITED, default_outcome, get_solana_rpc_pool
+
 
 DEFAULT_SOLANA_RPC_URL = "https://api.mainnet-beta.solana.com"
 DEFAULT_TIMEOUT_SECONDS = 10
 SUCCESS_CACHE_TTL_SECONDS = 10 * 60
 RATE_LIMIT_CACHE_TTL_SECONDS = 90
+CACHE_MAX_ENTRIES = 512
+# Two JSON-RPC requests per mint, so 50 mints make a 100-request batch.
+MAX_BATCH_MINTS_PER_REQUEST = 50
+HOLDER_CONCENTRATION_SHARED_CACHE_ENV = "HOLDER_CONCENTRATION_SHARED_CACHE"
+HOLDER_CONCENTRATION_CACHE_DB_PATH_ENV = "HOLDER_CONCENTRATION_CACHE_DB_PATH"
 WARNINGS = [
     "token_accounts_are_not_wallet_clusters",
     "concentration_is_not_safety_score",
     "solana_rpc_top_accounts_only",
 ]
-_HOLDER_CONCENTRATION_CACHE: dict[tuple[str, str], dict[str, Any]] = {}
+_HOLDER_CONCENTRATION_CACHE = TieredResultCache(MemoryLruCache(CACHE_MAX_ENTRIES), name="holder_concentration")
+
+
+def holder_concentration_shared_cache_enabled() -> bool:
+    return (os.getenv(HOLDER_CONCENTRATION_SHARED_CACHE_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _holder_cache() -> TieredResultCache:
+    """
+    With HOLDER_CONCENTRATION_SHARED_CACHE=1 a SQLite tier is attached, so
+    every worker process reuses one getTokenLargestAccounts answer.
+    """
+    if _HOLDER_CONCENTRATION_CACHE.shared is None and holder_concentration_shared_cache_enabled():
+        raw = (os.getenv(HOLDER_CONCENTRATION_CACHE_DB_PATH_ENV) or "").strip()
+        _HOLDER_CONCENTRATION_CACHE.shared = SqliteResultCache(
+            Path(raw) if raw else db.DB_PATH,
+            namespace="holder_concentration",
+        )
+    return _HOLDER_CONCENTRATION_CACHE
+
+
+def get_holder_concentration_cache_stats() -> dict[str, Any]:
+    return _holder_cache().stats()
 
 
 def _configured_rpc_url() -> tuple[str, dict[str, Any]]:
@@ -114,7 +148,7 @@ def _with_known_mint_context(
 
 
 def clear_holder_concentration_cache() -> None:
-    _HOLDER_CONCENTRATION_CACHE.clear()
+    _holder_cache().clear()
 
 
 def _cache_key(mint: str, rpc_meta: dict[str, Any]) -> tuple[str, str]:
@@ -130,15 +164,14 @@ def _cache_ttl_for_result(result: dict[str, Any]) -> int | None:
 
 
 def _get_cached_result(key: tuple[str, str], now: float) -> dict[str, Any] | None:
-    cached = _HOLDER_CONCENTRATION_CACHE.get(key)
+    cached = _holder_cache().get(key, now)
     if not cached:
         return None
-    expires_at = float(cached.get("expires_at") or 0)
-    if expires_at <= now:
-        _HOLDER_CONCENTRATION_CACHE.pop(key, None)
-        return None
-    result = deepcopy(cached.get("result") or {})
-    result.setdefault("diagnostics", {})
+    # Copy-on-write: only the two dicts this function changes are copied; the
+    # rest of the stored result is shared and treated as read-only.
+    stored = cached.get("result") or {}
+    result = dict(stored)
+    result["diagnostics"] = dict(stored.get("diagnostics") or {})
     result["diagnostics"]["cached"] = True
     result["diagnostics"]["cache_age_seconds"] = round(now - float(cached.get("stored_at") or now), 3)
     result["cached"] = True
@@ -149,11 +182,12 @@ def _store_cached_result(key: tuple[str, str], result: dict[str, Any], now: floa
     ttl = _cache_ttl_for_result(result)
     if not ttl:
         return
-    _HOLDER_CONCENTRATION_CACHE[key] = {
+    # One copy at store time detaches the entry from the caller's result.
+    _holder_cache().set(key, {
         "stored_at": now,
         "expires_at": now + ttl,
         "result": deepcopy(result),
-    }
+    })
 
 
 def _decimal_from_value(value: Any) -> Decimal | None:
@@ -184,6 +218,9 @@ def _rpc_post(
         "params": params,
     }
 
+    if not acquire_upstream(rpc_upstream(url)):
+        return _rate_limited_error(method, mint, detail="Local rate limit budget for this RPC is exhausted.")
+    count_rpc_call(method)
     try:
         response = requests.post(url, json=payload, timeout=timeout)
     except requests.RequestException as exc:
@@ -227,6 +264,10 @@ def _rpc_post(
             detail=str(exc),
         )
 
+    return _rpc_response_result(data, method=method, mint=mint, lookup_error_code=lookup_error_code)
+
+
+def _rpc_response_result(data: Any, *, method: str, mint: str, lookup_error_code: str) -> dict[str, Any]:
     if not isinstance(data, dict):
         return _error(
             "TOKEN_HOLDER_CONCENTRATION_INVALID_JSON",
@@ -269,12 +310,25 @@ def _rounded_percent(value: float | None) -> float | None:
 
 
 def _sum_top(accounts: list[dict[str, Any]], count: int) -> Decimal:
+    return _sum_tops(accounts, (count,))[count]
+
+
+def _sum_tops(accounts: list[dict[str, Any]], counts: tuple[int, ...]) -> dict[int, Decimal]:
+    """Prefix sums of the largest accounts for every count in one pass over the list."""
+    targets = sorted(set(counts))
+    sums: dict[int, Decimal] = {}
     total = Decimal("0")
-    for account in accounts[:count]:
+    index = 0
+    for position, account in enumerate(accounts[:targets[-1]] if targets else [], start=1):
         amount = _decimal_from_value(account.get("amount"))
         if amount is not None:
             total += amount
-    return total
+        while index < len(targets) and targets[index] == position:
+            sums[targets[index]] = total
+            index += 1
+    for count in targets[index:]:
+        sums[count] = total
+    return sums
 
 
 def _concentration_level(top_account_pct: float | None, top_10_accounts_pct: float | None) -> str:
@@ -304,55 +358,30 @@ def _format_pct(value: float | None) -> str:
     return f"{text}%"
 
 
-def fetch_token_holder_concentration(
+def _finalize_result(
+    result: dict[str, Any],
     mint: str,
-    rpc_url: str | None = None,
+    rpc_meta: dict[str, Any],
     *,
-    timeout: int = DEFAULT_TIMEOUT_SECONDS,
-    use_cache: bool | None = None,
+    methods_attempted: list[str],
+    partial_data_available: bool,
+    cache_key: tuple[str, str] | None,
+    now: float,
 ) -> dict[str, Any]:
-    mint = (mint or "").strip()
-    if not mint:
-        return _error(
-            "TOKEN_MINT_REQUIRED",
-            "Token mint is required.",
-        )
-
-    url, rpc_meta = _resolve_rpc_url(rpc_url)
-    cache_enabled = (not rpc_url) if use_cache is None else bool(use_cache)
-    now = time.time()
-    key = _cache_key(mint, rpc_meta)
-    if cache_enabled:
-        cached = _get_cached_result(key, now)
-        if cached is not None:
-            return cached
-
-    methods_attempted: list[str] = []
-    def finalize(result: dict[str, Any], *, partial_data_available: bool = False) -> dict[str, Any]:
-        out = _with_known_mint_context(
-            result,
-            mint,
-            rpc_meta,
-            methods_attempted=methods_attempted,
-            partial_data_available=partial_data_available,
-        )
-        out["cached"] = False
-        if cache_enabled:
-            _store_cached_result(key, out, now)
-        return out
-
-    methods_attempted.append("getTokenSupply")
-    supply_result = _rpc_post(
-        url,
-        "getTokenSupply",
-        [mint, {"commitment": "confirmed"}],
-        timeout=timeout,
-        mint=mint,
-        lookup_error_code="TOKEN_SUPPLY_LOOKUP_FAILED",
+    out = _with_known_mint_context(
+        result,
+        mint,
+        rpc_meta,
+        methods_attempted=methods_attempted,
+        partial_data_available=partial_data_available,
     )
-    if not supply_result.get("ok"):
-        return finalize(supply_result)
+    out["cached"] = False
+    if cache_key is not None:
+        _store_cached_result(cache_key, out, now)
+    return out
+
 
+def _supply_amount(supply_result: dict[str, Any]) -> tuple[Any, Decimal | None]:
     supply_value = (
         ((supply_result.get("data") or {}).get("result") or {}).get("value")
         if isinstance(supply_result.get("data"), dict)
@@ -361,29 +390,38 @@ def fetch_token_holder_concentration(
     supply_amount = _decimal_from_value(
         (supply_value or {}).get("amount") if isinstance(supply_value, dict) else None
     )
-    if supply_amount is None or supply_amount <= 0:
-        return finalize(
-            _error(
-                "TOKEN_SUPPLY_NOT_FOUND",
-                "Solana RPC did not return a usable token supply.",
-                provider="solana_rpc",
-                mint=mint,
-            ),
-        )
+    if supply_amount is not None and supply_amount <= 0:
+        supply_amount = None
+    return supply_value, supply_amount
+
+
+def _holder_concentration_from_rpc(
+    mint: str,
+    rpc_meta: dict[str, Any],
+    supply_result: dict[str, Any],
+    accounts_result: dict[str, Any] | None,
+) -> tuple[dict[str, Any], bool]:
+    """
+    Builds the endpoint result from getTokenSupply and getTokenLargestAccounts
+    answers; returns (result, partial_data_available). accounts_result is
+    ignored (and may be None) when the supply lookup failed.
+    """
+    if not supply_result.get("ok"):
+        return supply_result, False
+
+    supply_value, supply_amount = _supply_amount(supply_result)
+    if supply_amount is None:
+        return _error(
+            "TOKEN_SUPPLY_NOT_FOUND",
+            "Solana RPC did not return a usable token supply.",
+            provider="solana_rpc",
+            mint=mint,
+        ), False
 
-    methods_attempted.append("getTokenLargestAccounts")
-    accounts_result = _rpc_post(
-        url,
-        "getTokenLargestAccounts",
-        [mint, {"commitment": "confirmed"}],
-        timeout=timeout,
-        mint=mint,
-        lookup_error_code="TOKEN_LARGEST_ACCOUNTS_LOOKUP_FAILED",
-    )
     if not accounts_result.get("ok"):
         accounts_result.setdefault("raw", {})
         accounts_result["raw"]["supply"] = supply_value
-        return finalize(accounts_result, partial_data_available=True)
+        return accounts_result, True
 
     account_values = (
         ((accounts_result.get("data") or {}).get("result") or {}).get("value")
@@ -398,10 +436,7 @@ def fetch_token_holder_concentration(
             mint=mint,
         )
         result["raw"] = {"supply": supply_value}
-        return finalize(
-            result,
-            partial_data_available=True,
-        )
+        return result, True
 
     accounts = [account for account in account_values if isinstance(account, dict)]
     if not accounts:
@@ -412,15 +447,13 @@ def fetch_token_holder_concentration(
             mint=mint,
         )
         result["raw"] = {"supply": supply_value}
-        return finalize(
-            result,
-            partial_data_available=True,
-        )
+        return result, True
 
-    top_account_pct = _rounded_percent(_percent(_sum_top(accounts, 1), supply_amount))
-    top_3_accounts_pct = _rounded_percent(_percent(_sum_top(accounts, 3), supply_amount))
-    top_5_accounts_pct = _rounded_percent(_percent(_sum_top(accounts, 5), supply_amount))
-    top_10_accounts_pct = _rounded_percent(_percent(_sum_top(accounts, 10), supply_amount))
+    tops = _sum_tops(accounts, (1, 3, 5, 10))
+    top_account_pct = _rounded_percent(_percent(tops[1], supply_amount))
+    top_3_accounts_pct = _rounded_percent(_percent(tops[3], supply_amount))
+    top_5_accounts_pct = _rounded_percent(_percent(tops[5], supply_amount))
+    top_10_accounts_pct = _rounded_percent(_percent(tops[10], supply_amount))
     concentration_level = _concentration_level(top_account_pct, top_10_accounts_pct)
     severity = _top_account_severity(top_account_pct)
 
@@ -459,4 +492,234 @@ def fetch_token_holder_concentration(
             "largest_accounts": accounts,
         },
     }
-    return finalize(result)
+    return result, False
+
+
+def fetch_token_holder_concentration(
+    mint: str,
+    rpc_url: str | None = None,
+    *,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    use_cache: bool | None = None,
+) -> dict[str, Any]:
+    mint = (mint or "").strip()
+    if not mint:
+        return _error(
+            "TOKEN_MINT_REQUIRED",
+            "Token mint is required.",
+        )
+
+    url, rpc_meta = _resolve_rpc_url(rpc_url)
+    cache_enabled = (not rpc_url) if use_cache is None else bool(use_cache)
+    now = time.time()
+    key = _cache_key(mint, rpc_meta)
+    if cache_enabled:
+        cached = _get_cached_result(key, now)
+        if cached is not None:
+            return cached
+
+    methods_attempted: list[str] = []
+    def finalize(result: dict[str, Any], *, partial_data_available: bool = False) -> dict[str, Any]:
+        return _finalize_result(
+            result,
+            mint,
+            rpc_meta,
+            methods_attempted=methods_attempted,
+            partial_data_available=partial_data_available,
+            cache_key=key if cache_enabled else None,
+            now=now,
+        )
+
+    def post(method: str, params: list[Any], *, lookup_error_code: str) -> dict[str, Any]:
+        def call(endpoint: str) -> dict[str, Any]:
+            return _rpc_post(endpoint, method, params, timeout=timeout, mint=mint, lookup_error_code=lookup_error_code)
+
+        if rpc_url:
+            return call(url)
+        # Configured (not explicit) URLs go through the shared pool, which
+        # moves to a healthier endpoint when SOLANA_RPC_POOL_URLS lists more.
+        return get_solana_rpc_pool().call(url, call)
+
+    methods_attempted.append("getTokenSupply")
+    supply_result = post(
+        "getTokenSupply",
+        [mint, {"commitment": "confirmed"}],
+        lookup_error_code="TOKEN_SUPPLY_LOOKUP_FAILED",
+    )
+    if not supply_result.get("ok") or _supply_amount(supply_result)[1] is None:
+        result, partial_data_available = _holder_concentration_from_rpc(mint, rpc_meta, supply_result, None)
+        return finalize(result, partial_data_available=partial_data_available)
+
+    methods_attempted.append("getTokenLargestAccounts")
+    accounts_result = post(
+        "getTokenLargestAccounts",
+        [mint, {"commitment": "confirmed"}],
+        lookup_error_code="TOKEN_LARGEST_ACCOUNTS_LOOKUP_FAILED",
+    )
+    result, partial_data_available = _holder_concentration_from_rpc(mint, rpc_meta, supply_result, accounts_result)
+    return finalize(result, partial_data_available=partial_data_available)
+
+
+def _rpc_batch_post(
+    url: str,
+    calls: list[tuple[str, list[Any], str, str]],
+    *,
+    timeout: int,
+) -> list[dict[str, Any]] | None:
+    """
+    Sends (method, params, mint, lookup_error_code) calls as one JSON-RPC
+    batch and returns one _rpc_post-shaped result per call, in order.
+    Returns None when the endpoint does not answer batches with a list.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+        for index, (method, params, _mint, _code) in enumerate(calls)
+    ]
+
+    def each(build) -> list[dict[str, Any]]:
+        return [build(method, mint, code) for method, _params, mint, code in calls]
+
+    if not acquire_upstream(rpc_upstream(url), cost=len(calls)):
+        return each(lambda method, mint, _code: _rate_limited_error(
+            method,
+            mint,
+            detail="Local rate limit budget for this RPC is exhausted.",
+        ))
+    for method, _params, _mint, _code in calls:
+        count_rpc_call(method)
+    try:
+        response = requests.post(url, json=payload, timeout=timeout)
+    except requests.RequestException as exc:
+        return each(lambda method, mint, code: _error(
+            code,
+            "Solana RPC token holder concentration lookup failed.",
+            provider="solana_rpc",
+            mint=mint,
+            method=method,
+            detail=str(exc),
+        ))
+
+    if response.status_code == 429:
+        detail = (response.text or "")[:500]
+        return each(lambda method, mint, _code: _rate_limited_error(
+            method,
+            mint,
+            status_code=response.status_code,
+            detail=detail,
+        ))
+
+    if not response.ok:
+        detail = (response.text or "")[:500]
+        return each(lambda method, mint, _code: _error(
+            "TOKEN_HOLDER_CONCENTRATION_HTTP_ERROR",
+            "Solana RPC token holder concentration lookup returned an HTTP error.",
+            provider="solana_rpc",
+            mint=mint,
+            method=method,
+            status_code=response.status_code,
+            detail=detail,
+        ))
+
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    if not isinstance(data, list):
+        return None
+
+    by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+    return [
+        _rpc_response_result(by_id.get(index), method=method, mint=mint, lookup_error_code=code)
+        for index, (method, _params, mint, code) in enumerate(calls)
+    ]
+
+
+def _batch_outcome(answers: list[dict[str, Any]] | None) -> str:
+    if not answers:
+        return ERROR
+    outcomes = {default_outcome(answer) for answer in answers}
+    if OK in outcomes:
+        return OK
+    return RATE_LIMITED if RATE_LIMITED in outcomes else ERROR
+
+
+def fetch_token_holder_concentration_batch(
+    mints: list[str],
+    rpc_url: str | None = None,
+    *,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    use_cache: bool | None = None,
+) -> dict[str, Any]:
+    """
+    Holder concentration for many mints. Cached mints are served from the
+    cache; getTokenSupply and getTokenLargestAccounts for every other mint
+    go out together as one JSON-RPC batch per MAX_BATCH_MINTS_PER_REQUEST
+    mints. Each result matches fetch_token_holder_concentration(). Endpoints
+    that reject batches fall back to per-mint lookups.
+    """
+    unique = list(dict.fromkeys((mint or "").strip() for mint in mints if (mint or "").strip()))
+    url, rpc_meta = _resolve_rpc_url(rpc_url)
+    cache_enabled = (not rpc_url) if use_cache is None else bool(use_cache)
+    now = time.time()
+
+    results: dict[str, dict[str, Any]] = {}
+    pending: list[str] = []
+    for mint in unique:
+        cached = _get_cached_result(_cache_key(mint, rpc_meta), now) if cache_enabled else None
+        if cached is not None:
+            results[mint] = cached
+        else:
+            pending.append(mint)
+
+    batch_requests = 0
+    fallback_mints = 0
+    for start in range(0, len(pending), MAX_BATCH_MINTS_PER_REQUEST):
+        chunk = pending[start:start + MAX_BATCH_MINTS_PER_REQUEST]
+        calls: list[tuple[str, list[Any], str, str]] = []
+        for mint in chunk:
+            calls.append(("getTokenSupply", [mint, {"commitment": "confirmed"}], mint, "TOKEN_SUPPLY_LOOKUP_FAILED"))
+            calls.append((
+                "getTokenLargestAccounts",
+                [mint, {"commitment": "confirmed"}],
+                mint,
+                "TOKEN_LARGEST_ACCOUNTS_LOOKUP_FAILED",
+            ))
+
+        def call(endpoint: str) -> list[dict[str, Any]] | None:
+            return _rpc_batch_post(endpoint, calls, timeout=timeout)
+
+        batch_requests += 1
+        answers = call(url) if rpc_url else get_solana_rpc_pool().call(url, call, classify=_batch_outcome)
+        if answers is None:
+            fallback_mints += len(chunk)
+            for mint in chunk:
+                results[mint] = fetch_token_holder_concentration(mint, rpc_url, timeout=timeout, use_cache=use_cache)
+            continue
+
+        for offset, mint in enumerate(chunk):
+            result, partial_data_available = _holder_concentration_from_rpc(
+                mint,
+                rpc_meta,
+                answers[2 * offset],
+                answers[2 * offset + 1],
+            )
+            results[mint] = _finalize_result(
+                result,
+                mint,
+                rpc_meta,
+                methods_attempted=["getTokenSupply", "getTokenLargestAccounts"],
+                partial_data_available=partial_data_available,
+                cache_key=_cache_key(mint, rpc_meta) if cache_enabled else None,
+                now=now,
+            )
+
+    return {
+        "ok": True,
+        "mints": unique,
+        "results": results,
+        "diagnostics": {
+            "cached_mints": len(unique) - len(pending),
+            "batch_requests": batch_requests,
+            "fallback_mints": fallback_mints,
+        },
+    }
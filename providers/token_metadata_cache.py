@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import db
+from providers.metrics import count_cache_lookup
+from providers.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+EXTERNAL_TOKEN_CACHE_ENV = "EXTERNAL_TOKEN_CACHE"
+EXTERNAL_TOKEN_CACHE_DB_PATH_ENV = "EXTERNAL_TOKEN_CACHE_DB_PATH"
+EXTERNAL_TOKEN_CACHE_REFRESH_SECONDS_ENV = "EXTERNAL_TOKEN_CACHE_REFRESH_SECONDS"
+# Price, liquidity and pair data move constantly; names and logos rarely do.
+DEFAULT_VOLATILE_TTL_SECONDS = 300.0
+DEFAULT_LOGO_TTL_SECONDS = 24 * 3600.0
+DEFAULT_NEGATIVE_TTL_SECONDS = 600.0
+# A mint counts as popular once it was looked up this often and recently.
+DEFAULT_POPULAR_MIN_HITS = 3
+DEFAULT_POPULAR_WINDOW_SECONDS = 3600.0
+DEFAULT_POPULAR_LIMIT = 20
+
+Refresher = Callable[[str], "dict[str, Any]"]
+
+
+def external_token_cache_enabled() -> bool:
+    return (os.getenv(EXTERNAL_TOKEN_CACHE_ENV) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def configured_external_token_cache_db_path() -> Path:
+    raw = (os.getenv(EXTERNAL_TOKEN_CACHE_DB_PATH_ENV) or "").strip()
+    return Path(raw) if raw else db.DB_PATH
+
+
+def configured_refresh_seconds() -> float | None:
+    raw = (os.getenv(EXTERNAL_TOKEN_CACHE_REFRESH_SECONDS_ENV) or "").strip()
+    try:
+        seconds = float(raw) if raw else 0.0
+    except ValueError:
+        return None
+    return max(5.0, seconds) if seconds > 0 else None
+
+
+class ExternalTokenMetadataCache:
+    """
+    SQLite-backed cache for metadata of mints outside the curated registry.
+
+    Decimals, mint owner and the mint itself never change, so they are kept
+    forever once resolved. The external token payload (price, liquidity,
+    pair) is fresh for volatile_ttl_seconds and logos for logo_ttl_seconds.
+    A TOKEN_METADATA_NOT_FOUND answer is cached for negative_ttl_seconds so
+    repeated lookups of junk mints do not hit DexScreener. With
+    EXTERNAL_TOKEN_CACHE_REFRESH_SECONDS set, a daemon thread re-fetches
+    popular mints before their payload goes stale.
+
+    Every method is fail-soft: a database error counts as a miss.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        volatile_ttl_seconds: float = DEFAULT_VOLATILE_TTL_SECONDS,
+        logo_ttl_seconds: float = DEFAULT_LOGO_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        refresh_seconds: float | None = None,
+        popular_min_hits: int = DEFAULT_POPULAR_MIN_HITS,
+        popular_window_seconds: float = DEFAULT_POPULAR_WINDOW_SECONDS,
+        popular_limit: int = DEFAULT_POPULAR_LIMIT,
+    ):
+        self.db_path = Path(db_path)
+        self.volatile_ttl_seconds = float(volatile_ttl_seconds)
+        self.logo_ttl_seconds = float(logo_ttl_seconds)
+        self.negative_ttl_seconds = float(negative_ttl_seconds)
+        self.refresh_seconds = refresh_seconds
+        self.popular_min_hits = int(popular_min_hits)
+        self.popular_window_seconds = float(popular_window_seconds)
+        self.popular_limit = int(popular_limit)
+        self.refresher: Refresher | None = None
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.refreshed = 0
+        self.errors = 0
+        self.last_error: str | None = None
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with self._lock:
+            if not self._schema_ready:
+                db.init_db(self.db_path)
+                self._schema_ready = True
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+        count_cache_lookup("external_token_metadata", name)
+
+    def _failed(self, exc: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+            self.last_error = f"{exc.__class__.__name__}: {exc}"
+
+    def _row(self, mint: str) -> dict | None:
+        self._ensure_schema()
+        return db.get_external_token_metadata(mint, db_path=self.db_path)
+
+    def _upsert(self, mint: str, fields: dict) -> None:
+        try:
+            self._ensure_schema()
+            db.upsert_external_token_metadata(mint, fields, db_path=self.db_path)
+        except Exception as exc:
+            self._failed(exc)
+
+    @staticmethod
+    def _token_from_row(row: dict) -> dict[str, Any] | None:
+        try:
+            token = json.loads(row.get("token_json") or "null")
+        except ValueError:
+            return None
+        if not isinstance(token, dict):
+            return None
+        if isinstance(row.get("decimals"), int):
+            token["decimals"] = row["decimals"]
+            token["decimals_source"] = row.get("decimals_source") or token.get("decimals_source")
+            if row.get("mint_account_owner"):
+                token["mint_account_owner"] = row["mint_account_owner"]
+            token.pop("decimals_error", None)
+            token["warnings"] = [warning for warning in (token.get("warnings") or []) if warning != "decimals_unresolved"]
+        if row.get("logo_uri") and not token.get("logo_uri"):
+            token["logo_uri"] = row["logo_uri"]
+        return token
+
+    def lookup(self, mint: str, *, count_hit: bool = True) -> dict[str, Any]:
+        """
+        Returns {"state", "token", "decimals"}. decimals has the
+        cached_decimals() shape or is None; state is "fresh", "stale"
+        (payload expired, decimals still usable), "not_found" (negative
+        entry) or "miss".
+        """
+        now = time.time()
+        try:
+            row = self._row(mint)
+            if count_hit:
+                db.record_external_token_hit(mint, now, db_path=self.db_path)
+        except Exception as exc:
+            self._failed(exc)
+            row = None
+        if count_hit:
+            self._ensure_refresher_thread()
+
+        if row is None:
+            self._count("misses")
+            return {"state": "miss", "token": None, "decimals": None}
+
+        decimals = self._decimals_from_row(row)
+        not_found_at = row.get("not_found_at")
+        if not_found_at is not None and now - not_found_at <= self.negative_ttl_seconds:
+            self._count("negative_hits")
+            return {"state": "not_found", "token": None, "decimals": decimals}
+
+        token = self._token_from_row(row)
+        fetched_at = row.get("token_fetched_at")
+        if token is not None and fetched_at is not None and now - fetched_at <= self.volatile_ttl_seconds:
+            self._count("hits")
+            return {"state": "fresh", "token": token, "decimals": decimals}
+
+        if token is not None or decimals is not None:
+            self._count("stale_hits")
+            return {"state": "stale", "token": token, "decimals": decimals}
+        self._count("misses")
+        return {"state": "miss", "token": None, "decimals": None}
+
+    @staticmethod
+    def _decimals_from_row(row: dict | None) -> dict[str, Any] | None:
+        if not row or not isinstance(row.get("decimals"), int):
+            return None
+        return {
+            "decimals": row["decimals"],
+            "source": row.get("decimals_source"),
+            "owner": row.get("mint_account_owner"),
+        }
+
+    def cached_decimals(self, mint: str) -> dict[str, Any] | None:
+        """{"decimals", "source", "owner"} for a mint whose decimals were resolved before."""
+        try:
+            return self._decimals_from_row(self._row(mint))
+        except Exception as exc:
+            self._failed(exc)
+            return None
+
+    def store_decimals(self, mint: str, token: dict[str, Any]) -> None:
+        if not isinstance(token.get("decimals"), int):
+            return
+        self._upsert(mint, {
+            "decimals": token["decimals"],
+            "decimals_source": token.get("decimals_source"),
+            "mint_account_owner": token.get("mint_account_owner"),
+        })
+
+    def store_result(self, mint: str, result: dict[str, Any]) -> None:
+        """Stores a resolver result: tokens refresh the payload, not-found answers become negative entries."""
+        now = time.time()
+        token = result.get("token") if result.get("ok") is True else None
+        if isinstance(token, dict):
+            payload = {
+                key: value
+                for key, value in token.items()
+                if key not in {"decimals_error", "mint_account_owner"}
+            }
+            fields = {
+                "token_json": json.dumps(payload, sort_keys=True),
+                "token_fetched_at": now,
+                "not_found_at": None,
+            }
+            if token.get("logo_uri"):
+                fields["logo_uri"] = token["logo_uri"]
+                fields["logo_fetched_at"] = now
+            self._upsert(mint, fields)
+            self.store_decimals(mint, token)
+            return
+        error = result.get("error") if isinstance(result.get("error"), dict) else {}
+        if error.get("code") == "TOKEN_METADATA_NOT_FOUND":
+            self._upsert(mint, {"not_found_at": now})
+
+    def cached_logo(self, mint: str) -> tuple[bool, str | None]:
+        """(fresh, logo_uri). A fresh entry with no logo means the last lookup found none."""
+        try:
+            row = self._row(mint)
+        except Exception as exc:
+            self._failed(exc)
+            return False, None
+        fetched_at = (row or {}).get("logo_fetched_at")
+        if fetched_at is None or time.time() - fetched_at > self.logo_ttl_seconds:
+            return False, None
+        return True, row.get("logo_uri")
+
+    def store_logo(self, mint: str, logo_uri: str | None) -> None:
+        self._upsert(mint, {"logo_uri": logo_uri, "logo_fetched_at": time.time()})
+
+    def set_refresher(self, refresher: Refresher) -> None:
+        self.refresher = refresher
+
+    def refresh_popular(self) -> int:
+        """Re-fetches popular mints whose payload is close to expiring; returns how many were refreshed."""
+        if self.refresher is None:
+            return 0
+        now = time.time()
+        try:
+            self._ensure_schema()
+            rows = db.get_popular_external_token_mints(
+                now - self.popular_window_seconds,
+                min_hits=self.popular_min_hits,
+                limit=self.popular_limit,
+                db_path=self.db_path,
+            )
+        except Exception as exc:
+            self._failed(exc)
+            return 0
+
+        # Refresh at 80% of the TTL so readers keep landing on fresh entries.
+        due_after = self.volatile_ttl_seconds * 0.8
+        refreshed = 0
+        for row in rows:
+            not_found_at = row.get("not_found_at")
+            if not_found_at is not None and now - not_found_at <= self.negative_ttl_seconds:
+                continue
+            fetched_at = row.get("token_fetched_at")
+            if fetched_at is not None and now - fetched_at < due_after:
+                continue
+            try:
+                result = self.refresher(row["mint"])
+            except Exception as exc:
+                self._failed(exc)
+                continue
+            if isinstance(result, dict):
+                self.store_result(row["mint"], result)
+                refreshed += 1
+        with self._lock:
+            self.refreshed += refreshed
+        return refreshed
+
+    def _ensure_refresher_thread(self) -> None:
+        if not self.refresh_seconds or self.refresher is None:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="external-token-cache", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            with upstream_priority(PRIORITY_BACKGROUND):
+                self.refresh_popular()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "db_path": str(self.db_path),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "refreshed": self.refreshed,
+                "background_refresh_seconds": self.refresh_seconds,
+                "errors": self.errors,
+                "last_error": self.last_error,
+            }
+
+
+_CACHE: ExternalTokenMetadataCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_external_token_cache() -> ExternalTokenMetadataCache | None:
+    """The process-wide cache, or None when EXTERNAL_TOKEN_CACHE is off."""
+    global _CACHE
+    if not external_token_cache_enabled():
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ExternalTokenMetadataCache(
+                configured_external_token_cache_db_path(),
+                refresh_seconds=configured_refresh_seconds(),
+            )
+        return _CACHE
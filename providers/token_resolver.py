@@ -5,8 +5,10 @@ from typing import Any
 
 import requests
 
-from providers.solana_token_metadata import fetch_solana_mint_decimals
-from token_registry import NATIVE_TOKENS, TOKENS
+from providers.rate_limiter import acquire_upstream
+from providers.solana_token_metadata import fetch_solana_mint_decimals, fetch_solana_mint_decimals_batch
+from providers.token_metadata_cache import get_external_token_cache
+from token_registry import get_token_index
 
 
 _BASE58_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
@@ -42,37 +44,11 @@ def _public_token(meta: dict[str, Any], *, source: str) -> dict[str, Any]:
     }
 
 
-def _registry_entries() -> list[dict[str, Any]]:
-    entries: list[dict[str, Any]] = []
-    for symbol, meta in NATIVE_TOKENS.items():
-        row = dict(meta)
-        row.setdefault("symbol", symbol)
-        row.setdefault("mint", meta.get("mint"))
-        entries.append(row)
-
-    for mint, meta in TOKENS.items():
-        row = dict(meta)
-        row.setdefault("mint", mint)
-        entries.append(row)
-
-    return entries
-
-
 def _resolve_registry_token(query: str) -> dict[str, Any] | None:
-    wanted_symbol = query.strip().upper()
-    raw_query = query.strip()
-    raw_without_spl = raw_query.split(":", 1)[1] if raw_query.lower().startswith("spl:") else raw_query
-    wanted_mint = raw_without_spl.lower()
-    wanted_asset = raw_without_spl.lower()
-
-    for meta in _registry_entries():
-        symbol = (meta.get("symbol") or "").strip().upper()
-        mint = (meta.get("mint") or "").strip().lower()
-        asset = (meta.get("asset") or "").strip().lower()
-        if symbol == wanted_symbol or mint == wanted_mint or (asset and asset == wanted_asset):
-            return _public_token(meta, source="registry")
-
-    return None
+    meta = get_token_index().resolve(query)
+    if meta is None:
+        return None
+    return _public_token(meta, source="registry")
 
 
 def _to_float_or_none(value: Any) -> float | None:
@@ -142,6 +118,9 @@ def fetch_dexscreener_token_metadata(mint: str, *, timeout: int = DEXSCREENER_TI
     failures: list[dict[str, Any]] = []
 
     for url in urls:
+        if not acquire_upstream("dexscreener"):
+            failures.append({"url": url, "error": "rate limit: local DexScreener budget exhausted"})
+            continue
         try:
             response = requests.get(
                 url,
@@ -207,17 +186,23 @@ def fetch_dexscreener_token_metadata(mint: str, *, timeout: int = DEXSCREENER_TI
     }
 
 
-def _with_decimals_lookup(token: dict[str, Any]) -> dict[str, Any]:
+def _with_decimals_lookup(token: dict[str, Any], *, cached: dict[str, Any] | None = None) -> dict[str, Any]:
     mint = (token.get("mint") or "").strip()
     if not mint:
         return token
 
-    decimals_result = fetch_solana_mint_decimals(mint)
+    if cached is not None:
+        # Decimals are immutable for a mint, so a cached value skips the RPC.
+        decimals_result = {"ok": True, **cached}
+    else:
+        decimals_result = fetch_solana_mint_decimals(mint)
     if decimals_result.get("ok") is True:
         token["decimals"] = decimals_result.get("decimals")
         token["decimals_source"] = decimals_result.get("source") or "solana_rpc"
         if decimals_result.get("owner"):
             token["mint_account_owner"] = decimals_result.get("owner")
+        if decimals_result.get("token_program"):
+            token["token_program"] = decimals_result.get("token_program")
         token["warnings"] = [
             warning
             for warning in (token.get("warnings") or [])
@@ -258,6 +243,15 @@ def maybe_enrich_token_logo_uri_from_dexscreener(token: dict[str, Any]) -> dict[
     if not _is_probable_solana_mint(mint):
         return out
 
+    cache = get_external_token_cache()
+    if cache is not None:
+        fresh, logo_uri = cache.cached_logo(mint)
+        if fresh:
+            if logo_uri:
+                out["logo_uri"] = logo_uri
+                out["logo_source"] = "dexscreener"
+            return out
+
     try:
         external = fetch_dexscreener_token_metadata(mint)
     except Exception:
@@ -271,12 +265,67 @@ def maybe_enrich_token_logo_uri_from_dexscreener(token: dict[str, Any]) -> dict[
         return out
 
     logo_uri = external_token.get("logo_uri")
+    if cache is not None:
+        cache.store_logo(mint, logo_uri)
     if logo_uri:
         out["logo_uri"] = logo_uri
         out["logo_source"] = "dexscreener"
     return out
 
 
+def _registry_token_with_decimals(token: dict[str, Any], known: dict[str, Any] | None = None) -> dict[str, Any]:
+    mint = token.get("mint") or ""
+    cache = get_external_token_cache()
+    if cache is None:
+        return _with_decimals_lookup(token, cached=known)
+    token = _with_decimals_lookup(token, cached=known or cache.cached_decimals(mint))
+    cache.store_decimals(mint, token)
+    return token
+
+
+def _fetch_external_token(mint: str, *, decimals_meta: dict[str, Any] | None = None) -> dict[str, Any]:
+    external = fetch_dexscreener_token_metadata(mint)
+    if external.get("ok") is True:
+        token = external.get("token")
+        if isinstance(token, dict):
+            external["token"] = _with_decimals_lookup(token, cached=decimals_meta)
+    return external
+
+
+def _refresh_external_token(mint: str) -> dict[str, Any]:
+    cache = get_external_token_cache()
+    return _fetch_external_token(mint, decimals_meta=cache.cached_decimals(mint) if cache is not None else None)
+
+
+def _resolve_external_token(mint: str, known: dict[str, Any] | None = None) -> dict[str, Any]:
+    cache = get_external_token_cache()
+    if cache is None:
+        return _fetch_external_token(mint, decimals_meta=known)
+
+    if cache.refresher is None:
+        cache.set_refresher(_refresh_external_token)
+    cached = cache.lookup(mint)
+    state = cached["state"]
+    if state == "fresh":
+        return {"ok": True, "token": cached["token"], "cache": {"state": state}}
+    if state == "not_found":
+        return {
+            "ok": False,
+            "error": {
+                "code": "TOKEN_METADATA_NOT_FOUND",
+                "message": "DexScreener recently returned no usable token metadata for this mint.",
+                "provider": "dexscreener",
+                "mint": mint,
+            },
+            "cache": {"state": state},
+        }
+
+    external = _fetch_external_token(mint, decimals_meta=cached["decimals"] or known)
+    cache.store_result(mint, external)
+    external["cache"] = {"state": state}
+    return external
+
+
 def _unresolved_mint_response(mint: str, *, code: str = "TOKEN_METADATA_LOOKUP_NOT_IMPLEMENTED") -> dict[str, Any]:
     return {
         "ok": False,
@@ -303,13 +352,64 @@ def _unresolved_mint_response(mint: str, *, code: str = "TOKEN_METADATA_LOOKUP_N
     }
 
 
-def resolve_token(query: str, *, allow_external: bool = True) -> dict[str, Any]:
+def prefetch_mint_decimals(mints: list[str], *, rpc_url: str | None = None) -> dict[str, dict[str, Any]]:
+    """
+    Decimals for many mints with batched getMultipleAccounts calls, for
+    callers about to resolve a list of tokens. Registry mints that already
+    carry decimals are skipped, and the external token cache (when enabled)
+    is read first and fed with every new answer. Pass the result to
+    resolve_token(known_decimals=...). Mints that failed are left out.
+    """
+    index = get_token_index()
+    cache = get_external_token_cache()
+    known: dict[str, dict[str, Any]] = {}
+    missing: list[str] = []
+    for mint in dict.fromkeys((mint or "").strip() for mint in mints):
+        if not _is_probable_solana_mint(mint):
+            continue
+        meta = index.by_mint(mint)
+        if meta is not None and isinstance(meta.get("decimals"), int):
+            continue
+        cached = cache.cached_decimals(mint) if cache is not None else None
+        if cached is not None:
+            known[mint] = cached
+        else:
+            missing.append(mint)
+
+    if not missing:
+        return known
+    batch = fetch_solana_mint_decimals_batch(missing, rpc_url)
+    for mint, result in (batch.get("results") or {}).items():
+        if result.get("ok") is not True:
+            continue
+        known[mint] = {
+            "decimals": result["decimals"],
+            "source": result.get("source"),
+            "owner": result.get("owner"),
+            "token_program": result.get("token_program"),
+        }
+        if cache is not None:
+            cache.store_decimals(mint, {
+                "decimals": result["decimals"],
+                "decimals_source": result.get("source"),
+                "mint_account_owner": result.get("owner"),
+            })
+    return known
+
+
+def resolve_token(
+    query: str,
+    *,
+    allow_external: bool = True,
+    known_decimals: dict[str, dict[str, Any]] | None = None,
+) -> dict[str, Any]:
     """
     Resolve a swap token query without guessing.
 
     V1 intentionally resolves only existing curated registry entries. Unknown
     Solana mints can optionally use external metadata lookup. V1 keeps registry
     entries authoritative and does not add unknown mints to the quote registry.
+    known_decimals (from prefetch_mint_decimals) skips the per-mint decimals RPC.
     """
     normalized = (query or "").strip()
     if not normalized:
@@ -324,7 +424,10 @@ def resolve_token(query: str, *, allow_external: bool = True) -> dict[str, Any]:
     registry_token = _resolve_registry_token(normalized)
     if registry_token:
         if _is_probable_solana_mint(registry_token.get("mint") or "") and not isinstance(registry_token.get("decimals"), int):
-            registry_token = _with_decimals_lookup(registry_token)
+            registry_token = _registry_token_with_decimals(
+                registry_token,
+                (known_decimals or {}).get(registry_token.get("mint") or ""),
+            )
         return {
             "ok": True,
             "token": registry_token,
@@ -334,13 +437,7 @@ def resolve_token(query: str, *, allow_external: bool = True) -> dict[str, Any]:
         if not allow_external:
             return _unresolved_mint_response(normalized)
 
-        external = fetch_dexscreener_token_metadata(normalized)
-        if external.get("ok") is True:
-            token = external.get("token")
-            if isinstance(token, dict):
-                external["token"] = _with_decimals_lookup(token)
-            return external
-        return external
+        return _resolve_external_token(normalized, (known_decimals or {}).get(normalized))
 
     return {
         "ok": False,
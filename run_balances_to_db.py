@@ -6,6 +6,7 @@ from typing import Dict, List
 
 from db import init_db, insert_balance_snapshot, get_latest_balances
 from portfolio import compute_portfolio_report
+from providers.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
 
 from token_registry import TOKENS, mint_to_asset_key
 
@@ -170,4 +171,5 @@ def main(argv: List[str] | None = None) -> None:
 
 
 if __name__ == "__main__":
-    main()
+    with upstream_priority(PRIORITY_BACKGROUND):
+        main()
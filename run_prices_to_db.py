@@ -11,6 +11,7 @@ from db import (
     get_price_history,
     get_latest_price,
 )
+from providers.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
 from wallet_helpers import fetch_prices
 
 
@@ -84,4 +85,5 @@ def main(argv: List[str] | None = None) -> None:
 
 
 if __name__ == "__main__":
-    main()
+    with upstream_priority(PRIORITY_BACKGROUND):
+        main()
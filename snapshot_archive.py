@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterator, List
+
+from db import DB_PATH, QUOTE_OBSERVATION_COLUMNS, init_db, open_conn
+
+# Columns are exported without the AUTOINCREMENT id so archives can be loaded
+# into a DB that already holds rows.
+SNAPSHOT_TABLES: dict[str, list[str]] = {
+    "price_snapshots": ["ts", "asset", "currency", "price", "source"],
+    "balance_snapshots": ["ts", "account", "asset", "amount", "source"],
+    "portfolio_snapshots": ["ts", "account", "currency", "total_value", "source"],
+    "quote_observations": list(QUOTE_OBSERVATION_COLUMNS),
+}
+# A row already present under this key is skipped on import, so loading the
+# same archive twice is a no-op.
+SNAPSHOT_IMPORT_KEYS: dict[str, list[str]] = {
+    "price_snapshots": ["ts", "asset", "currency", "source"],
+    "balance_snapshots": ["ts", "account", "asset", "source"],
+    "portfolio_snapshots": ["ts", "account", "currency", "source"],
+    "quote_observations": ["ts", "quote_id", "variant_id"],
+}
+FLOAT_COLUMNS = {
+    "price",
+    "amount",
+    "total_value",
+    "input_amount",
+    "latency_ms",
+    "reference_output_amount",
+    "benchmark_gap_pct",
+    "execution_cost",
+    "execution_cost_usd",
+}
+INT_COLUMNS = {"ok", "route_step_count", "is_best", "is_recommended"}
+
+DEFAULT_CHUNK_ROWS = 50_000
+ARCHIVE_FORMATS = ("parquet", "arrow", "jsonl")
+FORMAT_SUFFIXES = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "jsonl": ".jsonl.gz",
+}
+MANIFEST_NAME = "manifest.json"
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def default_archive_format() -> str:
+    return "parquet" if _load_pyarrow() is not None else "jsonl"
+
+
+def _require_pyarrow(fmt: str):
+    pa = _load_pyarrow()
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required for {fmt} archives; install pyarrow or use --format jsonl")
+    return pa
+
+
+def _arrow_schema(pa, table: str):
+    fields = []
+    for column in SNAPSHOT_TABLES[table]:
+        if column in FLOAT_COLUMNS:
+            fields.append(pa.field(column, pa.float64()))
+        elif column in INT_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def _existing_tables(conn: sqlite3.Connection) -> set[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';").fetchall()
+    return {row[0] for row in rows}
+
+
+def iter_table_chunks(
+    conn: sqlite3.Connection,
+    table: str,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[list[tuple]]:
+    """
+    Yields lists of row tuples, ordered by id, at most chunk_rows long.
+    Uses keyset pagination so memory stays bounded regardless of table size.
+    """
+    columns = SNAPSHOT_TABLES[table]
+    sql = f"""
+        SELECT id, {", ".join(columns)}
+        FROM {table}
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?;
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(sql, (last_id, int(chunk_rows))).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [tuple(row)[1:] for row in rows]
+        if len(rows) < chunk_rows:
+            return
+
+
+def _write_chunks(path: Path, fmt: str, table: str, chunks: Iterator[list[tuple]]) -> int:
+    columns = SNAPSHOT_TABLES[table]
+    written = 0
+
+    if fmt == "jsonl":
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for chunk in chunks:
+                for row in chunk:
+                    f.write(json.dumps(dict(zip(columns, row)), separators=(",", ":")))
+                    f.write("\n")
+                written += len(chunk)
+        return written
+
+    pa = _require_pyarrow(fmt)
+    schema = _arrow_schema(pa, table)
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(str(path), schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(str(path), schema)
+    try:
+        for chunk in chunks:
+            arrays = [
+                pa.array([row[i] for row in chunk], type=schema.field(i).type)
+                for i in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(chunk)
+    finally:
+        writer.close()
+    return written
+
+
+def _read_chunks(path: Path, fmt: str, table: str, *, chunk_rows: int) -> Iterator[list[tuple]]:
+    columns = SNAPSHOT_TABLES[table]
+
+    if fmt == "jsonl":
+        batch: list[tuple] = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                batch.append(tuple(item.get(column) for column in columns))
+                if len(batch) >= chunk_rows:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+        return
+
+    pa = _require_pyarrow(fmt)
+    if fmt == "parquet":
+        parquet_file = pa.parquet.ParquetFile(str(path))
+        present = [column for column in columns if column in parquet_file.schema_arrow.names]
+        batches = parquet_file.iter_batches(batch_size=chunk_rows, columns=present)
+    else:
+        reader = pa.ipc.open_file(str(path))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for record_batch in batches:
+        data = record_batch.to_pydict()
+        # Archives written before a column existed load it as NULL.
+        missing = [None] * record_batch.num_rows
+        yield list(zip(*(data.get(column, missing) for column in columns)))
+
+
+def export_snapshots(
+    out_dir: Path,
+    *,
+    fmt: str | None = None,
+    tables: List[str] | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    db_path: Path = DB_PATH,
+) -> dict:
+    """
+    Streams snapshot tables to one columnar file per table plus a manifest.
+    Returns the manifest dict.
+    """
+    fmt = fmt or default_archive_format()
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"unsupported archive format: {fmt}")
+    tables = tables or list(SNAPSHOT_TABLES)
+    unknown = [t for t in tables if t not in SNAPSHOT_TABLES]
+    if unknown:
+        raise ValueError(f"unknown snapshot tables: {', '.join(unknown)}")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"format": fmt, "tables": {}}
+
+    with open_conn(db_path) as conn:
+        present = _existing_tables(conn)
+        for table in tables:
+            if table not in present:
+                continue
+            path = out_dir / f"{table}{FORMAT_SUFFIXES[fmt]}"
+            rows = _write_chunks(path, fmt, table, iter_table_chunks(conn, table, chunk_rows=chunk_rows))
+            manifest["tables"][table] = {
+                "file": path.name,
+                "rows": rows,
+                "columns": SNAPSHOT_TABLES[table],
+            }
+
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _import_sql(table: str, staging: str) -> str:
+    """
+    Copies staged rows whose import key is not in the table yet. The key is
+    checked with NOT EXISTS rather than a unique index, so importing never
+    changes the live schema or touches rows already there.
+    """
+    columns = ", ".join(SNAPSHOT_TABLES[table])
+    matches = " AND ".join(f"t.{column} = s.{column}" for column in SNAPSHOT_IMPORT_KEYS[table])
+    return f"""
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM {staging} AS s
+        WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {matches});
+    """
+
+
+def import_snapshots(
+    in_dir: Path,
+    *,
+    tables: List[str] | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    db_path: Path = DB_PATH,
+) -> dict[str, int]:
+    """
+    Loads an archive written by export_snapshots into db_path.
+    Each chunk is staged in a temp table with executemany and copied inside
+    one transaction per table; rows whose SNAPSHOT_IMPORT_KEYS key already
+    exists are skipped.
+    Returns rows inserted per table.
+    """
+    in_dir = Path(in_dir)
+    manifest_path = in_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"archive manifest not found: {manifest_path}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    fmt = manifest.get("format")
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"unsupported archive format: {fmt}")
+
+    init_db(db_path)
+    inserted: dict[str, int] = {}
+    with open_conn(db_path) as conn:
+        for table, entry in (manifest.get("tables") or {}).items():
+            if table not in SNAPSHOT_TABLES or (tables and table not in tables):
+                continue
+            columns = SNAPSHOT_TABLES[table]
+            staging = f"import_{table}"
+            stage_sql = f"""
+                INSERT INTO temp.{staging} ({", ".join(columns)})
+                VALUES ({", ".join("?" for _ in columns)});
+            """
+            import_sql = _import_sql(table, f"temp.{staging}")
+            count = 0
+            with conn:
+                conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS SELECT {', '.join(columns)} FROM {table} WHERE 0;")
+                for chunk in _read_chunks(in_dir / entry["file"], fmt, table, chunk_rows=chunk_rows):
+                    conn.executemany(stage_sql, chunk)
+                    count += conn.execute(import_sql).rowcount
+                    conn.execute(f"DELETE FROM temp.{staging};")
+                conn.execute(f"DROP TABLE temp.{staging};")
+            inserted[table] = count
+    return inserted
+
+
+def main(argv: List[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Bulk export/import of SQLite snapshot history")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Export snapshot tables to an archive folder")
+    exp.add_argument("--out", default="exports/history", help="Output folder (default: exports/history)")
+    exp.add_argument("--format", choices=ARCHIVE_FORMATS, default=None, help="Archive format (default: parquet if pyarrow is installed, else jsonl)")
+
+    imp = sub.add_parser("import", help="Load an archive folder into the DB")
+    imp.add_argument("--in", dest="in_dir", required=True, help="Archive folder written by export")
+
+    for sp in (exp, imp):
+        sp.add_argument("--db", default=str(DB_PATH), help="SQLite DB path (default: wallet.db)")
+        sp.add_argument("--tables", nargs="*", default=None, help="Subset of tables (default: all)")
+        sp.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk")
+
+    args = p.parse_args(argv)
+
+    if args.command == "export":
+        manifest = export_snapshots(
+            Path(args.out),
+            fmt=args.format,
+            tables=args.tables,
+            chunk_rows=args.chunk_rows,
+            db_path=Path(args.db),
+        )
+        for table, entry in manifest["tables"].items():
+            print(f"Exported {entry['rows']} rows from {table} -> {Path(args.out) / entry['file']}")
+        return
+
+    inserted = import_snapshots(
+        Path(args.in_dir),
+        tables=args.tables,
+        chunk_rows=args.chunk_rows,
+        db_path=Path(args.db),
+    )
+    for table, count in inserted.items():
+        print(f"Imported {count} rows into {table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 import requests
 
+from providers.rate_limiter import acquire_upstream, rpc_upstream
+
 
 DEFAULT_SOLANA_RPC_URL = "https://api.mainnet-beta.solana.com"
 TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
@@ -21,6 +23,8 @@ class SolanaTokenBalance:
 
 def _rpc_call(rpc_url: str, method: str, params: list[Any]) -> dict:
     payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    if not acquire_upstream(rpc_upstream(rpc_url)):
+        raise RuntimeError(f"Solana RPC rate limit: local budget exhausted for {method}")
     r = requests.post(rpc_url, json=payload, timeout=20)
     r.raise_for_status()
     data = r.json()
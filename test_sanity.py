@@ -1,5 +1,6 @@
 import unittest
 import tempfile
+import functools
 import base64
 import json
 import os
@@ -82,9 +83,10 @@ from api.main import (
     token_holder_concentration,
     wallet_activity,
 )
+from api.quote_observations import reset_quote_observation_writer
 from api.ui_page import build_ui_html
-from providers.token_resolver import maybe_enrich_token_logo_uri_from_dexscreener, resolve_token
-from providers.solana_token_metadata import fetch_solana_mint_decimals
+from providers.token_resolver import maybe_enrich_token_logo_uri_from_dexscreener, prefetch_mint_decimals, resolve_token
+from providers.solana_token_metadata import fetch_solana_mint_decimals, fetch_solana_mint_decimals_batch
 from providers.helius_activity import fetch_wallet_activity
 from providers.token_holder_concentration import (
     build_bubblemaps_url,
@@ -109,6 +111,7 @@ from run_balances_to_db import (
     normalize_solana_requested_asset,
 )
 
+import db as db_module
 from db import (
     init_db,
     insert_price_snapshot,
@@ -116,6 +119,7 @@ from db import (
     get_price_at_or_before,
     insert_balance_snapshot,
     get_latest_balances_with_ts,
+    open_conn,
 )
 
 _TEST_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
@@ -208,8 +212,20 @@ class TestSanity(unittest.TestCase):
         self.tmp = tempfile.TemporaryDirectory()
         self.db_path = Path(self.tmp.name) / "test_wallet.db"
         init_db(db_path=self.db_path)
+        # Quotes made by tests must not append observations to ./wallet.db.
+        env = patch.dict(
+            os.environ,
+            {"QUOTE_OBSERVATION_LOG": "0", "QUOTE_OBSERVATION_DB_PATH": str(self.db_path)},
+        )
+        env.start()
+        self.addCleanup(env.stop)
+        # Quote baselines look up prices in the default DB; read the per-test one.
+        prices = patch("db.get_latest_price", new=functools.partial(db_module.get_latest_price, db_path=self.db_path))
+        prices.start()
+        self.addCleanup(prices.stop)
 
     def tearDown(self):
+        reset_quote_observation_writer()
         self.tmp.cleanup()
 
     def test_token_resolver_resolves_known_symbol(self):
@@ -1105,7 +1121,7 @@ class TestSanity(unittest.TestCase):
         ])
         self.assertEqual(report["pairs"][0]["classification"], "strong")
         self.assertEqual(report["promotion_status"], "promote_candidate")
-        resolver.assert_called_once_with(mint, allow_external=True)
+        resolver.assert_called_once_with(mint, allow_external=True, known_decimals=None)
         self.assertEqual(quote.call_count, 4)
         sleep.assert_not_called()
         self.assertEqual(before_mints, {meta.get("mint") for meta in TOKEN_META.values()})
@@ -3720,7 +3736,7 @@ class TestSanity(unittest.TestCase):
         self.assertNotIn("function refreshHolderConcentrationButton()", html)
         self.assertIn("function renderHolderConcentration(data)", html)
         self.assertIn("function runHolderConcentration()", html)
-        self.assertIn('fetchMaybeJson("/tokens/holder-concentration?" + qs({', html)
+        self.assertIn('fetchMaybeJson("/tokens/holder-concentration/batch?" + qs({', html)
         self.assertIn("https://v2.bubblemaps.io/map?address=", html)
         self.assertIn("Token stats & holder concentration", html)
         self.assertNotIn('<div style="font-weight:600;">Holder concentration</div>', html)
@@ -3790,7 +3806,8 @@ class TestSanity(unittest.TestCase):
         self.assertIn("async function previewSwap()", html)
         self.assertIn("runHolderConcentration();", html)
         self.assertNotIn('$("btnHolderConcentration").addEventListener("click", runHolderConcentration);', html)
-        self.assertEqual(html.count("/tokens/holder-concentration?"), 1)
+        self.assertEqual(html.count("/tokens/holder-concentration/batch?"), 1)
+        self.assertNotIn("/tokens/holder-concentration?", html)
 
     def test_swap_ui_holder_concentration_avoids_score_and_scam_language(self):
         html = build_ui_html()
@@ -9280,7 +9297,8 @@ class TestSanity(unittest.TestCase):
         self.assertEqual(simulate.call_args.kwargs["rpc_url"], "https://rpc.example?api-key=SECRET")
         self.assertEqual(simulate.call_args.kwargs["provider"], "orca-whirlpool")
         self.assertEqual(simulate.call_args.kwargs["transaction_diagnostics"]["fee_payer"], payer)
-        self.assertEqual(simulate.call_args.kwargs["setup_cost_estimate"]["setup_cost_estimate_lamports"], 2039280)
+        self.assertEqual(result["setup_cost_estimate_lamports"], 2039280)
+        self.assertEqual(set(result["preflight_timings_ms"]), {"decode", "simulate", "setup_cost", "total"})
         result_json = json.dumps(result)
         self.assertNotIn(transaction_base64, result_json)
         self.assertNotIn("transaction_base64", result_json)
@@ -10971,5 +10989,2158 @@ class TestSanity(unittest.TestCase):
         self.assertEqual([pair.label for pair in pairs], ["SOL:USDC"])
         self.assertEqual(json.dumps(TOKEN_META, sort_keys=True), before)
 
+
+    def test_snapshot_archive_jsonl_round_trip_in_chunks(self):
+        import snapshot_archive
+
+        insert_price_snapshot(
+            "2026-01-01T00:00:00+00:00",
+            {"btc": 95000.0, "eth": 3300.0, "sol": 150.0},
+            "usd",
+            db_path=self.db_path,
+        )
+        insert_balance_snapshot(
+            "2026-01-01T00:00:00+00:00",
+            "val-main",
+            {"sol": 1.5, "usdc": 20.0},
+            db_path=self.db_path,
+        )
+        out_dir = Path(self.tmp.name) / "archive"
+
+        manifest = snapshot_archive.export_snapshots(out_dir, fmt="jsonl", chunk_rows=2, db_path=self.db_path)
+
+        self.assertEqual(manifest["tables"]["price_snapshots"]["rows"], 3)
+        self.assertEqual(manifest["tables"]["balance_snapshots"]["rows"], 2)
+        self.assertEqual(manifest["tables"]["portfolio_snapshots"]["rows"], 0)
+
+        fresh_db = Path(self.tmp.name) / "fresh.db"
+        inserted = snapshot_archive.import_snapshots(out_dir, chunk_rows=2, db_path=fresh_db)
+
+        self.assertEqual(
+            inserted,
+            {"price_snapshots": 3, "balance_snapshots": 2, "portfolio_snapshots": 0, "quote_observations": 0},
+        )
+        self.assertEqual(
+            get_latest_prices_with_ts(["btc", "sol"], "usd", db_path=fresh_db),
+            {
+                "btc": ("2026-01-01T00:00:00+00:00", 95000.0),
+                "sol": ("2026-01-01T00:00:00+00:00", 150.0),
+            },
+        )
+        self.assertEqual(
+            get_latest_balances_with_ts("val-main", ["sol"], db_path=fresh_db),
+            {"sol": ("2026-01-01T00:00:00+00:00", 1.5)},
+        )
+
+    def test_snapshot_archive_columnar_formats_require_pyarrow(self):
+        import snapshot_archive
+
+        with patch("snapshot_archive._load_pyarrow", return_value=None):
+            self.assertEqual(snapshot_archive.default_archive_format(), "jsonl")
+            with self.assertRaises(RuntimeError):
+                snapshot_archive.export_snapshots(
+                    Path(self.tmp.name) / "archive",
+                    fmt="parquet",
+                    db_path=self.db_path,
+                )
+
+
+    def test_swap_quote_records_per_variant_observations_without_blocking(self):
+        ext_mint = "AiXxRGmRc5oDiFXbEeRX9obPpr3Zir7rks1ef2NjddiF"
+        raydium_quote = {
+            "success": True,
+            "data": {
+                "inputMint": METEORA_DLMM_SOL_MINT,
+                "inputAmount": "1000000000",
+                "outputMint": ext_mint,
+                "outputAmount": "4200000",
+                "otherAmountThreshold": "4179000",
+                "slippageBps": 50,
+                "priceImpactPct": 0,
+                "routePlan": [],
+            },
+        }
+        unsupported = {
+            "ok": False,
+            "error": {"status_code": 400, "detail": "unsupported pair"},
+        }
+
+        with (
+            patch(
+                "api.main.resolve_token",
+                return_value={
+                    "ok": True,
+                    "token": {
+                        "source": "dexscreener",
+                        "symbol": "AIX",
+                        "name": "AIX",
+                        "display_name": "AIX",
+                        "mint": ext_mint,
+                        "decimals": 6,
+                        "verified": False,
+                        "price_usd": 0.502,
+                    },
+                },
+            ),
+            patch(
+                "api.main._fetch_jupiter_quote",
+                side_effect=HTTPException(
+                    status_code=400,
+                    detail='Jupiter HTTP error: {"error":"No routes found","errorCode":"NO_ROUTES_FOUND"}',
+                ),
+            ),
+            patch(
+                "api.main._try_fetch_jupiter_quote",
+                return_value={
+                    "ok": False,
+                    "error": {
+                        "status_code": 400,
+                        "detail": 'Jupiter HTTP error: {"error":"No routes found","errorCode":"NO_ROUTES_FOUND"}',
+                    },
+                },
+            ),
+            patch("api.main._try_fetch_raydium_quote", return_value={"ok": True, "data": raydium_quote}),
+            patch("api.main._try_fetch_meteora_dlmm_quote", return_value=unsupported),
+            patch("api.main._try_fetch_orca_whirlpool_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phoenix_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phantom_quote", return_value=unsupported),
+            patch("api.main._try_fetch_pumpswap_quote", return_value=unsupported),
+            patch(
+                "api.main._resolve_quote_reference_prices_usd",
+                return_value={
+                    "SOL": {"usd": 84.0},
+                    "AIX": {"usd": 0.502},
+                },
+            ),
+            patch("api.main.record_quote_observations") as record,
+        ):
+            response = swap_quote(from_token="SOL", to_token=ext_mint, amount=1.0)
+
+        self.assertTrue(response["ok"])
+        record.assert_called_once()
+        rows = {row["variant_id"]: row for row in record.call_args.args[0]}
+        self.assertEqual(rows["raydium_quote"]["ok"], 1)
+        self.assertEqual(rows["raydium_quote"]["is_best"], 1)
+        self.assertEqual(rows["raydium_quote"]["provider"], "raydium-trade-api")
+        self.assertEqual(rows["raydium_quote"]["estimated_output_raw"], "4200000")
+        self.assertEqual(rows["raydium_quote"]["output_mint"], ext_mint)
+        self.assertIsNotNone(rows["raydium_quote"]["benchmark_gap_pct"])
+        self.assertEqual(rows["recommended_default"]["ok"], 0)
+        self.assertEqual(rows["recommended_default"]["error_code"], "NO_ROUTES_FOUND")
+        self.assertEqual(rows["meteora_dlmm_quote"]["provider"], "meteora-dlmm")
+        self.assertEqual(len({row["quote_id"] for row in rows.values()}), 1)
+        for row in rows.values():
+            self.assertIsInstance(row["latency_ms"], float)
+
+    def test_quote_observation_writer_batches_rows_and_supports_indexed_queries(self):
+        from api.quote_observations import QuoteObservationWriter
+        from db import get_quote_observations, get_quote_provider_stats
+
+        def row(ts, variant_id, provider, *, ok=1, is_best=0, latency_ms=100.0, output_mint="out-mint"):
+            return {
+                "ts": ts,
+                "quote_id": f"q-{ts}",
+                "network": "solana",
+                "input_mint": "in-mint",
+                "output_mint": output_mint,
+                "variant_id": variant_id,
+                "provider": provider,
+                "ok": ok,
+                "latency_ms": latency_ms,
+                "is_best": is_best,
+                "is_recommended": is_best,
+            }
+
+        writer = QuoteObservationWriter(self.db_path, batch_size=2, flush_interval_seconds=0.05)
+        accepted = writer.submit([
+            row("2026-01-01T00:00:00+00:00", "recommended_default", "jupiter-metis", is_best=1, latency_ms=120.0),
+            row("2026-01-01T00:00:00+00:00", "raydium_quote", "raydium-trade-api", latency_ms=300.0),
+            row("2026-01-02T00:00:00+00:00", "recommended_default", "jupiter-metis", latency_ms=80.0),
+            row("2026-01-02T00:00:00+00:00", "raydium_quote", "raydium-trade-api", is_best=1, latency_ms=250.0),
+            row("2026-01-03T00:00:00+00:00", "raydium_quote", "raydium-trade-api", ok=0, output_mint="other"),
+        ])
+
+        self.assertEqual(accepted, 5)
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.stats()["written_rows"], 5)
+
+        pair_rows = get_quote_observations(
+            input_mint="in-mint",
+            output_mint="out-mint",
+            provider="raydium-trade-api",
+            db_path=self.db_path,
+        )
+        self.assertEqual([r["ts"] for r in pair_rows], ["2026-01-02T00:00:00+00:00", "2026-01-01T00:00:00+00:00"])
+
+        window_rows = get_quote_observations(
+            since="2026-01-02T00:00:00+00:00",
+            until="2026-01-03T00:00:00+00:00",
+            db_path=self.db_path,
+        )
+        self.assertEqual(len(window_rows), 2)
+
+        stats = get_quote_provider_stats(input_mint="in-mint", output_mint="out-mint", db_path=self.db_path)
+        self.assertEqual(stats["recommended_default"]["win_rate"], 0.5)
+        self.assertEqual(stats["raydium_quote"]["wins"], 1)
+        self.assertEqual(stats["recommended_default"]["latency_ms_p50"], 80.0)
+        self.assertEqual(stats["recommended_default"]["latency_ms_p95"], 120.0)
+
+
+    def test_quote_scheduler_skips_or_shortens_rarely_winning_variants_by_pair_class(self):
+        import random
+        from api.quote_scheduler import QuoteScheduler, classify_pair
+        from db import insert_quote_observations
+
+        bonk_mint = METEORA_DLMM_BONK_MINT
+        self.assertEqual(classify_pair(METEORA_DLMM_SOL_MINT, METEORA_DLMM_USDC_MINT), "major")
+        self.assertEqual(classify_pair(METEORA_DLMM_SOL_MINT, bonk_mint), "meme")
+        self.assertEqual(classify_pair(METEORA_DLMM_SOL_MINT, "7LSsEoJGhLeZzGvDofTdNg7M3JttxQqGWNLo6vWMpump"), "pump")
+
+        from datetime import datetime, timezone
+        ts = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for i in range(40):
+            for variant_id, is_best in (
+                ("recommended_default", int(i % 2 == 0)),
+                ("broader_search", 0),
+                ("raydium_quote", int(i == 0)),
+                ("orca_whirlpool_quote", int(i % 2 == 1)),
+            ):
+                rows.append({
+                    "ts": ts,
+                    "quote_id": f"q{i}",
+                    "network": "solana",
+                    "input_mint": METEORA_DLMM_SOL_MINT,
+                    "output_mint": bonk_mint,
+                    "variant_id": variant_id,
+                    "ok": 1,
+                    "latency_ms": 200.0,
+                    "is_best": is_best,
+                    "is_recommended": is_best,
+                })
+        insert_quote_observations(rows, db_path=self.db_path)
+
+        scheduler = QuoteScheduler(db_path=self.db_path, explore_rate=0.0, rng=random.Random(1))
+        meme_plan = scheduler.plan(
+            ["recommended_default", "broader_search", "raydium_quote", "orca_whirlpool_quote", "phoenix_quote"],
+            pair_class="meme",
+        )
+
+        self.assertTrue(meme_plan.should_run("recommended_default"))
+        self.assertFalse(meme_plan.should_run("broader_search"))
+        self.assertTrue(meme_plan.should_run("raydium_quote"))
+        self.assertEqual(meme_plan.call_kwargs("raydium_quote"), {"timeout": 4.0})
+        self.assertEqual(meme_plan.call_kwargs("orca_whirlpool_quote"), {})
+        self.assertEqual(meme_plan.decisions["phoenix_quote"]["reason"], "insufficient_history")
+        self.assertEqual(meme_plan.skipped_variants(), ["broader_search"])
+        self.assertEqual(meme_plan.debug()["priority_order"][0], "recommended_default")
+
+        major_plan = scheduler.plan(["broader_search"], pair_class="major")
+        self.assertTrue(major_plan.should_run("broader_search"))
+
+    def test_swap_quote_does_not_call_variants_skipped_by_schedule(self):
+        from api.quote_scheduler import QuoteSchedule
+
+        jupiter_quote = {
+            "inputMint": METEORA_DLMM_SOL_MINT,
+            "outputMint": METEORA_DLMM_USDC_MINT,
+            "inAmount": "1000000000",
+            "outAmount": "84000000",
+            "otherAmountThreshold": "83580000",
+            "slippageBps": 50,
+            "priceImpactPct": "0",
+            "routePlan": [{"swapInfo": {"label": "Orca"}, "percent": 100}],
+        }
+        unsupported = {
+            "ok": False,
+            "error": {"status_code": 400, "detail": "unsupported pair"},
+        }
+        all_variants = [
+            "recommended_default",
+            "broader_search",
+            "exclude_recommended_dexes",
+            "direct_route_check",
+            "raydium_quote",
+            "meteora_dlmm_quote",
+            "orca_whirlpool_quote",
+            "phoenix_quote",
+            "phantom_quote",
+            "pumpswap_quote",
+        ]
+        schedule = QuoteSchedule(
+            "major",
+            {
+                variant_id: {
+                    "run": variant_id not in {"broader_search", "exclude_recommended_dexes", "phoenix_quote"},
+                    "timeout_seconds": 4.0 if variant_id == "raydium_quote" else None,
+                }
+                for variant_id in all_variants
+            },
+            adaptive=True,
+        )
+
+        with (
+            patch("api.main.plan_quote_schedule", return_value=schedule),
+            patch("api.main._fetch_jupiter_quote", return_value=jupiter_quote),
+            patch("api.main._try_fetch_jupiter_quote", return_value={"ok": True, "data": jupiter_quote}) as try_jupiter,
+            patch("api.main._try_fetch_raydium_quote", return_value=unsupported) as try_raydium,
+            patch("api.main._try_fetch_meteora_dlmm_quote", return_value=unsupported),
+            patch("api.main._try_fetch_orca_whirlpool_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phoenix_quote", return_value=unsupported) as try_phoenix,
+            patch("api.main._try_fetch_phantom_quote", return_value=unsupported),
+            patch("api.main._try_fetch_pumpswap_quote", return_value=unsupported),
+            patch("api.main._resolve_quote_reference_prices_usd", return_value={}),
+            patch("api.main.record_quote_observations"),
+        ):
+            response = swap_quote(from_token="SOL", to_token="USDC", amount=1.0)
+
+        self.assertTrue(response["ok"])
+        try_phoenix.assert_not_called()
+        self.assertEqual(try_jupiter.call_count, 1)
+        self.assertEqual(try_jupiter.call_args.args[0]["onlyDirectRoutes"], "true")
+        self.assertEqual(try_raydium.call_args.kwargs, {"timeout": 4.0})
+        self.assertEqual(
+            response["summary"]["skipped_variants"],
+            ["broader_search", "exclude_recommended_dexes", "phoenix_quote"],
+        )
+        self.assertNotIn("broader_search", response["summary"]["checked_variants"])
+        self.assertNotIn(
+            "phoenix_quote",
+            [item.get("variant_id") for item in response["debug"]["variant_errors"]],
+        )
+
+    def test_route_label_cache_buckets_amounts_and_expires(self):
+        from api.jupiter_route_cache import RouteLabelCache, amount_bucket, same_route_labels
+
+        cache = RouteLabelCache(ttl_seconds=60, max_entries=2)
+        cache.put("A", "B", 1_000_000_000, ["Orca", "Raydium"])
+        self.assertEqual(amount_bucket(1_000_000_000), amount_bucket(1_050_000_000))
+        self.assertEqual(cache.get("A", "B", 1_050_000_000), ["Orca", "Raydium"])
+        self.assertIsNone(cache.get("A", "B", 10_000_000_000))
+        self.assertIsNone(cache.get("B", "A", 1_000_000_000))
+        self.assertTrue(same_route_labels(["Raydium", "Orca"], ["Orca", "Raydium"]))
+        self.assertFalse(same_route_labels(["Orca"], ["Orca", "Raydium"]))
+
+        cache.put("C", "D", 5, ["Meteora"])
+        cache.put("E", "F", 5, ["Phoenix"])
+        self.assertIsNone(cache.get("A", "B", 1_000_000_000))
+
+        with patch("api.jupiter_route_cache.time.monotonic", return_value=10**12):
+            self.assertIsNone(cache.get("E", "F", 5))
+
+    def test_swap_quote_speculative_exclude_uses_cached_labels_and_falls_back_on_miss(self):
+        from api.jupiter_route_cache import RouteLabelCache
+
+        jupiter_quote = {
+            "inputMint": METEORA_DLMM_SOL_MINT,
+            "outputMint": METEORA_DLMM_USDC_MINT,
+            "inAmount": "1000000000",
+            "outAmount": "84000000",
+            "otherAmountThreshold": "83580000",
+            "slippageBps": 50,
+            "priceImpactPct": "0",
+            "routePlan": [{"swapInfo": {"label": "Orca"}, "percent": 100}],
+        }
+        unsupported = {
+            "ok": False,
+            "error": {"status_code": 400, "detail": "unsupported pair"},
+        }
+
+        def run_quote(cached_labels):
+            cache = RouteLabelCache()
+            if cached_labels:
+                cache.put(METEORA_DLMM_SOL_MINT, METEORA_DLMM_USDC_MINT, 1_000_000_000, cached_labels)
+            with (
+                patch.dict(os.environ, {"JUPITER_SPECULATIVE_EXCLUDE": "1"}),
+                patch("api.main.get_route_label_cache", return_value=cache),
+                patch("api.main._fetch_jupiter_quote", return_value=jupiter_quote),
+                patch("api.main._try_fetch_jupiter_quote", return_value={"ok": True, "data": jupiter_quote}) as try_jupiter,
+                patch("api.main._try_fetch_raydium_quote", return_value=unsupported),
+                patch("api.main._try_fetch_meteora_dlmm_quote", return_value=unsupported),
+                patch("api.main._try_fetch_orca_whirlpool_quote", return_value=unsupported),
+                patch("api.main._try_fetch_phoenix_quote", return_value=unsupported),
+                patch("api.main._try_fetch_phantom_quote", return_value=unsupported),
+                patch("api.main._try_fetch_pumpswap_quote", return_value=unsupported),
+                patch("api.main._resolve_quote_reference_prices_usd", return_value={}),
+                patch("api.main.record_quote_observations"),
+            ):
+                response = swap_quote(from_token="SOL", to_token="USDC", amount=1.0)
+            excluded = [
+                call.args[0]["excludeDexes"]
+                for call in try_jupiter.call_args_list
+                if "excludeDexes" in call.args[0]
+            ]
+            return response, excluded, cache
+
+        from providers.metrics import get_metrics
+
+        probes = get_metrics().speculative_probes
+        used_before = probes.value("used")
+        discarded_before = probes.value("discarded_not_started") + probes.value("discarded_in_flight")
+
+        response, excluded, cache = run_quote(["Orca"])
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["debug"]["jupiter_exclude_speculation"]["outcome"], "hit")
+        self.assertEqual(excluded, ["Orca"])
+        provider_timings = response["debug"]["timings"]["providers"]
+        self.assertEqual(
+            provider_timings["exclude_recommended_dexes"],
+            provider_timings["exclude_recommended_dexes_speculative"],
+        )
+        self.assertEqual(probes.value("used"), used_before + 1)
+
+        response, excluded, cache = run_quote(["Raydium"])
+        speculation = response["debug"]["jupiter_exclude_speculation"]
+        self.assertEqual(speculation["outcome"], "miss")
+        self.assertIn(speculation["probe"], {"discarded_not_started", "discarded_in_flight"})
+        self.assertEqual(
+            probes.value("discarded_not_started") + probes.value("discarded_in_flight"), discarded_before + 1
+        )
+        # A probe that was not started is dropped; the serial retry always runs under its own timing key.
+        self.assertIn("exclude_recommended_dexes", response["debug"]["timings"]["providers"])
+        self.assertEqual(excluded[-1], "Orca")
+        self.assertLessEqual(set(excluded), {"Orca", "Raydium"})
+        self.assertEqual(cache.get(METEORA_DLMM_SOL_MINT, METEORA_DLMM_USDC_MINT, 1_000_000_000), ["Orca"])
+
+        response, excluded, _ = run_quote(None)
+        self.assertEqual(response["debug"]["jupiter_exclude_speculation"]["outcome"], "no_cached_labels")
+        self.assertEqual(excluded, ["Orca"])
+
+    def test_network_fee_service_caches_fee_shape_within_budget(self):
+        from unittest.mock import Mock
+
+        import providers.rate_limiter as rate_limiter
+        from api.network_fee import NetworkFeeService
+
+        service = NetworkFeeService()
+        fetch_fee = Mock(return_value=10000)
+
+        self.assertEqual(service.fee_for_shape("rpc", (1, 200000, 1000), fetch_fee), 10000)
+        self.assertEqual(service.fee_for_shape("rpc", (1, 200000, 1000), fetch_fee), 10000)
+        self.assertEqual(service.fee_for_shape("rpc", (1, 200000, None), Mock(return_value=None)), None)
+        self.assertEqual(fetch_fee.call_count, 1)
+
+        # The budget is the upstream limiter's network_fee bucket at background
+        # priority: half of a 4-token burst stays in reserve, and it never waits.
+        # It applies with the global limiter off (the default) too.
+        saved = rate_limiter._UPSTREAM_LIMITER
+        try:
+            rate_limiter._UPSTREAM_LIMITER = None
+            env = {"UPSTREAM_RATE_LIMITER": "0", "UPSTREAM_RATE_LIMITS": "network_fee=0.001:4"}
+            with patch.dict(os.environ, env):
+                self.assertTrue(service.try_acquire_budget())
+                self.assertTrue(service.try_acquire_budget())
+                self.assertFalse(service.try_acquire_budget())
+                decisions = rate_limiter.get_upstream_rate_limiter().snapshot()["decisions"]
+        finally:
+            rate_limiter._UPSTREAM_LIMITER = saved
+        self.assertEqual(service.stats()["budget_rejections"], 1)
+        self.assertIn(
+            {"upstream": "network_fee", "priority": "background", "outcome": "shed", "count": 1},
+            decisions,
+        )
+
+    def test_network_fee_estimate_prices_compiled_message_and_reuses_cache(self):
+        from api.chain_head import ChainHeadTracker
+        from api.main import _estimate_swap_network_fee_lamports, _fetch_chain_head
+        from api.network_fee import NetworkFeeService
+
+        payer = "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"
+        set_limit = base64.b64encode(bytes([2]) + (200_000).to_bytes(4, "little")).decode()
+        set_price = base64.b64encode(bytes([3]) + (5_000).to_bytes(8, "little")).decode()
+        instructions = {
+            "computeBudgetInstructions": [
+                {"programId": "ComputeBudget111111111111111111111111111111", "accounts": [], "data": set_limit},
+                {"programId": "ComputeBudget111111111111111111111111111111", "accounts": [], "data": set_price},
+            ],
+            "setupInstructions": [],
+            "swapInstruction": {
+                "programId": "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+                "accounts": [
+                    {"pubkey": payer, "isSigner": True, "isWritable": True},
+                    {"pubkey": METEORA_DLMM_USDC_MINT, "isSigner": False, "isWritable": False},
+                ],
+                "data": base64.b64encode(b"swap").decode(),
+            },
+            "cleanupInstruction": None,
+        }
+        rpc_calls = []
+
+        def fake_rpc(rpc_url, method, params=None):
+            rpc_calls.append((method, params))
+            if method == "getLatestBlockhash":
+                return {"result": {"value": {"blockhash": "11111111111111111111111111111111"}}}
+            if method == "getFeeForMessage":
+                return {"result": {"value": 6000}}
+            raise AssertionError(method)
+
+        with (
+            patch("api.main.get_network_fee_service", return_value=NetworkFeeService()),
+            patch("api.main.get_chain_head_tracker", return_value=ChainHeadTracker(_fetch_chain_head, background=False)),
+            patch("api.main._fetch_jupiter_swap_instructions", return_value=instructions) as fetch_ix,
+            patch("api.main._solana_rpc_call", side_effect=fake_rpc),
+        ):
+            first = _estimate_swap_network_fee_lamports(
+                quote_response={"outAmount": "1"}, user_public_key=payer, rpc_url="rpc"
+            )
+            second = _estimate_swap_network_fee_lamports(
+                quote_response={"outAmount": "2"}, user_public_key=payer, rpc_url="rpc"
+            )
+
+        self.assertEqual(first["lamports"], 6000)
+        self.assertEqual(first["scope"], "solana_fee_for_message_estimate")
+        self.assertEqual(second["lamports"], 6000)
+        self.assertEqual(fetch_ix.call_count, 2)
+        self.assertEqual([method for method, _ in rpc_calls], ["getLatestBlockhash", "getFeeForMessage"])
+
+        message = base64.b64decode(rpc_calls[1][1][0])
+        # header: one writable signer, no readonly signers, two readonly unsigned (programs + mint)
+        self.assertEqual(list(message[:3]), [1, 0, 3])
+        self.assertEqual(message[3], 4)
+
+    def test_chain_constants_cache_refreshes_on_new_epoch_and_serves_stale_on_failure(self):
+        from api.chain_constants import ChainConstantsCache
+
+        cache = ChainConstantsCache(epoch_info_ttl_seconds=0)
+        epochs = iter([{"epoch": 700}, {"epoch": 700}, {"epoch": 701}, {"epoch": 701}])
+        values = iter([2_039_280, 2_100_000, None])
+
+        def epoch_fetch():
+            return next(epochs)
+
+        def fetch():
+            return next(values)
+
+        self.assertEqual(cache.get("rpc", "rent", fetch, epoch_fetch=epoch_fetch), (2_039_280, "fetched"))
+        self.assertEqual(cache.get("rpc", "rent", fetch, epoch_fetch=epoch_fetch), (2_039_280, "cached"))
+        self.assertEqual(cache.get("rpc", "rent", fetch, epoch_fetch=epoch_fetch), (2_100_000, "fetched"))
+
+        cache.ttl_seconds = 0
+        self.assertEqual(cache.get("rpc", "rent", fetch, epoch_fetch=epoch_fetch), (2_100_000, "stale"))
+        self.assertEqual(cache.get("other-rpc", "rent", lambda: None), (None, None))
+
+    def test_fetch_solana_rent_exempt_lamports_uses_chain_constants_cache(self):
+        from api.chain_constants import ChainConstantsCache
+        from api.main import _fetch_solana_rent_exempt_lamports
+
+        with (
+            patch("api.main.get_chain_constants_cache", return_value=ChainConstantsCache()),
+            patch("api.main._request_solana_rent_exempt_lamports", return_value=2_039_280) as request_rent,
+            patch("api.main._fetch_solana_epoch_info", return_value={"epoch": 700}),
+        ):
+            first = _fetch_solana_rent_exempt_lamports("https://rpc.example")
+            second = _fetch_solana_rent_exempt_lamports("https://rpc.example")
+
+        request_rent.assert_called_once_with("https://rpc.example", 165)
+        self.assertEqual(first["cache_status"], "fetched")
+        self.assertEqual(second["cache_status"], "cached")
+        self.assertEqual(second["lamports"], 2_039_280)
+        self.assertEqual(second["source"], "rpc_getMinimumBalanceForRentExemption_165")
+
+        with (
+            patch("api.main.get_chain_constants_cache", return_value=ChainConstantsCache()),
+            patch("api.main._request_solana_rent_exempt_lamports", return_value=None),
+            patch("api.main._fetch_solana_epoch_info", return_value=None),
+        ):
+            cold = _fetch_solana_rent_exempt_lamports("https://rpc.example")
+
+        self.assertFalse(cold["ok"])
+        self.assertEqual(cold["source"], "fallback_spl_token_account_rent_exempt_lamports")
+
+    def test_swap_execute_preflight_runs_stages_concurrently_and_reports_account_balances(self):
+        import threading
+
+        payer = "EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL"
+        transaction_base64 = _test_versioned_swap_transaction_base64(payer=payer)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_simulate(**kwargs):
+            barrier.wait()
+            return {"ok": True, "message": "Preflight simulation passed.", "logs_preview": []}
+
+        def fake_rent(rpc_url, account_size=165):
+            barrier.wait()
+            return {"ok": True, "lamports": 2039280, "source": "rpc_getMinimumBalanceForRentExemption_165"}
+
+        def fake_rpc(rpc_url, method, params=None):
+            self.assertEqual(method, "getMultipleAccounts")
+            return {"result": {"value": [{"lamports": 5_000_000, "owner": "11111111111111111111111111111111"}] + [None] * (len(params[0]) - 1)}}
+
+        with (
+            patch.dict(os.environ, {"SWAP_PREPARE_RPC_URL": "https://rpc.example"}, clear=True),
+            patch("api.main._fetch_solana_simulate_transaction", side_effect=fake_simulate),
+            patch("api.main._fetch_solana_rent_exempt_lamports", side_effect=fake_rent),
+            patch("api.main._solana_rpc_call", side_effect=fake_rpc),
+        ):
+            result = swap_execute_preflight({
+                "network": "solana",
+                "provider": "orca-whirlpool",
+                "transaction_base64": transaction_base64,
+                "user_public_key": payer,
+                "include_account_balances": True,
+            })
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["setup_cost_estimate_lamports"], 2039280)
+        accounts = result["account_balances"]["accounts"]
+        self.assertEqual(accounts[0], {
+            "pubkey": payer,
+            "exists": True,
+            "lamports": 5_000_000,
+            "owner": "11111111111111111111111111111111",
+        })
+        self.assertNotIn("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", [item["pubkey"] for item in accounts])
+        self.assertEqual(
+            set(result["preflight_timings_ms"]),
+            {"decode", "simulate", "setup_cost", "account_balances", "total"},
+        )
+
+    def test_solana_tx_base58_codec_matches_reference_and_rejects_bad_input(self):
+        from api.solana_tx import b58decode, b58encode, decode_pubkey, encode_pubkey
+
+        samples = [
+            "11111111111111111111111111111111",
+            "So11111111111111111111111111111111111111112",
+            "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+            "3yr17ZEE6wvCG7e3qD51XsfeSoSSKuCKptVissoopump",
+        ]
+        for value in samples:
+            raw = _test_base58_decode(value)
+            self.assertEqual(b58decode(value), raw)
+            self.assertEqual(b58encode(raw), value)
+            self.assertEqual(encode_pubkey(raw), value)
+            self.assertEqual(decode_pubkey(value), raw)
+        self.assertEqual(b58encode(b"\x00\x00\x01"), "112")
+        self.assertEqual(b58encode(b""), "")
+        for bad in ["0OIl", "", "abcé"]:
+            with self.assertRaises(ValueError):
+                b58decode(bad)
+
+    def test_decode_solana_transaction_diagnostics_resolves_v0_address_table_lookups(self):
+        from api.solana_tx import SolanaTransactionView
+
+        payer = "EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL"
+        table = "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"
+        account_keys = [
+            payer,
+            "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL",
+            "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+            "11111111111111111111111111111111",
+        ]
+        message = bytearray([0x80, 1, 0, 3])
+        message += _test_shortvec(len(account_keys))
+        for key in account_keys:
+            message += _test_pubkey_bytes(key)
+        message += bytes(32)
+        message += _test_shortvec(1)
+        message += _test_compiled_instruction(1, [0, 4, 0, 5, 3, 2])
+        message += _test_shortvec(1)
+        message += _test_pubkey_bytes(table) + _test_shortvec(1) + bytes([3]) + _test_shortvec(1) + bytes([5])
+        transaction_base64 = base64.b64encode(_test_shortvec(1) + bytes(64) + bytes(message)).decode("ascii")
+
+        unresolved = _decode_solana_transaction_diagnostics(transaction_base64, expected_user_public_key=payer)
+        self.assertTrue(unresolved["decode_ok"])
+        self.assertEqual(unresolved["transaction_version"], "v0")
+        self.assertEqual(unresolved["loaded_account_count"], 2)
+        self.assertEqual(
+            unresolved["address_table_lookups"],
+            [{"account_key": table, "writable_count": 1, "readonly_count": 1}],
+        )
+        self.assertEqual(unresolved["ata_create_details"][0]["ata_account"], "loaded_address_index:4")
+        self.assertTrue(unresolved["expected_user_account_present"])
+        self.assertFalse(unresolved["loaded_address_resolution_available"])
+
+        table_addresses = [f"table-address-{index}" for index in range(6)]
+        resolved = _decode_solana_transaction_diagnostics(
+            transaction_base64,
+            expected_user_public_key=payer,
+            lookup_table_addresses={table: table_addresses},
+        )
+        self.assertEqual(resolved["ata_create_details"][0]["ata_account"], "table-address-3")
+        self.assertEqual(resolved["ata_create_details"][0]["mint"], "table-address-5")
+        self.assertTrue(resolved["loaded_address_resolution_available"])
+
+        view = SolanaTransactionView.from_base64(transaction_base64)
+        self.assertEqual([view.is_writable(index) for index in range(6)], [True, False, False, False, True, False])
+        self.assertEqual(view.writable_static_account_keys(), [payer])
+
+    def test_solana_pda_on_curve_check_matches_reference_and_ata_batch_is_memoized(self):
+        import hashlib
+
+        from api.solana_pda import (
+            clear_pda_cache,
+            derive_associated_token_accounts,
+            ed25519_is_on_curve,
+            pda_cache_info,
+        )
+
+        def reference_is_on_curve(compressed: bytes) -> bool:
+            p = 2**255 - 19
+            y = int.from_bytes(compressed, "little") & ((1 << 255) - 1)
+            if y >= p:
+                return False
+            y2 = (y * y) % p
+            d = (-121665 * pow(121666, p - 2, p)) % p
+            v = (d * y2 + 1) % p
+            if v == 0:
+                return False
+            x2 = ((y2 - 1) * pow(v, p - 2, p)) % p
+            return pow(x2, (p - 1) // 2, p) == 1 or x2 == 0
+
+        for i in range(200):
+            digest = hashlib.sha256(i.to_bytes(2, "little")).digest()
+            self.assertEqual(ed25519_is_on_curve(digest), reference_is_on_curve(digest))
+        self.assertTrue(ed25519_is_on_curve((1).to_bytes(32, "little")))
+
+        owner = "EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL"
+        clear_pda_cache()
+        accounts = derive_associated_token_accounts([
+            (owner, METEORA_DLMM_USDC_MINT),
+            (owner, METEORA_DLMM_SOL_MINT),
+            (owner, METEORA_DLMM_USDC_MINT),
+        ])
+        self.assertEqual(len(accounts), 2)
+        self.assertEqual(accounts[(owner, METEORA_DLMM_USDC_MINT)], "GwWhFWPZm8hxqksYzRv5FYoZsVGYgTuYS6uRkodqEDcV")
+
+        _raydium_prepare_token_accounts(
+            input_mint=METEORA_DLMM_USDC_MINT,
+            output_mint=METEORA_DLMM_SOL_MINT,
+            user_public_key=owner,
+        )
+        info = pda_cache_info()
+        self.assertEqual(info["pda"]["misses"], 2)
+        self.assertGreaterEqual(info["ata"]["hits"], 1)
+
+    def test_signature_watcher_batches_pending_signatures_and_pushes_changes(self):
+        from api.signature_watcher import SignatureWatcher
+
+        calls = []
+
+        def fetch(signatures, rpc_url):
+            calls.append((rpc_url, list(signatures)))
+            return {
+                signature: {"confirmation_status": "confirmed", "confirmed": True, "err": None}
+                if signature == "sig0"
+                else {"confirmation_status": "processed", "confirmed": False, "err": None}
+                for signature in signatures
+            }
+
+        watcher = SignatureWatcher(fetch, min_interval_seconds=0.1, max_interval_seconds=1.0, backoff_factor=2)
+        for index in range(300):
+            watcher.register(f"sig{index}", "https://rpc.example", start=False)
+        watcher.register("other", "https://rpc2.example", start=False)
+        subscriber = watcher.subscribe("sig0")
+
+        self.assertEqual(watcher.tick(), 3)
+        self.assertEqual(sorted(len(signatures) for _url, signatures in calls), [1, 44, 256])
+        self.assertEqual(subscriber.get_nowait()["state"], "confirmed")
+        self.assertEqual(watcher.snapshot("sig0")["state"], "confirmed")
+        self.assertEqual(watcher.snapshot("sig1")["confirmation_status"], "processed")
+        self.assertEqual(watcher.interval_seconds, 0.1)
+
+        calls.clear()
+        watcher.tick()
+        # Confirmed is not settled: sig0 keeps being polled until it finalizes.
+        self.assertIn("sig0", [signature for _url, signatures in calls for signature in signatures])
+        self.assertEqual(watcher.interval_seconds, 0.2)
+        watcher.tick()
+        self.assertEqual(watcher.interval_seconds, 0.4)
+        self.assertTrue(subscriber.empty())
+
+    def test_swap_transaction_status_serves_repeat_polls_from_signature_watcher(self):
+        from api.signature_watcher import SignatureWatcher
+
+        watcher = SignatureWatcher(lambda signatures, rpc_url: {})
+        pending = {
+            "ok": True,
+            "signature": "sig123",
+            "confirmation_status": "processed",
+            "confirmations": 0,
+            "confirmed": False,
+            "finalized": False,
+            "err": None,
+        }
+        with (
+            patch.dict(os.environ, {"SWAP_SUBMIT_RPC_URL": "https://rpc.example"}, clear=True),
+            patch("api.main.get_signature_watcher", return_value=watcher),
+            patch("api.main._fetch_solana_signature_status", return_value=pending) as status,
+            patch.object(watcher, "_ensure_thread_locked"),
+        ):
+            first = swap_transaction_status("sig123")
+            second = swap_transaction_status("sig123")
+
+        self.assertEqual(status.call_count, 1)
+        self.assertEqual(first["confirmation_status"], "processed")
+        self.assertEqual(second["confirmation_status"], "processed")
+        self.assertFalse(second["confirmed"])
+        self.assertEqual(watcher.stats()["pending"], 1)
+
+    def test_chain_head_tracker_reads_through_and_refreshes_in_background(self):
+        import threading
+
+        from api.chain_head import ChainHeadTracker
+
+        slots = iter(range(100, 200))
+        refreshed = threading.Event()
+
+        def fetch_head(rpc_url):
+            slot = next(slots)
+            if slot >= 102:
+                refreshed.set()
+            return {"blockhash": f"hash-{slot}", "last_valid_block_height": slot + 150, "slot": slot}
+
+        tracker = ChainHeadTracker(fetch_head, background=False)
+        self.assertIsNone(tracker.peek("rpc"))
+        first = tracker.head("rpc")
+        self.assertEqual(first["blockhash"], "hash-100")
+        self.assertEqual(first["last_valid_block_height"], 250)
+        self.assertIn("blockhash_age_ms", first)
+        self.assertEqual(tracker.head("rpc")["slot"], 100)
+        tracker.invalidate("rpc")
+        self.assertEqual(tracker.head("rpc")["slot"], 101)
+        self.assertEqual(tracker.stats()["misses"], 2)
+
+        background = ChainHeadTracker(fetch_head, refresh_seconds=0.01, background=True)
+        try:
+            background.peek("rpc")
+            self.assertTrue(refreshed.wait(2))
+            self.assertGreaterEqual(background.peek("rpc")["slot"], 102)
+        finally:
+            background.stop()
+
+    def test_fetch_orca_whirlpool_swap_transaction_reuses_tracked_blockhash(self):
+        from api.chain_head import ChainHeadTracker
+
+        captured = {}
+        fetched = []
+
+        def fetch_head(rpc_url):
+            fetched.append(rpc_url)
+            return {"blockhash": "11111111111111111111111111111111", "last_valid_block_height": 900, "slot": 750}
+
+        # Nothing tracked yet and no background refresh: prepare reads through the tracker.
+        tracker = ChainHeadTracker(fetch_head, background=False)
+
+        def fake_run(*args, **kwargs):
+            captured.update(json.loads(kwargs["input"]))
+            return self._fake_subprocess_result({"ok": True, "transaction_base64": "orca-base64tx"})
+
+        with (
+            patch.dict(os.environ, {"SWAP_PREPARE_RPC_URL": "https://rpc.example"}, clear=True),
+            patch("api.main.get_chain_head_tracker", return_value=tracker),
+            patch("pathlib.Path.exists", return_value=True),
+            patch("subprocess.run", side_effect=fake_run),
+        ):
+            result = _fetch_orca_whirlpool_swap_transaction(
+                quote_response={"ok": True},
+                user_public_key="EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL",
+            )
+            again = _fetch_orca_whirlpool_swap_transaction(
+                quote_response={"ok": True},
+                user_public_key="EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL",
+            )
+
+        self.assertTrue(result["ok"])
+        self.assertTrue(again["ok"])
+        self.assertEqual(fetched, ["https://rpc.example"])
+        self.assertEqual(captured["recent_blockhash"], "11111111111111111111111111111111")
+        self.assertEqual(captured["last_valid_block_height"], 900)
+        self.assertEqual(result["chain_head"]["slot"], 750)
+        self.assertGreaterEqual(result["chain_head"]["blockhash_age_ms"], 0)
+
+    def test_solana_rpc_pool_fails_over_on_rate_limit_and_hedges_slow_endpoints(self):
+        import threading
+
+        from providers.solana_rpc_pool import SolanaRpcPool
+
+        pool = SolanaRpcPool()
+        calls = []
+
+        def rate_limited_primary(url):
+            calls.append(url)
+            if url == "https://primary.example":
+                return {"ok": False, "error": {"code": "SWAP_STATUS_RATE_LIMITED", "status_code": 429}}
+            return {"ok": True, "url": url}
+
+        with patch.dict(os.environ, {"SOLANA_RPC_POOL_URLS": "https://backup.example, https://primary.example"}):
+            self.assertEqual(pool.urls("https://primary.example"), ["https://primary.example", "https://backup.example"])
+            self.assertEqual(pool.call("https://primary.example", rate_limited_primary)["url"], "https://backup.example")
+            # The 429 puts the primary on cooldown, so the next call starts at the backup.
+            self.assertEqual(pool.urls("https://primary.example")[0], "https://backup.example")
+            pool.call("https://primary.example", rate_limited_primary)
+            self.assertEqual(calls, ["https://primary.example", "https://backup.example", "https://backup.example"])
+
+            release = threading.Event()
+
+            def slow_backup(url):
+                if url == "https://backup.example":
+                    release.wait(5)
+                return {"ok": True, "url": url}
+
+            try:
+                result = pool.call("https://primary.example", slow_backup, hedge=True)
+            finally:
+                release.set()
+            self.assertEqual(result["url"], "https://primary.example")
+            self.assertEqual(pool.hedges, 1)
+            self.assertNotIn("example", json.dumps(pool.stats("https://primary.example")))
+
+    def test_swap_execute_submit_fans_out_to_rpc_pool_when_enabled(self):
+        from providers.solana_rpc_pool import SolanaRpcPool
+
+        def send(*, signed_transaction_base64, rpc_url, skip_preflight, preflight_commitment):
+            if rpc_url == "https://submit.example":
+                return {"ok": False, "error": {"code": "SWAP_SUBMIT_RATE_LIMITED", "status_code": 429}}
+            return {"ok": True, "signature": "sig-" + rpc_url.split("//")[1], "status": "submitted"}
+
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "SWAP_SUBMIT_RPC_URL": "https://submit.example",
+                    "SOLANA_RPC_POOL_URLS": "https://pool-a.example",
+                    "SWAP_SUBMIT_FAN_OUT": "1",
+                },
+                clear=True,
+            ),
+            patch("api.main.get_solana_rpc_pool", return_value=SolanaRpcPool()),
+            patch("api.main._fetch_solana_send_transaction", side_effect=send) as fetch_send,
+        ):
+            result = swap_execute_submit({"network": "solana", "signed_transaction_base64": "AQID"})
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["signature"], "sig-pool-a.example")
+        self.assertEqual(result["rpc"]["fan_out_endpoints"], 2)
+        self.assertEqual(result["rpc"]["source"], "SWAP_SUBMIT_RPC_URL")
+        self.assertEqual(fetch_send.call_count, 2)
+
+    def test_token_index_matches_registry_scan_and_reloads_on_registry_change(self):
+        from token_registry import get_token_index, get_token_meta_by_symbol, reload_token_index
+
+        index = get_token_index()
+        for mint, meta in TOKENS.items():
+            self.assertIs(index.by_mint(mint), index.by_mint(mint.lower(), case_sensitive=False))
+            self.assertEqual(index.resolve(f"spl:{mint.lower()}")["mint"], mint)
+            if meta.get("asset"):
+                self.assertEqual(index.by_asset(meta["asset"].upper())["mint"], mint)
+        self.assertEqual(index.by_symbol("sol")["mint"], NATIVE_TOKENS["SOL"]["mint"])
+        self.assertEqual(index.by_spl_alias(f"SPL:{USDC_MINT}")["symbol"], "USDC")
+        with self.assertRaises(TypeError):
+            index.by_symbol("USDC")["symbol"] = "FAKE"
+
+        new_mint = "NewMint1111111111111111111111111111111111111"
+        with patch.dict(TOKENS, {new_mint: {"asset": "newt", "symbol": "NEWT", "mint": new_mint, "decimals": 6}}):
+            self.assertEqual(resolve_token("newt")["token"]["mint"], new_mint)
+            self.assertEqual(get_token_meta_by_symbol("NEWT", default_enabled_only=False)["decimals"], 6)
+            TOKENS[new_mint]["decimals"] = 9
+            self.assertEqual(get_token_index().by_mint(new_mint)["decimals"], 6)
+            self.assertEqual(reload_token_index().by_mint(new_mint)["decimals"], 9)
+        self.assertIsNone(get_token_index().by_mint(new_mint))
+        self.assertEqual(resolve_token("USDC")["token"]["mint"], USDC_MINT)
+
+    def test_external_token_cache_serves_fresh_refetches_stale_and_remembers_not_found(self):
+        import copy
+        import providers.token_metadata_cache as token_metadata_cache
+
+        unknown_mint = "11111111111111111111111111111112"
+        missing_mint = "11111111111111111111111111111113"
+        external_token = {
+            "source": "dexscreener",
+            "symbol": "EXT",
+            "name": "External Token",
+            "display_name": "External Token",
+            "mint": unknown_mint,
+            "decimals": None,
+            "logo_uri": "https://example.invalid/logo.png",
+            "tags": ["external", "dexscreener"],
+            "price_usd": 0.001,
+            "warnings": ["external_metadata_unverified", "decimals_unresolved"],
+        }
+
+        def fetch_external(mint):
+            if mint == missing_mint:
+                return {"ok": False, "error": {"code": "TOKEN_METADATA_NOT_FOUND", "mint": mint}}
+            return {"ok": True, "token": copy.deepcopy(external_token)}
+
+        env = {
+            "EXTERNAL_TOKEN_CACHE": "1",
+            "EXTERNAL_TOKEN_CACHE_DB_PATH": str(self.db_path),
+            "EXTERNAL_TOKEN_CACHE_REFRESH_SECONDS": "",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch.object(token_metadata_cache, "_CACHE", None),
+            patch("providers.token_resolver.fetch_dexscreener_token_metadata", side_effect=fetch_external) as fetch_dexscreener,
+            patch(
+                "providers.token_resolver.fetch_solana_mint_decimals",
+                return_value={"ok": True, "decimals": 6, "source": "solana_rpc", "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"},
+            ) as fetch_decimals,
+        ):
+            first = resolve_token(unknown_mint)
+            second = resolve_token(unknown_mint)
+            self.assertEqual(fetch_dexscreener.call_count, 1)
+            self.assertEqual(first["cache"]["state"], "miss")
+            self.assertEqual(second["cache"]["state"], "fresh")
+            self.assertEqual(second["token"]["decimals"], 6)
+            self.assertEqual(second["token"]["mint_account_owner"], "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+            self.assertNotIn("decimals_unresolved", second["token"]["warnings"])
+
+            cache = token_metadata_cache.get_external_token_cache()
+            cache.volatile_ttl_seconds = 0
+            external_token["price_usd"] = 0.002
+            stale = resolve_token(unknown_mint)
+            self.assertEqual(stale["cache"]["state"], "stale")
+            self.assertEqual(stale["token"]["price_usd"], 0.002)
+            self.assertEqual(stale["token"]["decimals"], 6)
+            self.assertEqual(fetch_dexscreener.call_count, 2)
+            fetch_decimals.assert_called_once_with(unknown_mint)
+
+            self.assertFalse(resolve_token(missing_mint)["ok"])
+            negative = resolve_token(missing_mint)
+            self.assertEqual(negative["error"]["code"], "TOKEN_METADATA_NOT_FOUND")
+            self.assertEqual(negative["cache"]["state"], "not_found")
+            self.assertEqual(fetch_dexscreener.call_count, 3)
+            self.assertEqual(cache.stats()["negative_hits"], 1)
+
+    def test_external_token_cache_refreshes_popular_mints_only(self):
+        from providers.token_metadata_cache import ExternalTokenMetadataCache
+
+        cache = ExternalTokenMetadataCache(self.db_path, popular_min_hits=2)
+        refreshed = []
+
+        def refresher(mint):
+            refreshed.append(mint)
+            return {"ok": True, "token": {"mint": mint, "symbol": "POP", "decimals": 9, "decimals_source": "solana_rpc"}}
+
+        cache.set_refresher(refresher)
+        for _ in range(3):
+            cache.lookup("popularMint")
+        cache.lookup("rareMint")
+
+        self.assertEqual(cache.refresh_popular(), 1)
+        self.assertEqual(refreshed, ["popularMint"])
+        self.assertEqual(cache.lookup("popularMint", count_hit=False)["state"], "fresh")
+        self.assertEqual(cache.cached_decimals("popularMint")["decimals"], 9)
+        # Freshly refreshed entries are not due again.
+        self.assertEqual(cache.refresh_popular(), 0)
+
+    def test_solana_mint_decimals_batch_parses_raw_mints_per_chunk(self):
+        def mint_account(decimals, owner, *, initialized=True):
+            raw = bytearray(82)
+            raw[44] = decimals
+            raw[45] = 1 if initialized else 0
+            return {"owner": owner, "data": [base64.b64encode(bytes(raw)).decode("ascii"), "base64"]}
+
+        accounts = {
+            "11111111111111111111111111111112": mint_account(6, "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"),
+            "11111111111111111111111111111113": mint_account(9, "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"),
+            "11111111111111111111111111111114": mint_account(6, "11111111111111111111111111111111"),
+            "11111111111111111111111111111115": mint_account(6, "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA", initialized=False),
+            "11111111111111111111111111111116": None,
+        }
+
+        class Response:
+            ok = True
+            status_code = 200
+
+            def __init__(self, keys):
+                self.keys = keys
+
+            def json(self):
+                return {"result": {"value": [accounts[key] for key in self.keys]}}
+
+        def post(url, json, timeout):
+            return Response(json["params"][0])
+
+        mints = list(accounts) + ["11111111111111111111111111111112", "not a mint"]
+        with patch("providers.solana_token_metadata.requests.post", side_effect=post) as rpc:
+            batch = fetch_solana_mint_decimals_batch(mints, rpc_url="https://example.invalid", batch_size=2)
+
+        results = batch["results"]
+        self.assertEqual(batch["rpc_calls"], 3)
+        self.assertEqual(rpc.call_count, 3)
+        request = rpc.call_args_list[0].kwargs["json"]
+        self.assertEqual(request["method"], "getMultipleAccounts")
+        self.assertEqual(request["params"][1]["dataSlice"], {"offset": 0, "length": 82})
+        self.assertEqual(results["11111111111111111111111111111112"]["decimals"], 6)
+        self.assertEqual(results["11111111111111111111111111111112"]["token_program"], "spl-token")
+        self.assertEqual(results["11111111111111111111111111111113"]["decimals"], 9)
+        self.assertEqual(results["11111111111111111111111111111113"]["token_program"], "spl-token-2022")
+        for mint in ("11111111111111111111111111111114", "11111111111111111111111111111115", "11111111111111111111111111111116"):
+            self.assertEqual(results[mint]["error"]["code"], "TOKEN_DECIMALS_NOT_FOUND")
+        self.assertEqual(results["not a mint"]["error"]["code"], "INVALID_SOLANA_MINT")
+
+    def test_prefetched_mint_decimals_skip_per_mint_rpc_in_resolver(self):
+        unknown_mint = "11111111111111111111111111111112"
+        batch = {
+            "ok": True,
+            "rpc_calls": 1,
+            "results": {
+                unknown_mint: {
+                    "ok": True,
+                    "decimals": 5,
+                    "source": "solana_rpc_mint_account",
+                    "owner": "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",
+                    "token_program": "spl-token-2022",
+                },
+            },
+        }
+        external = {
+            "ok": True,
+            "token": {
+                "source": "dexscreener",
+                "symbol": "EXT",
+                "mint": unknown_mint,
+                "decimals": None,
+                "warnings": ["external_metadata_unverified", "decimals_unresolved"],
+            },
+        }
+        with (
+            patch("providers.token_resolver.fetch_solana_mint_decimals_batch", return_value=batch) as fetch_batch,
+            patch("providers.token_resolver.fetch_dexscreener_token_metadata", return_value=external),
+            patch("providers.token_resolver.fetch_solana_mint_decimals") as fetch_single,
+        ):
+            known = prefetch_mint_decimals([unknown_mint, "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm", unknown_mint])
+            result = resolve_token(unknown_mint, known_decimals=known)
+
+        fetch_batch.assert_called_once_with([unknown_mint], None)
+        fetch_single.assert_not_called()
+        self.assertEqual(result["token"]["decimals"], 5)
+        self.assertEqual(result["token"]["token_program"], "spl-token-2022")
+        self.assertNotIn("decimals_unresolved", result["token"]["warnings"])
+
+    def test_token_holder_concentration_shared_cache_serves_other_workers(self):
+        import providers.token_holder_concentration as holder_module
+
+        class RateLimitHttpResponse:
+            ok = False
+            status_code = 429
+            text = "Too many requests"
+
+        env = {
+            "TOKEN_HOLDER_CONCENTRATION_RPC_URL": "https://holder.example",
+            "HOLDER_CONCENTRATION_SHARED_CACHE": "1",
+            "HOLDER_CONCENTRATION_CACHE_DB_PATH": str(self.db_path),
+        }
+        with (
+            patch.dict(os.environ, env, clear=True),
+            patch.object(holder_module._HOLDER_CONCENTRATION_CACHE, "shared", None),
+            patch("providers.token_holder_concentration.requests.post", return_value=RateLimitHttpResponse()) as post,
+        ):
+            clear_holder_concentration_cache()
+            first = fetch_token_holder_concentration("mint")
+            # A second worker starts with an empty memory tier.
+            holder_module._HOLDER_CONCENTRATION_CACHE.memory.clear()
+            second = fetch_token_holder_concentration("mint")
+            second["diagnostics"]["mutated"] = True
+            third = fetch_token_holder_concentration("mint")
+            stats = holder_module.get_holder_concentration_cache_stats()
+            clear_holder_concentration_cache()
+
+        self.assertEqual(post.call_count, 1)
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["error"]["code"], "TOKEN_HOLDER_CONCENTRATION_RATE_LIMITED")
+        self.assertNotIn("mutated", third["diagnostics"])
+        self.assertEqual(stats["shared_hits"], 1)
+        self.assertGreaterEqual(stats["memory_hits"], 1)
+
+    def test_memory_lru_cache_evicts_least_recent_and_expired_entries(self):
+        from providers.result_cache import MemoryLruCache
+
+        cache = MemoryLruCache(max_entries=2)
+        cache.set("a", {"stored_at": 0, "expires_at": 100, "result": {"v": "a"}})
+        cache.set("b", {"stored_at": 0, "expires_at": 100, "result": {"v": "b"}})
+        self.assertIsNotNone(cache.get("a", 1))
+        cache.set("c", {"stored_at": 0, "expires_at": 5, "result": {"v": "c"}})
+
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(cache.get("a", 1)["result"], {"v": "a"})
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get("c", 5))
+        self.assertEqual(len(cache), 1)
+
+    def test_token_holder_concentration_batch_sends_one_json_rpc_batch(self):
+        from providers.token_holder_concentration import fetch_token_holder_concentration_batch
+
+        largest = [{"address": f"acct{i}", "amount": str(amount)} for i, amount in enumerate([50, 20, 10, 5, 5, 4, 3, 1, 1, 1, 1])]
+
+        class BatchResponse:
+            ok = True
+            status_code = 200
+            text = ""
+
+            def __init__(self, payload):
+                self.payload = payload
+
+            def json(self):
+                out = []
+                for request in self.payload:
+                    mint = request["params"][0]
+                    if mint == "missing":
+                        out.append({"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32602, "message": "Invalid param"}})
+                    elif request["method"] == "getTokenSupply":
+                        out.append({"jsonrpc": "2.0", "id": request["id"], "result": {"value": {"amount": "1000"}}})
+                    else:
+                        out.append({"jsonrpc": "2.0", "id": request["id"], "result": {"value": largest}})
+                return list(reversed(out))
+
+        with patch(
+            "providers.token_holder_concentration.requests.post",
+            side_effect=lambda url, json, timeout: BatchResponse(json),
+        ) as post:
+            batch = fetch_token_holder_concentration_batch(["mintA", "missing", "mintA"], rpc_url="https://rpc.example")
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(len(post.call_args.kwargs["json"]), 4)
+        self.assertEqual(batch["mints"], ["mintA", "missing"])
+        summary = batch["results"]["mintA"]["summary"]
+        self.assertEqual(summary["top_account_pct"], 5.0)
+        self.assertEqual(summary["top_3_accounts_pct"], 8.0)
+        self.assertEqual(summary["top_10_accounts_pct"], 10.0)
+        self.assertEqual(summary["concentration_level"], "high")
+        missing = batch["results"]["missing"]
+        self.assertFalse(missing["ok"])
+        self.assertEqual(missing["error"]["code"], "TOKEN_SUPPLY_LOOKUP_FAILED")
+        self.assertEqual(missing["links"]["bubblemaps"], build_bubblemaps_url("missing"))
+        self.assertEqual(batch["diagnostics"]["batch_requests"], 1)
+
+    def test_token_holder_concentration_batch_falls_back_when_batches_unsupported(self):
+        from providers.token_holder_concentration import fetch_token_holder_concentration_batch
+
+        class Response:
+            ok = True
+            status_code = 200
+            text = ""
+
+            def __init__(self, payload):
+                self.payload = payload
+
+            def json(self):
+                if isinstance(self.payload, list):
+                    return {"jsonrpc": "2.0", "error": {"code": -32600, "message": "batch requests are disabled"}}
+                if self.payload["method"] == "getTokenSupply":
+                    return {"jsonrpc": "2.0", "id": 1, "result": {"value": {"amount": "100"}}}
+                return {"jsonrpc": "2.0", "id": 1, "result": {"value": [{"address": "a", "amount": "2"}]}}
+
+        with patch(
+            "providers.token_holder_concentration.requests.post",
+            side_effect=lambda url, json, timeout: Response(json),
+        ) as post:
+            batch = fetch_token_holder_concentration_batch(["mintA"], rpc_url="https://rpc.example")
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(batch["diagnostics"]["fallback_mints"], 1)
+        self.assertEqual(batch["results"]["mintA"]["summary"]["top_account_pct"], 2.0)
+
+    def test_ui_is_served_as_hashed_compressed_assets_with_etags(self):
+        import gzip
+        from starlette.requests import Request
+        from api.main import ui, ui_asset
+
+        def request(**headers):
+            return Request({
+                "type": "http",
+                "method": "GET",
+                "path": "/ui",
+                "headers": [(key.replace("_", "-").encode(), value.encode()) for key, value in headers.items()],
+            })
+
+        shell = ui(request(accept_encoding="gzip, deflate"))
+        self.assertEqual(shell.headers["content-encoding"], "gzip")
+        self.assertEqual(shell.headers["cache-control"], "no-cache")
+        self.assertEqual(shell.headers["vary"], "Accept-Encoding")
+        html = gzip.decompress(shell.body).decode("utf-8")
+        self.assertNotIn("<style>", html)
+        self.assertNotIn("<script>", html)
+        self.assertIn('id="holderConcentrationCard"', html)
+
+        js_name = html.split('<script src="/ui/assets/', 1)[1].split('"', 1)[0]
+        css_name = html.split('<link rel="stylesheet" href="/ui/assets/', 1)[1].split('"', 1)[0]
+        self.assertRegex(js_name, r"^app\.[0-9a-f]{16}\.js$")
+        self.assertRegex(css_name, r"^app\.[0-9a-f]{16}\.css$")
+
+        js = ui_asset(js_name, request())
+        self.assertEqual(js.headers["cache-control"], "public, max-age=31536000, immutable")
+        self.assertNotIn("content-encoding", js.headers)
+        self.assertIn("async function runHolderConcentration()", js.body.decode("utf-8"))
+        self.assertIn("--bg-primary", ui_asset(css_name, request()).body.decode("utf-8"))
+
+        not_modified = ui_asset(js_name, request(if_none_match=js.headers["etag"]))
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.body, b"")
+        self.assertEqual(ui(request(accept_encoding="gzip", if_none_match=shell.headers["etag"])).status_code, 304)
+        self.assertEqual(ui_asset(js_name, request(accept_encoding="gzip", if_none_match=js.headers["etag"])).status_code, 200)
+
+        with self.assertRaises(HTTPException) as missing:
+            ui_asset("app.0000000000000000.js", request())
+        self.assertEqual(missing.exception.status_code, 404)
+
+    def test_api_main_import_time_budget_keeps_ui_lazy(self):
+        import sys
+
+        from tools.import_time_budget import measure, parse_importtime, summarize
+
+        rows = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   db\n"
+            "import time:       900 |        900 |   api.ui_page\n"
+            "import time:      5000 |       6020 | api.main\n"
+        )
+        sample = summarize(rows, repo_budget_ms=5.0)
+        self.assertEqual(sample["repo_self_ms"], 6.0)
+        self.assertEqual(sample["eager_lazy_modules"], ["api.ui_page"])
+        self.assertFalse(sample["ok"])
+
+        # Timings are left to the CLI; a loaded CI box would make them flaky.
+        self.assertEqual(summarize(measure("api.main"))["eager_lazy_modules"], [])
+        decoder_modules = {row["module"] for row in measure("tools.solana_tx_decode_benchmark")}
+        self.assertIn("api.solana_tx", decoder_modules)
+        self.assertNotIn("api.main", decoder_modules)
+        self.assertNotIn("fastapi", decoder_modules)
+
+        # TOKEN_META is built on first use, not at import.
+        lazy_meta = subprocess.run(
+            [sys.executable, "-c", "import api.main as m; print(m._TOKEN_META is None, bool(m.TOKEN_META_BY_MINT))"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(lazy_meta.stdout.split(), ["True", "True"])
+
+    def test_quote_provider_registry_disables_providers_from_env_but_keeps_jupiter(self):
+        from api.main import QUOTE_PROVIDERS, swap_quote_providers
+
+        with patch.dict(os.environ, {"SWAP_QUOTE_PROVIDERS_DISABLED": "phoenix-clob, phantom_quote, jupiter-metis"}):
+            enabled = [provider.variant_id for provider in QUOTE_PROVIDERS.enabled()]
+            described = {item["variant_id"]: item for item in swap_quote_providers()["providers"]}
+
+        self.assertEqual(
+            enabled,
+            ["recommended_default", "raydium_quote", "meteora_dlmm_quote", "orca_whirlpool_quote", "pumpswap_quote"],
+        )
+        self.assertFalse(described["phoenix_quote"]["enabled"])
+        self.assertTrue(described["recommended_default"]["enabled"])
+        self.assertTrue(described["raydium_quote"]["prepare"])
+        self.assertFalse(described["phantom_quote"]["prepare"])
+        self.assertEqual(get_swap_execution_provider("jupiter")["provider"], "jupiter-metis")
+        self.assertIsNone(get_swap_execution_provider("phoenix-clob"))
+
+        # Every hook resolves api.main.<name> at call time, so patches apply.
+        raydium = QUOTE_PROVIDERS.get("raydium_quote")
+        self.assertFalse(hasattr(raydium, "fees"))
+        with (
+            patch("api.main._raydium_quote_request_params", return_value={"patched": "build"}),
+            patch("api.main._try_fetch_raydium_quote", return_value={"ok": True, "data": {}}),
+            patch("api.main._normalize_raydium_quote_option", return_value={"patched": "normalize"}),
+            patch("api.main._prepare_raydium_swap_transaction", return_value={"patched": "prepare"}),
+        ):
+            self.assertEqual(raydium.build_payload(None), {"patched": "build"})
+            self.assertEqual(raydium.try_fetch({}), {"ok": True, "data": {}})
+            self.assertEqual(raydium.normalize(), {"patched": "normalize"})
+            self.assertEqual(raydium.prepare(), {"patched": "prepare"})
+
+    def test_swap_quote_skips_disabled_providers_without_calling_them(self):
+        unsupported = {"ok": False, "error": {"status_code": 400, "detail": "unsupported pair"}}
+        jupiter_quote = self._mock_jupiter_execution_quote()
+        with (
+            patch.dict(os.environ, {"SWAP_QUOTE_PROVIDERS_DISABLED": "phoenix-clob,phantom-routing-api"}),
+            patch("api.main._fetch_jupiter_quote", return_value=jupiter_quote),
+            patch("api.main._try_fetch_jupiter_quote", return_value=unsupported),
+            patch("api.main._try_fetch_raydium_quote", return_value=unsupported) as raydium,
+            patch("api.main._try_fetch_meteora_dlmm_quote", return_value=unsupported),
+            patch("api.main._try_fetch_orca_whirlpool_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phoenix_quote", return_value=unsupported) as phoenix,
+            patch("api.main._try_fetch_phantom_quote", return_value=unsupported) as phantom,
+            patch("api.main._try_fetch_pumpswap_quote", return_value=unsupported),
+            patch("api.main._resolve_quote_reference_prices_usd", return_value={}),
+        ):
+            response = swap_quote(from_token="SOL", to_token="USDC", amount=1.0)
+
+        raydium.assert_called_once()
+        phoenix.assert_not_called()
+        phantom.assert_not_called()
+        self.assertIn("phoenix_quote", response["summary"]["skipped_variants"])
+        self.assertIn("phantom_quote", response["summary"]["skipped_variants"])
+        self.assertEqual(
+            response["debug"]["quote_schedule"]["decisions"]["phoenix_quote"]["reason"],
+            "provider_disabled",
+        )
+        self.assertIn("raydium_quote", [item["variant_id"] for item in response["debug"]["variant_errors"]])
+
+    def test_swap_quote_reports_stage_timings_and_prometheus_metrics(self):
+        from api.main import metrics
+        from providers.metrics import get_metrics
+
+        rate_limited = {"ok": False, "error": {"status_code": 429, "detail": "Too Many Requests"}}
+        unsupported = {"ok": False, "error": {"status_code": 400, "detail": "unsupported pair"}}
+        provider_errors = get_metrics().provider_errors
+        rate_limited_before = provider_errors.value("raydium_quote", "rate_limited")
+        with (
+            patch("api.main._fetch_jupiter_quote", return_value=self._mock_jupiter_execution_quote()),
+            patch("api.main._try_fetch_jupiter_quote", return_value=unsupported),
+            patch("api.main._try_fetch_raydium_quote", return_value=rate_limited),
+            patch("api.main._try_fetch_meteora_dlmm_quote", return_value=unsupported),
+            patch("api.main._try_fetch_orca_whirlpool_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phoenix_quote", return_value=unsupported),
+            patch("api.main._try_fetch_phantom_quote", return_value=unsupported),
+            patch("api.main._try_fetch_pumpswap_quote", return_value=unsupported),
+            patch("api.main._resolve_quote_reference_prices_usd", return_value={}),
+        ):
+            response = swap_quote(from_token="SOL", to_token="USDC", amount=1.0)
+
+        timings = response["debug"]["timings"]
+        self.assertEqual(
+            list(timings["stages"]),
+            ["resolve_tokens", "providers", "rank", "reference_prices", "select", "costs_and_fees"],
+        )
+        self.assertGreaterEqual(timings["total_ms"], sum(timings["stages"].values()) - 0.1)
+        self.assertIn("raydium_quote", timings["providers"])
+        self.assertEqual(provider_errors.value("raydium_quote", "rate_limited"), rate_limited_before + 1)
+
+        body = metrics().body.decode()
+        self.assertIn("# TYPE swap_quote_provider_latency_ms histogram", body)
+        self.assertIn('swap_quote_provider_errors_total{variant="raydium_quote",failure_kind="rate_limited"}', body)
+        self.assertIn('request_stage_latency_ms_bucket{endpoint="swap_quote",stage="providers",le="+Inf"}', body)
+        self.assertIn('swap_quote_provider_latency_ms_count{variant="recommended_default",outcome="ok"}', body)
+
+    def test_sampling_profiler_counts_folded_stacks_and_runtime_switch_is_gated(self):
+        import threading
+
+        from api.main import debug_profiler_control
+        from api.profiler import SamplingProfiler
+
+        release = threading.Event()
+        worker = threading.Thread(target=release.wait, daemon=True)
+        worker.start()
+        profiler = SamplingProfiler(interval_ms=0.1)
+        self.assertEqual(profiler.interval_ms, 1.0)
+        try:
+            profiler.sample_once()
+        finally:
+            release.set()
+            worker.join()
+        snapshot = profiler.snapshot(top=50)
+        self.assertEqual(snapshot["samples"], 1)
+        self.assertFalse(snapshot["running"])
+        self.assertTrue(any("wait (threading.py:" in item["stack"] for item in snapshot["top_stacks"]))
+        self.assertIn(" 1\n", profiler.folded())
+        profiler.reset()
+        self.assertEqual(profiler.snapshot()["distinct_stacks"], 0)
+
+        with patch.dict(os.environ, {"SAMPLING_PROFILER_CONTROL": ""}):
+            denied = debug_profiler_control({"enabled": True})
+        self.assertEqual(denied.status_code, 403)
+
+
+    def test_offline_benchmark_replays_fixtures_without_network(self):
+        from tools import offline_benchmark
+
+        transport = offline_benchmark.ReplayTransport(offline_benchmark.load_fixtures(), {"node": 0.0})
+        with transport.installed():
+            with patch.dict(os.environ, {"QUOTE_OBSERVATION_LOG": "0"}):
+                result = swap_quote(from_token="SOL", to_token="USDC", amount=1.0)
+            batch = requests.post("https://rpc.offline", json=[{"jsonrpc": "2.0", "id": 7, "method": "getSlot"}]).json()
+
+        self.assertTrue(result["ok"])
+        self.assertIsNotNone(result["recommended_option"])
+        other_providers = {item.get("provider") for item in result["other_options"]}
+        self.assertIn("raydium-trade-api", other_providers)
+        self.assertEqual(batch, [{"jsonrpc": "2.0", "id": 7, "result": 348000000}])
+        self.assertEqual(dict(transport.unmatched), {})
+        self.assertGreater(transport.calls["node"], 0)
+
+    def test_offline_benchmark_compare_flags_p95_regressions(self):
+        from tools import offline_benchmark
+
+        baseline = {"scenarios": {"swap_quote": {"p50_ms": 2.0, "p95_ms": 4.0}, "decode": {"p50_ms": 1.0, "p95_ms": 1.0}}}
+        current = {
+            "scenarios": {
+                "swap_quote": {"p50_ms": 2.1, "p95_ms": 6.0},
+                "decode": {"p50_ms": 1.1, "p95_ms": 1.1},
+                "portfolio_report_100": {"p50_ms": 3.0, "p95_ms": 3.0},
+            }
+        }
+
+        comparison = offline_benchmark.compare(current, baseline, max_regression=0.25)
+
+        self.assertEqual(comparison["regressed"], ["swap_quote"])
+        statuses = {row["scenario"]: row["status"] for row in comparison["scenarios"]}
+        self.assertEqual(statuses, {"swap_quote": "regressed", "decode": "ok", "portfolio_report_100": "new"})
+        self.assertEqual(offline_benchmark.parse_latency("jupiter=120,node=250"), {"jupiter": 120.0, "node": 250.0})
+
+
+    def test_provider_simulator_serves_quotes_rpc_and_node_helpers_over_overridden_urls(self):
+        import threading
+        import api.main as main_module
+        from tools.provider_simulator import ProviderSimulator, make_server
+
+        server = make_server(ProviderSimulator(seed=1), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with patch.dict(os.environ, {"PROVIDER_SIMULATOR_URL": base}):
+                quote = main_module._fetch_jupiter_quote(
+                    {
+                        "inputMint": "So11111111111111111111111111111111111111112",
+                        "outputMint": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+                        "amount": "2000000000",
+                        "slippageBps": "50",
+                    }
+                )
+                with patch("api.main.subprocess.run") as run_mock:
+                    helper = main_module._run_node_helper(
+                        Path("tools/orca_whirlpool_quote_research.mjs"),
+                        {
+                            "input_mint": "So11111111111111111111111111111111111111112",
+                            "output_mint": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+                            "amount_raw": "2000000000",
+                        },
+                        timeout=5,
+                    )
+                missing = main_module._run_node_helper(Path("tools/unknown.mjs"), {}, timeout=5)
+            rpc = requests.post(
+                base + "/rpc",
+                json=[
+                    {"jsonrpc": "2.0", "id": 1, "method": "getFeeForMessage", "params": ["AQ=="]},
+                    {"jsonrpc": "2.0", "id": 2, "method": "getSignatureStatuses", "params": [["a", "b"]]},
+                ],
+                timeout=5,
+            ).json()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(quote["inAmount"], "2000000000")
+        self.assertEqual(int(quote["outAmount"]), 170_217_021)
+        run_mock.assert_not_called()
+        self.assertEqual(helper.returncode, 0)
+        self.assertEqual(json.loads(helper.stdout)["in_amount_raw"], "2000000000")
+        self.assertEqual(missing.returncode, 1)
+        self.assertEqual(rpc[0]["result"]["value"], 5000)
+        self.assertEqual(len(rpc[1]["result"]["value"]), 2)
+
+    def test_provider_simulator_latency_specs_and_failure_injection(self):
+        import random
+        from tools.provider_simulator import LatencyDistribution, ProviderSimulator, parse_failure_rates, parse_latency_specs
+
+        specs = parse_latency_specs("jupiter=lognormal:100:0.5,rpc=uniform:10:20,node=5")
+        rng = random.Random(3)
+        samples = [specs["rpc"].sample_ms(rng) for _ in range(200)]
+        self.assertTrue(all(10 <= value <= 20 for value in samples))
+        self.assertEqual(specs["node"].sample_ms(rng), 5.0)
+        with self.assertRaises(ValueError):
+            LatencyDistribution("gamma:1")
+        self.assertEqual(parse_failure_rates("0.5"), {kind: 0.5 for kind in ("jupiter", "raydium", "price", "rpc", "node")})
+
+        simulator = ProviderSimulator(failure_rates=parse_failure_rates("raydium=1.0"), seed=2)
+        self.assertTrue(simulator.inject("raydium"))
+        self.assertFalse(simulator.inject("jupiter"))
+        self.assertEqual(simulator.stats(), {"requests": {"raydium": 1, "jupiter": 1}, "failures": {"raydium": 1}})
+
+
+    def test_quote_coverage_audit_runs_concurrently_and_resumes_from_checkpoint(self):
+        from tools import quote_coverage_audit
+        from tools.audit_scheduler import AuditCheckpoint, ProviderRateLimits
+
+        calls = []
+
+        def fake_quote_universe(universe, *, input_mint, output_mint, amount_raw, user_public_key):
+            calls.append((universe, output_mint))
+            if universe == "Raydium" and output_mint == METEORA_DLMM_BONK_MINT and len(calls) <= 4:
+                return {"ok": False, "error": {"status_code": 429, "detail": "Too Many Requests"}}
+            return {"ok": True, "data": {"outAmount": "1", "data": {"outputAmount": "1"}}}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "coverage.json"
+            with (
+                patch.object(quote_coverage_audit, "UNIVERSES", ["Jupiter", "Raydium"]),
+                patch.object(quote_coverage_audit, "quote_universe", side_effect=fake_quote_universe),
+                patch.object(quote_coverage_audit.time, "sleep") as sleep,
+            ):
+                first = quote_coverage_audit.audit(
+                    ["USDC", "BONK"],
+                    amount=1.0,
+                    user_public_key="wallet",
+                    rate_limits=ProviderRateLimits({"Jupiter": 1000.0, "Raydium": 1000.0}),
+                    concurrency=2,
+                    checkpoint=AuditCheckpoint(path),
+                )
+                second = quote_coverage_audit.audit(
+                    ["USDC", "BONK"],
+                    amount=1.0,
+                    user_public_key="wallet",
+                    rate_limits=ProviderRateLimits({"Jupiter": 1000.0, "Raydium": 1000.0}),
+                    concurrency=2,
+                    checkpoint=AuditCheckpoint(path),
+                )
+            saved = json.loads(path.read_text())
+
+        sleep.assert_not_called()
+        self.assertEqual([pair["pair"] for pair in first["pairs"]], ["SOL->USDC", "SOL->BONK"])
+        self.assertEqual(first["pairs"][1]["universes"][1]["failure_kind"], "unexpected_rate_limited")
+        self.assertEqual(first["checkpoint"]["audited"], 2)
+        # Only the rate-limited pair is audited again.
+        self.assertEqual(second["checkpoint"], {"path": str(path), "reused": 1, "audited": 1})
+        self.assertEqual(len(calls), 6)
+        self.assertEqual(second["pairs"][1]["success_count"], 2)
+        self.assertTrue(all(entry["complete"] for entry in saved["entries"].values()))
+
+    def test_token_bucket_waits_for_refill_and_readiness_audit_reuses_one_session(self):
+        from providers.rate_limiter import TokenBucket
+        from tools import execution_readiness_audit as audit
+
+        now = [100.0]
+        slept = []
+
+        def fake_sleep(seconds):
+            slept.append(round(seconds, 3))
+            now[0] += seconds
+
+        bucket = TokenBucket(2.0, burst=2, clock=lambda: now[0], sleep=fake_sleep)
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertEqual(bucket.wait_time(), 0.5)
+        self.assertTrue(bucket.acquire())
+        self.assertEqual(slept, [0.5])
+        self.assertFalse(bucket.acquire(timeout=0.1))
+        # take() keeps a floor in reserve, as the upstream limiter's priority classes need.
+        now[0] += 10.0
+        self.assertEqual(bucket.take(floor=1.5), 0.25)
+        self.assertEqual(bucket.take(floor=1.0), 0.0)
+
+        class FakeResponse:
+            status_code = 200
+
+            def json(self):
+                return {"ok": True}
+
+        audit.close_session()
+        session = audit.get_session()
+        try:
+            with patch.object(session, "request", return_value=FakeResponse()) as request_mock:
+                first = audit._request_json("GET", "http://127.0.0.1:8000/swap/quote?from_token=SOL")
+                second = audit._request_json("POST", "http://127.0.0.1:8000/swap/execute/prepare", {"provider": "x"})
+            self.assertIs(audit.get_session(), session)
+        finally:
+            audit.close_session()
+
+        self.assertEqual(first, {"ok": True, "status": 200, "data": {"ok": True}})
+        self.assertTrue(second["ok"])
+        self.assertEqual(request_mock.call_args_list[1].kwargs["json"], {"provider": "x"})
+
+    def test_upstream_rate_limiter_reserves_capacity_for_higher_priorities(self):
+        from providers.rate_limiter import (
+            PRIORITY_AUDIT,
+            PRIORITY_BACKGROUND,
+            PRIORITY_EXECUTION,
+            PRIORITY_QUOTE,
+            UpstreamRateLimiter,
+            upstream_priority,
+        )
+
+        now = [1000.0]
+        slept = []
+
+        def fake_sleep(seconds):
+            slept.append(round(seconds, 3))
+            now[0] += seconds
+
+        limiter = UpstreamRateLimiter({"jupiter": (0.25, 10.0)}, clock=lambda: now[0], sleep=fake_sleep)
+        with upstream_priority(PRIORITY_AUDIT):
+            self.assertTrue(all(limiter.acquire("jupiter") for _ in range(3)))
+        self.assertTrue(all(limiter.acquire("jupiter", PRIORITY_BACKGROUND) for _ in range(2)))
+        # Background may not dip below half the burst, so the next call waits for a refill.
+        self.assertTrue(limiter.acquire("jupiter", PRIORITY_BACKGROUND))
+        self.assertEqual(slept, [4.0])
+        self.assertTrue(all(limiter.acquire("jupiter", PRIORITY_QUOTE) for _ in range(3)))
+        self.assertTrue(all(limiter.acquire("jupiter", PRIORITY_EXECUTION) for _ in range(2)))
+        # A quote would wait 12s for a token but only tolerates 3s: shed without sleeping.
+        self.assertFalse(limiter.acquire("jupiter"))
+        self.assertEqual(slept, [4.0])
+        self.assertTrue(limiter.acquire("jupiter", PRIORITY_EXECUTION))
+        self.assertEqual(slept, [4.0, 4.0])
+        # Lower classes defer while a higher class is waiting on the same upstream.
+        now[0] += 100.0
+        limiter._waiting["jupiter"][PRIORITY_EXECUTION] += 1
+        self.assertFalse(limiter.acquire("jupiter", PRIORITY_BACKGROUND))
+        limiter._waiting["jupiter"][PRIORITY_EXECUTION] -= 1
+        self.assertTrue(limiter.acquire("unconfigured"))
+
+        stats = limiter.snapshot()
+        decisions = {(d["priority"], d["outcome"]): d["count"] for d in stats["decisions"]}
+        self.assertEqual(decisions[("audit", "granted")], 3)
+        self.assertEqual(decisions[("background", "waited")], 1)
+        self.assertEqual(decisions[("background", "shed")], 1)
+        self.assertEqual(decisions[("quote", "shed")], 1)
+        self.assertEqual(decisions[("execution", "waited")], 1)
+        self.assertFalse(stats["shared"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "limits.db"
+            shared_now = [50.0]
+            shared_slept = []
+
+            def shared_sleep(seconds):
+                shared_slept.append(round(seconds, 3))
+                shared_now[0] += seconds
+
+            first, second = (
+                UpstreamRateLimiter({"rpc": (1.0, 2.0)}, db_path=db_path, clock=lambda: shared_now[0], sleep=shared_sleep)
+                for _ in range(2)
+            )
+            self.assertTrue(first.acquire("rpc:node.example", PRIORITY_EXECUTION))
+            self.assertTrue(second.acquire("rpc:node.example", PRIORITY_EXECUTION))
+            # The bucket is shared through SQLite, so the first limiter now has to wait too.
+            self.assertTrue(first.acquire("rpc:node.example", PRIORITY_EXECUTION))
+            self.assertEqual(shared_slept, [1.0])
+            self.assertEqual(first.shared_errors + second.shared_errors, 0)
+
+    def test_jupiter_quote_rate_limited_locally_when_upstream_limiter_enabled(self):
+        import providers.rate_limiter as rate_limiter
+        from api import main as api_main
+
+        saved = rate_limiter._UPSTREAM_LIMITER
+        try:
+            rate_limiter._UPSTREAM_LIMITER = None
+            with patch.dict(os.environ, {"UPSTREAM_RATE_LIMITER": "0"}):
+                self.assertTrue(rate_limiter.acquire_upstream("jupiter"))
+                self.assertIsNone(rate_limiter._UPSTREAM_LIMITER)
+
+            env = {"UPSTREAM_RATE_LIMITER": "1", "UPSTREAM_RATE_LIMITS": "jupiter=0.01:1,bogus", "JUP_API_KEY": ""}
+            with patch.dict(os.environ, env), patch("api.main.urllib.request.urlopen") as urlopen:
+                urlopen.return_value.__enter__.return_value.read.return_value = b'{"outAmount": "1"}'
+                self.assertEqual(api_main._fetch_jupiter_quote({"amount": 1}), {"outAmount": "1"})
+                with self.assertRaises(HTTPException) as ctx:
+                    api_main._fetch_jupiter_quote({"amount": 1})
+                self.assertEqual(ctx.exception.status_code, 429)
+                self.assertIn("rate limit", ctx.exception.detail)
+                self.assertEqual(urlopen.call_count, 1)
+
+                snapshot = api_main.debug_rate_limits()
+                self.assertTrue(snapshot["enabled"])
+                self.assertEqual(snapshot["limits"]["jupiter"], {"rate": 0.01, "burst": 1.0})
+        finally:
+            rate_limiter._UPSTREAM_LIMITER = saved
+
+    def test_snapshot_archive_import_twice_is_a_no_op(self):
+        import snapshot_archive
+
+        insert_price_snapshot("2026-01-01T00:00:00+00:00", {"btc": 95000.0, "sol": 150.0}, "usd", db_path=self.db_path)
+        insert_balance_snapshot("2026-01-01T00:00:00+00:00", "val-main", {"sol": 1.5}, db_path=self.db_path)
+        out_dir = Path(self.tmp.name) / "archive"
+        snapshot_archive.export_snapshots(out_dir, fmt="jsonl", db_path=self.db_path)
+
+        fresh_db = Path(self.tmp.name) / "fresh.db"
+        first = snapshot_archive.import_snapshots(out_dir, db_path=fresh_db)
+        second = snapshot_archive.import_snapshots(out_dir, db_path=fresh_db)
+
+        self.assertEqual(first["price_snapshots"], 2)
+        self.assertEqual(first["balance_snapshots"], 1)
+        self.assertEqual(set(second.values()), {0})
+        with open_conn(fresh_db) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM price_snapshots;").fetchone()[0], 2)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM balance_snapshots;").fetchone()[0], 1)
+
+        # Importing leaves the schema and existing rows alone: duplicates already
+        # in the DB stay, and the app can keep writing rows with the same key.
+        with open_conn(self.db_path) as conn, conn:
+            conn.execute(
+                "INSERT INTO price_snapshots (ts, asset, currency, price, source) "
+                "SELECT ts, asset, currency, price, source FROM price_snapshots;"
+            )
+        self.assertEqual(snapshot_archive.import_snapshots(out_dir, db_path=self.db_path)["price_snapshots"], 0)
+        insert_price_snapshot("2026-01-01T00:00:00+00:00", {"btc": 95100.0}, "usd", db_path=fresh_db)
+        with open_conn(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM price_snapshots;").fetchone()[0], 4)
+        with open_conn(fresh_db) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM price_snapshots;").fetchone()[0], 3)
+            indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")]
+        self.assertFalse([name for name in indexes if name.endswith("_import_key")])
+
+    def test_quote_observation_endpoints_read_configured_db_before_first_write(self):
+        from api.main import swap_quote_observations, swap_quote_provider_stats
+
+        empty_db = Path(self.tmp.name) / "observations.db"
+        with patch.dict(os.environ, {"QUOTE_OBSERVATION_DB_PATH": str(empty_db)}):
+            observations = swap_quote_observations(
+                input_mint=None, output_mint=None, provider=None, since=None, until=None, limit=10
+            )
+            stats = swap_quote_provider_stats(input_mint=None, output_mint=None, since=None, until=None)
+
+        self.assertEqual(observations, {"ok": True, "count": 0, "observations": []})
+        self.assertTrue(stats["ok"])
+        self.assertEqual(stats["variants"], {})
+        self.assertTrue(empty_db.exists())
+
+    def test_quote_scheduler_keeps_direct_route_check_and_uses_logged_pair_class(self):
+        import random
+        import sqlite3
+        from datetime import datetime, timezone
+        from api.quote_scheduler import QuoteScheduler
+        from db import QUOTE_OBSERVATION_COLUMNS, insert_quote_observations
+
+        ts = datetime.now(timezone.utc).isoformat()
+        external_mint = "ExternalMint1111111111111111111111111111111"
+        rows = []
+        for i in range(40):
+            for variant_id, is_best in (
+                ("recommended_default", 1),
+                ("broader_search", 0),
+                ("direct_route_check", 0),
+            ):
+                rows.append({
+                    "ts": ts,
+                    "quote_id": f"q{i}",
+                    "network": "solana",
+                    "input_mint": METEORA_DLMM_SOL_MINT,
+                    "output_mint": external_mint,
+                    "variant_id": variant_id,
+                    "ok": 1,
+                    "is_best": is_best,
+                    "is_recommended": is_best,
+                    # plan() saw the resolver's pumpfun tag; the registry knows nothing about this mint.
+                    "pair_class": "pump",
+                })
+        insert_quote_observations(rows, db_path=self.db_path)
+
+        scheduler = QuoteScheduler(db_path=self.db_path, explore_rate=0.0, rng=random.Random(1))
+        pump_plan = scheduler.plan(["recommended_default", "broader_search", "direct_route_check"], pair_class="pump")
+
+        self.assertEqual(pump_plan.skipped_variants(), ["broader_search"])
+        self.assertEqual(pump_plan.decisions["direct_route_check"]["reason"], "always_run")
+        self.assertEqual(scheduler.stats_for_class("meme"), {})
+
+        legacy_db = Path(self.tmp.name) / "legacy.db"
+        with sqlite3.connect(legacy_db) as conn:
+            legacy_columns = ", ".join(c for c in QUOTE_OBSERVATION_COLUMNS if c != "pair_class")
+            conn.execute(f"CREATE TABLE quote_observations (id INTEGER PRIMARY KEY, {legacy_columns});")
+        init_db(db_path=legacy_db)
+        with sqlite3.connect(legacy_db) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(quote_observations);")}
+        self.assertIn("pair_class", columns)
+
+    def test_network_fee_primary_lane_skips_extra_route_queue_and_wait_is_bounded(self):
+        import threading
+        from api.network_fee import NetworkFeeService
+
+        service = NetworkFeeService(max_workers=1, primary_workers=1, result_timeout_seconds=0.05)
+        release = threading.Event()
+        try:
+            blocked_extra = service.submit(release.wait, 5)
+            queued_extra = service.submit(lambda: {"ok": True, "scope": "extra"})
+            primary = service.submit(lambda: {"ok": True, "scope": "primary"}, primary=True)
+
+            self.assertEqual(service.result(primary), {"ok": True, "scope": "primary"})
+            self.assertIsNone(service.result(queued_extra))
+            self.assertTrue(queued_extra.cancelled())
+            self.assertEqual(service.stats()["result_timeouts"], 1)
+        finally:
+            release.set()
+        self.assertTrue(blocked_extra.result(timeout=5))
+
+    def test_swap_status_stream_is_async_and_ends_with_watch_expired(self):
+        import asyncio
+        import inspect
+        from api.main import swap_transaction_status_stream
+        from api.signature_watcher import SignatureWatcher
+
+        self.assertTrue(inspect.iscoroutinefunction(swap_transaction_status_stream))
+        confirmed = {"confirmation_status": "confirmed", "confirmed": True, "err": None}
+        watcher = SignatureWatcher(lambda signatures, rpc_url: {s: confirmed for s in signatures if s == "sig-ok"})
+
+        async def collect(signature, *, push=None):
+            response = await swap_transaction_status_stream(signature)
+            chunks = []
+            async for chunk in response.body_iterator:
+                chunks.append(chunk)
+                if push and len(chunks) == 1:
+                    break
+            if push:
+                await asyncio.get_running_loop().run_in_executor(None, push)
+                async for chunk in response.body_iterator:
+                    chunks.append(chunk)
+            return chunks
+
+        with (
+            patch.dict(os.environ, {"SWAP_SUBMIT_RPC_URL": "https://rpc.example"}),
+            patch("api.main.get_signature_watcher", return_value=watcher),
+            patch("api.main.SWAP_STATUS_STREAM_KEEPALIVE_SECONDS", 0.05),
+            patch.object(watcher, "_ensure_thread_locked"),
+        ):
+            # A pending signature: the watcher thread pushes the change into the event loop.
+            watcher.watch_seconds = 30
+            chunks = asyncio.run(collect("sig-ok", push=watcher.tick))
+            self.assertTrue(chunks[0].startswith(": keep-alive"))
+            self.assertIn("event: status", chunks[-1])
+            self.assertIn('"state":"confirmed"', chunks[-1])
+            self.assertEqual(watcher.stats()["subscribers"], 0)
+
+            # Past the watch window the stream ends with watch_expired, and the
+            # stale pending status is no longer served as a snapshot.
+            watcher.register("sig-slow", "https://rpc.example", status={"confirmation_status": "processed"})
+            watcher.watch_seconds = 0
+            watcher.tick()
+            self.assertIsNone(watcher.snapshot("sig-slow"))
+            chunks = asyncio.run(collect("sig-slow"))
+            self.assertEqual(len(chunks), 1)
+            self.assertIn("event: watch_expired", chunks[0])
+
+    def test_solana_rpc_pool_runs_slow_hedged_calls_on_their_own_executor(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        from providers.solana_rpc_pool import SolanaRpcPool
+
+        pool = SolanaRpcPool(max_workers=2, slow_workers=2)
+        release = threading.Event()
+        started = threading.Barrier(3)
+        urls = {"SOLANA_RPC_POOL_URLS": "https://backup.example"}
+
+        def simulate(url):
+            if url == "https://primary.example" and not release.is_set():
+                started.wait(5)
+                release.wait(5)
+            return {"ok": True, "url": url, "thread": threading.current_thread().name}
+
+        def status(url):
+            return {"ok": True, "url": url, "thread": threading.current_thread().name}
+
+        with patch.dict(os.environ, urls), ThreadPoolExecutor(max_workers=2) as callers:
+            try:
+                # Two long simulations pin both slow workers on the primary.
+                blocked = [
+                    callers.submit(lambda: pool._submit(simulate, "https://primary.example", lambda _result: "ok", slow=True).result())
+                    for _ in range(2)
+                ]
+                started.wait(5)
+                result = pool.call("https://primary.example", status, hedge=True)
+            finally:
+                release.set()
+            for future in blocked:
+                self.assertTrue(future.result(timeout=5)[1]["thread"].startswith("solana-rpc-pool-slow"))
+        self.assertEqual(result["url"], "https://primary.example")
+        self.assertTrue(result["thread"].startswith("solana-rpc-pool_"))
+        with patch.dict(os.environ, urls):
+            slow = pool.call("https://primary.example", simulate, hedge=True, slow=True)
+        self.assertTrue(slow["thread"].startswith("solana-rpc-pool-slow"))
+
+    def test_wallet_price_lookups_only_match_spl_registry_rows(self):
+        from types import SimpleNamespace
+
+        import wallet_helpers
+        from token_registry import SOL_MINT, get_token_index
+
+        # The full index knows native SOL; the wallet price lookups must not.
+        self.assertIsNotNone(get_token_index().by_mint(SOL_MINT))
+        self.assertIsNone(get_token_index(spl_only=True).by_mint(SOL_MINT))
+        self.assertIsNone(wallet_helpers.coingecko_id_for_asset(f"spl:{SOL_MINT}"))
+        self.assertEqual(wallet_helpers.coingecko_id_for_asset("sol"), "solana")
+        self.assertEqual(wallet_helpers.coingecko_id_for_asset("snp500"), "spl:3yr17ZEE6wvCG7e3qD51XsfeSoSSKuCKptVissoopump")
+
+        looked_up = []
+
+        def fake_best_pair(mint, min_liquidity_usd=5_000.0):
+            looked_up.append(mint)
+            return SimpleNamespace(price_usd=1.5)
+
+        with patch("dexscreener.fetch_best_pair_price_usd_solana", side_effect=fake_best_pair), patch.object(wallet_helpers, "acquire_upstream", return_value=False):
+            prices = wallet_helpers.fetch_prices([f"spl:{SOL_MINT}", "snp500"], allow_dexscreener=True)
+
+        self.assertEqual(looked_up, ["3yr17ZEE6wvCG7e3qD51XsfeSoSSKuCKptVissoopump"])
+        self.assertEqual(prices, {"snp500": {"usd": 1.5}})
+
+    def test_provider_simulator_covers_every_host_the_quote_path_contacts(self):
+        import socket
+        import threading
+        from tools.provider_simulator import ProviderSimulator, make_server
+
+        simulator = ProviderSimulator(seed=3)
+        server = make_server(simulator, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        simulator_address = ("127.0.0.1", server.server_address[1])
+        rpc_env = {"SOLANA_MAINNET_RPC_URL", "SOLANA_RPC_URL", "SWAP_PREPARE_RPC_URL", "SWAP_SUBMIT_RPC_URL", "HELIUS_RPC_URL"}
+        env = {key: value for key, value in os.environ.items() if key not in rpc_env}
+        env["PROVIDER_SIMULATOR_URL"] = f"http://127.0.0.1:{simulator_address[1]}"
+        resolved = []
+        contacted = []
+        real_getaddrinfo = socket.getaddrinfo
+        real_connect = socket.socket.connect
+
+        def recording_getaddrinfo(host, *args, **kwargs):
+            resolved.append(host)
+            return real_getaddrinfo(host, *args, **kwargs)
+
+        def recording_connect(sock, address):
+            contacted.append(tuple(address[:2]) if isinstance(address, tuple) else address)
+            return real_connect(sock, address)
+
+        try:
+            with (
+                patch.dict(os.environ, env, clear=True),
+                patch("socket.getaddrinfo", recording_getaddrinfo),
+                patch.object(socket.socket, "connect", recording_connect),
+                patch("api.main.subprocess.run", side_effect=AssertionError("Node helper spawned")),
+            ):
+                response = swap_quote(
+                    from_token="SOL",
+                    to_token="USDC",
+                    amount=1.0,
+                    user_public_key="EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL",
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertTrue(response["ok"])
+        self.assertTrue(contacted)
+        self.assertEqual(set(resolved), {"127.0.0.1"})
+        self.assertEqual(set(contacted), {simulator_address})
+        # The mainnet RPC reads (fee estimate) went to the simulator's /rpc too.
+        self.assertGreater(simulator.stats()["requests"].get("rpc", 0), 0)
+
+    def test_upstream_rate_limiter_shared_take_runs_outside_the_global_lock(self):
+        import threading
+        import time
+
+        import providers.rate_limiter as rate_limiter
+        from providers.rate_limiter import PRIORITY_EXECUTION, UpstreamRateLimiter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "limits.db"
+            limiter = UpstreamRateLimiter({"jupiter": (1.0, 5.0), "raydium": (1.0, 5.0)}, db_path=db_path)
+            self.assertTrue(limiter.acquire("raydium", PRIORITY_EXECUTION))
+
+            # A slow shared take for one upstream must not hold up another upstream.
+            entered = threading.Event()
+            release = threading.Event()
+            real_take = db_module.take_rate_limit_tokens
+
+            def slow_take(upstream, **kwargs):
+                if upstream == "jupiter":
+                    entered.set()
+                    release.wait(5)
+                return real_take(upstream, **kwargs)
+
+            with patch("db.take_rate_limit_tokens", side_effect=slow_take) as take:
+                blocked = threading.Thread(target=limiter.acquire, args=("jupiter", PRIORITY_EXECUTION))
+                blocked.start()
+                try:
+                    self.assertTrue(entered.wait(5))
+                    started = time.monotonic()
+                    self.assertTrue(limiter.acquire("raydium", PRIORITY_EXECUTION))
+                    self.assertLess(time.monotonic() - started, 1.0)
+                    self.assertIsNotNone(limiter.snapshot())
+                finally:
+                    release.set()
+                    blocked.join(5)
+            self.assertEqual(take.call_args.kwargs["timeout"], rate_limiter.SHARED_STORE_TIMEOUT_SECONDS)
+
+            # Another process holding the write lock: fall back after the short timeout.
+            with open_conn(db_path) as holder:
+                holder.execute("BEGIN IMMEDIATE;")
+                started = time.monotonic()
+                self.assertTrue(limiter.acquire("raydium", PRIORITY_EXECUTION))
+                self.assertLess(time.monotonic() - started, 2.0)
+                holder.rollback()
+            self.assertEqual(limiter.shared_errors, 1)
+
+    def test_upstream_rate_limiter_charges_batches_per_request(self):
+        import providers.token_holder_concentration as holders
+        from providers.rate_limiter import PRIORITY_EXECUTION, UpstreamRateLimiter
+
+        now = [0.0]
+        limiter = UpstreamRateLimiter({"rpc": (1.0, 10.0)}, clock=lambda: now[0], sleep=lambda seconds: None)
+        self.assertTrue(limiter.acquire("rpc:node.example", PRIORITY_EXECUTION, cost=4))
+        self.assertTrue(limiter.acquire("rpc:node.example", PRIORITY_EXECUTION, cost=6))
+        self.assertFalse(limiter.acquire("rpc:node.example", PRIORITY_EXECUTION, wait=False))
+        # A batch bigger than the burst is clamped to it rather than never being granted.
+        now[0] += 100.0
+        self.assertTrue(limiter.acquire("rpc:node.example", PRIORITY_EXECUTION, cost=50, wait=False))
+        self.assertFalse(limiter.acquire("rpc:node.example", PRIORITY_EXECUTION, wait=False))
+
+        calls = [("getTokenSupply", [f"mint{index}"], f"mint{index}", "SUPPLY_ERROR") for index in range(3)]
+        with patch.object(holders, "acquire_upstream", return_value=False) as acquire:
+            results = holders._rpc_batch_post("https://rpc.example", calls, timeout=1)
+        self.assertEqual(acquire.call_args.kwargs["cost"], 3)
+        self.assertEqual(len(results), 3)
+
+    def test_signature_watcher_polls_confirmed_signatures_until_finalized_and_prunes(self):
+        import time
+
+        from api.signature_watcher import SignatureWatcher
+
+        statuses = {"sig": {"confirmation_status": "confirmed", "confirmations": 3, "confirmed": True, "err": None}}
+        watcher = SignatureWatcher(lambda signatures, rpc_url: dict(statuses), retain_seconds=0.1)
+        watcher.register("sig", "https://rpc.example", start=False)
+        watcher.tick()
+        self.assertEqual(watcher.snapshot("sig")["confirmations"], 3)
+        self.assertEqual(watcher.stats()["awaiting_finalization"], 1)
+
+        statuses["sig"] = {"confirmation_status": "finalized", "confirmations": None, "confirmed": True, "finalized": True, "err": None}
+        watcher.tick()
+        self.assertTrue(watcher.snapshot("sig", max_age_seconds=0)["finalized"])
+        self.assertEqual(watcher.stats()["awaiting_finalization"], 0)
+
+        # A confirmed signature whose watch ended is no longer refreshed, so its
+        # snapshot ages out and callers fall back to a direct lookup.
+        statuses["late"] = {"confirmation_status": "confirmed", "confirmations": 1, "confirmed": True, "err": None}
+        watcher.retain_seconds = 60
+        watcher.register("late", "https://rpc.example", start=False)
+        watcher.tick()
+        watcher.watch_seconds = 0
+        watcher.tick()
+        self.assertIsNotNone(watcher.snapshot("late", max_age_seconds=0.1))
+        time.sleep(0.15)
+        self.assertIsNone(watcher.snapshot("late", max_age_seconds=0.1))
+        self.assertIsNotNone(watcher.snapshot("late"))
+
+        # Settled and expired entries are pruned on register/snapshot, even with no watcher thread running.
+        watcher.retain_seconds = 0.1
+        self.assertIsNone(watcher.snapshot("sig"))
+        watcher.register("fresh", "https://rpc.example", start=False)
+        self.assertEqual(watcher.stats()["tracked"], 1)
+
+    def test_network_fee_estimate_falls_back_to_flat_signature_fee_without_get_fees(self):
+        from api.chain_head import ChainHeadTracker
+        from api.main import _estimate_swap_network_fee_lamports, _fetch_chain_head
+        from api.network_fee import NetworkFeeService
+
+        payer = "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"
+        instructions = {
+            "swapInstruction": {
+                "programId": "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+                "accounts": [{"pubkey": payer, "isSigner": True, "isWritable": True}],
+                "data": base64.b64encode(b"swap").decode(),
+            },
+        }
+        methods = []
+
+        def fake_rpc(rpc_url, method, params=None):
+            methods.append(method)
+            if method == "getLatestBlockhash":
+                return {"result": {"value": {"blockhash": "11111111111111111111111111111111"}}}
+            if method == "getFeeForMessage":
+                return {"result": {"value": None}}
+            raise AssertionError(method)
+
+        with (
+            patch("api.main.get_network_fee_service", return_value=NetworkFeeService()),
+            patch("api.main.get_chain_head_tracker", return_value=ChainHeadTracker(_fetch_chain_head, background=False)),
+            patch("api.main._fetch_jupiter_swap_instructions", return_value=instructions),
+            patch("api.main._solana_rpc_call", side_effect=fake_rpc),
+        ):
+            result = _estimate_swap_network_fee_lamports(
+                quote_response={"outAmount": "1"}, user_public_key=payer, rpc_url="rpc"
+            )
+
+        self.assertEqual(result["lamports"], 5000)
+        self.assertEqual(result["scope"], "solana_fallback_signature_fee_estimate")
+        self.assertEqual(methods, ["getLatestBlockhash", "getFeeForMessage"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,7 +5,9 @@
 
 from __future__ import annotations
 
-from typing import Dict, TypedDict
+import threading
+from types import MappingProxyType
+from typing import Dict, Mapping, TypedDict
 
 
 class TokenMeta(TypedDict, total=False):
@@ -207,6 +209,136 @@ def _with_mint(mint: str, meta: TokenMeta) -> TokenMeta:
     return out
 
 
+class TokenIndex:
+    """
+    Read-only lookup tables over NATIVE_TOKENS + TOKENS, built once.
+
+    Rows keep registry order (natives first) and are read-only mappings with
+    "mint" and "symbol" filled in. Every key maps to the first row that owns
+    it, matching the old first-match linear scans:
+
+    - by_symbol: upper-case symbol (native keys included)
+    - by_mint: exact mint; by_mint_folded: lower-case mint
+    - by_asset: lower-case asset key
+    - by_spl_alias: "spl:<lower-case mint>"
+    """
+
+    def __init__(self, native_tokens: Mapping[str, TokenMeta], tokens: Mapping[str, TokenMeta]):
+        rows = []
+        for symbol, meta in native_tokens.items():
+            row = dict(meta)
+            row.setdefault("symbol", symbol)
+            row.setdefault("mint", meta.get("mint"))
+            rows.append((symbol.strip().upper(), row))
+        for mint, meta in tokens.items():
+            row = dict(meta)
+            row.setdefault("mint", mint)
+            rows.append((None, row))
+
+        self.signature = _registry_signature(native_tokens, tokens)
+        self.rows: tuple[Mapping, ...] = tuple(MappingProxyType(row) for _key, row in rows)
+        by_symbol: dict[str, int] = {}
+        by_mint: dict[str, int] = {}
+        by_mint_folded: dict[str, int] = {}
+        by_asset: dict[str, int] = {}
+        for position, (native_key, row) in enumerate(rows):
+            symbol = (row.get("symbol") or "").strip().upper()
+            mint = (row.get("mint") or "").strip()
+            asset = (row.get("asset") or "").strip().lower()
+            for key in (native_key, symbol):
+                if key:
+                    by_symbol.setdefault(key, position)
+            if mint:
+                by_mint.setdefault(mint, position)
+                by_mint_folded.setdefault(mint.lower(), position)
+            if asset:
+                by_asset.setdefault(asset, position)
+
+        self._by_symbol = MappingProxyType(by_symbol)
+        self._by_mint = MappingProxyType(by_mint)
+        self._by_mint_folded = MappingProxyType(by_mint_folded)
+        self._by_asset = MappingProxyType(by_asset)
+        self._by_spl_alias = MappingProxyType({f"spl:{mint}": position for mint, position in by_mint_folded.items()})
+
+    def _row(self, table: Mapping[str, int], key: str) -> Mapping | None:
+        position = table.get(key)
+        return None if position is None else self.rows[position]
+
+    def by_symbol(self, symbol: str) -> Mapping | None:
+        return self._row(self._by_symbol, str(symbol or "").strip().upper())
+
+    def by_mint(self, mint: str, *, case_sensitive: bool = True) -> Mapping | None:
+        mint = str(mint or "").strip()
+        if case_sensitive:
+            return self._row(self._by_mint, mint)
+        return self._row(self._by_mint_folded, mint.lower())
+
+    def by_asset(self, asset: str) -> Mapping | None:
+        return self._row(self._by_asset, str(asset or "").strip().lower())
+
+    def by_spl_alias(self, alias: str) -> Mapping | None:
+        return self._row(self._by_spl_alias, str(alias or "").strip().lower())
+
+    def resolve(self, query: str) -> Mapping | None:
+        """
+        Symbol, mint (any case, optional "spl:" prefix) or asset key. When a
+        query hits several rows, the earliest registry row wins, as the
+        linear scan did.
+        """
+        raw = str(query or "").strip()
+        without_spl = raw.split(":", 1)[1] if raw.lower().startswith("spl:") else raw
+        positions = [
+            position
+            for position in (
+                self._by_symbol.get(raw.upper()),
+                self._by_mint_folded.get(without_spl.lower()),
+                self._by_asset.get(without_spl.lower()),
+            )
+            if position is not None
+        ]
+        return self.rows[min(positions)] if positions else None
+
+
+def _registry_signature(native_tokens: Mapping, tokens: Mapping) -> tuple:
+    return (id(native_tokens), len(native_tokens), id(tokens), len(tokens))
+
+
+_TOKEN_INDEX: TokenIndex | None = None
+_SPL_TOKEN_INDEX: TokenIndex | None = None
+_TOKEN_INDEX_LOCK = threading.Lock()
+_NO_NATIVE_TOKENS: Mapping[str, TokenMeta] = MappingProxyType({})
+
+
+def reload_token_index() -> TokenIndex:
+    """Rebuild the indexes after editing NATIVE_TOKENS/TOKENS in place."""
+    global _TOKEN_INDEX, _SPL_TOKEN_INDEX
+    index = TokenIndex(NATIVE_TOKENS, TOKENS)
+    spl_index = TokenIndex(_NO_NATIVE_TOKENS, TOKENS)
+    with _TOKEN_INDEX_LOCK:
+        _TOKEN_INDEX = index
+        _SPL_TOKEN_INDEX = spl_index
+    return index
+
+
+def get_token_index(*, spl_only: bool = False) -> TokenIndex:
+    """
+    Index over NATIVE_TOKENS + TOKENS, or over TOKENS alone with spl_only=True
+    (for lookups that must not match the native SOL/wSOL rows).
+    """
+    # Adding or removing registry entries is picked up automatically; edits to
+    # an existing entry need reload_token_index().
+    index = _TOKEN_INDEX
+    if index is None or index.signature != _registry_signature(NATIVE_TOKENS, TOKENS):
+        index = reload_token_index()
+    if not spl_only:
+        return index
+    spl_index = _SPL_TOKEN_INDEX
+    if spl_index is None or spl_index.signature != _registry_signature(_NO_NATIVE_TOKENS, TOKENS):
+        reload_token_index()
+        spl_index = _SPL_TOKEN_INDEX
+    return spl_index
+
+
 def get_token_meta_by_symbol(symbol: str, *, default_enabled_only: bool = True) -> TokenMeta | None:
     """
     Resolve a curated token by display symbol for swap/quote surfaces.
@@ -218,32 +350,20 @@ def get_token_meta_by_symbol(symbol: str, *, default_enabled_only: bool = True)
     if not wanted:
         return None
 
-    native = NATIVE_TOKENS.get(wanted)
-    if native:
-        if default_enabled_only and not native.get("default_enabled"):
-            return None
-        return _with_mint(native["mint"], native)
-
-    for mint, meta in TOKENS.items():
-        if (meta.get("symbol") or "").strip().upper() != wanted:
-            continue
-        if default_enabled_only and not meta.get("default_enabled"):
-            return None
-        return _with_mint(mint, meta)
-
-    return None
+    meta = get_token_index().by_symbol(wanted)
+    if meta is None:
+        return None
+    if default_enabled_only and not meta.get("default_enabled"):
+        return None
+    return _with_mint(meta["mint"], meta)
 
 
 def default_swap_token_meta_by_symbol() -> Dict[str, TokenMeta]:
     out: Dict[str, TokenMeta] = {}
-    for symbol, meta in NATIVE_TOKENS.items():
-        if meta.get("default_enabled"):
-            out[symbol] = _with_mint(meta["mint"], meta)
-
-    for mint, meta in TOKENS.items():
+    for meta in get_token_index().rows:
         symbol = (meta.get("symbol") or "").strip().upper()
         if symbol and meta.get("default_enabled"):
-            out[symbol] = _with_mint(mint, meta)
+            out[symbol] = _with_mint(meta["mint"], meta)
 
     return out
 
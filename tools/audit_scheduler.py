@@ -0,0 +1,162 @@
+"""
+Shared plumbing for the nightly audits: per-provider token buckets instead
+of fixed sleeps, an order-preserving thread pool, and a JSON checkpoint so
+an interrupted run resumes and a re-run only audits stale entries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+from providers.rate_limiter import TokenBucket
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+CHECKPOINT_VERSION = 1
+DEFAULT_MAX_AGE_HOURS = 20.0
+
+
+class ProviderRateLimits:
+    """
+    One token bucket per provider name. Providers without an explicit rate
+    share default_rate (or are unlimited when it is None).
+    """
+
+    def __init__(self, rates: dict[str, float] | None = None, *, default_rate: float | None = None, burst: float = 1.0):
+        self.default_rate = default_rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {
+            name: TokenBucket(rate, burst) for name, rate in (rates or {}).items() if rate > 0
+        }
+
+    def bucket(self, provider: str) -> TokenBucket | None:
+        with self._lock:
+            bucket = self._buckets.get(provider)
+            if bucket is None and self.default_rate:
+                bucket = self._buckets[provider] = TokenBucket(self.default_rate, self.burst)
+            return bucket
+
+    def acquire(self, provider: str) -> None:
+        bucket = self.bucket(provider)
+        if bucket is not None:
+            bucket.acquire()
+
+    def rates(self) -> dict[str, float]:
+        with self._lock:
+            return {name: bucket.rate for name, bucket in sorted(self._buckets.items())}
+
+
+def parse_rate_limits(value: str) -> dict[str, float]:
+    """"Jupiter=1,Raydium=2.5" -> {"Jupiter": 1.0, "Raydium": 2.5} (requests per second)."""
+    rates: dict[str, float] = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, rate = part.partition("=")
+        try:
+            parsed = float(rate)
+        except ValueError:
+            parsed = -1.0
+        if not sep or not name.strip() or parsed <= 0:
+            raise argparse.ArgumentTypeError(f"Rate limits must use NAME=REQUESTS_PER_SECOND: {part}")
+        rates[name.strip()] = parsed
+    return rates
+
+
+def run_concurrently(items: Iterable[T], fn: Callable[[T], R], *, max_workers: int) -> list[R]:
+    """fn over items on up to max_workers threads; results keep the input order."""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    # One context copy per item so workers keep the caller's upstream priority.
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="audit") as pool:
+        return list(pool.map(lambda context, item: context.run(fn, item), contexts, items))
+
+
+class AuditCheckpoint:
+    """
+    Completed audit entries keyed by a caller-chosen string, saved after
+    every record() with an atomic replace. fresh() returns an entry only if
+    it is complete and younger than max_age_seconds, so re-runs skip work
+    done recently and retry incomplete (e.g. rate-limited) entries.
+    """
+
+    def __init__(self, path: Path, *, max_age_seconds: float = DEFAULT_MAX_AGE_HOURS * 3600, clock=time.time):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self.reused = 0
+        self.recorded = 0
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == CHECKPOINT_VERSION and isinstance(data.get("entries"), dict):
+                self._entries = data["entries"]
+
+    def fresh(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or not entry.get("complete"):
+                return None
+            if self._clock() - float(entry.get("checked_at") or 0) > self.max_age_seconds:
+                return None
+            self.reused += 1
+            return entry.get("result")
+
+    def record(self, key: str, result: Any, *, complete: bool = True) -> None:
+        with self._lock:
+            self._entries[key] = {"checked_at": self._clock(), "complete": bool(complete), "result": result}
+            self.recorded += 1
+            self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": CHECKPOINT_VERSION, "entries": self._entries}, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"path": str(self.path), "reused": self.reused, "audited": self.recorded}
+
+
+def add_scheduler_arguments(parser: argparse.ArgumentParser, *, default_rates: dict[str, float], default_concurrency: int) -> None:
+    defaults = ",".join(f"{name}={rate:g}" for name, rate in default_rates.items())
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=default_concurrency,
+        help=f"Entries audited at the same time. Default: {default_concurrency}",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=parse_rate_limits,
+        default=dict(default_rates),
+        help=f"Per-provider requests per second, NAME=RATE,... Default: {defaults}",
+    )
+    parser.add_argument("--checkpoint", type=Path, help="JSON checkpoint to resume from and update after every entry.")
+    parser.add_argument(
+        "--max-age-hours",
+        type=float,
+        default=DEFAULT_MAX_AGE_HOURS,
+        help=f"Checkpoint entries older than this are re-audited. Default: {DEFAULT_MAX_AGE_HOURS:g}",
+    )
@@ -8,9 +8,12 @@ from __future__ import annotations
 
 import argparse
 import json
+import threading
 from dataclasses import dataclass
 from typing import Any
-from urllib import error, parse, request
+from urllib import parse
+
+import requests
 
 
 DEFAULT_PAIRS = [
@@ -22,6 +25,28 @@ DEFAULT_PAIRS = [
 ]
 
 PREPARE_PROVIDERS = {"jupiter-metis", "raydium-trade-api"}
+REQUEST_TIMEOUT_SECONDS = 30
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """One keep-alive session to the local server for the whole audit run."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+            _SESSION.headers["Accept"] = "application/json"
+        return _SESSION
+
+
+def close_session() -> None:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
 
 
 @dataclass
@@ -57,26 +82,8 @@ def should_check_prepare(args: argparse.Namespace) -> bool:
 
 
 def _request_json(method: str, url: str, payload: dict[str, Any] | None = None) -> dict[str, Any]:
-    body = None
-    headers = {"Accept": "application/json"}
-    if payload is not None:
-        body = json.dumps(payload).encode("utf-8")
-        headers["Content-Type"] = "application/json"
-
-    req = request.Request(url, data=body, headers=headers, method=method)
     try:
-        with request.urlopen(req, timeout=30) as response:
-            return {
-                "ok": 200 <= response.status < 300,
-                "status": response.status,
-                "data": json.loads(response.read().decode("utf-8")),
-            }
-    except error.HTTPError as exc:
-        try:
-            data = json.loads(exc.read().decode("utf-8"))
-        except Exception:
-            data = {"ok": False, "error": {"code": "HTTP_ERROR", "message": str(exc.code)}}
-        return {"ok": False, "status": exc.code, "data": data}
+        response = get_session().request(method, url, json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
     except Exception as exc:
         return {
             "ok": False,
@@ -84,6 +91,17 @@ def _request_json(method: str, url: str, payload: dict[str, Any] | None = None)
             "data": {"ok": False, "error": {"code": "REQUEST_FAILED", "message": str(exc)}},
         }
 
+    ok = 200 <= response.status_code < 300
+    try:
+        data = response.json()
+    except ValueError as exc:
+        if ok:
+            data = {"ok": False, "error": {"code": "REQUEST_FAILED", "message": str(exc)}}
+            ok = False
+        else:
+            data = {"ok": False, "error": {"code": "HTTP_ERROR", "message": str(response.status_code)}}
+    return {"ok": ok, "status": response.status_code, "data": data}
+
 
 def quote_url(server_url: str, pair: AuditPair, amount: float) -> str:
     query = parse.urlencode(
@@ -280,7 +298,10 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
     pairs = build_pairs(args)
-    rows = [audit_pair(args, pair) for pair in pairs]
+    try:
+        rows = [audit_pair(args, pair) for pair in pairs]
+    finally:
+        close_session()
 
     if args.json:
         print(json.dumps({"ok": True, "rows": rows}, indent=2, sort_keys=True))
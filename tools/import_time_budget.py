@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Import-time report and budget check for cold starts.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports the slowest imports, the time spent in this repo's own modules, and
+any modules that must stay lazily loaded but were imported eagerly. Third
+party imports (FastAPI, pydantic, requests) are reported but not budgeted:
+workers need them regardless.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+REPO_PACKAGES = ("api", "providers", "tools")
+REPO_MODULES = ("db", "portfolio", "token_registry", "solana_rpc", "snapshot_archive")
+DEFAULT_MODULE = "api.main"
+# Own-module self time, in milliseconds. api.main's share includes FastAPI
+# route registration; measured at ~100-130 ms, with slack for slow CI machines.
+DEFAULT_REPO_BUDGET_MS = 400.0
+# Loaded on first use only; importing api.main must not pull them in.
+LAZY_MODULES = ("api.ui_page", "api.ui_assets", "snapshot_archive")
+
+
+def is_repo_module(name: str) -> bool:
+    root = name.split(".", 1)[0]
+    return root in REPO_PACKAGES or name in REPO_MODULES
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of {"module", "self_us", "cumulative_us"} from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0].strip())
+            cumulative_us = int(fields[1].strip())
+        except ValueError:
+            continue
+        rows.append({"module": fields[2].strip(), "self_us": self_us, "cumulative_us": cumulative_us})
+    return rows
+
+
+def measure(module: str = DEFAULT_MODULE) -> list[dict]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def summarize(
+    rows: list[dict],
+    *,
+    module: str = DEFAULT_MODULE,
+    repo_budget_ms: float = DEFAULT_REPO_BUDGET_MS,
+    lazy_modules: tuple[str, ...] = LAZY_MODULES,
+    top: int = 15,
+) -> dict:
+    by_name = {row["module"]: row for row in rows}
+    repo_self_ms = sum(row["self_us"] for row in rows if is_repo_module(row["module"])) / 1000
+    eager = [name for name in lazy_modules if name in by_name]
+    total = by_name.get(module, {}).get("cumulative_us", 0) / 1000
+    return {
+        "module": module,
+        "total_ms": round(total, 1),
+        "repo_self_ms": round(repo_self_ms, 1),
+        "repo_budget_ms": repo_budget_ms,
+        "eager_lazy_modules": eager,
+        "ok": repo_self_ms <= repo_budget_ms and not eager,
+        "slowest": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda row: row["self_us"], reverse=True)[:top]
+        ],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check the import-time budget of a module.")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help=f"Module to import. Default: {DEFAULT_MODULE}.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_REPO_BUDGET_MS,
+        help=f"Budget for this repo's own modules. Default: {DEFAULT_REPO_BUDGET_MS:g}.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    result = summarize(measure(args.module), module=args.module, repo_budget_ms=args.budget_ms)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {result['module']}: {result['total_ms']} ms total")
+        print(f"repo modules: {result['repo_self_ms']} ms (budget {result['repo_budget_ms']:g} ms)")
+        if result["eager_lazy_modules"]:
+            print(f"eagerly imported lazy modules: {', '.join(result['eager_lazy_modules'])}")
+        print("\nSlowest imports (self time)")
+        for row in result["slowest"]:
+            print(f"  {row['self_ms']:>8.1f} ms  {row['module']}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
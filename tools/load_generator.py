@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Closed-loop load generator for /swap/quote (or any GET path).
+
+N concurrent users each send a request, wait for the answer and send the
+next one, for a fixed number of requests or a duration. Reports server
+throughput, p50/p95/p99/max latency and status counts. Meant to run against
+an API whose providers point at tools/provider_simulator.py so capacity
+tests do not touch Jupiter or public RPC.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from tools.offline_benchmark import percentile
+
+DEFAULT_TARGET = "http://127.0.0.1:8000"
+DEFAULT_CONCURRENCY = 50
+DEFAULT_REQUESTS = 1000
+DEFAULT_PAIRS = ("SOL:USDC",)
+DEFAULT_AMOUNTS = (0.1, 1.0, 2.5)
+
+
+def build_paths(pairs: tuple[str, ...], amounts: tuple[float, ...]) -> list[str]:
+    paths = []
+    for pair in pairs:
+        from_token, _, to_token = pair.partition(":")
+        for amount in amounts:
+            query = urllib.parse.urlencode({"from_token": from_token, "to_token": to_token, "amount": amount})
+            paths.append(f"/swap/quote?{query}")
+    return paths
+
+
+def run_load(
+    target: str,
+    paths: list[str],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    total_requests: int | None = DEFAULT_REQUESTS,
+    duration_s: float | None = None,
+    timeout: float = 30.0,
+) -> dict:
+    target = target.rstrip("/")
+    cycle = itertools.cycle(paths)
+    lock = threading.Lock()
+    latencies_ms: list[float] = []
+    statuses: Counter[str] = Counter()
+    issued = 0
+    started = time.perf_counter()
+    deadline = started + duration_s if duration_s else None
+
+    def next_path() -> str | None:
+        nonlocal issued
+        with lock:
+            if total_requests is not None and issued >= total_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            issued += 1
+            return next(cycle)
+
+    def user() -> None:
+        while (path := next_path()) is not None:
+            request_started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(target + path, timeout=timeout) as resp:
+                    resp.read()
+                    status = str(resp.status)
+            except urllib.error.HTTPError as e:
+                e.read()
+                status = str(e.code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - request_started) * 1000.0
+            with lock:
+                latencies_ms.append(elapsed_ms)
+                statuses[status] += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="load-user") as pool:
+        for future in [pool.submit(user) for _ in range(max(1, concurrency))]:
+            future.result()
+
+    elapsed = time.perf_counter() - started
+    latencies_ms.sort()
+    completed = len(latencies_ms)
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": completed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(completed / elapsed, 2) if elapsed > 0 else None,
+        "ok_throughput_per_s": round(ok / elapsed, 2) if elapsed > 0 else None,
+        "error_rate": round(1 - ok / completed, 4) if completed else None,
+        "p50_ms": round(percentile(latencies_ms, 0.50), 2),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 2),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 2),
+        "max_ms": round(latencies_ms[-1], 2) if latencies_ms else 0.0,
+        "statuses": dict(statuses),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default=DEFAULT_TARGET, help=f"API base URL (default: {DEFAULT_TARGET})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent users.")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Total requests (ignored with --duration).")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a request count.")
+    parser.add_argument("--pairs", default=",".join(DEFAULT_PAIRS), help="Comma-separated FROM:TO pairs.")
+    parser.add_argument(
+        "--amounts",
+        default=",".join(str(amount) for amount in DEFAULT_AMOUNTS),
+        help="Comma-separated input amounts, rotated so quote caches see a realistic mix.",
+    )
+    parser.add_argument("--path", action="append", default=[], help="Explicit path(s) to request instead of /swap/quote.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    paths = args.path or build_paths(
+        tuple(item.strip() for item in args.pairs.split(",") if item.strip()),
+        tuple(float(item) for item in args.amounts.split(",") if item.strip()),
+    )
+    result = run_load(
+        args.target,
+        paths,
+        concurrency=args.concurrency,
+        total_requests=None if args.duration else args.requests,
+        duration_s=args.duration,
+        timeout=args.timeout,
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"{result['requests']} requests in {result['elapsed_s']}s with {result['concurrency']} users: "
+            f"{result['throughput_per_s']} req/s ({result['ok_throughput_per_s']} ok/s), error rate {result['error_rate']}"
+        )
+        print(f"latency ms p50={result['p50_ms']} p95={result['p95_ms']} p99={result['p99_ms']} max={result['max_ms']}")
+        print(f"statuses: {result['statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -70,6 +70,14 @@ function structuredError(code, message, detail = undefined) {
   return { ok: false, error };
 }
 
+function suppliedBlockhash(request) {
+  // The API passes its tracked chain head when it is fresh; otherwise fetch.
+  const blockhash = typeof request.recent_blockhash === "string" ? request.recent_blockhash.trim() : "";
+  const height = Number(request.last_valid_block_height);
+  if (!blockhash || !Number.isSafeInteger(height) || height <= 0) return null;
+  return { blockhash, lastValidBlockHeight: height };
+}
+
 function parseInput(raw) {
   if (raw.trim().length === 0) {
     return structuredError("EMPTY_STDIN", "Expected Meteora DLMM prepare request JSON on stdin.");
@@ -187,6 +195,7 @@ function validateRequest(request) {
     ok: true,
     value: {
       rpcUrl: request.rpc_url || process.env.SOLANA_RPC_URL || DEFAULT_RPC_URL,
+      latestBlockhash: suppliedBlockhash(request),
       routeShape,
       txVersion,
       slippageBps,
@@ -325,7 +334,7 @@ async function prepareMeteoraDlmmSwap(request) {
     warnings.push("bin_array_bitmap_extension_marked_writable");
   }
 
-  const latestBlockhash = await connection.getLatestBlockhash("confirmed");
+  const latestBlockhash = request.latestBlockhash || await connection.getLatestBlockhash("confirmed");
   const message = new TransactionMessage({
     payerKey: request.userPublicKey.value,
     recentBlockhash: latestBlockhash.blockhash,
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the quote, baseline, decode and portfolio paths.
+
+Replays recorded provider responses from tools/benchmark_fixtures (Jupiter
+and Raydium HTTP, reference prices, Solana JSON-RPC by method and the Node
+quote helpers by script name) with optional artificial latency, so
+swap_quote and friends run their real parsing, normalization and ranking
+code without touching the network. Portfolio scenarios run against
+synthetic SQLite databases of increasing size in a temporary directory.
+
+Reports throughput and p50/p95/p99 per scenario, can store the results as
+a baseline, and compares later runs against it. Any request without a
+fixture fails the call (and is counted as unmatched) instead of going out.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+from unittest.mock import patch
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+FIXTURES_PATH = REPO_ROOT / "tools" / "benchmark_fixtures" / "provider_responses.json"
+DEFAULT_DB_SIZES = (100, 1000, 5000)
+DEFAULT_ITERATIONS = 50
+DEFAULT_MAX_REGRESSION = 0.25
+LATENCY_KINDS = ("jupiter", "raydium", "price", "rpc", "node")
+BENCHMARK_ACCOUNT = "bench"
+BENCHMARK_ASSETS = ("sol", "usdc", "jup", "bonk", "wif")
+
+
+class _HttpResponse:
+    """Enough of http.client.HTTPResponse and requests.Response for the fetchers."""
+
+    def __init__(self, body: Any, status_code: int = 200):
+        self._raw = json.dumps(body).encode("utf-8")
+        self._body = body
+        self.status_code = status_code
+        self.status = status_code
+        self.ok = 200 <= status_code < 300
+        self.text = self._raw.decode("utf-8")
+        self.headers: dict[str, str] = {"content-type": "application/json"}
+
+    def read(self) -> bytes:
+        return self._raw
+
+    def json(self) -> Any:
+        return copy.deepcopy(self._body)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} from offline fixture", response=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+class ReplayTransport:
+    """
+    Serves fixtures in place of urllib/requests/Node helpers. latency_ms maps
+    a fixture kind (jupiter, raydium, price, rpc, node) to a sleep per call.
+    """
+
+    def __init__(self, fixtures: dict, latency_ms: dict[str, float] | None = None):
+        self.http = list(fixtures.get("http") or [])
+        self.node_helpers = dict(fixtures.get("node_helpers") or {})
+        self.rpc = dict(fixtures.get("rpc") or {})
+        self.latency_ms = dict(latency_ms or {})
+        self.calls: Counter[str] = Counter()
+        self.unmatched: Counter[str] = Counter()
+
+    def _delay(self, kind: str) -> None:
+        self.calls[kind] += 1
+        delay = self.latency_ms.get(kind) or 0.0
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _http_fixture(self, url: str) -> dict | None:
+        for entry in self.http:
+            if url.startswith(entry["prefix"]):
+                return entry
+        return None
+
+    def urlopen(self, request, timeout=None, **_kwargs):
+        url = request.full_url if isinstance(request, urllib.request.Request) else str(request)
+        entry = self._http_fixture(url)
+        if entry is None:
+            self.unmatched[url.split("?", 1)[0]] += 1
+            raise urllib.error.URLError(f"offline benchmark: no fixture for {url.split('?', 1)[0]}")
+        self._delay(entry.get("kind") or "http")
+        return _HttpResponse(entry["body"], int(entry.get("status_code") or 200))
+
+    def requests_get(self, url, params=None, **_kwargs):
+        entry = self._http_fixture(str(url))
+        if entry is None:
+            self.unmatched[str(url)] += 1
+            raise requests.ConnectionError(f"offline benchmark: no fixture for {url}")
+        self._delay(entry.get("kind") or "http")
+        return _HttpResponse(entry["body"], int(entry.get("status_code") or 200))
+
+    def _rpc_answer(self, call: dict) -> dict:
+        method = call.get("method")
+        if method not in self.rpc:
+            self.unmatched[f"rpc:{method}"] += 1
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": f"no fixture for {method}"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": copy.deepcopy(self.rpc[method])}
+
+    def requests_post(self, url, json=None, **_kwargs):
+        if isinstance(json, list):
+            self._delay("rpc")
+            return _HttpResponse([self._rpc_answer(call) for call in json])
+        if isinstance(json, dict) and json.get("method"):
+            self._delay("rpc")
+            return _HttpResponse(self._rpc_answer(json))
+        entry = self._http_fixture(str(url))
+        if entry is None:
+            self.unmatched[str(url)] += 1
+            raise requests.ConnectionError(f"offline benchmark: no fixture for {url}")
+        self._delay(entry.get("kind") or "http")
+        return _HttpResponse(entry["body"], int(entry.get("status_code") or 200))
+
+    def run_node_helper(self, helper_path: Path, payload: dict, *, timeout: float):
+        name = Path(helper_path).name
+        if name not in self.node_helpers:
+            self.unmatched[f"node:{name}"] += 1
+            raise FileNotFoundError(f"offline benchmark: no fixture for {name}")
+        self._delay("node")
+        return subprocess.CompletedProcess(["node", str(helper_path)], 0, json.dumps(self.node_helpers[name]), "")
+
+    @contextmanager
+    def installed(self):
+        with ExitStack() as stack:
+            stack.enter_context(patch("urllib.request.urlopen", self.urlopen))
+            stack.enter_context(patch("requests.get", self.requests_get))
+            stack.enter_context(patch("requests.post", self.requests_post))
+            stack.enter_context(patch("api.main._run_node_helper", self.run_node_helper))
+            yield self
+
+
+def load_fixtures(path: Path = FIXTURES_PATH) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[], Any], iterations: int, *, warmup: int = 2) -> dict:
+    for _ in range(max(0, warmup)):
+        fn()
+    samples_ms = []
+    started = time.perf_counter()
+    for _ in range(max(1, iterations)):
+        call_started = time.perf_counter()
+        fn()
+        samples_ms.append((time.perf_counter() - call_started) * 1000.0)
+    elapsed = time.perf_counter() - started
+    samples_ms.sort()
+    return {
+        "iterations": len(samples_ms),
+        "throughput_per_s": round(len(samples_ms) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(percentile(samples_ms, 0.50), 3),
+        "p95_ms": round(percentile(samples_ms, 0.95), 3),
+        "p99_ms": round(percentile(samples_ms, 0.99), 3),
+        "max_ms": round(samples_ms[-1], 3),
+    }
+
+
+def build_synthetic_db(db_path: Path, snapshots: int) -> None:
+    """snapshots balance snapshots (one per 10 minutes) with a price snapshot each, for BENCHMARK_ASSETS."""
+    import db
+
+    db.init_db(db_path)
+    base_prices = {"sol": 85.0, "usdc": 1.0, "jup": 0.9, "bonk": 0.00002, "wif": 1.7}
+    amounts = {"sol": 12.5, "usdc": 2500.0, "jup": 800.0, "bonk": 25_000_000.0, "wif": 300.0}
+    start = datetime.now(timezone.utc) - timedelta(minutes=10 * snapshots)
+    price_rows = []
+    balance_rows = []
+    for index in range(snapshots):
+        ts = (start + timedelta(minutes=10 * index)).isoformat()
+        drift = 1.0 + ((index % 97) - 48) / 1000.0
+        for asset in BENCHMARK_ASSETS:
+            price_rows.append((ts, asset, "usd", base_prices[asset] * drift, "benchmark"))
+            balance_rows.append((ts, BENCHMARK_ACCOUNT, asset, amounts[asset], "benchmark"))
+    with db.open_conn(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO price_snapshots (ts, asset, currency, price, source) VALUES (?, ?, ?, ?, ?);",
+            price_rows,
+        )
+        conn.executemany(
+            "INSERT INTO balance_snapshots (ts, account, asset, amount, source) VALUES (?, ?, ?, ?, ?);",
+            balance_rows,
+        )
+        conn.commit()
+
+
+def _sample_transaction_base64() -> str:
+    from tools.solana_tx_decode_benchmark import build_v0_transaction
+
+    return base64.b64encode(build_v0_transaction()).decode("ascii")
+
+
+def run(
+    *,
+    iterations: int = DEFAULT_ITERATIONS,
+    db_sizes: tuple[int, ...] = DEFAULT_DB_SIZES,
+    latency_ms: dict[str, float] | None = None,
+    fixtures_path: Path = FIXTURES_PATH,
+    only: set[str] | None = None,
+) -> dict:
+    import api.main as main_module
+    import db
+    import portfolio
+    from providers.token_holder_concentration import fetch_token_holder_concentration_batch
+
+    transport = ReplayTransport(load_fixtures(fixtures_path), latency_ms)
+    transaction_base64 = _sample_transaction_base64()
+    holder_mints = [f"{index:032d}" for index in range(8)]
+    scenarios: dict[str, dict] = {}
+
+    def wanted(name: str) -> bool:
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    previous_cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="offline-benchmark-") as tmp, ExitStack() as stack:
+        # db.DB_PATH is relative, so every default-path read and write lands in tmp.
+        os.chdir(tmp)
+        stack.callback(os.chdir, previous_cwd)
+        stack.enter_context(patch.dict(os.environ, {"QUOTE_OBSERVATION_LOG": "0"}))
+        stack.enter_context(transport.installed())
+        db.init_db()
+
+        if wanted("swap_quote"):
+            scenarios["swap_quote"] = measure(
+                lambda: main_module.swap_quote(from_token="SOL", to_token="USDC", amount=1.0),
+                iterations,
+            )
+        if wanted("swap_inline_baseline"):
+            scenarios["swap_inline_baseline"] = measure(
+                lambda: main_module.swap_inline_baseline(from_token="SOL", to_token="USDC", amount=1.0),
+                iterations,
+            )
+        if wanted("decode_transaction"):
+            scenarios["decode_transaction"] = measure(
+                lambda: main_module._decode_solana_transaction_diagnostics(transaction_base64),
+                iterations * 20,
+            )
+        if wanted("holder_concentration_batch"):
+            scenarios["holder_concentration_batch"] = measure(
+                lambda: fetch_token_holder_concentration_batch(holder_mints, "https://rpc.offline", use_cache=False),
+                iterations,
+            )
+
+        for size in db_sizes:
+            if not (wanted(f"portfolio_report_{size}") or wanted(f"portfolio_history_{size}")):
+                continue
+            # compute_portfolio_report reads the default DB_PATH ("wallet.db" in cwd).
+            db_path = Path(tmp) / "wallet.db"
+            db_path.unlink(missing_ok=True)
+            build_synthetic_db(db_path, size)
+            if wanted(f"portfolio_report_{size}"):
+                scenarios[f"portfolio_report_{size}"] = measure(
+                    lambda: portfolio.compute_portfolio_report(BENCHMARK_ACCOUNT, BENCHMARK_ASSETS),
+                    iterations,
+                )
+            if wanted(f"portfolio_history_{size}"):
+                scenarios[f"portfolio_history_{size}"] = measure(
+                    lambda: db.get_portfolio_value_history(
+                        BENCHMARK_ACCOUNT, BENCHMARK_ASSETS, limit=200, db_path=db_path
+                    ),
+                    iterations,
+                )
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "iterations": iterations,
+        "latency_ms": transport.latency_ms,
+        "scenarios": scenarios,
+        "replayed_calls": dict(transport.calls),
+        "unmatched_calls": dict(transport.unmatched),
+    }
+
+
+def compare(current: dict, baseline: dict, *, max_regression: float = DEFAULT_MAX_REGRESSION) -> dict:
+    """Flags scenarios whose p50 or p95 grew by more than max_regression (0.25 = 25%)."""
+    rows = []
+    for name, result in current.get("scenarios", {}).items():
+        base = (baseline.get("scenarios") or {}).get(name)
+        if not base:
+            rows.append({"scenario": name, "status": "new"})
+            continue
+        row = {"scenario": name, "status": "ok"}
+        for key in ("p50_ms", "p95_ms"):
+            before = float(base.get(key) or 0.0)
+            after = float(result.get(key) or 0.0)
+            change = (after - before) / before if before > 0 else 0.0
+            row[f"{key}_change"] = round(change, 3)
+            if change > max_regression:
+                row["status"] = "regressed"
+        rows.append(row)
+    return {
+        "max_regression": max_regression,
+        "regressed": [row["scenario"] for row in rows if row["status"] == "regressed"],
+        "scenarios": rows,
+    }
+
+
+def parse_latency(value: str) -> dict[str, float]:
+    """"jupiter=120,node=300" or a single number for every kind."""
+    value = (value or "").strip()
+    if not value:
+        return {}
+    if "=" not in value:
+        return {kind: float(value) for kind in LATENCY_KINDS}
+    out = {}
+    for part in value.split(","):
+        kind, _, ms = part.partition("=")
+        kind = kind.strip()
+        if kind not in LATENCY_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown latency kind {kind!r}; expected one of {', '.join(LATENCY_KINDS)}")
+        out[kind] = float(ms)
+    return out
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help=f"Calls per scenario (default: {DEFAULT_ITERATIONS})")
+    parser.add_argument(
+        "--db-sizes",
+        default=",".join(str(size) for size in DEFAULT_DB_SIZES),
+        help="Comma-separated snapshot counts for the synthetic portfolio DBs.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        default={},
+        help="Artificial latency in ms, e.g. 'jupiter=120,raydium=80,rpc=30,node=250' or '50' for all.",
+    )
+    parser.add_argument("--only", default="", help="Comma-separated scenario name prefixes to run.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_PATH, help="Provider fixture file.")
+    parser.add_argument("--save-baseline", type=Path, help="Write the results to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare against a stored baseline; exit 1 on regression.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help=f"Allowed p50/p95 growth vs the baseline (default: {DEFAULT_MAX_REGRESSION}).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    db_sizes = tuple(int(size) for size in args.db_sizes.split(",") if size.strip())
+    only = {item.strip() for item in args.only.split(",") if item.strip()} or None
+    results = run(
+        iterations=max(1, args.iterations),
+        db_sizes=db_sizes,
+        latency_ms=args.latency,
+        fixtures_path=args.fixtures,
+        only=only,
+    )
+    comparison = None
+    if args.baseline:
+        comparison = compare(results, load_fixtures(args.baseline), max_regression=args.max_regression)
+        results["comparison"] = comparison
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'scenario':<28} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, item in results["scenarios"].items():
+            print(
+                f"{name:<28} {item['throughput_per_s']:>9} {item['p50_ms']:>9} {item['p95_ms']:>9} {item['p99_ms']:>9}"
+            )
+        if results["unmatched_calls"]:
+            print(f"\nunmatched calls (no fixture): {results['unmatched_calls']}")
+        if comparison:
+            for row in comparison["scenarios"]:
+                if row["status"] != "ok":
+                    print(f"{row['scenario']}: {row['status']} {row}")
+    return 1 if comparison and comparison["regressed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
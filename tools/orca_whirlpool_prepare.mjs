@@ -33,6 +33,13 @@ function structuredError(code, message, details = undefined) {
   return { ok: false, error };
 }
 
+function suppliedBlockhash(request) {
+  const blockhash = typeof request.recent_blockhash === "string" ? request.recent_blockhash.trim() : "";
+  const height = Number(request.last_valid_block_height);
+  if (!blockhash || !Number.isSafeInteger(height) || height <= 0) return null;
+  return { blockhash, lastValidBlockHeight: height };
+}
+
 function safeScalar(value) {
   if (
     value === undefined
@@ -196,6 +203,7 @@ function validateRequest(request) {
       slippage,
       txVersion,
       rpcUrl: request.rpc_url || quote.rpc_url || process.env.SOLANA_RPC_URL || DEFAULT_RPC_URL,
+      latestBlockhash: suppliedBlockhash(request),
     },
   };
 }
@@ -222,8 +230,16 @@ async function prepareOrcaWhirlpoolSwap(request) {
     return structuredError("ORCA_PREPARE_FAILED", "Orca did not return swap instructions.");
   }
 
-  const latestBlockhash = await rpc.getLatestBlockhash().send();
-  const blockhashLifetime = latestBlockhash.value ?? latestBlockhash;
+  let blockhashLifetime;
+  if (request.latestBlockhash) {
+    blockhashLifetime = {
+      blockhash: request.latestBlockhash.blockhash,
+      lastValidBlockHeight: BigInt(request.latestBlockhash.lastValidBlockHeight),
+    };
+  } else {
+    const latestBlockhash = await rpc.getLatestBlockhash().send();
+    blockhashLifetime = latestBlockhash.value ?? latestBlockhash;
+  }
 
   const message = pipe(
     createTransactionMessage({ version: 0 }),
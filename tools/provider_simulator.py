@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the quote providers, for load tests of /swap/quote.
+
+Emulates the Jupiter quote/swap/swap-instructions and price APIs, Raydium
+compute and transaction, CoinGecko simple price, Solana JSON-RPC
+(getLatestBlockhash, getFeeForMessage, simulateTransaction,
+getSignatureStatuses, getTokenAccountsByOwner and the reads the quote path
+makes) and the Node helper protocol (POST /node-helper/<script name>, JSON
+in and out). Each kind of call gets its own latency distribution and
+failure rate. Responses are shaped like tools/benchmark_fixtures with
+amounts scaled to the request.
+
+Point the API at it with:
+
+    PROVIDER_SIMULATOR_URL=http://127.0.0.1:8900 SOLANA_RPC_URL=http://127.0.0.1:8900/rpc \\
+        uvicorn api.main:app
+
+then drive it with tools/load_generator.py.
+
+PROVIDER_SIMULATOR_URL alone also sends the quote path's mainnet RPC reads
+(SOLANA_MAINNET_RPC_URL) to <base>/rpc; SOLANA_RPC_URL covers prepare,
+submit and status. An explicitly set SOLANA_MAINNET_RPC_URL still wins,
+which is why the printed export line sets it as well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import copy
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from tools.offline_benchmark import FIXTURES_PATH, LATENCY_KINDS, load_fixtures
+from tools.solana_tx_decode_benchmark import build_v0_transaction
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8900
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+# mint -> (decimals, usd price); anything else is treated as a 6-decimal $1 token.
+SIMULATED_MINTS = {
+    SOL_MINT: (9, 85.1),
+    USDC_MINT: (6, 0.9999),
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": (6, 1.0),
+}
+# Output haircut per provider so the ranking has something to rank.
+PROVIDER_EDGE = {"jupiter": 1.0, "raydium": 0.9988}
+
+
+class LatencyDistribution:
+    """
+    Parsed from "fixed:MS", "uniform:LO:HI", "normal:MEAN:SD" or
+    "lognormal:MEDIAN:SIGMA" (all milliseconds); a bare number means fixed.
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec.strip() or "fixed:0"
+        parts = self.spec.split(":")
+        if len(parts) == 1:
+            parts = ["fixed", parts[0]]
+        self.kind = parts[0].lower()
+        try:
+            self.params = [float(item) for item in parts[1:]]
+        except ValueError:
+            raise ValueError(f"invalid latency spec {spec!r}") from None
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}.get(self.kind)
+        if expected is None or len(self.params) != expected:
+            raise ValueError(f"invalid latency spec {spec!r}")
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            value = rng.gauss(self.params[0], self.params[1])
+        else:
+            value = rng.lognormvariate(math.log(max(self.params[0], 1e-3)), self.params[1])
+        return max(0.0, value)
+
+
+def _parse_kind_map(value: str, parse) -> dict:
+    out = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, sep, spec = part.partition("=")
+        if not sep:
+            # A bare value applies to every kind.
+            return {name: parse(kind) for name in LATENCY_KINDS}
+        kind = kind.strip()
+        if kind not in LATENCY_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown kind {kind!r}; expected one of {', '.join(LATENCY_KINDS)}")
+        out[kind] = parse(spec)
+    return out
+
+
+def parse_latency_specs(value: str) -> dict[str, LatencyDistribution]:
+    return _parse_kind_map(value, LatencyDistribution)
+
+
+def parse_failure_rates(value: str) -> dict[str, float]:
+    return _parse_kind_map(value, lambda spec: min(1.0, max(0.0, float(spec))))
+
+
+class ProviderSimulator:
+    """Response builders plus per-kind latency/failure injection; thread-safe."""
+
+    def __init__(
+        self,
+        fixtures: dict | None = None,
+        *,
+        latency: dict[str, LatencyDistribution] | None = None,
+        failure_rates: dict[str, float] | None = None,
+        seed: int | None = None,
+    ):
+        fixtures = fixtures if fixtures is not None else load_fixtures()
+        self.http = {entry["kind"]: entry["body"] for entry in fixtures.get("http") or []}
+        self.node_helpers = dict(fixtures.get("node_helpers") or {})
+        self.rpc = dict(fixtures.get("rpc") or {})
+        self.latency = dict(latency or {})
+        self.failure_rates = dict(failure_rates or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+        self.transaction_base64 = base64.b64encode(build_v0_transaction()).decode("ascii")
+
+    def inject(self, kind: str) -> bool:
+        """Sleeps for the kind's latency; True when this call should fail."""
+        with self._lock:
+            self.requests[kind] += 1
+            distribution = self.latency.get(kind)
+            delay_ms = distribution.sample_ms(self._rng) if distribution else 0.0
+            failed = self._rng.random() < self.failure_rates.get(kind, 0.0)
+            if failed:
+                self.failures[kind] += 1
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        return failed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "failures": dict(self.failures)}
+
+    @staticmethod
+    def convert_raw(input_mint: str, output_mint: str, amount_raw: int, edge: float = 1.0) -> int:
+        in_decimals, in_price = SIMULATED_MINTS.get(input_mint, (6, 1.0))
+        out_decimals, out_price = SIMULATED_MINTS.get(output_mint, (6, 1.0))
+        usd = amount_raw / (10**in_decimals) * in_price
+        return max(0, int(usd / out_price * (10**out_decimals) * edge))
+
+    def jupiter_quote(self, query: dict) -> dict:
+        input_mint = query.get("inputMint") or SOL_MINT
+        output_mint = query.get("outputMint") or USDC_MINT
+        amount_raw = int(query.get("amount") or 0)
+        slippage_bps = int(query.get("slippageBps") or 50)
+        out_raw = self.convert_raw(input_mint, output_mint, amount_raw, PROVIDER_EDGE["jupiter"])
+        body = copy.deepcopy(self.http["jupiter"])
+        body.update(
+            {
+                "inputMint": input_mint,
+                "outputMint": output_mint,
+                "inAmount": str(amount_raw),
+                "outAmount": str(out_raw),
+                "otherAmountThreshold": str(out_raw * (10_000 - slippage_bps) // 10_000),
+                "slippageBps": slippage_bps,
+            }
+        )
+        for step in body.get("routePlan") or []:
+            info = step["swapInfo"]
+            share = step.get("percent", 100) / 100
+            info.update(
+                {
+                    "inputMint": input_mint,
+                    "outputMint": output_mint,
+                    "inAmount": str(int(amount_raw * share)),
+                    "outAmount": str(int(out_raw * share)),
+                    "feeMint": input_mint,
+                }
+            )
+        return body
+
+    def jupiter_swap_instructions(self, payload: dict) -> dict:
+        program = {"programId": "ComputeBudget111111111111111111111111111111", "accounts": []}
+        return {
+            "computeBudgetInstructions": [
+                {**program, "data": base64.b64encode(bytes([2]) + (1_400_000).to_bytes(4, "little")).decode()},
+                {**program, "data": base64.b64encode(bytes([3]) + (10_000).to_bytes(8, "little")).decode()},
+            ],
+            "setupInstructions": [],
+            "swapInstruction": {
+                "programId": "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+                "accounts": [{"pubkey": payload.get("userPublicKey") or SOL_MINT, "isSigner": True, "isWritable": True}],
+                "data": base64.b64encode(b"simulated-swap").decode(),
+            },
+            "cleanupInstruction": None,
+            "otherInstructions": [],
+            "addressLookupTableAddresses": [],
+        }
+
+    def jupiter_swap(self, _payload: dict) -> dict:
+        return {
+            "swapTransaction": self.transaction_base64,
+            "lastValidBlockHeight": self.rpc["getLatestBlockhash"]["value"]["lastValidBlockHeight"],
+        }
+
+    def jupiter_prices(self, query: dict) -> dict:
+        ids = [item for item in (query.get("ids") or "").split(",") if item]
+        return {
+            mint: {"usdPrice": SIMULATED_MINTS.get(mint, (6, 1.0))[1], "blockId": 348000000, "decimals": SIMULATED_MINTS.get(mint, (6, 1.0))[0]}
+            for mint in ids
+        }
+
+    def coingecko_prices(self, query: dict) -> dict:
+        body = self.http.get("price") or {}
+        ids = [item for item in (query.get("ids") or "").split(",") if item]
+        fixture = next((entry for entry in body.values() if isinstance(entry, dict) and "usd" in entry), {"usd": 1.0})
+        return {coin: {"usd": fixture["usd"] if coin == "solana" else 1.0, "last_updated_at": int(time.time())} for coin in ids}
+
+    def raydium_compute(self, query: dict) -> dict:
+        input_mint = query.get("inputMint") or SOL_MINT
+        output_mint = query.get("outputMint") or USDC_MINT
+        amount_raw = int(query.get("amount") or 0)
+        slippage_bps = int(query.get("slippageBps") or 50)
+        out_raw = self.convert_raw(input_mint, output_mint, amount_raw, PROVIDER_EDGE["raydium"])
+        body = copy.deepcopy(self.http["raydium"])
+        data = body["data"]
+        data.update(
+            {
+                "inputMint": input_mint,
+                "outputMint": output_mint,
+                "inputAmount": str(amount_raw),
+                "outputAmount": str(out_raw),
+                "otherAmountThreshold": str(out_raw * (10_000 - slippage_bps) // 10_000),
+                "slippageBps": slippage_bps,
+            }
+        )
+        for step in data.get("routePlan") or []:
+            step.update({"inputMint": input_mint, "outputMint": output_mint, "feeMint": input_mint})
+            step["feeAmount"] = str(amount_raw * int(step.get("feeRate") or 0) // 10_000)
+        return body
+
+    def raydium_transaction(self, _payload: dict) -> dict:
+        return {"id": "simulated", "success": True, "version": "V1", "data": [{"transaction": self.transaction_base64}]}
+
+    def node_helper(self, name: str, payload: dict) -> dict | None:
+        body = self.node_helpers.get(name)
+        if body is None:
+            return None
+        body = copy.deepcopy(body)
+        amount_raw = payload.get("amount_raw")
+        input_mint = payload.get("input_mint") or body.get("input_mint")
+        output_mint = payload.get("output_mint") or body.get("output_mint")
+        if body.get("ok") and amount_raw and "out_amount_raw" in body and input_mint and output_mint:
+            fixture_in = int(body.get("in_amount_raw") or 0)
+            edge = int(body["out_amount_raw"]) / self.convert_raw(SOL_MINT, USDC_MINT, fixture_in) if fixture_in else 1.0
+            out_raw = self.convert_raw(input_mint, output_mint, int(amount_raw), edge)
+            body.update(
+                {
+                    "input_mint": input_mint,
+                    "output_mint": output_mint,
+                    "in_amount_raw": str(amount_raw),
+                    "out_amount_raw": str(out_raw),
+                    "min_out_amount_raw": str(out_raw * 995 // 1000),
+                }
+            )
+        return body
+
+    def rpc_result(self, method: str, params: list):
+        context = {"slot": self.rpc.get("getSlot", 348000000)}
+        if method == "getFeeForMessage":
+            return {"context": context, "value": 5000}
+        if method == "simulateTransaction":
+            return {
+                "context": context,
+                "value": {
+                    "err": None,
+                    "logs": ["Program JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4 success"],
+                    "unitsConsumed": 120_000,
+                    "accounts": None,
+                    "returnData": None,
+                },
+            }
+        if method == "getSignatureStatuses":
+            signatures = params[0] if params and isinstance(params[0], list) else []
+            status = {"slot": context["slot"], "confirmations": None, "err": None, "confirmationStatus": "finalized"}
+            return {"context": context, "value": [dict(status) for _ in signatures]}
+        if method == "getTokenAccountsByOwner":
+            mint = (params[1] or {}).get("mint") if len(params) > 1 and isinstance(params[1], dict) else None
+            return {
+                "context": context,
+                "value": [
+                    {
+                        "pubkey": "3emsAVdmGKERbHjmGfQ6oZ1e35dkf5iYcS6U4CPKFVaa",
+                        "account": {
+                            "data": {
+                                "parsed": {
+                                    "info": {
+                                        "mint": mint or USDC_MINT,
+                                        "owner": params[0] if params else None,
+                                        "tokenAmount": {"amount": "2500000000", "decimals": 6, "uiAmountString": "2500"},
+                                    },
+                                    "type": "account",
+                                },
+                                "program": "spl-token",
+                            },
+                            "lamports": 2039280,
+                            "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                        },
+                    }
+                ],
+            }
+        if method == "getBalance":
+            return {"context": context, "value": 12_500_000_000}
+        if method == "getAccountInfo":
+            return {"context": context, "value": None}
+        if method == "getMultipleAccounts":
+            keys = params[0] if params and isinstance(params[0], list) else []
+            return {"context": context, "value": [None for _ in keys]}
+        if method in self.rpc:
+            return copy.deepcopy(self.rpc[method])
+        raise KeyError(method)
+
+    def rpc_answer(self, call: dict) -> dict:
+        method = str(call.get("method") or "")
+        try:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": self.rpc_result(method, list(call.get("params") or []))}
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": f"Method not found: {method}"}}
+
+
+ROUTE_KINDS = {
+    "/swap/v1/quote": "jupiter",
+    "/swap/v1/swap": "jupiter",
+    "/swap/v1/swap-instructions": "jupiter",
+    "/price/v3": "price",
+    "/coingecko/simple/price": "price",
+    "/compute/swap-base-in": "raydium",
+    "/transaction/swap-base-in": "raydium",
+    "/rpc": "rpc",
+}
+
+
+def make_handler(simulator: ProviderSimulator):
+    class SimulatorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):
+            pass
+
+        def _send(self, status: int, body) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _route(self, method: str) -> None:
+            parsed = urllib.parse.urlsplit(self.path)
+            path = parsed.path.rstrip("/") or "/"
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"null") if length else None
+
+            if path == "/simulator/stats":
+                return self._send(200, simulator.stats())
+            if path.startswith("/node-helper/"):
+                kind = "node"
+            else:
+                kind = ROUTE_KINDS.get(path)
+            if kind is None:
+                return self._send(404, {"error": f"no simulated route for {method} {path}"})
+
+            if simulator.inject(kind):
+                if kind == "rpc":
+                    return self._send(429, {"jsonrpc": "2.0", "id": None, "error": {"code": 429, "message": "Too many requests (simulated)"}})
+                return self._send(503, {"error": f"simulated {kind} failure"})
+
+            if kind == "rpc":
+                if isinstance(payload, list):
+                    return self._send(200, [simulator.rpc_answer(call) for call in payload if isinstance(call, dict)])
+                return self._send(200, simulator.rpc_answer(payload or {}))
+            if kind == "node":
+                body = simulator.node_helper(path.rsplit("/", 1)[-1], payload or {})
+                if body is None:
+                    return self._send(404, {"ok": False, "error": {"code": "HELPER_NOT_SIMULATED"}})
+                return self._send(200, body)
+            if path == "/swap/v1/quote":
+                return self._send(200, simulator.jupiter_quote(query))
+            if path == "/swap/v1/swap-instructions":
+                return self._send(200, simulator.jupiter_swap_instructions(payload or {}))
+            if path == "/swap/v1/swap":
+                return self._send(200, simulator.jupiter_swap(payload or {}))
+            if path == "/price/v3":
+                return self._send(200, simulator.jupiter_prices(query))
+            if path == "/coingecko/simple/price":
+                return self._send(200, simulator.coingecko_prices(query))
+            if path == "/compute/swap-base-in":
+                return self._send(200, simulator.raydium_compute(query))
+            return self._send(200, simulator.raydium_transaction(payload or {}))
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+    return SimulatorHandler
+
+
+def make_server(simulator: ProviderSimulator, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(simulator))
+    server.daemon_threads = True
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--latency",
+        type=parse_latency_specs,
+        default={},
+        help="Per-kind latency, e.g. 'jupiter=lognormal:120:0.4,raydium=uniform:60:150,rpc=fixed:25,node=normal:300:80'.",
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=parse_failure_rates,
+        default={},
+        help="Per-kind failure probability, e.g. 'jupiter=0.02,rpc=0.01' (HTTP 503, RPC 429).",
+    )
+    parser.add_argument("--seed", type=int, help="Seed for latency and failure sampling.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_PATH, help="Response templates.")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    simulator = ProviderSimulator(
+        load_fixtures(args.fixtures),
+        latency=args.latency,
+        failure_rates=args.failure_rate,
+        seed=args.seed,
+    )
+    server = make_server(simulator, args.host, args.port)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"provider simulator on {base}", flush=True)
+    print(
+        f"  export PROVIDER_SIMULATOR_URL={base} SOLANA_RPC_URL={base}/rpc SOLANA_MAINNET_RPC_URL={base}/rpc",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(simulator.stats()), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -26,6 +26,13 @@ function structuredError(code, message, detail = undefined) {
   return { ok: false, error };
 }
 
+function suppliedBlockhash(request) {
+  const blockhash = typeof request.recent_blockhash === "string" ? request.recent_blockhash.trim() : "";
+  const height = Number(request.last_valid_block_height);
+  if (!blockhash || !Number.isSafeInteger(height) || height <= 0) return null;
+  return { blockhash, lastValidBlockHeight: height };
+}
+
 function safeScalar(value) {
   if (
     value === undefined
@@ -226,6 +233,7 @@ function validateRequest(request) {
       slippage,
       txVersion,
       rpcUrl: request.rpc_url || quote.rpc_url || process.env.SOLANA_RPC_URL || DEFAULT_RPC_URL,
+      latestBlockhash: suppliedBlockhash(request),
     },
   };
 }
@@ -275,7 +283,7 @@ async function preparePumpSwap(request) {
     return structuredError("PUMPSWAP_PREPARE_FAILED", "PumpSwap did not return swap instructions.");
   }
 
-  const latestBlockhash = await connection.getLatestBlockhash("confirmed");
+  const latestBlockhash = request.latestBlockhash || await connection.getLatestBlockhash("confirmed");
   const message = new TransactionMessage({
     payerKey: request.wallet.value,
     recentBlockhash: latestBlockhash.blockhash,
@@ -21,7 +21,6 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from api.main import (  # noqa: E402
-    SOLANA_MAINNET_RPC_URL,
     _build_meteora_dlmm_quote_payload,
     _build_orca_whirlpool_quote_payload,
     _build_phantom_quote_payload,
@@ -38,11 +37,31 @@ from api.main import (  # noqa: E402
     _try_fetch_raydium_quote,
     to_raw_amount,
 )
+from api.provider_urls import solana_mainnet_rpc_url  # noqa: E402
+from providers.rate_limiter import PRIORITY_AUDIT, upstream_priority  # noqa: E402
+from tools.audit_scheduler import (  # noqa: E402
+    AuditCheckpoint,
+    ProviderRateLimits,
+    add_scheduler_arguments,
+    run_concurrently,
+)
 
 
 DEFAULT_TO_TOKENS = ["USDC", "BONK", "WIF", "POPCAT", "SPX6900", "CHAD", "FIGURE"]
 UNIVERSES = ["Jupiter", "Raydium", "Meteora", "Orca", "Phoenix", "Phantom", "PumpSwap"]
 DEFAULT_USER_PUBLIC_KEY = "EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL"
+# Requests per second per universe. The Node-helper universes share the
+# public RPC, so they stay low; Jupiter's keyless limit is about 1/s.
+DEFAULT_RATE_LIMITS = {
+    "Jupiter": 1.0,
+    "Raydium": 2.0,
+    "Meteora": 0.5,
+    "Orca": 0.5,
+    "Phoenix": 0.5,
+    "Phantom": 1.0,
+    "PumpSwap": 0.5,
+}
+DEFAULT_CONCURRENCY = 4
 
 
 def classify_coverage(success_count: int) -> str:
@@ -168,7 +187,7 @@ def quote_universe(
             output_mint=output_mint,
             amount_raw=amount_raw,
             slippage_bps=50,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=solana_mainnet_rpc_url(),
         )
         return _try_fetch_meteora_dlmm_quote(payload)
 
@@ -178,7 +197,7 @@ def quote_universe(
             output_mint=output_mint,
             amount_raw=amount_raw,
             slippage_bps=50,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=solana_mainnet_rpc_url(),
         )
         return _try_fetch_orca_whirlpool_quote(payload)
 
@@ -188,7 +207,7 @@ def quote_universe(
             output_mint=output_mint,
             amount_raw=amount_raw,
             slippage_bps=50,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=solana_mainnet_rpc_url(),
         )
         return _try_fetch_phoenix_quote(payload)
 
@@ -208,7 +227,7 @@ def quote_universe(
             output_mint=output_mint,
             amount_raw=amount_raw,
             slippage_bps=50,
-            rpc_url=SOLANA_MAINNET_RPC_URL,
+            rpc_url=solana_mainnet_rpc_url(),
             user_public_key=user_public_key,
         )
         return _try_fetch_pumpswap_quote(payload)
@@ -240,16 +259,24 @@ def audit_pair(
     *,
     amount: float,
     user_public_key: str | None,
-    request_delay: float,
+    request_delay: float = 0.0,
+    rate_limits: ProviderRateLimits | None = None,
 ) -> dict:
+    """
+    With rate_limits, every universe is quoted at once and each call waits
+    for its own provider's token bucket; otherwise universes run one after
+    another with request_delay seconds between them.
+    """
     input_meta = _resolve_swap_token_meta(from_symbol)
     output_meta = _resolve_swap_token_meta(to_symbol)
     if not input_meta or not output_meta:
         raise ValueError(f"Unsupported audit pair: {from_symbol} -> {to_symbol}")
 
     amount_raw = to_raw_amount(amount, input_meta["decimals"])
-    universes = []
-    for index, universe in enumerate(UNIVERSES):
+
+    def run_universe(universe: str) -> dict:
+        if rate_limits is not None:
+            rate_limits.acquire(universe)
         result = quote_universe(
             universe,
             input_mint=input_meta["mint"],
@@ -257,9 +284,16 @@ def audit_pair(
             amount_raw=amount_raw,
             user_public_key=user_public_key,
         )
-        universes.append(summarize_result(universe, result))
-        if request_delay > 0 and index < len(UNIVERSES) - 1:
-            time.sleep(request_delay)
+        return summarize_result(universe, result)
+
+    if rate_limits is not None:
+        universes = run_concurrently(UNIVERSES, run_universe, max_workers=len(UNIVERSES))
+    else:
+        universes = []
+        for index, universe in enumerate(UNIVERSES):
+            universes.append(run_universe(universe))
+            if request_delay > 0 and index < len(UNIVERSES) - 1:
+                time.sleep(request_delay)
 
     success_count = sum(1 for item in universes if item["success"])
     return {
@@ -274,38 +308,75 @@ def audit_pair(
     }
 
 
+def pair_checkpoint_key(from_symbol: str, to_symbol: str, amount: float) -> str:
+    return f"{from_symbol}->{to_symbol}@{amount:g}"
+
+
+def is_complete_pair(pair: dict) -> bool:
+    """Rate-limited universes are re-audited on the next run instead of trusted."""
+    return not any(item.get("failure_kind") == "unexpected_rate_limited" for item in pair.get("universes") or [])
+
+
 def audit_pairs(
     pairs_to_audit: list[tuple[str, str]],
     *,
     amount: float,
     user_public_key: str | None,
-    request_delay: float,
+    request_delay: float = 0.0,
+    rate_limits: ProviderRateLimits | None = None,
+    concurrency: int = 1,
+    checkpoint: AuditCheckpoint | None = None,
 ) -> dict:
-    pairs = []
-    for index, (from_symbol, to_symbol) in enumerate(pairs_to_audit):
-        pairs.append(
-            audit_pair(
-                from_symbol.upper().strip(),
-                to_symbol.upper().strip(),
-                amount=amount,
-                user_public_key=user_public_key,
-                request_delay=request_delay,
-            )
+    """
+    request_delay keeps the old serial behaviour. With rate_limits, up to
+    concurrency pairs are audited at once; with a checkpoint, fresh pairs
+    are reused and each finished pair is saved immediately.
+    """
+    normalized = [(from_symbol.upper().strip(), to_symbol.upper().strip()) for from_symbol, to_symbol in pairs_to_audit]
+
+    def run_pair(pair: tuple[str, str]) -> dict:
+        from_symbol, to_symbol = pair
+        key = pair_checkpoint_key(from_symbol, to_symbol, amount)
+        if checkpoint is not None:
+            cached = checkpoint.fresh(key)
+            if cached is not None:
+                return cached
+        result = audit_pair(
+            from_symbol,
+            to_symbol,
+            amount=amount,
+            user_public_key=user_public_key,
+            request_delay=request_delay,
+            rate_limits=rate_limits,
         )
-        if request_delay > 0 and index < len(pairs_to_audit) - 1:
-            time.sleep(request_delay)
-    return {
+        if checkpoint is not None:
+            checkpoint.record(key, result, complete=is_complete_pair(result))
+        return result
+
+    if rate_limits is not None:
+        pairs = run_concurrently(normalized, run_pair, max_workers=concurrency)
+    else:
+        pairs = []
+        for index, pair in enumerate(normalized):
+            pairs.append(run_pair(pair))
+            if request_delay > 0 and index < len(normalized) - 1:
+                time.sleep(request_delay)
+    result = {
         "universes": UNIVERSES,
         "pairs": pairs,
     }
+    if checkpoint is not None:
+        result["checkpoint"] = checkpoint.summary()
+    return result
 
 
-def audit(tokens: list[str], *, amount: float, user_public_key: str | None, request_delay: float) -> dict:
+def audit(tokens: list[str], *, amount: float, user_public_key: str | None, request_delay: float = 0.0, **scheduling) -> dict:
     return audit_pairs(
         [("SOL", token.upper().strip()) for token in tokens],
         amount=amount,
         user_public_key=user_public_key,
         request_delay=request_delay,
+        **scheduling,
     )
 
 
@@ -377,12 +448,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--request-delay",
         type=float,
-        default=0.75,
-        help="Seconds to sleep between quote requests to reduce rate limits. Default: 0.75",
+        default=0.0,
+        help="Legacy serial mode: seconds to sleep between quote requests, ignoring --concurrency and --rate-limit.",
     )
+    add_scheduler_arguments(parser, default_rates=DEFAULT_RATE_LIMITS, default_concurrency=DEFAULT_CONCURRENCY)
     return parser.parse_args()
 
 
+def scheduling_options(args: argparse.Namespace) -> dict:
+    checkpoint = (
+        AuditCheckpoint(args.checkpoint, max_age_seconds=args.max_age_hours * 3600) if args.checkpoint else None
+    )
+    if args.request_delay > 0:
+        return {"request_delay": args.request_delay, "checkpoint": checkpoint}
+    return {
+        "rate_limits": ProviderRateLimits(args.rate_limit),
+        "concurrency": max(1, args.concurrency),
+        "checkpoint": checkpoint,
+    }
+
+
 def main() -> int:
     args = parse_args()
     if args.pairs:
@@ -390,14 +475,14 @@ def main() -> int:
             args.pairs,
             amount=args.amount,
             user_public_key=args.user_public_key,
-            request_delay=args.request_delay,
+            **scheduling_options(args),
         )
     else:
         result = audit(
             args.tokens,
             amount=args.amount,
             user_public_key=args.user_public_key,
-            request_delay=args.request_delay,
+            **scheduling_options(args),
         )
     if args.json:
         print(json.dumps(result, indent=2, sort_keys=True))
@@ -407,4 +492,5 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    with upstream_priority(PRIORITY_AUDIT):
+        raise SystemExit(main())
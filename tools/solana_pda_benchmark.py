@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for PDA / associated-token-account derivation.
+
+Compares api.solana_pda (single-exponentiation on-curve check, LRU-cached
+find_program_address and ATA derivation) against the previous per-bump
+inversion + Legendre check without caching, for a handful of owner/mint
+pairs that repeat the way they do for a connected wallet.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import timeit
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from api.solana_pda import (  # noqa: E402
+    SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID,
+    SOLANA_TOKEN_PROGRAM_ID,
+    clear_pda_cache,
+    derive_associated_token_account,
+    derive_associated_token_accounts,
+    ed25519_is_on_curve,
+)
+from api.solana_tx import decode_pubkey, encode_pubkey  # noqa: E402
+
+OWNERS = [
+    "EUaGMYfk7KFfCn8XPdRNVPNC4pvg3vyGYXovkyuWitUL",
+    "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin",
+]
+MINTS = [
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",
+    "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm",
+    "3yr17ZEE6wvCG7e3qD51XsfeSoSSKuCKptVissoopump",
+]
+
+
+def reference_is_on_curve(compressed: bytes) -> bool:
+    p = 2**255 - 19
+    y = int.from_bytes(compressed, "little") & ((1 << 255) - 1)
+    if y >= p:
+        return False
+    y2 = (y * y) % p
+    u = (y2 - 1) % p
+    d = (-121665 * pow(121666, p - 2, p)) % p
+    v = (d * y2 + 1) % p
+    if v == 0:
+        return False
+    x2 = (u * pow(v, p - 2, p)) % p
+    return pow(x2, (p - 1) // 2, p) == 1 or x2 == 0
+
+
+def reference_derive_ata(owner: str, mint: str) -> str:
+    seeds = [decode_pubkey(owner), decode_pubkey(SOLANA_TOKEN_PROGRAM_ID), decode_pubkey(mint)]
+    program_id = decode_pubkey(SOLANA_ASSOCIATED_TOKEN_PROGRAM_ID)
+    for bump in range(255, -1, -1):
+        digest = hashlib.sha256(b"".join(seeds) + bytes([bump]) + program_id + b"ProgramDerivedAddress").digest()
+        if not reference_is_on_curve(digest):
+            return encode_pubkey(digest)
+    raise ValueError("could not find a valid PDA")
+
+
+def run(iterations: int) -> dict:
+    pairs = [(owner, mint) for owner in OWNERS for mint in MINTS]
+    digests = [hashlib.sha256(bytes([i])).digest() for i in range(64)]
+    for owner, mint in pairs:
+        assert reference_derive_ata(owner, mint) == derive_associated_token_account(owner, mint)
+
+    def best_us(fn, *, setup=None) -> float:
+        samples = []
+        for _ in range(5):
+            if setup:
+                setup()
+            samples.append(timeit.timeit(fn, number=iterations))
+        return round(min(samples) / iterations * 1_000_000, 2)
+
+    def uncached_batch():
+        clear_pda_cache()
+        derive_associated_token_accounts(pairs)
+
+    results = {
+        "on_curve_check_64": {
+            "reference_us": best_us(lambda: [reference_is_on_curve(d) for d in digests]),
+            "current_us": best_us(lambda: [ed25519_is_on_curve(d) for d in digests]),
+        },
+        "derive_8_atas_uncached": {
+            "reference_us": best_us(lambda: [reference_derive_ata(o, m) for o, m in pairs]),
+            "current_us": best_us(uncached_batch),
+        },
+        "derive_8_atas_cached": {
+            "reference_us": best_us(lambda: [reference_derive_ata(o, m) for o, m in pairs]),
+            "current_us": best_us(lambda: derive_associated_token_accounts(pairs), setup=uncached_batch),
+        },
+    }
+    for item in results.values():
+        item["speedup"] = round(item["reference_us"] / max(item["current_us"], 0.01), 2)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per timing sample (default: 200)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run(max(1, args.iterations))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for name, item in results.items():
+        print(
+            f"{name:<24} reference {item['reference_us']:>10}us  current {item['current_us']:>10}us"
+            f"  speedup x{item['speedup']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
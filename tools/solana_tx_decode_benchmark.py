@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the Solana transaction decoder used by swap preflight.
+
+Compares api.solana_tx (chunked base58 codec, cached pubkey encoding, lazy
+memoryview transaction view) against the previous per-character big-int
+codec and eager "encode every account key" parse, on a synthetic Jupiter-like
+v0 transaction with 64 static keys and two address-table lookups.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import timeit
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from api.solana_tx import (  # noqa: E402
+    BASE58_ALPHABET,
+    b58decode,
+    b58encode,
+    decode_transaction_diagnostics,
+    encode_pubkey,
+)
+
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+ATA_PROGRAM_ID = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
+COMPUTE_BUDGET_PROGRAM_ID = "ComputeBudget111111111111111111111111111111"
+JUPITER_PROGRAM_ID = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4"
+
+
+def reference_b58encode(raw: bytes) -> str:
+    if not raw:
+        return ""
+    value = int.from_bytes(raw, "big")
+    encoded = ""
+    while value:
+        value, remainder = divmod(value, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    leading_zeroes = len(raw) - len(raw.lstrip(b"\x00"))
+    return ("1" * leading_zeroes) + encoded
+
+
+def reference_b58decode(value: str) -> bytes:
+    decoded = 0
+    for char in value:
+        if char not in BASE58_ALPHABET:
+            raise ValueError("invalid base58 character")
+        decoded = decoded * 58 + BASE58_ALPHABET.index(char)
+    raw = decoded.to_bytes((decoded.bit_length() + 7) // 8, "big") if decoded else b""
+    leading_zeroes = len(value) - len(value.lstrip("1"))
+    return (b"\x00" * leading_zeroes) + raw
+
+
+def _shortvec(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def build_v0_transaction(*, static_keys: int = 64, instructions: int = 12, seed: int = 7) -> bytes:
+    rng = random.Random(seed)
+    programs = [COMPUTE_BUDGET_PROGRAM_ID, ATA_PROGRAM_ID, TOKEN_PROGRAM_ID, SYSTEM_PROGRAM_ID, JUPITER_PROGRAM_ID]
+    keys = [bytes(rng.getrandbits(8) for _ in range(32)) for _ in range(static_keys - len(programs))]
+    keys += [reference_b58decode(program) for program in programs]
+    program_indexes = list(range(len(keys) - len(programs), len(keys)))
+
+    message = bytearray([0x80, 1, 0, len(programs)])
+    message += _shortvec(len(keys))
+    for key in keys:
+        message += key
+    message += os.urandom(32)
+    message += _shortvec(instructions)
+    for index in range(instructions):
+        program_index = program_indexes[index % len(program_indexes)]
+        accounts = bytes(rng.randrange(0, len(keys) + 20) for _ in range(rng.randrange(4, 24)))
+        data = bytes([2]) + os.urandom(11)
+        message += bytes([program_index]) + _shortvec(len(accounts)) + accounts + _shortvec(len(data)) + data
+    message += _shortvec(2)
+    for _ in range(2):
+        message += os.urandom(32) + _shortvec(10) + bytes(range(10)) + _shortvec(10) + bytes(range(10, 20))
+    return _shortvec(1) + bytes(64) + bytes(message)
+
+
+def reference_decode_all_keys(raw: bytes) -> list[str]:
+    """
+    Lower bound of the previous decoder's cost: it sliced and base58-encoded
+    every static account key before looking at any instruction.
+    """
+    signature_count = raw[0]
+    offset = 1 + signature_count * 64
+    if raw[offset] & 0x80:
+        offset += 1
+    offset += 3
+    account_count = raw[offset]
+    offset += 1
+    keys = []
+    for _ in range(account_count):
+        keys.append(reference_b58encode(raw[offset:offset + 32]))
+        offset += 32
+    return keys
+
+
+def run(iterations: int) -> dict:
+    raw = build_v0_transaction()
+    transaction_base64 = base64.b64encode(raw).decode("ascii")
+    pubkey = os.urandom(32)
+    pubkey_text = reference_b58encode(pubkey)
+
+    def best_us(fn) -> float:
+        timings = timeit.repeat(fn, number=iterations, repeat=5)
+        return round(min(timings) / iterations * 1_000_000, 2)
+
+    results = {
+        "b58encode_32": {
+            "reference_us": best_us(lambda: reference_b58encode(pubkey)),
+            "current_us": best_us(lambda: b58encode(pubkey)),
+            "cached_us": best_us(lambda: encode_pubkey(pubkey)),
+        },
+        "b58decode_32": {
+            "reference_us": best_us(lambda: reference_b58decode(pubkey_text)),
+            "current_us": best_us(lambda: b58decode(pubkey_text)),
+        },
+        "decode_v0_64_keys": {
+            "reference_us": best_us(lambda: reference_decode_all_keys(raw)),
+            "current_us": best_us(lambda: decode_transaction_diagnostics(transaction_base64)),
+        },
+    }
+    for item in results.values():
+        item["speedup"] = round(item["reference_us"] / max(item["current_us"], 0.01), 2)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per timing sample (default: 2000)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run(max(1, args.iterations))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for name, item in results.items():
+        extras = f"  cached {item['cached_us']}us" if "cached_us" in item else ""
+        print(
+            f"{name:<20} reference {item['reference_us']:>9}us  current {item['current_us']:>9}us"
+            f"{extras}  speedup x{item['speedup']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -23,7 +23,15 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from api.main import swap_quote  # noqa: E402
-from providers.token_resolver import resolve_token  # noqa: E402
+from providers.token_holder_concentration import fetch_token_holder_concentration_batch  # noqa: E402
+from providers.rate_limiter import PRIORITY_AUDIT, upstream_priority  # noqa: E402
+from providers.token_resolver import prefetch_mint_decimals, resolve_token  # noqa: E402
+from tools.audit_scheduler import (  # noqa: E402
+    AuditCheckpoint,
+    ProviderRateLimits,
+    add_scheduler_arguments,
+    run_concurrently,
+)
 
 
 UNIVERSES = ["Jupiter", "Raydium", "Meteora", "Orca", "Phoenix", "Phantom", "PumpSwap"]
@@ -47,6 +55,12 @@ VARIANT_UNIVERSE_LABELS = {
     "pumpswap_quote": "PumpSwap",
 }
 LOW_LIQUIDITY_USD = 25_000.0
+# Each swap_quote fans out to every provider, so the audit budgets whole
+# quotes rather than individual providers.
+QUOTE_RATE_LIMIT_KEY = "swap_quote"
+DEFAULT_RATE_LIMITS = {QUOTE_RATE_LIMIT_KEY: 0.5}
+DEFAULT_CONCURRENCY = 2
+RATE_LIMIT_RETRY_SECONDS = 10
 
 
 def classify_pair_coverage(success_count: int) -> str:
@@ -196,10 +210,13 @@ def audit_pair(
     amount: float,
     request_delay: float,
     user_public_key: str | None,
+    rate_limits: ProviderRateLimits | None = None,
 ) -> dict:
     attempts = 0
     while True:
         attempts += 1
+        if rate_limits is not None:
+            rate_limits.acquire(QUOTE_RATE_LIMIT_KEY)
         try:
             response = swap_quote(
                 from_token=from_token,
@@ -227,7 +244,7 @@ def audit_pair(
         except Exception as exc:
             rate_limited = is_rate_limited_error(exc)
             if rate_limited and attempts == 1:
-                time.sleep(10)
+                time.sleep(RATE_LIMIT_RETRY_SECONDS)
                 continue
 
             detail = getattr(exc, "detail", str(exc))
@@ -313,8 +330,15 @@ def audit_mint(
     amount: float,
     request_delay: float,
     user_public_key: str | None = DEFAULT_USER_PUBLIC_KEY,
+    known_decimals: dict[str, dict] | None = None,
+    rate_limits: ProviderRateLimits | None = None,
 ) -> dict:
-    resolved = resolve_token(mint, allow_external=True)
+    """
+    With rate_limits the four standard pairs are quoted at once, each
+    waiting for the shared swap_quote bucket; otherwise they run in order
+    with request_delay seconds between them.
+    """
+    resolved = resolve_token(mint, allow_external=True, known_decimals=known_decimals)
     if resolved.get("ok") is not True:
         return {
             "ok": False,
@@ -337,20 +361,27 @@ def audit_mint(
             "recommendation": recommendation,
         }
 
-    pairs = []
-    for index, (from_token, to_token, label) in enumerate(standard_pairs_for_mint(token.get("mint") or mint)):
-        pairs.append(
-            audit_pair(
-                from_token,
-                to_token,
-                label,
-                amount=amount,
-                request_delay=request_delay,
-                user_public_key=user_public_key,
-            )
+    def run_pair(pair: tuple[str, str, str]) -> dict:
+        from_token, to_token, label = pair
+        return audit_pair(
+            from_token,
+            to_token,
+            label,
+            amount=amount,
+            request_delay=request_delay,
+            user_public_key=user_public_key,
+            rate_limits=rate_limits,
         )
-        if request_delay > 0 and index < 3:
-            time.sleep(request_delay)
+
+    standard_pairs = standard_pairs_for_mint(token.get("mint") or mint)
+    if rate_limits is not None:
+        pairs = run_concurrently(standard_pairs, run_pair, max_workers=len(standard_pairs))
+    else:
+        pairs = []
+        for index, pair in enumerate(standard_pairs):
+            pairs.append(run_pair(pair))
+            if request_delay > 0 and index < len(standard_pairs) - 1:
+                time.sleep(request_delay)
 
     status, recommendation, reasons = classify_promotion(token, pairs)
     return {
@@ -369,24 +400,77 @@ def audit_mints(
     amount: float,
     request_delay: float,
     user_public_key: str | None = DEFAULT_USER_PUBLIC_KEY,
+    holder_concentration: bool = False,
+    rate_limits: ProviderRateLimits | None = None,
+    concurrency: int = 1,
+    checkpoint: AuditCheckpoint | None = None,
 ) -> dict:
-    reports = []
-    for index, mint in enumerate(mints):
-        reports.append(
-            audit_mint(
-                mint,
-                amount=amount,
-                request_delay=request_delay,
-                user_public_key=user_public_key,
-            )
+    # One getMultipleAccounts call per 100 mints instead of a decimals RPC per mint.
+    known_decimals = prefetch_mint_decimals(mints) if len(mints) > 1 else None
+
+    def run_mint(mint: str) -> dict:
+        key = mint_checkpoint_key(mint, amount)
+        if checkpoint is not None:
+            cached = checkpoint.fresh(key)
+            if cached is not None:
+                return cached
+        report = audit_mint(
+            mint,
+            amount=amount,
+            request_delay=request_delay,
+            user_public_key=user_public_key,
+            known_decimals=known_decimals,
+            rate_limits=rate_limits,
         )
-        if request_delay > 0 and index < len(mints) - 1:
-            time.sleep(request_delay)
-    return {
+        if checkpoint is not None:
+            checkpoint.record(key, report, complete=is_complete_report(report))
+        return report
+
+    if rate_limits is not None:
+        reports = run_concurrently(mints, run_mint, max_workers=concurrency)
+    else:
+        reports = []
+        for index, mint in enumerate(mints):
+            reports.append(run_mint(mint))
+            if request_delay > 0 and index < len(mints) - 1:
+                time.sleep(request_delay)
+
+    if holder_concentration:
+        # Supply and largest accounts for every mint in one JSON-RPC batch.
+        holders = fetch_token_holder_concentration_batch(mints).get("results") or {}
+        for mint, report in zip(mints, reports):
+            report["holder_concentration"] = holder_concentration_summary(holders.get((mint or "").strip()))
+
+    result = {
         "ok": True,
         "universes": UNIVERSES,
         "reports": reports,
     }
+    if checkpoint is not None:
+        result["checkpoint"] = checkpoint.summary()
+    return result
+
+
+def mint_checkpoint_key(mint: str, amount: float) -> str:
+    return f"{(mint or '').strip()}@{amount:g}"
+
+
+def is_complete_report(report: dict) -> bool:
+    """Reports with rate-limited pairs are re-audited on the next run."""
+    return not any((pair.get("error") or {}).get("status") == "rate_limited" for pair in report.get("pairs") or [])
+
+
+def holder_concentration_summary(result: dict | None) -> dict:
+    if not isinstance(result, dict) or result.get("ok") is not True:
+        error = (result or {}).get("error") if isinstance(result, dict) else None
+        return {"ok": False, "error_code": (error or {}).get("code") or "TOKEN_HOLDER_CONCENTRATION_UNAVAILABLE"}
+    summary = result.get("summary") or {}
+    return {
+        "ok": True,
+        "top_account_pct": summary.get("top_account_pct"),
+        "top_10_accounts_pct": summary.get("top_10_accounts_pct"),
+        "concentration_level": summary.get("concentration_level"),
+    }
 
 
 def print_text_report(result: dict) -> None:
@@ -407,6 +491,15 @@ def print_text_report(result: dict) -> None:
         print(f"Liquidity USD: {token.get('liquidity_usd')}")
         print(f"Price USD: {token.get('price_usd')}")
         print(f"Warnings: {', '.join(token.get('warnings') or []) or 'none'}")
+        holders = report.get("holder_concentration")
+        if holders:
+            if holders.get("ok"):
+                print(
+                    f"Holder concentration: {holders.get('concentration_level')} "
+                    f"(top account {holders.get('top_account_pct')}%, top 10 {holders.get('top_10_accounts_pct')}%)"
+                )
+            else:
+                print(f"Holder concentration: unavailable ({holders.get('error_code')})")
 
         pairs = report.get("pairs") or []
         if pairs:
@@ -453,25 +546,50 @@ def parse_args() -> argparse.Namespace:
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--mint", help="Single Solana token mint to audit.")
     group.add_argument("--mints", nargs="+", help="One or more Solana token mints to audit.")
-    parser.add_argument("--request-delay", type=float, default=3.0, help="Seconds between quote requests. Default: 3.")
+    parser.add_argument(
+        "--request-delay",
+        type=float,
+        default=0.0,
+        help="Legacy serial mode: seconds between quote requests, ignoring --concurrency and --rate-limit.",
+    )
     parser.add_argument("--amount", type=float, default=1.0, help="Amount to use for each standard pair. Default: 1.")
     parser.add_argument(
         "--user-public-key",
         default=DEFAULT_USER_PUBLIC_KEY,
         help="Wallet public key used for wallet-routing quote previews. Default: deterministic audit wallet.",
     )
+    parser.add_argument(
+        "--holder-concentration",
+        action="store_true",
+        help="Also fetch holder concentration for every mint (one batched RPC request).",
+    )
     parser.add_argument("--json", action="store_true", help="Print machine-readable JSON.")
+    add_scheduler_arguments(parser, default_rates=DEFAULT_RATE_LIMITS, default_concurrency=DEFAULT_CONCURRENCY)
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
     mints = [args.mint] if args.mint else args.mints
+    checkpoint = (
+        AuditCheckpoint(args.checkpoint, max_age_seconds=args.max_age_hours * 3600) if args.checkpoint else None
+    )
+    scheduling = (
+        {"request_delay": args.request_delay}
+        if args.request_delay > 0
+        else {
+            "request_delay": 0.0,
+            "rate_limits": ProviderRateLimits(args.rate_limit),
+            "concurrency": max(1, args.concurrency),
+        }
+    )
     result = audit_mints(
         mints,
         amount=args.amount,
-        request_delay=args.request_delay,
         user_public_key=args.user_public_key,
+        holder_concentration=args.holder_concentration,
+        checkpoint=checkpoint,
+        **scheduling,
     )
     if args.json:
         print(json.dumps(result, indent=2, sort_keys=True))
@@ -481,4 +599,5 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    with upstream_priority(PRIORITY_AUDIT):
+        raise SystemExit(main())
@@ -4,7 +4,8 @@ import json
 
 from datetime import datetime, timezone
 
-from token_registry import TOKENS
+from providers.rate_limiter import acquire_upstream
+from token_registry import get_token_index
 
 COINGECKO_IDS = {"btc": "bitcoin", "eth": "ethereum", "sol": "solana"}
 
@@ -132,7 +133,9 @@ def coingecko_id_for_asset(asset: str) -> str | None:
     Supports:
       - normal keys (btc, eth, sol, usdc) via COINGECKO_IDS
       - asset keys from token_registry (e.g. "bonk", "usdt")
-      - SPL keys like spl:<mint> via token_registry.TOKENS[mint]["coingecko_id"]
+      - SPL keys like spl:<mint> via the token_registry index (coingecko_id)
+
+    Only TOKENS rows are consulted; native SOL is priced through COINGECKO_IDS.
 
     IMPORTANT: SPL mint addresses are case-sensitive. Do NOT lowercase the mint.
     """
@@ -143,19 +146,21 @@ def coingecko_id_for_asset(asset: str) -> str | None:
     if raw_lower in COINGECKO_IDS:
         return COINGECKO_IDS[raw_lower]
 
+    index = get_token_index(spl_only=True)
+
     # asset keys coming from the registry (e.g. "bonk", "usdt", "snp500")
-    for mint, meta in TOKENS.items():
-        if meta.get("asset", "").lower() == raw_lower:
-            cg = meta.get("coingecko_id")
-            if cg:
-                return cg
-            # no CoinGecko id: return canonical SPL key so Dex fallback can use it
-            return f"spl:{mint}"
+    meta = index.by_asset(raw_lower)
+    if meta is not None:
+        cg = meta.get("coingecko_id")
+        if cg:
+            return cg
+        # no CoinGecko id: return canonical SPL key so Dex fallback can use it
+        return f"spl:{meta['mint']}"
 
     # spl:<mint> (keep mint case!)
     if raw_lower.startswith("spl:"):
         mint = raw.split(":", 1)[1]  # <-- preserves original mint case
-        meta = TOKENS.get(mint)
+        meta = index.by_mint(mint)
         if meta:
             return meta.get("coingecko_id")
 
@@ -192,7 +197,8 @@ def fetch_prices(coins, currency="usd", allow_dexscreener: bool = False, min_liq
     # Fetch from CoinGecko (if we have any ids)
     data = {}
     ids_str = ",".join(ids)
-    if ids_str:
+    # A shed request (local rate limit) leaves these assets unpriced, like a failed fetch.
+    if ids_str and acquire_upstream("coingecko"):
         params = {"ids": ids_str, "vs_currencies": currency}
         try:
             r = requests.get(url, params=params, timeout=10)
@@ -222,13 +228,12 @@ def fetch_prices(coins, currency="usd", allow_dexscreener: bool = False, min_liq
     # DexScreener fallback (opt-in, USD-only)
     if allow_dexscreener and currency == "usd":
         try:
-            from token_registry import TOKENS
             from dexscreener import fetch_best_pair_price_usd_solana
         except Exception:
-            TOKENS = {}
             fetch_best_pair_price_usd_solana = None
 
         if fetch_best_pair_price_usd_solana is not None:
+            index = get_token_index(spl_only=True)
             for q in coins:
                 if q in out:
                     continue
@@ -237,26 +242,16 @@ def fetch_prices(coins, currency="usd", allow_dexscreener: bool = False, min_liq
                 if s.lower().startswith("spl:"):
                     mint_in = s.split(":", 1)[1]
                 else:
-                    mint_in = None
-                    for k, meta in TOKENS.items():
-                        if meta.get("asset", "").lower() == s.lower():
-                            mint_in = k
-                            break
-                    if not mint_in:
+                    asset_meta = index.by_asset(s)
+                    if asset_meta is None:
                         continue
+                    mint_in = asset_meta["mint"]
 
                 # Find registry entry (case-insensitive), only if dexscreener=True
-                meta = TOKENS.get(mint_in)
-                canonical_mint = mint_in
-                if meta is None:
-                    for k, v in TOKENS.items():
-                        if k.lower() == mint_in.lower():
-                            meta = v
-                            canonical_mint = k
-                            break
-
+                meta = index.by_mint(mint_in) or index.by_mint(mint_in, case_sensitive=False)
                 if not meta or not meta.get("dexscreener"):
                     continue
+                canonical_mint = meta["mint"]
 
                 pair = fetch_best_pair_price_usd_solana(canonical_mint, min_liquidity_usd=min_liquidity_usd)
                 if pair: